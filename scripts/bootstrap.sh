@@ -9,11 +9,13 @@
 # 3. Launches appropriate MCP servers
 # 4. Opens VS Code with the specified profile
 #
-# Usage: ./bootstrap.sh --profile <profile-name>
+# Usage: ./bootstrap.sh --profile <profile-name> [--trace <file>]
+#        ./bootstrap.sh --non-interactive [--answers <file>] > report.json
 # Available profiles: bash, cicd, docs, infra, python, node
 #
 # Exits non-zero on failure
 
+# shellcheck disable=SC2329  # functions run through trace_span are invoked indirectly
 set -euo pipefail  # Exit on error, undefined variables, and pipe failures
 
 # Colors for output
@@ -35,6 +37,8 @@ log_warn() {
 
 log_error() {
     echo -e "${RED}[ERROR]${NC} $1"
+    # The first error of a run is the one a non-interactive report carries
+    [[ -n "$REPORT_ERROR" ]] || REPORT_ERROR="$1"
 }
 
 log_step() {
@@ -45,6 +49,51 @@ log_success() {
     echo -e "${CYAN}[SUCCESS]${NC} $1"
 }
 
+# Function to get the script directory
+get_script_dir() {
+    local script_path="${BASH_SOURCE[0]}"
+    # Resolve symlinks
+    while [[ -L "$script_path" ]]; do
+        local dir_path
+        dir_path=$(dirname "$script_path")
+        script_path=$(readlink "$script_path")
+        [[ "$script_path" != /* ]] && script_path="$dir_path/$script_path"
+    done
+    dirname "$script_path"
+}
+
+# Tracing helpers (trace_span, trace_process_name, ...) shared by the scripts
+# shellcheck source=lib/trace.sh
+source "$(get_script_dir)/lib/trace.sh"
+
+# Function to start tracing this run into MCP_TRACE_FILE
+# The file is truncated, exported so check-tools.sh and install-mcp-npx.sh
+# append their spans to it, and the whole run is recorded as one span on exit
+start_trace() {
+    if [[ "$MCP_TRACE_FILE" != /* ]]; then
+        MCP_TRACE_FILE="$(pwd)/$MCP_TRACE_FILE"
+    fi
+    if ! : > "$MCP_TRACE_FILE" 2>/dev/null; then
+        log_warn "Cannot write trace file $MCP_TRACE_FILE, tracing disabled"
+        MCP_TRACE_FILE=""
+        return 0
+    fi
+    export MCP_TRACE_FILE
+
+    trace_process_name "bootstrap.sh"
+    trace_clock TRACE_START_US
+    trap finish_trace EXIT
+}
+
+# Function to record the whole bootstrap run as a span (EXIT trap)
+# Usage: finish_trace [exit_status]
+finish_trace() {
+    local status=${1:-$?}
+    local trace_end_us
+    trace_clock trace_end_us
+    trace_event "bootstrap" run "$TRACE_START_US" "$trace_end_us" "$status"
+}
+
 # Function to show usage
 show_usage() {
     cat << EOF
@@ -56,6 +105,18 @@ OPTIONS:
   --profile <name>     Use specific profile (bash, cicd, docs, infra, python, node)
   --interactive        Launch interactive mode with auto-detection and wizard
   --quick              Quick setup with minimal validation (uses Python profile)
+  --monorepo           Detect a profile per top-level directory and generate a
+                       multi-root VS Code workspace (requires python3)
+  --rescan             Ignore the detection index and rescan the whole workspace
+  --trace <file>       Write phase and sub-step timings to <file> (JSON lines of
+                       Chrome trace events; also set via MCP_TRACE_FILE)
+  --non-interactive    Never prompt: take answers from flags or --answers, skip
+                       the npx download test and VS Code launch, and print a
+                       JSON report of the run on stdout (logs go to stderr)
+  --answers <file>     Read answers from <file> ("profile=", "activity=" and
+                       "tools=" lines); implies --non-interactive
+  --activity <name>    Non-interactive answer for the primary activity (a profile)
+  --tools <name>       Non-interactive answer for the tools preference (a profile)
   -h, --help           Show this help message
 
 PROFILES:
@@ -72,11 +133,18 @@ EXAMPLES:
   $0 --profile infra      # Bootstrap Infrastructure development environment
   $0 --interactive        # Launch interactive wizard with auto-detection
   $0 --quick              # Quick setup with Python profile (under 60 seconds)
+  $0 --monorepo           # One profile per subtree in a multi-root workspace
+  $0 --non-interactive    # Detected profile, JSON report on stdout
 
 AUTO-DETECTION:
   When no options are provided, the script will analyze your project structure
   and suggest the most appropriate profile based on detected files and patterns.
   You can accept the suggestion, choose a different profile, or use interactive mode.
+  Results are indexed in .mcp/cache/ so reruns only rescan changed directories.
+  Detection runs in-process in python3 when available (MCP_DETECT_ENGINE=bash
+  forces the shell implementation). While a watcher started with
+  "python3 -m mcp_vscode_workflow.watch start" runs, its results are used
+  without scanning.
 
 EOF
 }
@@ -103,77 +171,604 @@ validate_profile() {
     return 1
 }
 
+# Directories pruned while scanning the workspace (hidden directories such as
+# .git, .venv and .terraform are always pruned)
+SCAN_PRUNE_DIRS=(
+    "node_modules"
+    "bower_components"
+    "venv"
+    "virtualenv"
+    "site-packages"
+    "__pycache__"
+    "vendor"
+    "build"
+    "dist"
+    "target"
+)
+
+# Detection index, relative to the workspace root (rebuilt by --rescan)
+DETECTION_INDEX_PATH=".mcp/cache/detection.index"
+DETECTION_INDEX_VERSION="2"
+# Results published by a running detection watcher (mcp_vscode_workflow.watch)
+DETECTION_STATUS_PATH=".mcp/cache/detection.status"
+RESCAN=false
+
+# Detection engine: workspace detection runs in one python3 process
+# (mcp_vscode_workflow.detect) when available; "bash" forces the shell
+# implementation below, which is also the fallback
+MCP_DETECT_ENGINE="${MCP_DETECT_ENGINE:-}"
+
+# Trace output (--trace); empty disables tracing
+MCP_TRACE_FILE="${MCP_TRACE_FILE:-}"
+TRACE_START_US=""
+
+# Non-interactive mode (--non-interactive or --answers): answers come from flags
+# or an answers file, and a JSON report of the run is written to stdout while
+# logs go to stderr. Reports from check-tools.sh and install-mcp-npx.sh and the
+# run's trace are collected in REPORT_DIR
+NON_INTERACTIVE=false
+ANSWERS_FILE=""
+ANSWER_PROFILE=""
+ANSWER_PROFILE_SOURCE=""
+ANSWER_ACTIVITY=""
+ANSWER_TOOLS=""
+REPORT_VERSION="1"
+REPORT_DIR=""
+REPORT_START_US=""
+REPORT_ERROR=""
+REPORT_VSCODE_OPENED=false
+BOOTSTRAP_PROFILE=""
+DETECTED_PROFILES=()
+DETECTION_CONFIDENCE=""
+DETECTION_RECOMMENDED=""
+
+# Top-level keys of CI/CD pipeline definitions (GitHub Actions, GitLab CI,
+# Azure Pipelines, Bitbucket, CircleCI, Concourse) and pipeline resource kinds
+# (Tekton, Argo Workflows); only the first lines of each YAML file are read
+PIPELINE_YAML_PATTERN='^(jobs|stages|pipelines|workflows|trigger):|^kind:[[:space:]]*(Pipeline|PipelineRun|Workflow|WorkflowTemplate)[[:space:]]*$'
+PIPELINE_YAML_PREFIX_LINES=100
+
+# Workspace scan results, populated once per workspace by scan_workspace
+SCAN_ROOT=""
+SCAN_PY_FILES=0
+SCAN_TF_FILES=0
+SCAN_DOC_FILES=0
+SCAN_YAML_FILES=0
+SCAN_JS_FILES=0
+SCAN_SH_FILES=0
+SCAN_PYTHON_REASONS=()
+SCAN_INFRA_REASONS=()
+SCAN_DOCS_REASONS=()
+SCAN_CICD_REASONS=()
+SCAN_NODE_REASONS=()
+SCAN_BASH_REASONS=()
+# Set when the Python engine scanned the workspace: it scores profiles with
+# the weights in .mcp/roles.json, so recommendations are asked from it too
+SCAN_ENGINE=""
+SCAN_RECOMMENDED=""
+
+# Profile order and weights of the shell fallback scoring; ties go to the
+# earlier profile (the Python engine reads both from .mcp/roles.json)
+RECOMMENDATION_PROFILES=(python infra docs cicd node bash)
+DETECTED_WEIGHT=3
+PRIMARY_ACTIVITY_WEIGHT=2
+TOOLS_PREFERENCE_WEIGHT=1
+
+# Function to record why a profile was detected
+add_detection_reason() {
+    local profile="$1"
+    local reason="$2"
+
+    case $profile in
+        python) SCAN_PYTHON_REASONS+=("$reason");;
+        infra) SCAN_INFRA_REASONS+=("$reason");;
+        docs) SCAN_DOCS_REASONS+=("$reason");;
+        cicd) SCAN_CICD_REASONS+=("$reason");;
+        node) SCAN_NODE_REASONS+=("$reason");;
+        bash) SCAN_BASH_REASONS+=("$reason");;
+    esac
+}
+
+# Function to print the recorded detection reasons for a profile, one per line
+get_detection_reasons() {
+    local profile="$1"
+    local reasons=()
+
+    case $profile in
+        python) reasons=("${SCAN_PYTHON_REASONS[@]:-}");;
+        infra) reasons=("${SCAN_INFRA_REASONS[@]:-}");;
+        docs) reasons=("${SCAN_DOCS_REASONS[@]:-}");;
+        cicd) reasons=("${SCAN_CICD_REASONS[@]:-}");;
+        node) reasons=("${SCAN_NODE_REASONS[@]:-}");;
+        bash) reasons=("${SCAN_BASH_REASONS[@]:-}");;
+    esac
+
+    local reason
+    for reason in "${reasons[@]}"; do
+        [[ -n "$reason" ]] && echo "$reason"
+    done
+    return 0
+}
+
+# Function to build the find arguments shared by full and incremental scans
+# Sets SCAN_PRUNE_ARGS (pruned entries) and SCAN_NAME_ARGS (tracked file types)
+build_scan_args() {
+    SCAN_PRUNE_ARGS=(-name ".*")
+    local dir
+    for dir in "${SCAN_PRUNE_DIRS[@]}"; do
+        SCAN_PRUNE_ARGS+=(-o \( -type d -name "$dir" \))
+    done
+
+    SCAN_NAME_ARGS=(-name "*.py" -o -name "*.tf" -o -name "*.hcl"
+        -o -name "*.md" -o -name "*.rst" -o -name "*.yml" -o -name "*.yaml"
+        -o -name "*.js" -o -name "*.ts" -o -name "*.jsx" -o -name "*.tsx"
+        -o -name "*.sh" -o -name "*.bash")
+}
+
+# Function to walk directory trees, printing "D <dir>" for every directory
+# and "F <file>" for every tracked file
+scan_trees_tagged() {
+    local dir
+    for dir in "$@"; do
+        echo "D $dir"
+    done
+
+    trace_span "find (full walk)" scan find "$@" -mindepth 1 \
+        \( "${SCAN_PRUNE_ARGS[@]}" \) -prune -o \
+        -type d -exec printf 'D %s\n' {} + -o \
+        -type f \( "${SCAN_NAME_ARGS[@]}" \) -exec printf 'F %s\n' {} + 2>/dev/null || true
+}
+
+# Function to list the direct entries of directories, printing "S <subdir>"
+# for every subdirectory and "F <file>" for every tracked file
+scan_dirs_shallow() {
+    trace_span "find (changed directories)" scan find "$@" -mindepth 1 -maxdepth 1 \
+        \( "${SCAN_PRUNE_ARGS[@]}" \) -prune -o \
+        -type d -exec printf 'S %s\n' {} + -o \
+        -type f \( "${SCAN_NAME_ARGS[@]}" \) -exec printf 'F %s\n' {} + 2>/dev/null || true
+}
+
+# Function to merge scan records from stdin into a detection index
+# Index lines: "dir <py> <tf> <doc> <yaml> <js> <sh> <path>" with per-directory
+# (non-recursive) file counts, and "yaml <path>" for every YAML file; the
+# cached pipeline check ("yaml_stat" and "pipeline_yaml" lines) is dropped
+# Input lines: "C <dir>" (rescanned, old counts dropped), "X <dir>" (removed
+# with its subtree), "D <dir>" and "F <file>" as printed by the scanners
+merge_detection_index() {
+    local workspace_root="$1"
+    local old_index="$2"
+
+    awk -v root="$workspace_root" -v old_index="$old_index" -v version="$DETECTION_INDEX_VERSION" '
+        function parent(p) { sub(/\/[^\/]*$/, "", p); return p }
+        function category(p) {
+            if (p ~ /\.py$/) return 1
+            if (p ~ /\.(tf|hcl)$/) return 2
+            if (p ~ /\.(md|rst)$/) return 3
+            if (p ~ /\.ya?ml$/) return 4
+            if (p ~ /\.(js|ts|jsx|tsx)$/) return 5
+            if (p ~ /\.(sh|bash)$/) return 6
+            return 0
+        }
+        function add_dir(p,    k) {
+            if (p in dirs) return
+            dirs[p] = 1
+            for (k = 1; k <= 6; k++) cnt[p, k] = 0
+        }
+        function is_removed(p,    i) {
+            for (i = 1; i <= nremoved; i++) {
+                if (p == removed[i] || index(p, removed[i] "/") == 1) return 1
+            }
+            return 0
+        }
+        BEGIN {
+            while ((getline line < old_index) > 0) {
+                split(line, f, " ")
+                p = line
+                if (f[1] == "dir") {
+                    sub(/^dir [0-9]+ [0-9]+ [0-9]+ [0-9]+ [0-9]+ [0-9]+ /, "", p)
+                    dirs[p] = 1
+                    for (k = 1; k <= 6; k++) cnt[p, k] = f[k + 1]
+                } else if (f[1] == "yaml") {
+                    sub(/^yaml /, "", p)
+                    oldyaml[p] = 1
+                }
+            }
+            close(old_index)
+        }
+        {
+            tag = substr($0, 1, 1)
+            p = substr($0, 3)
+        }
+        tag == "C" { changed[p] = 1; for (k = 1; k <= 6; k++) cnt[p, k] = 0; next }
+        tag == "X" { removed[++nremoved] = p; next }
+        tag == "D" { add_dir(p); next }
+        tag == "F" {
+            c = category(p)
+            if (c == 0) next
+            d = parent(p)
+            add_dir(d)
+            cnt[d, c]++
+            if (c == 4) newyaml[p] = 1
+        }
+        END {
+            print "# bootstrap detection index v" version
+            print "root " root
+            for (p in dirs) {
+                if (is_removed(p)) continue
+                printf "dir %d %d %d %d %d %d %s\n", cnt[p, 1], cnt[p, 2], cnt[p, 3], cnt[p, 4], cnt[p, 5], cnt[p, 6], p
+            }
+            for (p in oldyaml) {
+                if ((parent(p) in changed) || is_removed(p) || (p in newyaml)) continue
+                print "yaml " p
+            }
+            for (p in newyaml) print "yaml " p
+        }
+    '
+}
+
+# Function to bring the detection index up to date for a workspace
+# Only directories whose mtime is newer than the last scan are rescanned:
+# their direct entries are re-listed, new subdirectories are walked and
+# removed subdirectories are dropped together with their subtrees
+update_detection_index() {
+    local workspace_root="$1"
+    local index_file="$2"
+    local work_dir="$3"
+    local stamp_file="$index_file.stamp"
+
+    build_scan_args
+
+    # Record the scan start time before touching the tree so that changes
+    # made while scanning are picked up by the next run
+    touch "$work_dir/stamp"
+
+    local header="# bootstrap detection index v$DETECTION_INDEX_VERSION"
+    if [[ "$RESCAN" == true ]] || [[ ! -f "$index_file" ]] || [[ ! -f "$stamp_file" ]] || \
+       [[ "$(head -1 "$index_file")" != "$header" ]] || \
+       [[ "$(sed -n 2p "$index_file")" != "root $workspace_root" ]]; then
+        scan_trees_tagged "$workspace_root" | \
+            merge_detection_index "$workspace_root" /dev/null > "$work_dir/index"
+    else
+        # Stat every indexed directory (no directory reads) to find changes
+        # shellcheck disable=SC2016  # $0/$@ belong to the inner sh
+        awk '/^dir / { sub(/^dir [0-9]+ [0-9]+ [0-9]+ [0-9]+ [0-9]+ [0-9]+ /, ""); print }' "$index_file" | \
+            tr '\n' '\0' | \
+            trace_span "find (stat indexed directories)" scan \
+            xargs -0 sh -c 'exec find "$@" -maxdepth 0 -newer "$0" -print' "$stamp_file" \
+            > "$work_dir/changed" 2>/dev/null || true
+
+        if [[ ! -s "$work_dir/changed" ]]; then
+            return 0
+        fi
+
+        local changed_dirs=()
+        local dir
+        while IFS= read -r dir; do
+            changed_dirs+=("$dir")
+        done < "$work_dir/changed"
+        scan_dirs_shallow "${changed_dirs[@]}" > "$work_dir/shallow"
+
+        # New subdirectories need a full walk; vanished ones are dropped
+        { awk '{ print "C " $0 }' "$work_dir/changed"; awk '/^S /' "$work_dir/shallow"; } | \
+            awk -v old_index="$index_file" '
+                function parent(p) { sub(/\/[^\/]*$/, "", p); return p }
+                BEGIN {
+                    while ((getline line < old_index) > 0) {
+                        if (line !~ /^dir /) continue
+                        sub(/^dir [0-9]+ [0-9]+ [0-9]+ [0-9]+ [0-9]+ [0-9]+ /, "", line)
+                        dirs[line] = 1
+                    }
+                    close(old_index)
+                }
+                { p = substr($0, 3) }
+                /^C / { changed[p] = 1; next }
+                /^S / { seen[p] = 1; if (!(p in dirs)) print "N " p }
+                END {
+                    for (p in dirs) {
+                        if ((parent(p) in changed) && !(p in seen)) print "X " p
+                    }
+                }
+            ' > "$work_dir/plan"
+
+        local new_dirs=()
+        while IFS= read -r dir; do
+            new_dirs+=("${dir#N }")
+        done < <(awk '/^N /' "$work_dir/plan")
+
+        {
+            awk '{ print "C " $0 }' "$work_dir/changed"
+            awk '/^X /' "$work_dir/plan"
+            awk '/^F /' "$work_dir/shallow"
+            if [[ ${#new_dirs[@]} -gt 0 ]]; then
+                scan_trees_tagged "${new_dirs[@]}"
+            fi
+        } | merge_detection_index "$workspace_root" "$index_file" > "$work_dir/index"
+    fi
+
+    mv "$work_dir/index" "$index_file"
+    mv "$work_dir/stamp" "$stamp_file"
+}
+
+# Function to print workspace file counts from the detection index
+# Prints: <py> <tf/hcl> <md/rst> <yml/yaml> <js/ts> <sh/bash> <pipeline-yaml>
+# where <pipeline-yaml> is the cached pipeline file path, "none" when no
+# pipeline file was found, or "unknown" when the YAML files were not checked
+# YAML file paths are written to the file given as the second argument, and
+# the sizes and mtimes they had when the pipeline was looked for to the third
+summarize_detection_index() {
+    local index_file="$1"
+    local yaml_list="$2"
+    local yaml_stats="$3"
+
+    awk -v yaml_list="$yaml_list" -v yaml_stats="$yaml_stats" '
+        BEGIN { printf "" > yaml_stats }
+        /^dir / { for (k = 1; k <= 6; k++) total[k] += $(k + 1); next }
+        /^yaml / { p = $0; sub(/^yaml /, "", p); print p > yaml_list; next }
+        /^yaml_stat / { print substr($0, 11) > yaml_stats; next }
+        /^pipeline_yaml / { pipeline_yaml = substr($0, 15) }
+        END {
+            printf "%d %d %d %d %d %d %s\n", total[1], total[2], total[3], total[4], total[5], total[6], (pipeline_yaml == "" ? "unknown" : pipeline_yaml)
+        }
+    ' "$index_file"
+}
+
+# Function to print the first YAML file that looks like a CI/CD pipeline
+# Only a bounded prefix of each file is read, likely pipeline file names are
+# checked first and the search stops at the first match
+find_pipeline_yaml() {
+    local yaml_list="$1"
+
+    # shellcheck disable=SC2016  # awk programs, not shell expansions
+    awk '
+        {
+            name = $0
+            sub(/.*\//, "", name)
+            if (name ~ /(ci|cd|pipeline|workflow|build|deploy|release)/) print
+            else others[++n] = $0
+        }
+        END { for (i = 1; i <= n; i++) print others[i] }
+    ' "$yaml_list" | tr '\n' '\0' | \
+        xargs -0 awk -v max_lines="$PIPELINE_YAML_PREFIX_LINES" -v pattern="$PIPELINE_YAML_PATTERN" '
+            FNR > max_lines { nextfile }
+            $0 ~ pattern { print FILENAME; exit 255 }
+        ' 2>/dev/null || true
+}
+
+# Function to print "<size> <mtime> <path>" for every file listed in a file,
+# sorted by path; files that no longer exist are left out
+stat_yaml_files() {
+    local yaml_list="$1"
+
+    # GNU stat takes -c, BSD stat -f
+    local format=(-c '%s %Y %n')
+    stat -c '%s' / >/dev/null 2>&1 || format=(-f '%z %m %N')
+    LC_ALL=C sort "$yaml_list" | tr '\n' '\0' | \
+        { xargs -0 stat "${format[@]}" 2>/dev/null || true; }
+}
+
+# Function to run the Python detection engine with the repository's roles.json
+# Prints its bootstrap-format output; returns non-zero if it cannot run
+run_detection_engine() {
+    if ! command -v python3 >/dev/null 2>&1; then
+        return 1
+    fi
+
+    local script_dir
+    script_dir="$(get_script_dir)"
+    PYTHONPATH="$script_dir/../src${PYTHONPATH:+:$PYTHONPATH}" \
+        python3 -m mcp_vscode_workflow.detect --format bootstrap \
+        --roles "$script_dir/../.mcp/roles.json" "$@" 2>/dev/null
+}
+
+# Function to load detection results in the Python engine's bootstrap format
+load_detection_output() {
+    local output="$1"
+
+    SCAN_PYTHON_REASONS=()
+    SCAN_INFRA_REASONS=()
+    SCAN_DOCS_REASONS=()
+    SCAN_CICD_REASONS=()
+    SCAN_NODE_REASONS=()
+    SCAN_BASH_REASONS=()
+
+    local key profile reason
+    while read -r key profile reason; do
+        case $key in
+            reason) add_detection_reason "$profile" "$reason";;
+            recommended) SCAN_RECOMMENDED="$profile";;
+        esac
+    done <<< "$output"
+    SCAN_ENGINE="python"
+}
+
+# Function to run the Python detection engine and load its detection reasons
+# Returns non-zero (leaving the scan results untouched) if it cannot run
+scan_workspace_python() {
+    local workspace_root="$1"
+
+    local args=()
+    [[ "$RESCAN" == true ]] && args+=(--rescan)
+
+    local output
+    output=$(run_detection_engine ${args[@]+"${args[@]}"} "$workspace_root") || return 1
+    load_detection_output "$output"
+}
+
+# Function to load the detection results published by a running watcher
+# (python -m mcp_vscode_workflow.watch); returns non-zero if none is running
+load_watcher_status() {
+    local workspace_root="$1"
+    local status_file="$workspace_root/$DETECTION_STATUS_PATH"
+
+    [[ -f "$status_file" ]] || return 1
+
+    local key pid root
+    read -r key pid root < "$status_file" || return 1
+    if [[ "$key" != "watcher" ]] || [[ "$root" != "$workspace_root" ]] || \
+       ! kill -0 "$pid" 2>/dev/null; then
+        return 1
+    fi
+
+    load_detection_output "$(tail -n +2 "$status_file")"
+}
+
+# Function to scan the workspace once and record every profile signal
+# Results are kept in the SCAN_* globals so detection and reasoning share them
+scan_workspace() {
+    local workspace_root="$1"
+
+    # Already scanned (e.g. inherited by a command substitution subshell)
+    if [[ "$SCAN_ROOT" == "$workspace_root" ]]; then
+        return 0
+    fi
+
+    # A running watcher has the current results already
+    if [[ "$MCP_DETECT_ENGINE" != "bash" ]] && [[ "$RESCAN" != true ]] && \
+       trace_span "detection watcher status" scan load_watcher_status "$workspace_root"; then
+        SCAN_ROOT="$workspace_root"
+        return 0
+    fi
+
+    if [[ "$MCP_DETECT_ENGINE" != "bash" ]] && \
+       trace_span "detection engine (python)" scan scan_workspace_python "$workspace_root"; then
+        SCAN_ROOT="$workspace_root"
+        return 0
+    fi
+
+    local work_dir
+    work_dir=$(mktemp -d "${TMPDIR:-/tmp}/bootstrap-scan.XXXXXX")
+
+    # Keep the index in the workspace when possible, otherwise scan from scratch
+    local index_file="$workspace_root/$DETECTION_INDEX_PATH"
+    local index_dir
+    index_dir=$(dirname "$index_file")
+    if ! mkdir -p "$index_dir" 2>/dev/null || [[ ! -w "$index_dir" ]]; then
+        index_file="$work_dir/detection.index"
+    fi
+
+    trace_span "update detection index" scan update_detection_index "$workspace_root" "$index_file" "$work_dir"
+
+    local pipeline_yaml
+    read -r SCAN_PY_FILES SCAN_TF_FILES SCAN_DOC_FILES SCAN_YAML_FILES SCAN_JS_FILES SCAN_SH_FILES pipeline_yaml \
+        <<< "$(summarize_detection_index "$index_file" "$work_dir/yaml" "$work_dir/yaml_stat.cached")"
+
+    SCAN_PYTHON_REASONS=()
+    SCAN_INFRA_REASONS=()
+    SCAN_DOCS_REASONS=()
+    SCAN_CICD_REASONS=()
+    SCAN_NODE_REASONS=()
+    SCAN_BASH_REASONS=()
+
+    # Python project indicators
+    [[ -f "$workspace_root/requirements.txt" ]] && add_detection_reason python "Found requirements.txt"
+    [[ -f "$workspace_root/pyproject.toml" ]] && add_detection_reason python "Found pyproject.toml"
+    [[ -f "$workspace_root/setup.py" ]] && add_detection_reason python "Found setup.py"
+    [[ -f "$workspace_root/Pipfile" ]] && add_detection_reason python "Found Pipfile"
+    [[ -f "$workspace_root/poetry.lock" ]] && add_detection_reason python "Found poetry.lock"
+    [[ -d "$workspace_root/venv" ]] && add_detection_reason python "Found venv directory"
+    [[ -d "$workspace_root/.venv" ]] && add_detection_reason python "Found .venv directory"
+    [[ $SCAN_PY_FILES -gt 0 ]] && add_detection_reason python "Found Python (.py) source files"
+
+    # Infrastructure project indicators
+    [[ -f "$workspace_root/terraform.tf" ]] && add_detection_reason infra "Found terraform.tf"
+    [[ -f "$workspace_root/main.tf" ]] && add_detection_reason infra "Found main.tf"
+    [[ -f "$workspace_root/variables.tf" ]] && add_detection_reason infra "Found variables.tf"
+    [[ -d "$workspace_root/terraform" ]] && add_detection_reason infra "Found terraform directory"
+    [[ -d "$workspace_root/k8s" ]] && add_detection_reason infra "Found k8s directory"
+    [[ -d "$workspace_root/kubernetes" ]] && add_detection_reason infra "Found kubernetes directory"
+    [[ -d "$workspace_root/.terraform" ]] && add_detection_reason infra "Found .terraform directory"
+    [[ -f "$workspace_root/ansible.cfg" ]] && add_detection_reason infra "Found ansible.cfg"
+    [[ -f "$workspace_root/playbook.yml" ]] && add_detection_reason infra "Found playbook.yml"
+    [[ $SCAN_TF_FILES -gt 0 ]] && add_detection_reason infra "Found Terraform/HCL files"
+
+    # Documentation project indicators
+    [[ -f "$workspace_root/mkdocs.yml" ]] && add_detection_reason docs "Found mkdocs.yml"
+    [[ -f "$workspace_root/conf.py" ]] && add_detection_reason docs "Found conf.py (Sphinx)"
+    [[ -f "$workspace_root/sphinx.conf" ]] && add_detection_reason docs "Found sphinx.conf"
+    [[ -d "$workspace_root/docs" ]] && add_detection_reason docs "Found docs directory"
+    [[ -f "$workspace_root/README.md" ]] && add_detection_reason docs "Found README.md"
+    [[ $SCAN_DOC_FILES -gt 0 ]] && add_detection_reason docs "Found documentation files (.md/.rst)"
+
+    # CI/CD project indicators
+    [[ -d "$workspace_root/.github/workflows" ]] && add_detection_reason cicd "Found .github/workflows directory"
+    [[ -f "$workspace_root/Jenkinsfile" ]] && add_detection_reason cicd "Found Jenkinsfile"
+    [[ -f "$workspace_root/.gitlab-ci.yml" ]] && add_detection_reason cicd "Found .gitlab-ci.yml"
+    [[ -f "$workspace_root/azure-pipelines.yml" ]] && add_detection_reason cicd "Found azure-pipelines.yml"
+    [[ -f "$workspace_root/docker-compose.yml" ]] && add_detection_reason cicd "Found docker-compose.yml"
+    [[ -f "$workspace_root/Dockerfile" ]] && add_detection_reason cicd "Found Dockerfile"
+    [[ -f "$workspace_root/.circleci/config.yml" ]] && add_detection_reason cicd "Found .circleci/config.yml"
+    [[ -f "$workspace_root/bitbucket-pipelines.yml" ]] && add_detection_reason cicd "Found bitbucket-pipelines.yml"
+
+    # Other YAML files are only inspected when no well-known CI/CD location
+    # exists; the result is cached with the size and mtime of every YAML file
+    # until the set of indexed files or one of those changes
+    if [[ ${#SCAN_CICD_REASONS[@]} -eq 0 ]] && [[ $SCAN_YAML_FILES -gt 0 ]]; then
+        stat_yaml_files "$work_dir/yaml" > "$work_dir/yaml_stat"
+        if [[ "$pipeline_yaml" == "unknown" ]] || \
+           [[ "$(< "$work_dir/yaml_stat")" != "$(< "$work_dir/yaml_stat.cached")" ]]; then
+            pipeline_yaml=$(trace_span "find pipeline yaml" scan find_pipeline_yaml "$work_dir/yaml")
+            {
+                awk '!/^(yaml_stat|pipeline_yaml) /' "$index_file"
+                awk '{ print "yaml_stat " $0 }' "$work_dir/yaml_stat"
+                echo "pipeline_yaml ${pipeline_yaml:-none}"
+            } > "$work_dir/index"
+            mv "$work_dir/index" "$index_file"
+        fi
+        if [[ -n "$pipeline_yaml" ]] && [[ "$pipeline_yaml" != "none" ]]; then
+            add_detection_reason cicd "Found CI/CD pipeline files (${pipeline_yaml#"$workspace_root"/})"
+        fi
+    fi
+
+    # Node.js project indicators
+    [[ -f "$workspace_root/package.json" ]] && add_detection_reason node "Found package.json"
+    [[ -f "$workspace_root/package-lock.json" ]] && add_detection_reason node "Found package-lock.json"
+    [[ -f "$workspace_root/yarn.lock" ]] && add_detection_reason node "Found yarn.lock"
+    [[ -f "$workspace_root/pnpm-lock.yaml" ]] && add_detection_reason node "Found pnpm-lock.yaml"
+    [[ -d "$workspace_root/node_modules" ]] && add_detection_reason node "Found node_modules directory"
+    [[ $SCAN_JS_FILES -gt 0 ]] && add_detection_reason node "Found JavaScript/TypeScript source files"
+
+    # Bash/Shell project indicators
+    [[ $SCAN_SH_FILES -gt 0 ]] && add_detection_reason bash "Found shell script files (.sh/.bash)"
+
+    rm -rf "$work_dir"
+    SCAN_ROOT="$workspace_root"
+    return 0
+}
+
 # Function to detect project type based on file patterns
 detect_project_type() {
     local workspace_root="$1"
     local detected_profiles=()
 
-    # Check for Python project indicators
-    if [[ -f "$workspace_root/requirements.txt" ]] || \
-       [[ -f "$workspace_root/pyproject.toml" ]] || \
-       [[ -f "$workspace_root/setup.py" ]] || \
-       [[ -f "$workspace_root/Pipfile" ]] || \
-       [[ -f "$workspace_root/poetry.lock" ]] || \
-       [[ -d "$workspace_root/venv" ]] || \
-       [[ -d "$workspace_root/.venv" ]] || \
-       [[ -n "$(find "$workspace_root" -name "*.py" -type f -not -path "*/.*" | head -1)" ]]; then
-        detected_profiles+=("python")
-    fi
-
-    # Check for Infrastructure project indicators
-    if [[ -f "$workspace_root/terraform.tf" ]] || \
-       [[ -f "$workspace_root/main.tf" ]] || \
-       [[ -f "$workspace_root/variables.tf" ]] || \
-       [[ -d "$workspace_root/terraform" ]] || \
-       [[ -d "$workspace_root/k8s" ]] || \
-       [[ -d "$workspace_root/kubernetes" ]] || \
-       [[ -d "$workspace_root/.terraform" ]] || \
-       [[ -f "$workspace_root/ansible.cfg" ]] || \
-       [[ -f "$workspace_root/playbook.yml" ]] || \
-       [[ -n "$(find "$workspace_root" -name "*.tf" -o -name "*.hcl" -type f -not -path "*/.*" | head -1)" ]]; then
-        detected_profiles+=("infra")
-    fi
-
-    # Check for Documentation project indicators
-    if [[ -f "$workspace_root/mkdocs.yml" ]] || \
-       [[ -f "$workspace_root/conf.py" ]] || \
-       [[ -f "$workspace_root/sphinx.conf" ]] || \
-       [[ -d "$workspace_root/docs" ]] || \
-       [[ -f "$workspace_root/README.md" ]] || \
-       [[ -n "$(find "$workspace_root" -name "*.md" -o -name "*.rst" -type f -not -path "*/.*" | head -1)" ]]; then
-        detected_profiles+=("docs")
-    fi
-
-    # Check for CI/CD project indicators
-    if [[ -d "$workspace_root/.github/workflows" ]] || \
-       [[ -f "$workspace_root/Jenkinsfile" ]] || \
-       [[ -f "$workspace_root/.gitlab-ci.yml" ]] || \
-       [[ -f "$workspace_root/azure-pipelines.yml" ]] || \
-       [[ -f "$workspace_root/docker-compose.yml" ]] || \
-       [[ -f "$workspace_root/Dockerfile" ]] || \
-       [[ -n "$(find "$workspace_root" -name "*.yml" -o -name "*.yaml" -type f -not -path "*/.*" -exec grep -l "workflow\|pipeline\|ci\|cd" {} + 2>/dev/null | head -1)" ]]; then
-        detected_profiles+=("cicd")
-    fi
-
-    # Check for Node.js project indicators
-    if [[ -f "$workspace_root/package.json" ]] || \
-       [[ -f "$workspace_root/package-lock.json" ]] || \
-       [[ -f "$workspace_root/yarn.lock" ]] || \
-       [[ -f "$workspace_root/pnpm-lock.yaml" ]] || \
-       [[ -d "$workspace_root/node_modules" ]] || \
-       [[ -n "$(find "$workspace_root" -name "*.js" -o -name "*.ts" -o -name "*.jsx" -o -name "*.tsx" -type f -not -path "*/.*" -not -path "*/node_modules/*" | head -1)" ]]; then
-        detected_profiles+=("node")
-    fi
-
-    # Check for Bash/Shell project indicators
-    if [[ -n "$(find "$workspace_root" -name "*.sh" -o -name "*.bash" -type f -not -path "*/.*" | head -1)" ]]; then
-        detected_profiles+=("bash")
-    fi
+    scan_workspace "$workspace_root"
+
+    local profile
+    for profile in python infra docs cicd node bash; do
+        if [[ -n "$(get_detection_reasons "$profile")" ]]; then
+            detected_profiles+=("$profile")
+        fi
+    done
 
     # Return the detected profiles
     echo "${detected_profiles[@]:-}"
 }
 
+# Function to print the confidence of a recommendation drawn from the given
+# number of detected profiles (none, high, medium or low)
+detection_confidence() {
+    local count="$1"
+
+    if [[ $count -eq 0 ]]; then
+        echo "none"
+    elif [[ $count -eq 1 ]]; then
+        echo "high"
+    elif [[ $count -le 3 ]]; then
+        echo "medium"
+    else
+        echo "low"
+    fi
+}
+
 # Function to show detection reasoning for each detected profile
 show_detection_reasoning() {
     local workspace_root="$1"
@@ -185,63 +780,14 @@ show_detection_reasoning() {
         return 0
     fi
 
+    scan_workspace "$workspace_root"
+
     echo -e "${CYAN}=== Detection Reasoning ===${NC}"
     echo
 
     for profile in "${detected_profiles[@]}"; do
         echo -e "${GREEN}✓ $profile profile detected:${NC}"
-        case $profile in
-            python)
-                [[ -f "$workspace_root/requirements.txt" ]] && echo "  • Found requirements.txt"
-                [[ -f "$workspace_root/pyproject.toml" ]] && echo "  • Found pyproject.toml"
-                [[ -f "$workspace_root/setup.py" ]] && echo "  • Found setup.py"
-                [[ -f "$workspace_root/Pipfile" ]] && echo "  • Found Pipfile"
-                [[ -f "$workspace_root/poetry.lock" ]] && echo "  • Found poetry.lock"
-                [[ -d "$workspace_root/venv" ]] && echo "  • Found venv directory"
-                [[ -d "$workspace_root/.venv" ]] && echo "  • Found .venv directory"
-                [[ -n "$(find "$workspace_root" -name "*.py" -type f -not -path "*/.*" | head -1)" ]] && echo "  • Found Python (.py) source files"
-                ;;
-            infra)
-                [[ -f "$workspace_root/terraform.tf" ]] && echo "  • Found terraform.tf"
-                [[ -f "$workspace_root/main.tf" ]] && echo "  • Found main.tf"
-                [[ -f "$workspace_root/variables.tf" ]] && echo "  • Found variables.tf"
-                [[ -d "$workspace_root/terraform" ]] && echo "  • Found terraform directory"
-                [[ -d "$workspace_root/k8s" ]] && echo "  • Found k8s directory"
-                [[ -d "$workspace_root/kubernetes" ]] && echo "  • Found kubernetes directory"
-                [[ -d "$workspace_root/.terraform" ]] && echo "  • Found .terraform directory"
-                [[ -f "$workspace_root/ansible.cfg" ]] && echo "  • Found ansible.cfg"
-                [[ -f "$workspace_root/playbook.yml" ]] && echo "  • Found playbook.yml"
-                [[ -n "$(find "$workspace_root" -name "*.tf" -o -name "*.hcl" -type f -not -path "*/.*" | head -1)" ]] && echo "  • Found Terraform/HCL files"
-                ;;
-            docs)
-                [[ -f "$workspace_root/mkdocs.yml" ]] && echo "  • Found mkdocs.yml"
-                [[ -f "$workspace_root/conf.py" ]] && echo "  • Found conf.py (Sphinx)"
-                [[ -f "$workspace_root/sphinx.conf" ]] && echo "  • Found sphinx.conf"
-                [[ -d "$workspace_root/docs" ]] && echo "  • Found docs directory"
-                [[ -f "$workspace_root/README.md" ]] && echo "  • Found README.md"
-                [[ -n "$(find "$workspace_root" -name "*.md" -o -name "*.rst" -type f -not -path "*/.*" | head -1)" ]] && echo "  • Found documentation files (.md/.rst)"
-                ;;
-            cicd)
-                [[ -d "$workspace_root/.github/workflows" ]] && echo "  • Found .github/workflows directory"
-                [[ -f "$workspace_root/Jenkinsfile" ]] && echo "  • Found Jenkinsfile"
-                [[ -f "$workspace_root/.gitlab-ci.yml" ]] && echo "  • Found .gitlab-ci.yml"
-                [[ -f "$workspace_root/azure-pipelines.yml" ]] && echo "  • Found azure-pipelines.yml"
-                [[ -f "$workspace_root/docker-compose.yml" ]] && echo "  • Found docker-compose.yml"
-                [[ -f "$workspace_root/Dockerfile" ]] && echo "  • Found Dockerfile"
-                [[ -n "$(find "$workspace_root" -name "*.yml" -o -name "*.yaml" -type f -not -path "*/.*" -exec grep -l "workflow\|pipeline\|ci\|cd" {} + 2>/dev/null | head -1)" ]] && echo "  • Found CI/CD pipeline files"
-                ;;
-            node)
-                [[ -f "$workspace_root/package.json" ]] && echo "  • Found package.json"
-                [[ -f "$workspace_root/package-lock.json" ]] && echo "  • Found package-lock.json"
-                [[ -f "$workspace_root/yarn.lock" ]] && echo "  • Found yarn.lock"
-                [[ -f "$workspace_root/pnpm-lock.yaml" ]] && echo "  • Found pnpm-lock.yaml"
-                [[ -d "$workspace_root/node_modules" ]] && echo "  • Found node_modules directory"
-                [[ -n "$(find "$workspace_root" -name "*.js" -o -name "*.ts" -o -name "*.jsx" -o -name "*.tsx" -type f -not -path "*/.*" -not -path "*/node_modules/*" | head -1)" ]] && echo "  • Found JavaScript/TypeScript source files"
-                ;;
-            bash)
-                [[ -n "$(find "$workspace_root" -name "*.sh" -o -name "*.bash" -type f -not -path "*/.*" | head -1)" ]] && echo "  • Found shell script files (.sh/.bash)"
-                ;;
-        esac
+        get_detection_reasons "$profile" | sed 's/^/  • /'
         echo
     done
 }
@@ -405,9 +951,12 @@ run_auto_detect_mode() {
     log_info "Analyzing project structure..." >&2
     echo >&2
 
+    # Scan once in this shell so detection and reasoning share the results
+    trace_span "scan workspace" detect scan_workspace "$workspace_root"
+
     # Detect project type
     local detected_profiles
-    detected_profiles=$(detect_project_type "$workspace_root")
+    detected_profiles=$(trace_span "detect project type" detect detect_project_type "$workspace_root")
     local detected_profiles_array=()
     if [[ -n "$detected_profiles" ]]; then
         read -ra detected_profiles_array <<< "$detected_profiles"
@@ -419,7 +968,8 @@ run_auto_detect_mode() {
 
     # Show detection reasoning
     if [[ ${#detected_profiles_array[@]} -gt 0 ]]; then
-        show_detection_reasoning "$workspace_root" "${detected_profiles_array[@]}" >&2
+        trace_span "detection reasoning" detect \
+            show_detection_reasoning "$workspace_root" "${detected_profiles_array[@]}" >&2
     else
         echo -e "${YELLOW}No specific project indicators detected${NC}" >&2
     fi
@@ -449,13 +999,7 @@ run_auto_detect_mode() {
 
     # Determine confidence level
     local confidence_level
-    if [[ ${#detected_profiles_array[@]} -eq 1 ]]; then
-        confidence_level="high"
-    elif [[ ${#detected_profiles_array[@]} -le 3 ]]; then
-        confidence_level="medium"
-    else
-        confidence_level="low"
-    fi
+    confidence_level=$(detection_confidence "${#detected_profiles_array[@]}")
 
     # Show recommendation
     echo -e "${GREEN}=== Recommendation ===${NC}" >&2
@@ -548,9 +1092,12 @@ run_interactive_mode() {
     log_info "Starting interactive mode..." >&2
     echo >&2
 
+    # Scan once in this shell so detection and reasoning share the results
+    trace_span "scan workspace" detect scan_workspace "$workspace_root"
+
     # Detect project type
     local detected_profiles
-    detected_profiles=$(detect_project_type "$workspace_root")
+    detected_profiles=$(trace_span "detect project type" detect detect_project_type "$workspace_root")
     local detected_profiles_array=()
     if [[ -n "$detected_profiles" ]]; then
         read -ra detected_profiles_array <<< "$detected_profiles"
@@ -654,93 +1201,67 @@ calculate_recommendation() {
     shift 2
     local detected_profiles=("$@")
 
-    # Score each profile using simple variables
-    local python_score=0
-    local infra_score=0
-    local docs_score=0
-    local cicd_score=0
-    local bash_score=0
-    local node_score=0
-
-    # Add points for detected project types
-    for profile in "${detected_profiles[@]:-}"; do
-        case $profile in
-            python) ((python_score += 3));;
-            infra) ((infra_score += 3));;
-            docs) ((docs_score += 3));;
-            cicd) ((cicd_score += 3));;
-            bash) ((bash_score += 3));;
-            node) ((node_score += 3));;
-        esac
-    done
-
-    # Add points for user preferences
-    case $primary_activity in
-        python) ((python_score += 2));;
-        infra) ((infra_score += 2));;
-        docs) ((docs_score += 2));;
-        cicd) ((cicd_score += 2));;
-        bash) ((bash_score += 2));;
-        node) ((node_score += 2));;
-    esac
-
-    case $tools_preference in
-        python) ((python_score += 1));;
-        infra) ((infra_score += 1));;
-        docs) ((docs_score += 1));;
-        cicd) ((cicd_score += 1));;
-        bash) ((bash_score += 1));;
-        node) ((node_score += 1));;
-    esac
-
-    # Find the highest scoring profile
-    local recommended_profile="python"
-    local max_score=$python_score
-
-    if [[ $infra_score -gt $max_score ]]; then
-        max_score=$infra_score
-        recommended_profile="infra"
-    fi
-    if [[ $docs_score -gt $max_score ]]; then
-        max_score=$docs_score
-        recommended_profile="docs"
-    fi
-    if [[ $cicd_score -gt $max_score ]]; then
-        max_score=$cicd_score
-        recommended_profile="cicd"
-    fi
-    if [[ $bash_score -gt $max_score ]]; then
-        max_score=$bash_score
-        recommended_profile="bash"
-    fi
-    if [[ $node_score -gt $max_score ]]; then
-        max_score=$node_score
-        recommended_profile="node"
+    # The Python engine also weighs how much of the workspace each profile's
+    # files make up; its detection-only recommendation is already known
+    if [[ "$SCAN_ENGINE" == "python" ]]; then
+        if [[ "$primary_activity" == "unknown" ]] && [[ "$tools_preference" == "unknown" ]]; then
+            echo "$SCAN_RECOMMENDED"
+            return 0
+        fi
+        local recommended
+        recommended=$(run_detection_engine --activity "$primary_activity" \
+            --tools "$tools_preference" "$SCAN_ROOT" | awk '$1 == "recommended" { print $2 }')
+        if [[ -n "$recommended" ]]; then
+            echo "$recommended"
+            return 0
+        fi
     fi
 
-    # If no profile scored, default to the first detected profile or python
-    if [[ $max_score -eq 0 ]]; then
-        if [[ ${#detected_profiles[@]:-0} -gt 0 ]]; then
-            recommended_profile="${detected_profiles[0]}"
-        else
-            recommended_profile="python"
+    local recommended_profile="${detected_profiles[0]:-python}"
+    local max_score=0
+    local profile detected score
+    for profile in "${RECOMMENDATION_PROFILES[@]}"; do
+        score=0
+        for detected in ${detected_profiles[@]+"${detected_profiles[@]}"}; do
+            [[ "$detected" == "$profile" ]] && score=$((score + DETECTED_WEIGHT))
+        done
+        [[ "$primary_activity" == "$profile" ]] && score=$((score + PRIMARY_ACTIVITY_WEIGHT))
+        [[ "$tools_preference" == "$profile" ]] && score=$((score + TOOLS_PREFERENCE_WEIGHT))
+        if [[ $score -gt $max_score ]]; then
+            max_score=$score
+            recommended_profile="$profile"
         fi
-    fi
+    done
 
     echo "$recommended_profile"
 }
 
-# Function to get the script directory
-get_script_dir() {
-    local script_path="${BASH_SOURCE[0]}"
-    # Resolve symlinks
-    while [[ -L "$script_path" ]]; do
-        local dir_path
-        dir_path=$(dirname "$script_path")
-        script_path=$(readlink "$script_path")
-        [[ "$script_path" != /* ]] && script_path="$dir_path/$script_path"
-    done
-    dirname "$script_path"
+# Function to print " (<version>)" for a tool recorded as installed in the
+# tool inventory cache written by check-tools.sh, so that quick setup can
+# report versions without probing the tool again
+cached_tool_version_suffix() {
+    local tool="$1"
+    local inventory_file="${XDG_CACHE_HOME:-$HOME/.cache}/mcp-vscode-workflow/tools-${HOSTNAME:-$(uname -n)}.tsv"
+    local ttl="${TOOL_INVENTORY_TTL:-3600}"
+
+    [[ -f "$inventory_file" ]] || return 0
+
+    local now
+    now=$(date +%s)
+    local header name status version tool_path probed_at
+    {
+        IFS= read -r header || return 0
+        [[ "$header" == "# path $PATH" ]] || return 0
+        while IFS=$'\t' read -r name status version tool_path probed_at; do
+            if [[ "$name" == "$tool" ]] && [[ "$status" == "installed" ]] && \
+               [[ -x "$tool_path" ]] && [[ "$probed_at" =~ ^[0-9]+$ ]] && \
+               [[ $((now - probed_at)) -lt $ttl ]]; then
+                echo " ($version)"
+                return 0
+            fi
+        done
+    } < "$inventory_file"
+    return 0
 }
 
 # Function to check if VS Code is installed
@@ -786,6 +1307,32 @@ run_tool_validation() {
     fi
 }
 
+# Function to validate the .mcp and .vscode/profiles configurations against
+# their schemas (mcp_vscode_workflow.schema); returns non-zero on violations
+validate_configs() {
+    local script_dir="$1"
+
+    log_step "Validating MCP and VS Code profile configurations..."
+
+    if ! command -v python3 >/dev/null 2>&1; then
+        log_warn "python3 not found, skipping configuration validation"
+        return 0
+    fi
+
+    local violations
+    if violations=$(PYTHONPATH="$script_dir/../src${PYTHONPATH:+:$PYTHONPATH}" \
+        python3 -m mcp_vscode_workflow.schema --workspace "$script_dir/.." 2>&1); then
+        log_info "Configurations match their schemas"
+        return 0
+    fi
+
+    local line
+    while IFS= read -r line; do
+        log_warn "$line"
+    done <<< "$violations"
+    return 1
+}
+
 # Function to install MCP packages
 install_mcp_packages() {
     local script_dir="$1"
@@ -855,14 +1402,12 @@ open_vscode_with_profile() {
 
     log_step "Opening VS Code with $profile profile..."
 
-    # Check if there's a VS Code profile configuration
-    local profile_config="$workspace_root/.vscode/profiles/${profile}.json"
-    if [[ -f "$profile_config" ]]; then
-        log_info "Found VS Code profile configuration: $profile_config"
-        # For now, just open the workspace - VS Code profile switching would need extension support
-        log_info "Opening workspace in VS Code..."
+    # Write the composed profile into the workspace's .vscode directory and
+    # install the extensions VS Code is missing
+    if trace_span "materialize profile" profile materialize_vscode_profile "$profile" "$workspace_root"; then
+        log_info "Profile settings written to: $workspace_root/.vscode"
     else
-        log_info "No specific VS Code profile found, opening with default settings..."
+        log_warn "Could not apply the $profile profile, opening with the current settings..."
     fi
 
     # Open VS Code in the workspace directory
@@ -870,9 +1415,6 @@ open_vscode_with_profile() {
         if code "$workspace_root"; then
             log_success "VS Code opened successfully"
             log_info "Workspace: $workspace_root"
-            if [[ -f "$profile_config" ]]; then
-                log_info "Profile config available at: $profile_config"
-            fi
             return 0
         else
             log_error "Failed to open VS Code"
@@ -881,11 +1423,349 @@ open_vscode_with_profile() {
     else
         log_warn "VS Code CLI not available, skipping VS Code opening"
         log_info "Workspace configured at: $workspace_root"
-        if [[ -f "$profile_config" ]]; then
-            log_info "Profile config available at: $profile_config"
+        return 0
+    fi
+}
+
+# Function to compose a VS Code profile (.vscode/profiles/base.json, the
+# profile's overlay and the other languages detected in the workspace) and
+# write it to the workspace with mcp_vscode_workflow.vscodeprofile; files are
+# only rewritten and extensions only checked when the profile changed
+materialize_vscode_profile() {
+    local profile="$1"
+    local workspace_root="$2"
+
+    if ! command -v python3 >/dev/null 2>&1; then
+        log_warn "python3 not found, cannot compose the VS Code profile"
+        return 1
+    fi
+
+    local script_dir
+    script_dir="$(get_script_dir)"
+    local args=(apply "$profile" --workspace "$workspace_root"
+        --profiles-dir "$script_dir/../.vscode/profiles"
+        --roles "$script_dir/../.mcp/roles.json")
+    command -v code >/dev/null 2>&1 || args+=(--no-install)
+
+    local output status=0
+    output=$(PYTHONPATH="$script_dir/../src${PYTHONPATH:+:$PYTHONPATH}" \
+        python3 -m mcp_vscode_workflow.vscodeprofile "${args[@]}" 2>&1) || status=$?
+
+    local line
+    while IFS= read -r line; do
+        [[ -n "$line" ]] || continue
+        if [[ $status -eq 0 ]]; then
+            log_info "$line"
+        else
+            log_warn "$line"
+        fi
+    done <<< "$output"
+    return $status
+}
+
+# Function to set up a monorepo: each top-level subtree is detected on its own
+# and gets its own profile settings in a multi-root VS Code workspace
+run_monorepo_mode() {
+    local workspace_root="$1"
+    local script_dir="$2"
+
+    if ! command -v python3 >/dev/null 2>&1; then
+        log_error "Monorepo mode requires python3"
+        return 1
+    fi
+
+    log_step "Detecting profiles per subtree..."
+    local args=(--format bootstrap --write-workspace
+        --roles "$script_dir/../.mcp/roles.json"
+        --profiles-dir "$script_dir/../.vscode/profiles")
+    [[ "$RESCAN" == true ]] && args+=(--rescan)
+
+    local output
+    if ! output=$(PYTHONPATH="$script_dir/../src${PYTHONPATH:+:$PYTHONPATH}" \
+        trace_span "detect subtrees" detect python3 -m mcp_vscode_workflow.monorepo \
+        "${args[@]}" "$workspace_root"); then
+        log_error "Subtree detection failed"
+        return 1
+    fi
+
+    local key rest profile confidence subtree
+    local workspace_file=""
+    local profiles=()
+    while read -r key rest; do
+        case $key in
+            subtree)
+                read -r profile confidence subtree <<< "$rest"
+                log_info "$subtree: $profile profile (confidence: $confidence)"
+                if [[ " ${profiles[*]:-} " != *" $profile "* ]]; then
+                    profiles+=("$profile")
+                fi
+                ;;
+            workspace) workspace_file="$rest";;
+        esac
+    done <<< "$output"
+
+    if [[ ${#profiles[@]} -eq 0 ]]; then
+        log_warn "No project indicators detected in any top-level directory"
+        log_warn "Run without --monorepo to detect a single profile for the workspace"
+        return 1
+    fi
+    log_success "Workspace written: $workspace_file"
+    echo
+
+    for profile in "${profiles[@]}"; do
+        if ! trace_span "tool validation ($profile)" phase run_tool_validation "$profile" "$script_dir"; then
+            return 1
+        fi
+        echo
+    done
+
+    if ! trace_span "install mcp packages" phase install_mcp_packages "$script_dir"; then
+        log_warn "MCP installation failed, but continuing..."
+    fi
+    echo
+
+    if command -v code >/dev/null 2>&1; then
+        if ! code "$workspace_file"; then
+            log_error "Failed to open VS Code"
+            return 1
         fi
+        log_success "VS Code opened with the multi-root workspace"
+    else
+        log_warn "VS Code CLI not available, skipping VS Code opening"
+        log_info "Open the workspace with: code \"$workspace_file\""
+    fi
+    return 0
+}
+
+# Function to load non-interactive answers from a file of "key=value" lines
+# (profile, activity, tools); blank lines and # comments are ignored, and
+# answers already given as flags take precedence
+load_answers_file() {
+    local answers_file="$1"
+
+    if [[ ! -f "$answers_file" ]] || [[ ! -r "$answers_file" ]]; then
+        log_error "Cannot read answers file: $answers_file"
+        return 1
+    fi
+
+    local line key value
+    while IFS= read -r line || [[ -n "$line" ]]; do
+        line="${line%$'\r'}"
+        [[ "$line" =~ ^[[:space:]]*(#|$) ]] && continue
+        if [[ ! "$line" =~ ^[[:space:]]*([a-z_]+)[[:space:]]*=[[:space:]]*(.*[^[:space:]])?[[:space:]]*$ ]]; then
+            log_error "Invalid line in answers file $answers_file: $line"
+            return 1
+        fi
+        key="${BASH_REMATCH[1]}"
+        value="${BASH_REMATCH[2]}"
+
+        case $key in
+            profile)
+                if [[ -z "$ANSWER_PROFILE" ]]; then
+                    ANSWER_PROFILE="$value"
+                    ANSWER_PROFILE_SOURCE="answers"
+                fi
+                ;;
+            activity) [[ -n "$ANSWER_ACTIVITY" ]] || ANSWER_ACTIVITY="$value";;
+            tools) [[ -n "$ANSWER_TOOLS" ]] || ANSWER_TOOLS="$value";;
+            *)
+                log_error "Unknown answer '$key' in $answers_file (expected profile, activity or tools)"
+                return 1
+                ;;
+        esac
+    done < "$answers_file"
+}
+
+# Function to detect the workspace and settle the profile without prompting
+# Sets DETECTED_PROFILES, DETECTION_CONFIDENCE, DETECTION_RECOMMENDED and
+# BOOTSTRAP_PROFILE; returns non-zero if no profile can be chosen
+resolve_non_interactive_profile() {
+    local workspace_root="$1"
+
+    local answer
+    for answer in "$ANSWER_PROFILE" "$ANSWER_ACTIVITY" "$ANSWER_TOOLS"; do
+        if [[ -n "$answer" ]] && ! validate_profile "$answer"; then
+            return 1
+        fi
+    done
+
+    trace_span "scan workspace" detect scan_workspace "$workspace_root"
+
+    local detected_profiles
+    detected_profiles=$(detect_project_type "$workspace_root")
+    DETECTED_PROFILES=()
+    if [[ -n "$detected_profiles" ]]; then
+        read -ra DETECTED_PROFILES <<< "$detected_profiles"
+    fi
+    DETECTION_CONFIDENCE=$(detection_confidence "${#DETECTED_PROFILES[@]}")
+
+    if [[ ${#DETECTED_PROFILES[@]} -gt 0 ]]; then
+        DETECTION_RECOMMENDED=$(calculate_recommendation "unknown" "unknown" "${DETECTED_PROFILES[@]}")
+        log_info "Detected profiles: ${DETECTED_PROFILES[*]} (confidence: $DETECTION_CONFIDENCE)"
+    else
+        log_info "No specific project type detected"
+    fi
+
+    if [[ -n "$ANSWER_PROFILE" ]]; then
+        BOOTSTRAP_PROFILE="$ANSWER_PROFILE"
+    elif [[ -n "$ANSWER_ACTIVITY" ]] || [[ -n "$ANSWER_TOOLS" ]]; then
+        BOOTSTRAP_PROFILE=$(calculate_recommendation "${ANSWER_ACTIVITY:-unknown}" \
+            "${ANSWER_TOOLS:-unknown}" ${DETECTED_PROFILES[@]+"${DETECTED_PROFILES[@]}"})
+        ANSWER_PROFILE_SOURCE="recommended"
+    elif [[ -n "$DETECTION_RECOMMENDED" ]]; then
+        BOOTSTRAP_PROFILE="$DETECTION_RECOMMENDED"
+        ANSWER_PROFILE_SOURCE="detected"
+    else
+        log_error "No project type detected; answer with --profile, --activity or --tools"
+        return 1
+    fi
+
+    log_info "Using $BOOTSTRAP_PROFILE profile ($ANSWER_PROFILE_SOURCE)"
+}
+
+# Function to switch the run to non-interactive reporting
+# Logs move to stderr (the report is written to the original stdout on exit),
+# the helper scripts report into REPORT_DIR, and the npx download test is
+# skipped; without --trace the run is traced privately for phase durations
+start_non_interactive() {
+    exec 3>&1 1>&2
+
+    REPORT_DIR=$(mktemp -d "${TMPDIR:-/tmp}/bootstrap-report.XXXXXX")
+    export MCP_TOOL_REPORT_FILE="$REPORT_DIR/tools.tsv"
+    export MCP_PACKAGE_REPORT_FILE="$REPORT_DIR/packages.tsv"
+    export MCP_METADATA_ONLY=true
+
+    if [[ -z "$MCP_TRACE_FILE" ]]; then
+        MCP_TRACE_FILE="$REPORT_DIR/trace.jsonl"
+        : > "$MCP_TRACE_FILE"
+        export MCP_TRACE_FILE
+    fi
+
+    trace_clock REPORT_START_US
+    trap finish_non_interactive EXIT
+}
+
+# Function to write the JSON report and clean up (EXIT trap)
+finish_non_interactive() {
+    local status=$?
+
+    if [[ -n "$TRACE_START_US" ]]; then
+        finish_trace "$status"
+    fi
+    write_bootstrap_report "$status" >&3
+    rm -rf "$REPORT_DIR"
+}
+
+# Function to print a value as a JSON string, or null when it is empty or "-"
+json_string() {
+    if [[ -z "$1" ]] || [[ "$1" == "-" ]]; then
+        printf 'null'
         return 0
     fi
+
+    local value="${1//\\/\\\\}"
+    value="${value//\"/\\\"}"
+    value="${value//$'\t'/\\t}"
+    value="${value//$'\n'/\\n}"
+    value="${value//$'\r'/\\r}"
+    value="${value//[[:cntrl:]]/}"
+    printf '"%s"' "$value"
+}
+
+# Function to print a microsecond count as fractional milliseconds
+json_duration_ms() {
+    printf '%d.%03d' "$(($1 / 1000))" "$(($1 % 1000))"
+}
+
+# Function to print the detected profiles and their reasons as a JSON array
+report_detection_profiles() {
+    local separator="" profile reason reason_separator
+    printf '['
+    for profile in ${DETECTED_PROFILES[@]+"${DETECTED_PROFILES[@]}"}; do
+        printf '%s{"name":%s,"reasons":[' "$separator" "$(json_string "$profile")"
+        reason_separator=""
+        while IFS= read -r reason; do
+            printf '%s%s' "$reason_separator" "$(json_string "$reason")"
+            reason_separator=","
+        done < <(get_detection_reasons "$profile")
+        printf ']}'
+        separator=","
+    done
+    printf ']'
+}
+
+# Function to print the tools checked by check-tools.sh as a JSON array
+report_tools() {
+    local separator="" tool required status version tool_path
+    printf '['
+    if [[ -f "$REPORT_DIR/tools.tsv" ]]; then
+        while IFS=$'\t' read -r tool required status version tool_path; do
+            printf '%s{"name":%s,"required":%s,"status":%s,"version":%s,"path":%s}' \
+                "$separator" "$(json_string "$tool")" "$required" "$(json_string "$status")" \
+                "$(json_string "$version")" "$(json_string "$tool_path")"
+            separator=","
+        done < "$REPORT_DIR/tools.tsv"
+    fi
+    printf ']'
+}
+
+# Function to print the MCP packages verified by install-mcp-npx.sh as a JSON
+# array, in package name order (workers report as they finish)
+report_packages() {
+    local separator="" package status version
+    printf '['
+    if [[ -f "$REPORT_DIR/packages.tsv" ]]; then
+        while IFS=$'\t' read -r package status version; do
+            printf '%s{"name":%s,"status":%s,"version":%s}' "$separator" \
+                "$(json_string "$package")" "$(json_string "$status")" "$(json_string "$version")"
+            separator=","
+        done < <(sort "$REPORT_DIR/packages.tsv")
+    fi
+    printf ']'
+}
+
+# Function to print this script's phase spans from the trace as a JSON array
+report_phases() {
+    local separator="" line
+    local pattern='^\{"name":"(([^"\\]|\\.)*)","cat":"phase","ph":"X","ts":[0-9]+,"dur":([0-9]+),"pid":'"$$"',.*"status":([0-9]+)\}\}$'
+    printf '['
+    if [[ -n "$MCP_TRACE_FILE" ]] && [[ -f "$MCP_TRACE_FILE" ]]; then
+        while IFS= read -r line; do
+            [[ "$line" =~ $pattern ]] || continue
+            printf '%s{"name":"%s","duration_ms":%s,"status":%s}' "$separator" \
+                "${BASH_REMATCH[1]}" "$(json_duration_ms "${BASH_REMATCH[3]}")" "${BASH_REMATCH[4]}"
+            separator=","
+        done < "$MCP_TRACE_FILE"
+    fi
+    printf ']'
+}
+
+# Function to print the non-interactive report of this run as one JSON document
+# Usage: write_bootstrap_report <exit_status>
+write_bootstrap_report() {
+    local status="$1"
+    local result="success"
+    [[ $status -eq 0 ]] || result="failed"
+
+    local report_end_us
+    trace_clock report_end_us
+    local vscode_cli=false
+    command -v code >/dev/null 2>&1 && vscode_cli=true
+    local engine=""
+    [[ -n "$DETECTION_CONFIDENCE" ]] && engine="${SCAN_ENGINE:-bash}"
+
+    printf '{"version":%s,"status":"%s","exit_code":%s' "$REPORT_VERSION" "$result" "$status"
+    printf ',"workspace":%s' "$(json_string "$(pwd)")"
+    printf ',"profile":%s,"profile_source":%s' "$(json_string "$BOOTSTRAP_PROFILE")" \
+        "$(json_string "$ANSWER_PROFILE_SOURCE")"
+    printf ',"detection":{"engine":%s,"profiles":%s,"recommended":%s,"confidence":%s}' \
+        "$(json_string "$engine")" "$(report_detection_profiles)" \
+        "$(json_string "$DETECTION_RECOMMENDED")" "$(json_string "$DETECTION_CONFIDENCE")"
+    printf ',"tools":%s,"packages":%s' "$(report_tools)" "$(report_packages)"
+    printf ',"vscode":{"cli":%s,"opened":%s}' "$vscode_cli" "$REPORT_VSCODE_OPENED"
+    printf ',"phases":%s,"duration_ms":%s' "$(report_phases)" \
+        "$(json_duration_ms "$((report_end_us - REPORT_START_US))")"
+    printf ',"error":%s}\n' "$(json_string "$REPORT_ERROR")"
 }
 
 # Function to run quick setup mode
@@ -906,12 +1786,13 @@ run_quick_setup() {
     fi
 
     # Step 2: Basic tool check for common tools (quick check, don't fail)
+    # Versions come from the check-tools.sh inventory cache when available
     log_step "Quick tool availability check..."
     local tools_status=()
 
     # Check git
     if command -v git >/dev/null 2>&1; then
-        log_info "✓ git available"
+        log_info "✓ git available$(cached_tool_version_suffix git)"
         tools_status+=("git: ✓")
     else
         log_warn "git not found - consider installing for version control"
@@ -920,7 +1801,7 @@ run_quick_setup() {
 
     # Check node
     if command -v node >/dev/null 2>&1; then
-        log_info "✓ node available"
+        log_info "✓ node available$(cached_tool_version_suffix node)"
         tools_status+=("node: ✓")
     else
         log_warn "node not found - some MCP features may be limited"
@@ -929,7 +1810,7 @@ run_quick_setup() {
 
     # Check python
     if command -v python >/dev/null 2>&1 || command -v python3 >/dev/null 2>&1; then
-        log_info "✓ python available"
+        log_info "✓ python available$(cached_tool_version_suffix python)"
         tools_status+=("python: ✓")
     else
         log_warn "python not found - may need to install for Python development"
@@ -952,7 +1833,8 @@ run_quick_setup() {
             chmod +x "$profile_script"
         fi
         log_info "Running Python profile setup..."
-        "$profile_script" || log_warn "Profile script completed with warnings"
+        trace_span "start-python-profile.sh" profile "$profile_script" || \
+            log_warn "Profile script completed with warnings"
     else
         log_info "Python profile script not found or empty - using default setup"
     fi
@@ -1009,6 +1891,7 @@ main() {
     local profile=""
     local interactive=false
     local quick=false
+    local monorepo=false
 
     # Parse command line arguments
     while [[ $# -gt 0 ]]; do
@@ -1025,6 +1908,35 @@ main() {
                 quick=true
                 shift
                 ;;
+            --monorepo)
+                monorepo=true
+                shift
+                ;;
+            --rescan)
+                RESCAN=true
+                shift
+                ;;
+            --trace)
+                MCP_TRACE_FILE="$2"
+                shift 2
+                ;;
+            --non-interactive)
+                NON_INTERACTIVE=true
+                shift
+                ;;
+            --answers)
+                ANSWERS_FILE="$2"
+                NON_INTERACTIVE=true
+                shift 2
+                ;;
+            --activity)
+                ANSWER_ACTIVITY="$2"
+                shift 2
+                ;;
+            --tools)
+                ANSWER_TOOLS="$2"
+                shift 2
+                ;;
             -h|--help)
                 show_usage
                 exit 0
@@ -1037,6 +1949,28 @@ main() {
         esac
     done
 
+    if [[ "$NON_INTERACTIVE" != true ]] && { [[ -n "$ANSWER_ACTIVITY" ]] || [[ -n "$ANSWER_TOOLS" ]]; }; then
+        log_error "--activity and --tools require --non-interactive"
+        show_usage
+        exit 1
+    fi
+
+    if [[ "$NON_INTERACTIVE" == true ]]; then
+        if [[ "$interactive" == true ]] || [[ "$quick" == true ]] || [[ "$monorepo" == true ]]; then
+            log_error "Cannot use --non-interactive with --interactive, --quick or --monorepo"
+            show_usage
+            exit 1
+        fi
+    fi
+
+    if [[ -n "$MCP_TRACE_FILE" ]]; then
+        start_trace
+    fi
+
+    if [[ "$NON_INTERACTIVE" == true ]]; then
+        start_non_interactive
+    fi
+
     # Get script directory and workspace root
     local script_dir
     script_dir=$(get_script_dir)
@@ -1044,6 +1978,27 @@ main() {
     # Use current directory as workspace root for auto-detection
     workspace_root=$(pwd)
 
+    # Handle monorepo mode
+    if [[ "$monorepo" == true ]]; then
+        if [[ -n "$profile" ]] || [[ "$interactive" == true ]] || [[ "$quick" == true ]]; then
+            log_error "Cannot use --monorepo with --profile, --interactive or --quick"
+            show_usage
+            exit 1
+        fi
+
+        log_info "Starting MCP VS Code workflow monorepo setup"
+        log_info "Workspace: $workspace_root"
+        echo
+
+        if trace_span "monorepo setup" phase run_monorepo_mode "$workspace_root" "$script_dir"; then
+            log_success "Monorepo bootstrap completed successfully!"
+            exit 0
+        else
+            log_error "Monorepo setup failed"
+            exit 1
+        fi
+    fi
+
     # Handle quick mode
     if [[ "$quick" == true ]]; then
         # Quick mode validation
@@ -1066,7 +2021,7 @@ main() {
         log_info "Workspace: $workspace_root"
         echo
 
-        if run_quick_setup "$script_dir" "$workspace_root"; then
+        if trace_span "quick setup" phase run_quick_setup "$script_dir" "$workspace_root"; then
             show_quick_success_message "$workspace_root"
             exit 0
         else
@@ -1075,15 +2030,28 @@ main() {
         fi
     fi
 
-    # Handle interactive mode
-    if [[ "$interactive" == true ]]; then
+    # Handle non-interactive mode: answers from flags or the answers file
+    if [[ "$NON_INTERACTIVE" == true ]]; then
+        if [[ -n "$profile" ]]; then
+            ANSWER_PROFILE="$profile"
+            ANSWER_PROFILE_SOURCE="flag"
+        fi
+        if [[ -n "$ANSWERS_FILE" ]] && ! load_answers_file "$ANSWERS_FILE"; then
+            exit 1
+        fi
+        if ! trace_span "detection" phase resolve_non_interactive_profile "$workspace_root"; then
+            exit 1
+        fi
+        profile="$BOOTSTRAP_PROFILE"
+    elif [[ "$interactive" == true ]]; then
+        # Handle interactive mode
         if [[ -n "$profile" ]]; then
             log_error "Cannot use --profile and --interactive together"
             show_usage
             exit 1
         fi
 
-        profile=$(run_interactive_mode "$workspace_root")
+        profile=$(trace_span "interactive mode" phase run_interactive_mode "$workspace_root")
         if [[ -z "$profile" ]]; then
             log_info "Interactive mode cancelled by user"
             exit 0
@@ -1091,7 +2059,7 @@ main() {
     else
         # If no profile specified, use auto-detect mode
         if [[ -z "$profile" ]]; then
-            if ! profile=$(run_auto_detect_mode "$workspace_root"); then
+            if ! profile=$(trace_span "auto-detect" phase run_auto_detect_mode "$workspace_root"); then
                 log_info "Auto-detect mode cancelled by user"
                 exit 0
             fi
@@ -1117,44 +2085,57 @@ main() {
     echo
 
     # Step 1: Check VS Code installation
-    if ! check_vscode; then
+    if ! trace_span "check vscode" phase check_vscode; then
         log_warn "VS Code check failed, but continuing..."
     fi
     echo
 
-    # Step 2: Validate tools for the profile
-    if ! run_tool_validation "$profile" "$script_dir"; then
+    # Step 2: Validate the MCP and VS Code profile configurations
+    if ! trace_span "validate configs" phase validate_configs "$script_dir"; then
+        log_warn "Configuration problems found, but continuing..."
+    fi
+    echo
+
+    # Step 3: Validate tools for the profile
+    if ! trace_span "tool validation" phase run_tool_validation "$profile" "$script_dir"; then
         exit 1
     fi
     echo
 
-    # Step 3: Install MCP packages
-    if ! install_mcp_packages "$script_dir"; then
+    # Step 4: Install MCP packages
+    if ! trace_span "install mcp packages" phase install_mcp_packages "$script_dir"; then
         log_warn "MCP installation failed, but continuing..."
     fi
     echo
 
-    # Step 4: Launch profile-specific startup script
-    launch_profile_script "$profile" "$script_dir"
+    # Step 5: Launch profile-specific startup script
+    trace_span "launch profile script" phase launch_profile_script "$profile" "$script_dir"
     echo
 
-    # Step 5: Open VS Code with the appropriate profile
-    if ! open_vscode_with_profile "$profile" "$workspace_root"; then
+    # Step 6: Open VS Code with the appropriate profile (provisioning runs
+    # have no one to open it for)
+    if [[ "$NON_INTERACTIVE" == true ]]; then
+        log_info "Non-interactive mode: skipping VS Code launch"
+    elif ! trace_span "open vscode" phase open_vscode_with_profile "$profile" "$workspace_root"; then
         log_error "Failed to open VS Code"
         exit 1
+    else
+        REPORT_VSCODE_OPENED=true
     fi
 
     echo
     log_success "Bootstrap completed successfully!"
     log_info "Your $profile development environment is ready"
-    log_info "VS Code is now open with the appropriate configuration"
+    if [[ "$REPORT_VSCODE_OPENED" == true ]]; then
+        log_info "VS Code is now open with the appropriate configuration"
+    fi
 
     # Show next steps
     echo
     echo -e "${BLUE}NEXT STEPS:${NC}"
     echo "  • Check the VS Code extensions recommended for $profile profile"
     echo "  • Review MCP prompt templates in .mcp/prompts/"
-    echo "  • Customize your workflow in .vscode/profiles/${profile}.json"
+    echo "  • Customize your workflow in .vscode/profiles/${profile}.json (shared settings: base.json)"
     echo "  • Start coding! 🚀"
 }
 
@@ -12,8 +12,14 @@
 # - Node Profile: node, npx
 #
 # Detects macOS vs Linux and offers appropriate installation commands
+# Tools are probed concurrently and recorded (status, version, resolved path)
+# in a per-host inventory cache so repeat validations skip re-probing
+# Set MCP_TRACE_FILE to append timed spans (one per probe) to a trace file
+# Set MCP_TOOL_REPORT_FILE to append one tab-separated line per checked tool
+# ("<tool>\t<required>\t<status>\t<version>\t<path>") for machine consumers
 # Exits non-zero if required tools are missing
 
+# shellcheck disable=SC2329  # functions run through trace_span are invoked indirectly
 set -euo pipefail  # Exit on error, undefined variables, and pipe failures
 
 # Colors for output
@@ -23,6 +29,15 @@ YELLOW='\033[1;33m'
 BLUE='\033[0;34m'
 NC='\033[0m' # No Color
 
+# Per-host tool inventory cache (entries older than the TTL are re-probed)
+TOOL_INVENTORY_DIR="${XDG_CACHE_HOME:-$HOME/.cache}/mcp-vscode-workflow"
+TOOL_INVENTORY_FILE="$TOOL_INVENTORY_DIR/tools-${HOSTNAME:-$(uname -n)}.tsv"
+TOOL_INVENTORY_TTL="${TOOL_INVENTORY_TTL:-3600}"
+REFRESH_INVENTORY=false
+
+# Inventory entries loaded for this run: "<tool>\t<status>\t<version>\t<path>\t<probed-at>"
+INVENTORY_LINES=()
+
 # Function to print colored output
 log_info() {
     echo -e "${GREEN}[INFO]${NC} $1"
@@ -40,6 +55,12 @@ log_install() {
     echo -e "${BLUE}[INSTALL]${NC} $1"
 }
 
+# Tracing helpers (trace_span, trace_process_name, ...) shared by the scripts
+SCRIPT_LIB_DIR="${BASH_SOURCE[0]%/*}/lib"
+[[ "${BASH_SOURCE[0]}" == */* ]] || SCRIPT_LIB_DIR="lib"
+# shellcheck source=lib/trace.sh
+source "$SCRIPT_LIB_DIR/trace.sh"
+
 # Function to check if a command exists
 command_exists() {
     command -v "$1" >/dev/null 2>&1
@@ -121,14 +142,174 @@ get_install_command() {
     esac
 }
 
+# Function to print the version number reported by a tool
+get_tool_version() {
+    local tool="$1"
+    local output=""
+
+    if command_exists timeout; then
+        output=$(timeout 10 "$tool" --version 2>&1 < /dev/null) || true
+    else
+        output=$("$tool" --version 2>&1 < /dev/null) || true
+    fi
+
+    local line
+    while IFS= read -r line; do
+        if [[ "$line" =~ [0-9]+(\.[0-9]+)+ ]]; then
+            echo "${BASH_REMATCH[0]}"
+            return 0
+        fi
+    done <<< "$output"
+    echo "unknown"
+}
+
+# Function to probe a tool and print its inventory entry
+probe_tool() {
+    local tool="$1"
+    local tool_path
+
+    if tool_path=$(command -v "$tool" 2>/dev/null); then
+        printf '%s\t%s\t%s\t%s\t%s\n' "$tool" "installed" "$(get_tool_version "$tool")" "$tool_path" "$(date +%s)"
+    else
+        printf '%s\t%s\t%s\t%s\t%s\n' "$tool" "missing" "-" "-" "$(date +%s)"
+    fi
+}
+
+# Function to check whether a cached inventory entry can be reused
+# Installed tools must still be executable at the recorded path, and tools
+# recorded as missing are re-probed as soon as they appear on PATH
+inventory_entry_is_fresh() {
+    local entry="$1"
+    local now="$2"
+    local tool status tool_path probed_at
+
+    IFS=$'\t' read -r tool status _ tool_path probed_at <<< "$entry"
+    [[ "$probed_at" =~ ^[0-9]+$ ]] || return 1
+    [[ $((now - probed_at)) -lt $TOOL_INVENTORY_TTL ]] || return 1
+
+    if [[ "$status" == "installed" ]]; then
+        [[ -x "$tool_path" ]]
+    elif command_exists "$tool"; then
+        return 1
+    fi
+}
+
+# Function to load inventory entries for the given tools
+# Fresh entries come from the cache; all other tools are probed concurrently
+# and the cache is rewritten with the merged result
+load_tool_inventory() {
+    local tools=("$@")
+    local now
+    now=$(date +%s)
+
+    local cached=()
+    local line
+    if [[ -f "$TOOL_INVENTORY_FILE" ]]; then
+        # The inventory is only valid for the PATH it was probed with
+        local header=""
+        IFS= read -r header < "$TOOL_INVENTORY_FILE" || true
+        if [[ "$header" == "# path $PATH" ]]; then
+            while IFS= read -r line; do
+                [[ -z "$line" || "$line" == "#"* ]] && continue
+                inventory_entry_is_fresh "$line" "$now" && cached+=("$line")
+            done < "$TOOL_INVENTORY_FILE"
+        fi
+    fi
+
+    # --refresh re-probes the requested tools but keeps other cached entries
+    local stale=()
+    local tool entry found
+    for tool in "${tools[@]}"; do
+        found=false
+        if [[ "$REFRESH_INVENTORY" != true ]]; then
+            for entry in "${cached[@]:-}"; do
+                if [[ "${entry%%$'\t'*}" == "$tool" ]]; then
+                    found=true
+                    break
+                fi
+            done
+        fi
+        [[ "$found" == true ]] || stale+=("$tool")
+    done
+
+    local probed=()
+    if [[ ${#stale[@]} -gt 0 ]]; then
+        local work_dir
+        work_dir=$(mktemp -d "${TMPDIR:-/tmp}/check-tools.XXXXXX")
+        for tool in "${stale[@]}"; do
+            trace_span "probe $tool" probe probe_tool "$tool" > "$work_dir/$tool" &
+        done
+        wait
+        for tool in "${stale[@]}"; do
+            IFS= read -r line < "$work_dir/$tool" && probed+=("$line")
+        done
+        rm -rf "$work_dir"
+
+        # Drop cached entries superseded by the new probes
+        local kept=()
+        for entry in "${cached[@]:-}"; do
+            found=false
+            for tool in "${stale[@]}"; do
+                if [[ "${entry%%$'\t'*}" == "$tool" ]]; then
+                    found=true
+                    break
+                fi
+            done
+            [[ "$found" == true || -z "$entry" ]] || kept+=("$entry")
+        done
+        cached=("${kept[@]:-}")
+
+        # Rewrite the cache atomically; failing to persist it is not an error
+        if mkdir -p "$TOOL_INVENTORY_DIR" 2>/dev/null; then
+            local tmp_file="$TOOL_INVENTORY_FILE.$$"
+            if { echo "# path $PATH"; printf '%s\n' "${cached[@]:-}" "${probed[@]}" | awk 'NF'; } > "$tmp_file" 2>/dev/null; then
+                mv "$tmp_file" "$TOOL_INVENTORY_FILE"
+            else
+                rm -f "$tmp_file"
+            fi
+        fi
+    fi
+
+    INVENTORY_LINES=("${cached[@]:-}" "${probed[@]:-}")
+}
+
+# Function to look up a tool in the loaded inventory
+# Sets TOOL_STATUS, TOOL_VERSION and TOOL_PATH (empty if not loaded);
+# returns 1 if not loaded
+lookup_tool() {
+    local tool="$1"
+    local entry name probed_at
+
+    for entry in "${INVENTORY_LINES[@]:-}"; do
+        IFS=$'\t' read -r name TOOL_STATUS TOOL_VERSION TOOL_PATH probed_at <<< "$entry"
+        if [[ "$name" == "$tool" ]]; then
+            return 0
+        fi
+    done
+    TOOL_STATUS=""
+    TOOL_VERSION=""
+    TOOL_PATH=""
+    return 1
+}
+
 # Function to check a single tool
 check_tool() {
     local tool="$1"
     local required="$2"
     local os="$3"
 
-    if command_exists "$tool"; then
-        log_info "✓ $tool is installed"
+    if ! lookup_tool "$tool"; then
+        load_tool_inventory "$tool"
+        lookup_tool "$tool"
+    fi
+
+    if [[ -n "${MCP_TOOL_REPORT_FILE:-}" ]]; then
+        printf '%s\t%s\t%s\t%s\t%s\n' "$tool" "$required" "$TOOL_STATUS" "$TOOL_VERSION" \
+            "$TOOL_PATH" >> "$MCP_TOOL_REPORT_FILE"
+    fi
+
+    if [[ "$TOOL_STATUS" == "installed" ]]; then
+        log_info "✓ $tool is installed ($TOOL_VERSION, $TOOL_PATH)"
         return 0
     else
         if [[ "$required" == "true" ]]; then
@@ -143,64 +324,57 @@ check_tool() {
     fi
 }
 
+# Function to list the tools of a profile as "<tool>:<required>" pairs
+get_profile_tools() {
+    local profile="$1"
+
+    case "$profile" in
+        bash) echo "jq:true shellcheck:true" ;;
+        cicd) echo "docker:true jq:true shellcheck:true" ;;
+        docs) echo "jq:false shellcheck:false" ;;
+        infra) echo "terraform:true terragrunt:false ansible:true docker:true jq:true" ;;
+        python) echo "python:true uv:true" ;;
+        node) echo "node:true npx:true" ;;
+        all) echo "node:false npx:false python:false uv:false terraform:false terragrunt:false ansible:false docker:false jq:false shellcheck:false" ;;
+        *) return 1 ;;
+    esac
+}
+
 # Function to check tools for a specific profile
 check_profile_tools() {
     local profile="$1"
     local os="$2"
     local missing_required=0
 
+    local tool_specs
+    if ! tool_specs=$(get_profile_tools "$profile"); then
+        log_error "Unknown profile: $profile"
+        log_error "Available profiles: bash, cicd, docs, infra, python, node, all"
+        return 1
+    fi
+
     log_info "Checking tools for $profile profile..."
     echo
 
-    case "$profile" in
-        bash)
-            check_tool "jq" "true" "$os" || ((missing_required++))
-            check_tool "shellcheck" "true" "$os" || ((missing_required++))
-            ;;
-        cicd)
-            check_tool "docker" "true" "$os" || ((missing_required++))
-            check_tool "jq" "true" "$os" || ((missing_required++))
-            check_tool "shellcheck" "true" "$os" || ((missing_required++))
-            ;;
-        docs)
-            check_tool "jq" "false" "$os"
-            check_tool "shellcheck" "false" "$os"
-            ;;
-        infra)
-            check_tool "terraform" "true" "$os" || ((missing_required++))
-            check_tool "terragrunt" "false" "$os"
-            check_tool "ansible" "true" "$os" || ((missing_required++))
-            check_tool "docker" "true" "$os" || ((missing_required++))
-            check_tool "jq" "true" "$os" || ((missing_required++))
-            ;;
-        python)
-            check_tool "python" "true" "$os" || ((missing_required++))
-            check_tool "uv" "true" "$os" || ((missing_required++))
-            ;;
-        node)
-            check_tool "node" "true" "$os" || ((missing_required++))
-            check_tool "npx" "true" "$os" || ((missing_required++))
-            ;;
-        all)
-            log_info "Checking all tools..."
-            echo
-            check_tool "node" "false" "$os"
-            check_tool "npx" "false" "$os"
-            check_tool "python" "false" "$os"
-            check_tool "uv" "false" "$os"
-            check_tool "terraform" "false" "$os"
-            check_tool "terragrunt" "false" "$os"
-            check_tool "ansible" "false" "$os"
-            check_tool "docker" "false" "$os"
-            check_tool "jq" "false" "$os"
-            check_tool "shellcheck" "false" "$os"
-            ;;
-        *)
-            log_error "Unknown profile: $profile"
-            log_error "Available profiles: bash, cicd, docs, infra, python, node, all"
-            return 1
-            ;;
-    esac
+    if [[ "$profile" == "all" ]]; then
+        log_info "Checking all tools..."
+        echo
+    fi
+
+    # Tools already loaded for this run (e.g. by the all-profiles pass) are
+    # not loaded again, so --refresh probes each tool once per run
+    local spec
+    local tools=()
+    for spec in $tool_specs; do
+        lookup_tool "${spec%%:*}" || tools+=("${spec%%:*}")
+    done
+    if [[ ${#tools[@]} -gt 0 ]]; then
+        trace_span "tool inventory ($profile)" validate load_tool_inventory "${tools[@]}"
+    fi
+
+    for spec in $tool_specs; do
+        check_tool "${spec%%:*}" "${spec##*:}" "$os" || missing_required=$((missing_required + 1))
+    done
 
     echo
     if [[ $missing_required -gt 0 ]]; then
@@ -223,6 +397,7 @@ Validates presence of CLI tools required for different development profiles.
 
 OPTIONS:
   --profile, -p PROFILE  Specify the profile to check
+  --refresh             Re-probe every tool instead of using the inventory cache
   -h, --help            Show this help message
 
 PROFILES:
@@ -243,6 +418,12 @@ Examples:
   $0 all                # Check all tools (overview mode)
   $0                    # Check all profiles
 
+Tools are probed concurrently. Each tool's status, version and resolved path
+are cached per host in:
+  $TOOL_INVENTORY_FILE
+Entries are reused for TOOL_INVENTORY_TTL seconds (default: 3600) while PATH
+is unchanged and the recorded binary still exists.
+
 Exit codes:
   0 - All required tools are present
   1 - One or more required tools are missing
@@ -264,6 +445,10 @@ main() {
                 profile="$2"
                 shift 2
                 ;;
+            --refresh)
+                REFRESH_INVENTORY=true
+                shift
+                ;;
             -h|--help)
                 show_usage
                 exit 0
@@ -278,6 +463,8 @@ main() {
         esac
     done
 
+    trace_process_name "check-tools.sh"
+
     # Detect operating system
     local os
     os=$(detect_os)
@@ -289,6 +476,14 @@ main() {
         local overall_status=0
         local profiles=("bash" "cicd" "docs" "infra" "python" "node")
 
+        # Probe every tool once, concurrently, before reporting per profile
+        local spec
+        local all_tools=()
+        for spec in $(get_profile_tools all); do
+            all_tools+=("${spec%%:*}")
+        done
+        trace_span "tool inventory (all profiles)" validate load_tool_inventory "${all_tools[@]}"
+
         for p in "${profiles[@]}"; do
             if ! check_profile_tools "$p" "$os"; then
                 overall_status=1
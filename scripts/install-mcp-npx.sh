@@ -13,10 +13,41 @@
 # - Task Master: https://github.com/eyaltoledano/claude-task-master
 # - Context7: https://github.com/upstash/context7
 #
+# Packages are verified concurrently (MCP_INSTALL_JOBS or --jobs workers);
+# each package's output is captured and printed as one block, in order
+#
+# Verified metadata (version, tarball integrity, verification time) is cached per
+# package and revalidated after MCP_METADATA_TTL seconds. --registry selects the
+# registry, including a file:// directory of package documents for offline runs
+#
+# Set MCP_TRACE_FILE to append timed spans (each npm/npx call) to a trace file
+# Set MCP_PACKAGE_REPORT_FILE to append one "<package>\t<status>\t<version>" line
+# per package (status: cached, verified, downloaded, prefetched, unavailable or
+# failed); bootstrap.sh --non-interactive builds its JSON report from it
+#
 # Exits non-zero on failure
 
 set -euo pipefail  # Exit on error, undefined variables, and pipe failures
 
+# Maximum number of packages verified at the same time
+MCP_INSTALL_JOBS="${MCP_INSTALL_JOBS:-3}"
+
+# Registry to verify against: empty for npm's configured registry, an http(s) URL,
+# or file:///path/to/dir holding <package-name>.json registry documents
+MCP_NPM_REGISTRY="${MCP_NPM_REGISTRY:-}"
+
+# Package metadata cache; entries older than the TTL are revalidated
+MCP_METADATA_CACHE_DIR="${XDG_CACHE_HOME:-$HOME/.cache}/mcp-vscode-workflow/mcp-packages"
+MCP_METADATA_TTL="${MCP_METADATA_TTL:-86400}"
+MCP_OFFLINE="${MCP_OFFLINE:-false}"
+
+# Verify packages against registry metadata only, skipping the npx download test
+MCP_METADATA_ONLY="${MCP_METADATA_ONLY:-false}"
+
+# Prefetched MCP server installs, one directory per package version
+MCP_SERVER_CACHE_DIR="${MCP_SERVER_CACHE_DIR:-${XDG_CACHE_HOME:-$HOME/.cache}/mcp-vscode-workflow/mcp-servers}"
+MCP_PREFETCH=false
+
 # Colors for output
 RED='\033[0;31m'
 GREEN='\033[0;32m'
@@ -36,6 +67,19 @@ log_error() {
     echo -e "${RED}[ERROR]${NC} $1"
 }
 
+# Tracing helpers (trace_span, trace_process_name, ...) shared by the scripts
+SCRIPT_LIB_DIR="${BASH_SOURCE[0]%/*}/lib"
+[[ "${BASH_SOURCE[0]}" == */* ]] || SCRIPT_LIB_DIR="lib"
+# shellcheck source=lib/trace.sh
+source "$SCRIPT_LIB_DIR/trace.sh"
+
+# Function to record a package's outcome in MCP_PACKAGE_REPORT_FILE
+# Usage: report_package_status <package_name> <status> [version]
+report_package_status() {
+    [[ -n "${MCP_PACKAGE_REPORT_FILE:-}" ]] || return 0
+    printf '%s\t%s\t%s\n' "$1" "$2" "${3:--}" >> "$MCP_PACKAGE_REPORT_FILE"
+}
+
 # Function to check if a command exists
 command_exists() {
     command -v "$1" >/dev/null 2>&1
@@ -79,6 +123,149 @@ check_prerequisites() {
     log_info "Prerequisites check passed!"
 }
 
+# Function to print a package's cache file path
+# Scoped names are flattened so every package has a single file (@scope/name -> @scope__name)
+package_metadata_cache_file() {
+    local package_name="$1"
+    echo "$MCP_METADATA_CACHE_DIR/${package_name//\//__}.tsv"
+}
+
+# Function to print cached metadata for a package
+# Usage: get_cached_package_metadata <package_name> [any_age]
+# Prints "version<TAB>integrity<TAB>tarball<TAB>verified_at" and returns 0 when an
+# entry for the current registry exists and was verified within MCP_METADATA_TTL
+# seconds (or at any time when any_age is "true")
+get_cached_package_metadata() {
+    local package_name="$1"
+    local any_age="${2:-false}"
+    local cache_file
+    cache_file=$(package_metadata_cache_file "$package_name")
+
+    [[ -f "$cache_file" ]] || return 1
+
+    local version integrity tarball verified_at registry
+    IFS=$'\t' read -r version integrity tarball verified_at registry < "$cache_file" || return 1
+    [[ -n "$version" && "$registry" == "$MCP_NPM_REGISTRY" ]] || return 1
+    [[ "$verified_at" =~ ^[0-9]+$ ]] || return 1
+
+    if [[ "$any_age" != "true" ]]; then
+        local now
+        now=$(date +%s)
+        [[ $((now - verified_at)) -le $MCP_METADATA_TTL ]] || return 1
+    fi
+
+    printf '%s\t%s\t%s\t%s\n' "$version" "$integrity" "$tarball" "$verified_at"
+}
+
+# Function to record verified metadata for a package
+# Usage: store_package_metadata <package_name> <version> <integrity> <tarball>
+store_package_metadata() {
+    local package_name="$1"
+    local cache_file
+    cache_file=$(package_metadata_cache_file "$package_name")
+
+    mkdir -p "$MCP_METADATA_CACHE_DIR" 2>/dev/null || return 0
+
+    # Workers run concurrently, so write to a private file and rename into place
+    local tmp_file="$cache_file.$$"
+    if printf '%s\t%s\t%s\t%s\t%s\n' "$2" "$3" "$4" "$(date +%s)" "$MCP_NPM_REGISTRY" \
+        > "$tmp_file" 2>/dev/null; then
+        mv -f "$tmp_file" "$cache_file" 2>/dev/null || rm -f "$tmp_file"
+    fi
+}
+
+# Function to extract "version<TAB>integrity<TAB>tarball" from package metadata JSON
+# Accepts either `npm view --json` output or a registry package document
+# (the JSON served by https://registry.npmjs.org/<name>)
+parse_package_metadata() {
+    node -e '
+        let input = "";
+        process.stdin.on("data", (chunk) => (input += chunk));
+        process.stdin.on("end", () => {
+            let meta;
+            try {
+                meta = JSON.parse(input);
+            } catch (err) {
+                process.exit(1);
+            }
+            let version, dist;
+            if (meta && meta["dist-tags"]) {
+                version = meta["dist-tags"].latest;
+                dist = ((meta.versions || {})[version] || {}).dist || {};
+            } else if (meta) {
+                version = meta.version;
+                dist = {
+                    integrity: meta["dist.integrity"],
+                    tarball: meta["dist.tarball"],
+                };
+            }
+            if (typeof version !== "string" || !version) process.exit(1);
+            console.log([version, dist.integrity || "-", dist.tarball || "-"].join("\t"));
+        });
+    '
+}
+
+# Function to query the configured registry for a package's metadata
+# Prints "version<TAB>integrity<TAB>tarball"; returns non-zero if the package
+# is unknown or the registry cannot be reached
+query_package_metadata() {
+    local package_name="$1"
+
+    if [[ "$MCP_NPM_REGISTRY" == file://* ]]; then
+        local document="${MCP_NPM_REGISTRY#file://}/$package_name.json"
+        [[ -f "$document" ]] || return 1
+        parse_package_metadata < "$document"
+        return
+    fi
+
+    # One registry round trip for everything we record
+    local registry_args=()
+    if [[ -n "$MCP_NPM_REGISTRY" ]]; then
+        registry_args=(--registry "$MCP_NPM_REGISTRY")
+    fi
+    trace_span "npm view $package_name" npm npm view ${registry_args[@]+"${registry_args[@]}"} \
+        "$package_name" version dist.integrity dist.tarball --json 2>/dev/null | parse_package_metadata
+}
+
+# Function to resolve a package's metadata from the cache, the registry, or
+# (when the registry is unreachable) a stale cache entry
+# Sets PACKAGE_METADATA ("version<TAB>integrity<TAB>tarball<TAB>verified_at") and
+# PACKAGE_METADATA_FROM_CACHE; returns non-zero if the package cannot be resolved
+resolve_package_metadata() {
+    local package_name="$1"
+    local display_name="$2"
+
+    PACKAGE_METADATA_FROM_CACHE=true
+    if PACKAGE_METADATA=$(get_cached_package_metadata "$package_name"); then
+        log_info "Using cached metadata for $display_name (verified within ${MCP_METADATA_TTL}s)"
+        return 0
+    fi
+
+    if [[ "$MCP_OFFLINE" == "true" && "$MCP_NPM_REGISTRY" != file://* ]]; then
+        if PACKAGE_METADATA=$(get_cached_package_metadata "$package_name" true); then
+            log_warn "Offline mode: using cached metadata for $display_name past its TTL"
+            return 0
+        fi
+        log_warn "Offline mode: no cached metadata for $display_name"
+        log_warn "Run once with registry access or point --registry at a local registry"
+        return 1
+    fi
+
+    log_info "Querying ${MCP_NPM_REGISTRY:-npm} registry for $display_name..."
+    if PACKAGE_METADATA=$(query_package_metadata "$package_name"); then
+        PACKAGE_METADATA_FROM_CACHE=false
+        return 0
+    fi
+    if PACKAGE_METADATA=$(get_cached_package_metadata "$package_name" true); then
+        log_warn "Registry lookup failed, using cached metadata for $display_name"
+        return 0
+    fi
+
+    log_warn "$display_name package not found on npm registry"
+    log_warn "This may be a placeholder name or the package may not be published yet"
+    return 1
+}
+
 # Function to install an MCP package via npx
 install_mcp_package() {
     local package_name="$1"
@@ -86,56 +273,221 @@ install_mcp_package() {
 
     log_info "Checking availability of $display_name ($package_name)..."
 
-    # First, check if the package exists on npm
-    log_info "Querying npm registry for $display_name..."
-    if npm view "$package_name" version >/dev/null 2>&1; then
-        local package_version
-        package_version=$(npm view "$package_name" version 2>/dev/null || echo "unknown")
-        log_info "$display_name package found on npm registry (version: $package_version)"
-
-        # For MCP servers, we just need to verify they can be downloaded
-        # We don't need to execute them since they're designed to run as persistent processes
-        log_info "Verifying $display_name can be downloaded via npx..."
-
-        # Special handling for task-master-ai which requires specific npx format
-        local npx_args
-        if [[ "$package_name" == "task-master-ai" ]]; then
-            npx_args="--package=task-master-ai task-master-ai"
-            log_info "Using Task Master specific npx format"
-        else
-            npx_args="$package_name"
-            log_info "Using standard npx format"
-        fi
+    if ! resolve_package_metadata "$package_name" "$display_name"; then
+        # Don't fail here as this might be expected for some MCP servers
+        report_package_status "$package_name" unavailable
+        return 0
+    fi
 
-        # Try a quick download test with shorter timeout
-        if command_exists timeout; then
-            log_info "Testing package download (30s timeout)..."
-            if timeout 30s npx --yes "$npx_args" --version >/dev/null 2>&1; then
-                log_info "✓ $display_name successfully downloaded and verified"
-            elif timeout 30s npx --yes "$npx_args" >/dev/null 2>&1; then
-                log_info "✓ $display_name successfully downloaded (no --version flag)"
-            else
-                log_info "Package download test completed (timeout expected for MCP servers)"
-                log_info "✓ $display_name is available on npm and ready for MCP use"
-            fi
+    local package_version integrity tarball verified_at
+    IFS=$'\t' read -r package_version integrity tarball verified_at <<< "$PACKAGE_METADATA"
+    log_info "$display_name package found on npm registry (version: $package_version)"
+    log_info "Integrity: $integrity"
+
+    if [[ "$PACKAGE_METADATA_FROM_CACHE" == "true" ]]; then
+        log_info "✓ $display_name verified from metadata cache (last verified $(($(date +%s) - verified_at))s ago)"
+        report_package_status "$package_name" cached "$package_version"
+        log_info "Finished processing $display_name"
+        return 0
+    fi
+
+    # A local registry stand-in is metadata only; there is nothing for npx to download
+    if [[ "$MCP_NPM_REGISTRY" == file://* ]]; then
+        store_package_metadata "$package_name" "$package_version" "$integrity" "$tarball"
+        log_info "✓ $display_name verified against local registry ${MCP_NPM_REGISTRY#file://}"
+        report_package_status "$package_name" verified "$package_version"
+        log_info "Finished processing $display_name"
+        return 0
+    fi
+
+    if [[ "$MCP_METADATA_ONLY" == "true" ]]; then
+        store_package_metadata "$package_name" "$package_version" "$integrity" "$tarball"
+        log_info "✓ $display_name verified on npm registry (download test skipped)"
+        report_package_status "$package_name" verified "$package_version"
+        log_info "Finished processing $display_name"
+        return 0
+    fi
+
+    # For MCP servers, we just need to verify they can be downloaded
+    # We don't need to execute them since they're designed to run as persistent processes
+    log_info "Verifying $display_name can be downloaded via npx..."
+
+    # Special handling for task-master-ai which requires specific npx format
+    local npx_args
+    if [[ "$package_name" == "task-master-ai" ]]; then
+        npx_args="--package=task-master-ai task-master-ai"
+        log_info "Using Task Master specific npx format"
+    else
+        npx_args="$package_name"
+        log_info "Using standard npx format"
+    fi
+
+    # Try a quick download test with shorter timeout
+    local package_status=verified
+    if command_exists timeout; then
+        log_info "Testing package download (30s timeout)..."
+        if trace_span "npx $package_name --version" npx \
+            timeout 30s npx --yes "$npx_args" --version >/dev/null 2>&1; then
+            log_info "✓ $display_name successfully downloaded and verified"
+            package_status=downloaded
+        elif trace_span "npx $package_name" npx timeout 30s npx --yes "$npx_args" >/dev/null 2>&1; then
+            log_info "✓ $display_name successfully downloaded (no --version flag)"
+            package_status=downloaded
         else
-            # Just verify the package exists and is installable
-            log_info "✓ $display_name verified on npm registry and ready for npx usage"
+            log_info "Package download test completed (timeout expected for MCP servers)"
+            log_info "✓ $display_name is available on npm and ready for MCP use"
         fi
     else
-        log_warn "$display_name package not found on npm registry"
-        log_warn "This may be a placeholder name or the package may not be published yet"
-        # Don't fail here as this might be expected for some MCP servers
-        return 0
+        # Just verify the package exists and is installable
+        log_info "✓ $display_name verified on npm registry and ready for npx usage"
     fi
 
+    store_package_metadata "$package_name" "$package_version" "$integrity" "$tarball"
+    report_package_status "$package_name" "$package_status" "$package_version"
     log_info "Finished processing $display_name"
 }
 
+# Function to print the current time in milliseconds
+now_ms() {
+    if [[ -n "${EPOCHREALTIME:-}" ]]; then
+        local micros="${EPOCHREALTIME/[.,]/}"
+        echo "${micros:0:${#micros}-3}"
+    else
+        echo "$(($(date +%s) * 1000))"
+    fi
+}
+
+# Function to print the launch command of a prefetched MCP server
+# Prefers the bin named after the package, falling back to its first bin
+prefetched_server_command() {
+    local install_dir="$1"
+    local package_name="$2"
+    local bin_name
+    bin_name=$(node -e '
+        const pkg = require(process.argv[1]);
+        const base = pkg.name.split("/").pop();
+        const bins = typeof pkg.bin === "string" ? [base] : Object.keys(pkg.bin || {});
+        console.log(bins.includes(base) ? base : bins[0] || "");
+    ' "$install_dir/node_modules/$package_name/package.json" 2>/dev/null) || return 1
+    [[ -n "$bin_name" ]] || return 1
+    echo "$install_dir/node_modules/.bin/$bin_name"
+}
+
+# Function to install an MCP package at its pinned version into the server cache
+# Each version lives in its own directory (<name>@<version>) and <name> links to
+# the latest prefetched one, so MCP clients can launch it without npx
+prefetch_mcp_package() {
+    local package_name="$1"
+    local display_name="$2"
+
+    log_info "Prefetching $display_name ($package_name)..."
+
+    if ! resolve_package_metadata "$package_name" "$display_name"; then
+        log_error "Cannot prefetch $display_name without its package metadata"
+        report_package_status "$package_name" failed
+        return 1
+    fi
+
+    local package_version integrity tarball verified_at
+    IFS=$'\t' read -r package_version integrity tarball verified_at <<< "$PACKAGE_METADATA"
+
+    local cache_name="${package_name//\//__}"
+    local install_dir="$MCP_SERVER_CACHE_DIR/$cache_name@$package_version"
+
+    if [[ -f "$install_dir/.complete" ]]; then
+        log_info "✓ $display_name $package_version already prefetched"
+    else
+        # A local registry stand-in can name a tarball on disk; otherwise install
+        # the pinned version from the registry
+        local install_spec="$package_name@$package_version"
+        if [[ "$tarball" == file://* && -f "${tarball#file://}" ]]; then
+            install_spec="${tarball#file://}"
+        elif [[ "$MCP_NPM_REGISTRY" == file://* ]]; then
+            log_error "Local registry has no tarball on disk for $display_name $package_version"
+            report_package_status "$package_name" failed "$package_version"
+            return 1
+        fi
+
+        mkdir -p "$MCP_SERVER_CACHE_DIR"
+        local staging_dir start_ms install_output
+        staging_dir=$(mktemp -d "$MCP_SERVER_CACHE_DIR/.staging.XXXXXX")
+        start_ms=$(now_ms)
+        log_info "Installing $install_spec..."
+        if ! install_output=$(trace_span "npm install $install_spec" npm \
+            npm install --prefix "$staging_dir" --no-save --no-audit \
+            --no-fund --omit=dev --loglevel=error "$install_spec" 2>&1); then
+            log_error "Failed to install $display_name $package_version"
+            echo "$install_output"
+            rm -rf "$staging_dir"
+            report_package_status "$package_name" failed "$package_version"
+            return 1
+        fi
+
+        # Publish the finished install in one rename so launches never see a partial tree
+        touch "$staging_dir/.complete"
+        rm -rf "$install_dir"
+        mv "$staging_dir" "$install_dir"
+
+        local bytes
+        bytes=$(du -sk "$install_dir" | awk '{ print $1 * 1024 }')
+        log_info "✓ $display_name $package_version prefetched: $bytes bytes in $(($(now_ms) - start_ms))ms"
+
+        if [[ "$PACKAGE_METADATA_FROM_CACHE" == "false" ]]; then
+            store_package_metadata "$package_name" "$package_version" "$integrity" "$tarball"
+        fi
+    fi
+
+    ln -sfn "$cache_name@$package_version" "$MCP_SERVER_CACHE_DIR/$cache_name"
+
+    local server_command
+    if server_command=$(prefetched_server_command "$MCP_SERVER_CACHE_DIR/$cache_name" "$package_name"); then
+        log_info "Launch command: $server_command"
+    else
+        log_warn "No executable found in the $display_name package"
+    fi
+    report_package_status "$package_name" prefetched "$package_version"
+    log_info "Finished processing $display_name"
+}
+
+# Function to wait for a package verification job and print its output
+# Usage: report_package_result <index> <total> <display_name> <pid> <log_file>
+# Returns the exit status of the verification job
+report_package_result() {
+    local index="$1"
+    local total="$2"
+    local display_name="$3"
+    local pid="$4"
+    local log_file="$5"
+    local status=0
+
+    wait "$pid" || status=$?
+
+    echo
+    log_info "Processing package $index of $total: $display_name"
+    log_info "=================================================="
+    cat "$log_file"
+    log_info "Completed $display_name ($index/$total)"
+
+    return $status
+}
+
 # Main installation function
 install_mcp_packages() {
+    local max_jobs="$MCP_INSTALL_JOBS"
+    if ! [[ "$max_jobs" =~ ^[1-9][0-9]*$ ]]; then
+        log_warn "Invalid worker count '$max_jobs', verifying packages one at a time"
+        max_jobs=1
+    fi
+
+    local worker=install_mcp_package
+    if [[ "$MCP_PREFETCH" == "true" ]]; then
+        worker=prefetch_mcp_package
+        log_info "Prefetching MCP servers into $MCP_SERVER_CACHE_DIR"
+    fi
+
     log_info "Starting MCP package verification..."
     log_info "This process may take several minutes as packages are downloaded and cached"
+    log_info "Verifying packages with up to $max_jobs concurrent worker(s)"
 
     # Array of packages to verify: package_name display_name
     # Note: task-master-ai requires special npx format: --package=task-master-ai task-master-ai
@@ -147,23 +499,39 @@ install_mcp_packages() {
 
     local failed_packages=()
     local total_packages=${#packages[@]}
-    local current_package=0
-
-    # Verify each package
-    for package_info in "${packages[@]}"; do
-        read -r package_name display_name <<< "$package_info"
-        current_package=$((current_package + 1))
+    local work_dir
+    work_dir=$(mktemp -d "${TMPDIR:-/tmp}/install-mcp.XXXXXX")
+
+    # Verify packages in background workers, keeping at most max_jobs running;
+    # results are reported in package order as each worker finishes
+    local pids=()
+    local display_names=()
+    local next_report=0
+    local i package_name display_name
+    for i in "${!packages[@]}"; do
+        if [[ $((i - next_report)) -ge $max_jobs ]]; then
+            if ! report_package_result "$((next_report + 1))" "$total_packages" \
+                "${display_names[$next_report]}" "${pids[$next_report]}" "$work_dir/$next_report.log"; then
+                failed_packages+=("${display_names[$next_report]}")
+            fi
+            next_report=$((next_report + 1))
+        fi
 
-        echo
-        log_info "Processing package $current_package of $total_packages: $display_name"
-        log_info "=================================================="
+        read -r package_name display_name <<< "${packages[$i]}"
+        display_names+=("$display_name")
+        trace_span "$display_name" package "$worker" "$package_name" "$display_name" \
+            > "$work_dir/$i.log" 2>&1 &
+        pids+=("$!")
+    done
 
-        if ! install_mcp_package "$package_name" "$display_name"; then
-            failed_packages+=("$display_name")
+    while [[ $next_report -lt $total_packages ]]; do
+        if ! report_package_result "$((next_report + 1))" "$total_packages" \
+            "${display_names[$next_report]}" "${pids[$next_report]}" "$work_dir/$next_report.log"; then
+            failed_packages+=("${display_names[$next_report]}")
         fi
-
-        log_info "Completed $display_name ($current_package/$total_packages)"
+        next_report=$((next_report + 1))
     done
+    rm -rf "$work_dir"
 
     echo
     log_info "=================================================="
@@ -179,12 +547,91 @@ install_mcp_packages() {
     fi
 
     log_info "All MCP packages verified successfully!"
-    log_info "Packages are available on npm and ready for MCP client configuration"
+    if [[ "$MCP_PREFETCH" == "true" ]]; then
+        log_info "Servers are installed in $MCP_SERVER_CACHE_DIR; use the launch commands above"
+        log_info "in MCP client configuration to start them without a registry round-trip"
+    else
+        log_info "Packages are available on npm and ready for MCP client configuration"
+    fi
     log_info "Note: MCP servers are designed to run as persistent processes in MCP clients"
 }
 
+# Function to show usage
+show_usage() {
+    cat << EOF
+Usage: $0 [OPTIONS]
+
+Verifies the MCP packages (Sequential Thinking, Task Master, Context7) via npm/npx.
+
+OPTIONS:
+  --jobs, -j N     Verify up to N packages concurrently (default: $MCP_INSTALL_JOBS,
+                   or the MCP_INSTALL_JOBS environment variable)
+  --registry URL   Registry to verify against (or MCP_NPM_REGISTRY); use
+                   file:///path/to/dir for a local registry of <package>.json documents
+  --refresh        Revalidate cached package metadata regardless of its age
+  --prefetch       Install the pinned packages into the shared server cache
+                   ($MCP_SERVER_CACHE_DIR)
+                   and report bytes and time per package
+  --offline        Never contact a network registry; use cached metadata of any
+                   age (or MCP_OFFLINE=true)
+  --metadata-only  Verify registry metadata only and skip the npx download test
+                   (or MCP_METADATA_ONLY=true)
+  -h, --help       Show this help message
+EOF
+}
+
 # Main script execution
 main() {
+    while [[ $# -gt 0 ]]; do
+        case $1 in
+            --jobs|-j)
+                MCP_INSTALL_JOBS="$2"
+                shift 2
+                ;;
+            --registry)
+                MCP_NPM_REGISTRY="$2"
+                shift 2
+                ;;
+            --refresh)
+                MCP_METADATA_TTL=-1
+                shift
+                ;;
+            --offline)
+                MCP_OFFLINE=true
+                shift
+                ;;
+            --prefetch)
+                MCP_PREFETCH=true
+                shift
+                ;;
+            --metadata-only)
+                MCP_METADATA_ONLY=true
+                shift
+                ;;
+            -h|--help)
+                show_usage
+                exit 0
+                ;;
+            *)
+                log_error "Unknown option: $1"
+                show_usage
+                exit 1
+                ;;
+        esac
+    done
+
+    if ! [[ "$MCP_METADATA_TTL" =~ ^-?[0-9]+$ ]]; then
+        log_warn "Invalid MCP_METADATA_TTL '$MCP_METADATA_TTL', revalidating all packages"
+        MCP_METADATA_TTL=-1
+    fi
+
+    # npx downloads from the same registry the metadata was verified against
+    if [[ -n "$MCP_NPM_REGISTRY" && "$MCP_NPM_REGISTRY" != file://* ]]; then
+        export npm_config_registry="$MCP_NPM_REGISTRY"
+    fi
+
+    trace_process_name "install-mcp-npx.sh"
+
     echo "============================================"
     echo "MCP NPX Package Installer"
     echo "Installing: Sequential Thinking, Task Master, Context7"
@@ -0,0 +1,65 @@
+# shellcheck shell=bash
+
+# lib/trace.sh
+# Tracing helpers sourced by bootstrap.sh, check-tools.sh and install-mcp-npx.sh
+#
+# When MCP_TRACE_FILE is set, timed spans are appended to it as JSON
+# lines in the Chrome trace-event format ("ph":"X" complete events with
+# microsecond "ts"/"dur"), one line per span
+
+# Function to store the current time in microseconds in the named variable
+trace_clock() {
+    if [[ -n "${EPOCHREALTIME:-}" ]]; then
+        printf -v "$1" '%s' "${EPOCHREALTIME/[.,]/}"
+    else
+        # No microsecond clock before bash 5; GNU date has nanoseconds
+        local now
+        now=$(date +%s%N)
+        if [[ "$now" =~ ^[0-9]+$ ]]; then
+            printf -v "$1" '%s' "${now:0:${#now}-3}"
+        else
+            printf -v "$1" '%s000000' "$(date +%s)"
+        fi
+    fi
+}
+
+# Function to append a complete span to the trace file
+# Usage: trace_event <name> <category> <start_us> <end_us> [exit_status]
+trace_event() {
+    local name="${1//\\/\\\\}"
+    name="${name//\"/\\\"}"
+    printf '{"name":"%s","cat":"%s","ph":"X","ts":%s,"dur":%s,"pid":%s,"tid":%s,"args":{"status":%s}}\n' \
+        "$name" "$2" "$3" "$(($4 - $3))" "$$" "${BASHPID:-$$}" "${5:-0}" >> "$MCP_TRACE_FILE"
+}
+
+# Function to run a command as a traced span, preserving its exit status
+# Usage: trace_span <name> <category> <command> [args...]
+# The command runs exactly as if called directly: it is not run in a
+# condition, so under set -e a failing step inside it still aborts the
+# script (and the span is not recorded) unless trace_span itself is tested
+trace_span() {
+    local span_name="$1"
+    local span_category="$2"
+    shift 2
+
+    if [[ -z "${MCP_TRACE_FILE:-}" ]]; then
+        "$@"
+        return
+    fi
+
+    local span_start span_end span_status
+    trace_clock span_start
+    "$@"
+    span_status=$?
+    trace_clock span_end
+    trace_event "$span_name" "$span_category" "$span_start" "$span_end" "$span_status"
+    return $span_status
+}
+
+# Function to label this script's process in trace viewers
+trace_process_name() {
+    [[ -n "${MCP_TRACE_FILE:-}" ]] || return 0
+    printf '{"name":"process_name","ph":"M","pid":%s,"args":{"name":"%s","host":"%s"}}\n' \
+        "$$" "$1" "${HOSTNAME:-$(uname -n)}" >> "$MCP_TRACE_FILE"
+}
+
@@ -0,0 +1,9 @@
+"""
+MCP VS Code Workflow helpers.
+
+Python support code for the workflow scripts. Modules are imported directly
+(e.g. ``mcp_vscode_workflow.config``) so each command-line entry point only
+loads what it needs.
+"""
+
+__version__ = "0.1.0"
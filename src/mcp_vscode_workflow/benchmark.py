@@ -0,0 +1,607 @@
+"""
+Benchmark bootstrap detection against synthetic workspaces of scalable size.
+
+Workspaces are generated from a few project kinds (python, terraform, docs,
+cicd, mixed) at sizes from tens to hundreds of thousands of files, including
+deep ``node_modules``, ``venv`` and ``.terraform`` trees like real checkouts.
+Each one is generated once and reused while its size and generator version
+match.
+
+The scripts run with ``MCP_TRACE_FILE`` set, and timings come from their
+trace spans:
+
+- ``detect``: ``bootstrap.sh`` auto-detect, cancelled at the recommendation
+  prompt. One ``--rescan`` run (cold) and one run reusing the detection index
+  (warm) per repeat, plus the detection reasoning output on its own
+- ``tools``: ``check-tools.sh --refresh`` for the recommended profile
+- ``bootstrap``: a full ``bootstrap.sh --profile <profile>`` run, which
+  installs MCP packages and opens VS Code (not run by default)
+
+Results are written as JSON with the median of every metric. Comparing them
+against a stored baseline flags metrics that slowed down by more than a
+relative threshold (and an absolute noise floor).
+
+Usage: python -m mcp_vscode_workflow.benchmark run|compare|generate ...
+"""
+
+import argparse
+import json
+import os
+import platform
+import re
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence, Tuple, Union
+
+PathLike = Union[str, "os.PathLike[str]"]
+
+# Bump when generated workspaces change shape to regenerate cached ones
+GENERATOR_VERSION = 1
+RESULTS_VERSION = 1
+
+WORKSPACE_MARKER = ".bench-workspace.json"
+
+# Files per generated directory, and subdirectories per directory level
+FILES_PER_DIR = 16
+DIR_FANOUT = 8
+
+DEFAULT_SIZES = (10, 1000, 10000)
+FULL_SIZES = (10, 1000, 10000, 100000, 500000)
+SCENARIOS = ("detect", "tools", "bootstrap")
+DEFAULT_SCENARIOS = ("detect", "tools")
+
+DEFAULT_REPEAT = 3
+DEFAULT_THRESHOLD = 0.2
+DEFAULT_MIN_DELTA_MS = 5.0
+DEFAULT_TIMEOUT = 600
+
+DEFAULT_WORK_DIR = Path(tempfile.gettempdir()) / "mcp-vscode-workflow-benchmark"
+DEFAULT_SCRIPTS_DIR = Path(__file__).resolve().parents[2] / "scripts"
+
+GITHUB_WORKFLOW = "name: CI\non: [push]\njobs:\n  test:\n    runs-on: ubuntu-latest\n"
+
+ANSI_ESCAPE = re.compile(r"\x1b\[[0-9;]*m")
+RECOMMENDATION_PATTERN = re.compile(r"we recommend: (\w+)")
+
+
+class BenchmarkError(Exception):
+    """Raised when a benchmark cannot be run or its results cannot be read."""
+
+
+class WorkspaceKind(NamedTuple):
+    """Shape of a synthetic workspace."""
+
+    profile: str
+    # Files written at fixed paths, with their contents
+    markers: Dict[str, str]
+    # (directory, extension) pairs the source files are spread over
+    sources: Tuple[Tuple[str, str], ...]
+    # Dependency tree layout -> share of the workspace's files
+    dependencies: Dict[str, float]
+
+
+WORKSPACE_KINDS = {
+    "python": WorkspaceKind(
+        profile="python",
+        markers={
+            "requirements.txt": "requests\n",
+            "pyproject.toml": '[project]\nname = "bench"\n',
+        },
+        sources=(("src/bench", ".py"), ("tests", ".py")),
+        dependencies={"venv": 0.4},
+    ),
+    "terraform": WorkspaceKind(
+        profile="infra",
+        markers={"main.tf": "", "variables.tf": ""},
+        sources=(("modules", ".tf"), ("live", ".hcl")),
+        dependencies={".terraform": 0.3},
+    ),
+    "docs": WorkspaceKind(
+        profile="docs",
+        markers={"mkdocs.yml": "site_name: bench\n", "README.md": "# Bench\n"},
+        sources=(("docs", ".md"), ("docs/reference", ".rst")),
+        dependencies={"node_modules": 0.3},
+    ),
+    "cicd": WorkspaceKind(
+        profile="cicd",
+        markers={
+            ".github/workflows/ci.yml": GITHUB_WORKFLOW,
+            "Jenkinsfile": "pipeline {}\n",
+            "Dockerfile": "FROM scratch\n",
+        },
+        sources=(("deploy", ".yaml"), ("ci/scripts", ".sh")),
+        dependencies={},
+    ),
+    "mixed": WorkspaceKind(
+        profile="python",
+        markers={
+            "requirements.txt": "requests\n",
+            "package.json": '{"name": "bench"}\n',
+            "main.tf": "",
+            "README.md": "# Bench\n",
+            ".github/workflows/ci.yml": GITHUB_WORKFLOW,
+        },
+        sources=(
+            ("services/api", ".py"),
+            ("web/src", ".ts"),
+            ("infra", ".tf"),
+            ("docs", ".md"),
+            ("scripts", ".sh"),
+        ),
+        dependencies={"node_modules": 0.3, "venv": 0.2},
+    ),
+}
+
+
+class Regression(NamedTuple):
+    """A metric that got slower than its baseline allows."""
+
+    case: str
+    metric: str
+    baseline_ms: float
+    current_ms: float
+
+    @property
+    def change(self) -> float:
+        """Relative slowdown, e.g. 0.5 for 50% slower."""
+        return self.current_ms / self.baseline_ms - 1 if self.baseline_ms else 0.0
+
+
+def _nested_dirs(index: int, prefix: str) -> List[str]:
+    """Spread directory ``index`` over a tree ``DIR_FANOUT`` entries wide."""
+    parts = []
+    while True:
+        parts.append(f"{prefix}{index % DIR_FANOUT}")
+        index //= DIR_FANOUT
+        if index == 0:
+            return list(reversed(parts))
+
+
+def _dependency_path(tree: str, index: int) -> str:
+    """Return the relative path of the ``index``-th file in a dependency tree."""
+    package = index // FILES_PER_DIR
+    if tree == "node_modules":
+        # Nested node_modules, as left behind by conflicting package versions
+        packages = "/node_modules/".join(_nested_dirs(package, "pkg-"))
+        return f"node_modules/{packages}/lib/module{index}.js"
+    if tree == "venv":
+        packages = "/".join(_nested_dirs(package, "pkg"))
+        return f"venv/lib/python3.11/site-packages/{packages}/module{index}.py"
+    providers = "/".join(_nested_dirs(package, "provider"))
+    return f"{tree}/providers/registry.terraform.io/{providers}/file{index}.tf"
+
+
+def _source_path(directory: str, extension: str, index: int) -> str:
+    """Return the relative path of the ``index``-th file in a source tree."""
+    nested = "/".join(_nested_dirs(index // FILES_PER_DIR, "pkg"))
+    return f"{directory}/{nested}/file{index}{extension}"
+
+
+def workspace_files(kind: str, files: int) -> Dict[str, str]:
+    """Return ``{relative path: contents}`` for a synthetic workspace."""
+    try:
+        spec = WORKSPACE_KINDS[kind]
+    except KeyError:
+        raise BenchmarkError(f"Unknown workspace kind: {kind}") from None
+
+    layout = dict(list(spec.markers.items())[:files])
+    remaining = files - len(layout)
+    for tree, share in spec.dependencies.items():
+        count = min(int(files * share), remaining)
+        for index in range(count):
+            layout[_dependency_path(tree, index)] = ""
+        remaining -= count
+
+    for index in range(remaining):
+        directory, extension = spec.sources[index % len(spec.sources)]
+        layout[_source_path(directory, extension, index)] = f"# file {index}\n"
+    return layout
+
+
+def generate_workspace(root: PathLike, kind: str, files: int) -> Path:
+    """Create (or reuse) a synthetic workspace of ``files`` files at ``root``."""
+    root = Path(root)
+    description = {"version": GENERATOR_VERSION, "kind": kind, "files": files}
+    marker = root / WORKSPACE_MARKER
+    try:
+        if json.loads(marker.read_text(encoding="utf-8")) == description:
+            return root
+    except (OSError, ValueError):
+        pass
+
+    layout = workspace_files(kind, files)
+    if root.exists():
+        shutil.rmtree(root)
+    created = set()
+    for relative_path, contents in layout.items():
+        path = root / relative_path
+        if path.parent not in created:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            created.add(path.parent)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(contents)
+
+    # Written last so an interrupted generation is redone
+    marker.write_text(json.dumps(description), encoding="utf-8")
+    return root
+
+
+def read_trace(trace_file: PathLike) -> Dict[str, float]:
+    """Return the total duration in milliseconds of every span in a trace."""
+    spans: Dict[str, float] = {}
+    try:
+        with open(trace_file, "r", encoding="utf-8") as f:
+            for line in f:
+                event = json.loads(line)
+                if event.get("ph") == "X":
+                    name = event["name"]
+                    spans[name] = spans.get(name, 0.0) + event["dur"] / 1000
+    except FileNotFoundError:
+        pass
+    return spans
+
+
+class ScriptRun(NamedTuple):
+    """Outcome of one traced script run."""
+
+    status: int
+    wall_ms: float
+    spans: Dict[str, float]
+    output: str
+
+
+class Runner:
+    """Runs the workflow scripts with tracing enabled."""
+
+    def __init__(
+        self,
+        scripts_dir: PathLike = DEFAULT_SCRIPTS_DIR,
+        timeout: int = DEFAULT_TIMEOUT,
+    ) -> None:
+        self.scripts_dir = Path(scripts_dir)
+        self.timeout = timeout
+        if not (self.scripts_dir / "bootstrap.sh").is_file():
+            raise BenchmarkError(f"bootstrap.sh not found in {self.scripts_dir}")
+
+    def run(
+        self, script: str, args: Sequence[str], cwd: Path, stdin: str = ""
+    ) -> ScriptRun:
+        """Run a script in ``cwd`` and collect its trace spans."""
+        with tempfile.TemporaryDirectory(prefix="mcp-bench-") as trace_dir:
+            trace_file = Path(trace_dir) / "trace.jsonl"
+            env = dict(os.environ, MCP_TRACE_FILE=str(trace_file))
+            start = time.perf_counter()
+            try:
+                result = subprocess.run(
+                    ["bash", str(self.scripts_dir / script), *args],
+                    cwd=str(cwd),
+                    input=stdin,
+                    capture_output=True,
+                    text=True,
+                    timeout=self.timeout,
+                    env=env,
+                )
+            except subprocess.TimeoutExpired:
+                raise BenchmarkError(
+                    f"{script} {' '.join(args)} timed out after {self.timeout}s"
+                ) from None
+            wall_ms = (time.perf_counter() - start) * 1000
+            output = ANSI_ESCAPE.sub("", result.stdout + result.stderr)
+            return ScriptRun(result.returncode, wall_ms, read_trace(trace_file), output)
+
+
+def _measure_detect(runner: Runner, workspace: Path) -> Tuple[Dict[str, float], str]:
+    """Time a cold and a warm auto-detect run; return metrics and recommendation."""
+    # "4" cancels at the recommendation prompt, after detection and reasoning
+    cold = runner.run("bootstrap.sh", ["--rescan"], workspace, stdin="4\n")
+    warm = runner.run("bootstrap.sh", [], workspace, stdin="4\n")
+    match = RECOMMENDATION_PATTERN.search(warm.output)
+    metrics = {
+        "autodetect_cold_ms": cold.spans.get("auto-detect", cold.wall_ms),
+        "autodetect_warm_ms": warm.spans.get("auto-detect", warm.wall_ms),
+        "scan_cold_ms": cold.spans.get("scan workspace", 0.0),
+        "scan_warm_ms": warm.spans.get("scan workspace", 0.0),
+        "reasoning_ms": warm.spans.get("detection reasoning", 0.0),
+    }
+    return metrics, match.group(1) if match else ""
+
+
+def _measure_tools(runner: Runner, workspace: Path, profile: str) -> Dict[str, float]:
+    """Time a full tool re-probe for ``profile``."""
+    run = runner.run("check-tools.sh", ["--profile", profile, "--refresh"], workspace)
+    return {"tool_validation_ms": run.wall_ms}
+
+
+def _measure_bootstrap(
+    runner: Runner, workspace: Path, profile: str
+) -> Dict[str, float]:
+    """Time a full bootstrap for ``profile``."""
+    run = runner.run("bootstrap.sh", ["--profile", profile], workspace)
+    return {"bootstrap_ms": run.spans.get("bootstrap", run.wall_ms)}
+
+
+def benchmark_case(
+    runner: Runner,
+    workspace: Path,
+    kind: str,
+    scenarios: Sequence[str] = DEFAULT_SCENARIOS,
+    repeat: int = DEFAULT_REPEAT,
+) -> Dict[str, Any]:
+    """Run the scenarios ``repeat`` times against one workspace."""
+    profile = WORKSPACE_KINDS[kind].profile
+    runs: Dict[str, List[float]] = {}
+    recommended = ""
+    for _ in range(repeat):
+        metrics: Dict[str, float] = {}
+        if "detect" in scenarios:
+            detect_metrics, recommended = _measure_detect(runner, workspace)
+            metrics.update(detect_metrics)
+        if "tools" in scenarios:
+            metrics.update(_measure_tools(runner, workspace, profile))
+        if "bootstrap" in scenarios:
+            metrics.update(_measure_bootstrap(runner, workspace, profile))
+        for metric, value in metrics.items():
+            runs.setdefault(metric, []).append(round(value, 3))
+
+    case = {
+        "kind": kind,
+        "profile": profile,
+        "metrics": {
+            metric: round(statistics.median(values), 3)
+            for metric, values in runs.items()
+        },
+        "runs": runs,
+    }
+    if recommended:
+        case["recommended"] = recommended
+    return case
+
+
+def case_name(kind: str, files: int) -> str:
+    """Return the results key for a workspace kind and size."""
+    return f"{kind}-{files}"
+
+
+def run_benchmarks(
+    kinds: Sequence[str],
+    sizes: Sequence[int],
+    scenarios: Sequence[str] = DEFAULT_SCENARIOS,
+    repeat: int = DEFAULT_REPEAT,
+    work_dir: PathLike = DEFAULT_WORK_DIR,
+    scripts_dir: PathLike = DEFAULT_SCRIPTS_DIR,
+    timeout: int = DEFAULT_TIMEOUT,
+    progress: Optional[Any] = None,
+) -> Dict[str, Any]:
+    """Benchmark every kind and size and return the results document."""
+    runner = Runner(scripts_dir, timeout)
+    results: Dict[str, Any] = {
+        "version": RESULTS_VERSION,
+        "created": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "host": {
+            "name": platform.node(),
+            "system": platform.system(),
+            "machine": platform.machine(),
+        },
+        "scenarios": list(scenarios),
+        "repeat": repeat,
+        "cases": {},
+    }
+    for kind in kinds:
+        for files in sizes:
+            name = case_name(kind, files)
+            if progress:
+                print(f"Generating {name}...", file=progress, flush=True)
+            workspace = generate_workspace(Path(work_dir) / name, kind, files)
+            if progress:
+                print(f"Benchmarking {name}...", file=progress, flush=True)
+            case = benchmark_case(runner, workspace, kind, scenarios, repeat)
+            case["files"] = files
+            results["cases"][name] = case
+    return results
+
+
+def load_results(path: PathLike) -> Dict[str, Any]:
+    """Read a results document written by ``run``."""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            results = json.load(f)
+    except (OSError, ValueError) as e:
+        raise BenchmarkError(f"Cannot read results {path}: {e}") from None
+    if not isinstance(results, dict) or results.get("version") != RESULTS_VERSION:
+        raise BenchmarkError(f"{path} is not a version {RESULTS_VERSION} result file")
+    return results
+
+
+def compare_results(
+    baseline: Dict[str, Any],
+    current: Dict[str, Any],
+    threshold: float = DEFAULT_THRESHOLD,
+    min_delta_ms: float = DEFAULT_MIN_DELTA_MS,
+) -> List[Regression]:
+    """Return the metrics of ``current`` that regressed against ``baseline``.
+
+    A metric regresses when it is more than ``threshold`` (relative) and more
+    than ``min_delta_ms`` (absolute) slower. Cases or metrics missing from
+    either side are not compared.
+    """
+    regressions = []
+    for name, case in current.get("cases", {}).items():
+        baseline_metrics = baseline.get("cases", {}).get(name, {}).get("metrics", {})
+        for metric, current_ms in case.get("metrics", {}).items():
+            baseline_ms = baseline_metrics.get(metric)
+            if baseline_ms is None:
+                continue
+            if (
+                current_ms > baseline_ms * (1 + threshold)
+                and current_ms - baseline_ms > min_delta_ms
+            ):
+                regressions.append(Regression(name, metric, baseline_ms, current_ms))
+    return regressions
+
+
+def format_results(results: Dict[str, Any]) -> str:
+    """Return a table of the median of every metric, one line per case."""
+    lines = []
+    for name, case in results["cases"].items():
+        metrics = "  ".join(
+            f"{metric}={value:.1f}" for metric, value in case["metrics"].items()
+        )
+        lines.append(f"{name}\t{metrics}")
+    return "\n".join(lines)
+
+
+def report_regressions(regressions: List[Regression], threshold: float) -> int:
+    """Print regressions and return the exit status for them."""
+    for regression in regressions:
+        print(
+            f"REGRESSION {regression.case} {regression.metric}: "
+            f"{regression.baseline_ms:.1f} -> {regression.current_ms:.1f} ms "
+            f"(+{regression.change:.0%})"
+        )
+    if regressions:
+        return 1
+    print(f"No regressions beyond {threshold:.0%}")
+    return 0
+
+
+def _csv(value: str) -> List[str]:
+    """Split a comma-separated option value."""
+    return [item for item in value.split(",") if item]
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    """Generate workspaces, run benchmarks or compare results."""
+    parser = argparse.ArgumentParser(
+        prog="python -m mcp_vscode_workflow.benchmark",
+        description="Benchmark bootstrap detection on synthetic workspaces.",
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    comparison = argparse.ArgumentParser(add_help=False)
+    comparison.add_argument(
+        "--threshold",
+        type=float,
+        default=DEFAULT_THRESHOLD,
+        help=f"relative slowdown that counts as a regression "
+        f"(default: {DEFAULT_THRESHOLD})",
+    )
+    comparison.add_argument(
+        "--min-delta-ms",
+        type=float,
+        default=DEFAULT_MIN_DELTA_MS,
+        help=f"ignore slowdowns below this many ms (default: {DEFAULT_MIN_DELTA_MS})",
+    )
+
+    run_parser = subparsers.add_parser(
+        "run", parents=[comparison], help="benchmark synthetic workspaces"
+    )
+    run_parser.add_argument(
+        "--kinds",
+        type=_csv,
+        default=list(WORKSPACE_KINDS),
+        help=f"comma-separated workspace kinds (default: {','.join(WORKSPACE_KINDS)})",
+    )
+    run_parser.add_argument(
+        "--sizes",
+        type=lambda value: [int(size) for size in _csv(value)],
+        default=list(DEFAULT_SIZES),
+        help="comma-separated file counts "
+        f"(default: {','.join(map(str, DEFAULT_SIZES))})",
+    )
+    run_parser.add_argument(
+        "--full",
+        action="store_true",
+        help=f"use sizes {','.join(map(str, FULL_SIZES))}",
+    )
+    run_parser.add_argument(
+        "--scenarios",
+        type=_csv,
+        default=list(DEFAULT_SCENARIOS),
+        help=f"comma-separated scenarios out of {','.join(SCENARIOS)} "
+        f"(default: {','.join(DEFAULT_SCENARIOS)})",
+    )
+    run_parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT)
+    run_parser.add_argument(
+        "--work-dir",
+        default=str(DEFAULT_WORK_DIR),
+        help="where generated workspaces are kept between runs",
+    )
+    run_parser.add_argument("--scripts-dir", default=str(DEFAULT_SCRIPTS_DIR))
+    run_parser.add_argument(
+        "--timeout",
+        type=int,
+        default=DEFAULT_TIMEOUT,
+        help="seconds before a single script run is abandoned",
+    )
+    run_parser.add_argument("--output", help="write the results JSON here")
+    run_parser.add_argument("--compare", metavar="BASELINE", help="baseline to check")
+
+    compare_parser = subparsers.add_parser(
+        "compare", parents=[comparison], help="compare results with a baseline"
+    )
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("results")
+
+    generate_parser = subparsers.add_parser(
+        "generate", help="generate one synthetic workspace"
+    )
+    generate_parser.add_argument("kind", choices=list(WORKSPACE_KINDS))
+    generate_parser.add_argument("files", type=int)
+    generate_parser.add_argument("directory")
+    args = parser.parse_args(argv)
+
+    try:
+        if args.command == "generate":
+            print(generate_workspace(args.directory, args.kind, args.files))
+            return 0
+
+        if args.command == "compare":
+            regressions = compare_results(
+                load_results(args.baseline),
+                load_results(args.results),
+                args.threshold,
+                args.min_delta_ms,
+            )
+            return report_regressions(regressions, args.threshold)
+
+        unknown = [kind for kind in args.kinds if kind not in WORKSPACE_KINDS]
+        unknown += [
+            scenario for scenario in args.scenarios if scenario not in SCENARIOS
+        ]
+        if unknown:
+            parser.error(f"unknown kind or scenario: {', '.join(unknown)}")
+        baseline = load_results(args.compare) if args.compare else None
+        results = run_benchmarks(
+            args.kinds,
+            FULL_SIZES if args.full else args.sizes,
+            args.scenarios,
+            args.repeat,
+            args.work_dir,
+            args.scripts_dir,
+            args.timeout,
+            progress=sys.stderr,
+        )
+    except BenchmarkError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+
+    print(format_results(results))
+    if args.output:
+        output = Path(args.output)
+        output.parent.mkdir(parents=True, exist_ok=True)
+        output.write_text(json.dumps(results, indent=2) + "\n", encoding="utf-8")
+    if baseline is not None:
+        regressions = compare_results(
+            baseline, results, args.threshold, args.min_delta_ms
+        )
+        return report_regressions(regressions, args.threshold)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,557 @@
+"""
+Render prompts over arguments too large for one request, in bounded memory.
+
+Prompts such as ``code-review`` and ``python-testing`` take the whole ``code``
+argument as one string; a large module or diff makes the rendered prompt
+overflow the model context. ``ChunkedPrompt`` streams the argument instead:
+
+- ``chunk_lines`` reads the input one line at a time and cuts it into chunks
+  that fit a token budget, preferring syntax boundaries: diff file and hunk
+  headers, top-level then nested definitions (the definition patterns of
+  ``mcp_vscode_workflow.codeindex``, with decorators kept on their
+  definition), then blank lines; lines longer than a chunk are cut
+- each prompt's budget is the ``tokenBudget`` of its role in ``roles.json``
+  (the role whose ``promptFile`` it is, or the profile declaring it in
+  ``config-<profile>.json``), else the top-level ``defaultTokenBudget``
+- ``requests`` renders one map request per chunk, ``merge_requests`` groups
+  the per-chunk results into merge requests under the same budget, and
+  ``run`` drives both with a completion function, a batch of map requests
+  at a time, merging until one result is left
+
+Besides the template, at most two chunks (one is held back to mark the last
+request) and the line being read are in memory, however large the input.
+
+Usage: python -m mcp_vscode_workflow.chunking plan|map|reduce PROMPT ...
+"""
+
+import argparse
+import json
+import re
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Mapping,
+    NamedTuple,
+    Optional,
+    Sequence,
+    TypeVar,
+)
+
+from .codeindex import SYMBOL_PATTERNS
+from .prompts import (
+    ARGUMENT_ALIASES,
+    CHARS_PER_TOKEN,
+    DEFAULT_PROMPTS_DIR,
+    PromptError,
+    PromptLibrary,
+    estimate_tokens,
+    render_template,
+)
+
+DEFAULT_TOKEN_BUDGET = 8000
+DEFAULT_BATCH_SIZE = 4
+# Smallest chunk worth sending once the template is paid for
+MIN_CHUNK_TOKENS = 256
+
+# Boundary ranks: a chunk preferably ends before the highest-ranked line
+TOP_LEVEL, NESTED, PARAGRAPH, LINE = 3, 2, 1, 0
+
+# Language names (as passed in the ``language`` argument) by file extension
+LANGUAGE_EXTENSIONS = {
+    "python": ".py",
+    "javascript": ".js",
+    "typescript": ".ts",
+    "node": ".js",
+    "go": ".go",
+    "golang": ".go",
+    "rust": ".rs",
+    "java": ".java",
+    "kotlin": ".kt",
+    "csharp": ".cs",
+    "c#": ".cs",
+    "scala": ".scala",
+    "bash": ".sh",
+    "shell": ".sh",
+    "sh": ".sh",
+    "zsh": ".zsh",
+    "terraform": ".tf",
+    "hcl": ".hcl",
+    "markdown": ".md",
+}
+
+DIFF_FILE_PATTERN = re.compile(r"diff --git |Index: ")
+DIFF_HUNK_PATTERN = re.compile(r"@@ ")
+DECORATOR_PATTERN = re.compile(r"[ \t]*@[A-Za-z_]")
+
+# Instructions for merging per-chunk results
+MERGE_TEMPLATE = """\
+The "{{PROMPT}}" prompt was run over a {{LANGUAGE}} input too large for one \
+request, one part at a time. Merge the results of parts {{PARTS}} below into a \
+single response in the same format: combine duplicate findings, keep every \
+distinct one, and refer to code by name rather than by part.
+
+{{RESULTS}}
+"""
+
+# Appended to a result cut to fit a merge request
+CUT_NOTE = "\n[... cut to fit the merge budget]"
+
+T = TypeVar("T")
+
+
+class Chunk(NamedTuple):
+    """A piece of a streamed argument and the input lines it covers."""
+
+    index: int
+    first_line: int
+    last_line: int
+    tokens: int
+    text: str
+
+
+class PromptRequest(NamedTuple):
+    """One rendered request of a map (per chunk) or reduce (merge) stage."""
+
+    stage: str
+    index: int
+    batch: int
+    first_part: int
+    last_part: int
+    tokens: int
+    last: bool
+    text: str
+
+
+def language_extension(language: Optional[str]) -> Optional[str]:
+    """Return the file extension whose definition patterns suit a language."""
+    if not language:
+        return None
+    language = language.strip().lower()
+    if language.startswith("."):
+        return language
+    return LANGUAGE_EXTENSIONS.get(language)
+
+
+class _BoundaryRanker:
+    """Rank each line by how good a place it is to start a chunk."""
+
+    def __init__(self, language: Optional[str]) -> None:
+        extension = language_extension(language)
+        self.diff = extension is None and (language or "").lower() in ("diff", "patch")
+        self.patterns = [p for _, p in SYMBOL_PATTERNS.get(extension or "", [])]
+        self.first = True
+        self.previous_blank = False
+        self.previous_decorator = False
+
+    def rank(self, line: str) -> int:
+        if self.first:
+            self.first = False
+            self.diff = self.diff or line.startswith(("diff --git ", "--- "))
+        rank = PARAGRAPH if self.previous_blank else LINE
+        stripped = line.strip()
+        decorator = bool(self.patterns) and bool(DECORATOR_PATTERN.match(line))
+        if self.diff:
+            if DIFF_FILE_PATTERN.match(line):
+                rank = TOP_LEVEL
+            elif DIFF_HUNK_PATTERN.match(line):
+                rank = NESTED
+        elif decorator or any(p.match(line) for p in self.patterns):
+            if not self.previous_decorator:
+                rank = TOP_LEVEL if line[:1] not in (" ", "\t") else NESTED
+        self.previous_blank = not stripped
+        self.previous_decorator = decorator
+        return rank
+
+
+def chunk_lines(
+    lines: Iterable[str], max_tokens: int, language: Optional[str] = None
+) -> Iterator[Chunk]:
+    """Cut streamed lines into chunks of at most ``max_tokens``.
+
+    A chunk ends before the best-ranked line that fits, counting lines in the
+    first half of the chunk one rank lower and preferring later lines among
+    equals, so large inputs split between definitions, diff files or hunks
+    before they split inside them, without leaving tiny chunks. Lines are
+    consumed as chunks are produced.
+    """
+    max_chars = max_tokens * CHARS_PER_TOKEN
+    if max_chars <= 0:
+        raise PromptError(f"Chunk budget must be positive, got {max_tokens}")
+    ranker = _BoundaryRanker(language)
+    # Pending pieces as (line number, rank, text)
+    buffer: List[Any] = []
+    size = 0
+    index = 0
+
+    def emit(count: int) -> Chunk:
+        nonlocal buffer, size, index
+        taken, buffer = buffer[:count], buffer[count:]
+        text = "".join(piece[2] for piece in taken)
+        size -= len(text)
+        index += 1
+        return Chunk(index, taken[0][0], taken[-1][0], estimate_tokens(text), text)
+
+    for number, line in enumerate(lines, 1):
+        rank = ranker.rank(line)
+        for start in range(0, max(len(line), 1), max_chars):
+            piece = line[start : start + max_chars]
+            buffer.append((number, rank if start == 0 else LINE, piece))
+            size += len(piece)
+            while size > max_chars:
+                yield emit(_split_point(buffer, max_chars))
+    if buffer:
+        yield emit(len(buffer))
+
+
+def _split_point(buffer: List[Any], max_chars: int) -> int:
+    """Return how many buffered pieces the next chunk takes."""
+    best, best_score = 1, LINE - 1
+    filled = len(buffer[0][2])
+    for i in range(1, len(buffer)):
+        if filled > max_chars:
+            break
+        score = buffer[i][1] - (0 if 2 * filled >= max_chars else 1)
+        if score >= best_score:
+            best, best_score = i, score
+        filled += len(buffer[i][2])
+    return best
+
+
+def _section(part: int, result: str) -> str:
+    """Return one part's result as a section of a merge request."""
+    return f"## Part {part}\n\n{result}\n"
+
+
+def batched(items: Iterable[T], size: int) -> Iterator[List[T]]:
+    """Yield lists of up to ``size`` consecutive items."""
+    batch: List[T] = []
+    for item in items:
+        batch.append(item)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _load_json(path: Path) -> Dict[str, Any]:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return data if isinstance(data, dict) else {}
+
+
+def declaring_profile(mcp_dir: Path, name: str) -> Optional[str]:
+    """Return the profile whose ``config-<profile>.json`` declares a prompt."""
+    for path in sorted(mcp_dir.glob("config-*.json")):
+        prompts = _load_json(path).get("prompts", [])
+        if any(isinstance(p, dict) and p.get("name") == name for p in prompts):
+            return path.stem[len("config-") :]
+    return None
+
+
+class ChunkedPrompt:
+    """A prompt rendered over a streamed argument within a token budget."""
+
+    def __init__(
+        self,
+        library: PromptLibrary,
+        name: str,
+        arguments: Optional[Mapping[str, Any]] = None,
+        argument: str = "code",
+        budget: Optional[int] = None,
+        role: Optional[str] = None,
+        language: Optional[str] = None,
+    ) -> None:
+        self.name = name
+        self.arguments = dict(arguments or {})
+        self.argument = argument
+        mcp_dir = library.prompts_dir.parent
+        if name in library:
+            self.role = role or library.entry(name).role
+            self.template = library.get(name)
+        else:
+            # Profile prompts without a template (python-code-review, ...) use
+            # the instructions of the role declaring them
+            self.role = role or declaring_profile(mcp_dir, name)
+            if self.role is None:
+                raise PromptError(f"Unknown prompt: {name}")
+            self.template = library.get(library.for_role(self.role).name)
+        roles = _load_json(library.roles_file)
+        role_budget = roles.get("roles", {}).get(self.role or "", {})
+        self.budget = int(
+            budget
+            or (role_budget.get("tokenBudget") if isinstance(role_budget, dict) else 0)
+            or roles.get("defaultTokenBudget")
+            or DEFAULT_TOKEN_BUDGET
+        )
+        self.language = language or self.arguments.get("language")
+        self.variable = ARGUMENT_ALIASES.get(argument, argument.upper())
+        self.inline = "{{%s}}" % self.variable in self.template
+        # The template with the longest part note; one more token covers
+        # rounding when the chunk's estimate is added
+        fixed = self._render("", 99999, 9999999, 9999999)
+        self.chunk_tokens = self.budget - estimate_tokens(fixed) - 1
+        if self.chunk_tokens < MIN_CHUNK_TOKENS:
+            raise PromptError(
+                f"Token budget {self.budget} leaves {self.chunk_tokens} tokens "
+                f"for {argument} after the {name} template"
+            )
+
+    def _render(self, text: str, part: int, first_line: int, last_line: int) -> str:
+        """Render the template around one chunk of the argument."""
+        arguments = dict(self.arguments)
+        arguments[self.argument] = text
+        note = (
+            f"Part {part} (lines {first_line}-{last_line}) of a larger input."
+            if part
+            else ""
+        )
+        if note and "{{CONTEXT}}" in self.template:
+            arguments["context"] = f"{arguments.get('context', '')} {note}".strip()
+            note = ""
+        rendered = render_template(self.template, arguments)
+        if not self.inline:
+            rendered = f"{rendered.rstrip()}\n\n```\n{text}```\n"
+        return f"{note}\n\n{rendered}" if note else rendered
+
+    def chunks(self, lines: Iterable[str]) -> Iterator[Chunk]:
+        """Stream the argument's lines into chunks that fit the budget."""
+        return chunk_lines(lines, self.chunk_tokens, self.language)
+
+    def requests(
+        self, lines: Iterable[str], batch_size: int = DEFAULT_BATCH_SIZE
+    ) -> Iterator[PromptRequest]:
+        """Yield one map request per chunk.
+
+        A single chunk renders exactly like the whole argument would; with
+        more, each request names its part and input lines. One chunk is held
+        back to know which is last.
+        """
+        pending: Optional[Chunk] = None
+        for chunk in self.chunks(lines):
+            if pending is not None:
+                yield self._map_request(pending, batch_size, last=False)
+            pending = chunk
+        if pending is not None:
+            yield self._map_request(pending, batch_size, last=True)
+
+    def _map_request(self, chunk: Chunk, batch_size: int, last: bool) -> PromptRequest:
+        part = 0 if last and chunk.index == 1 else chunk.index
+        text = self._render(chunk.text, part, chunk.first_line, chunk.last_line)
+        return PromptRequest(
+            "map",
+            chunk.index,
+            (chunk.index - 1) // batch_size,
+            chunk.index,
+            chunk.index,
+            estimate_tokens(text),
+            last,
+            text,
+        )
+
+    def merge_requests(
+        self, results: Sequence[str], first_part: int = 1
+    ) -> Iterator[PromptRequest]:
+        """Yield merge requests covering ``results`` (numbered from ``first_part``).
+
+        Each request merges as many consecutive results as fit the budget and
+        at least two, so every round shrinks the results; a result larger than
+        half the budget is cut.
+        """
+        fixed = estimate_tokens(self._merge_text([], 99999, 99999))
+        available = (self.budget - fixed - 1) * CHARS_PER_TOKEN
+        overhead = len(_section(99999, "")) + 1
+        limit = available // 2 - overhead - len(CUT_NOTE)
+        if limit <= 0:
+            raise PromptError(f"Token budget {self.budget} is too small to merge")
+        group: List[str] = []
+        start = first_part
+        size = 0
+        index = 0
+        for number, result in enumerate(results, first_part):
+            result = result.strip()
+            if len(result) > limit:
+                result = result[:limit] + CUT_NOTE
+            if len(group) >= 2 and size + overhead + len(result) > available:
+                index += 1
+                yield self._merge_request(group, start, index, last=False)
+                group, start, size = [], number, 0
+            group.append(result)
+            size += overhead + len(result)
+        if group:
+            yield self._merge_request(group, start, index + 1, last=True)
+
+    def _merge_text(self, results: List[str], first_part: int, last_part: int) -> str:
+        sections = "\n".join(
+            _section(first_part + i, result) for i, result in enumerate(results)
+        )
+        return render_template(
+            MERGE_TEMPLATE,
+            {
+                "prompt": self.name,
+                "language": self.arguments.get("language") or "text",
+                "parts": f"{first_part}-{last_part}",
+                "results": sections,
+            },
+        )
+
+    def _merge_request(
+        self, results: List[str], first_part: int, index: int, last: bool
+    ) -> PromptRequest:
+        last_part = first_part + len(results) - 1
+        text = self._merge_text(results, first_part, last_part)
+        return PromptRequest(
+            "reduce",
+            index,
+            0,
+            first_part,
+            last_part,
+            estimate_tokens(text),
+            last,
+            text,
+        )
+
+    def run(
+        self,
+        lines: Iterable[str],
+        complete: Callable[[str], str],
+        batch_size: int = DEFAULT_BATCH_SIZE,
+    ) -> str:
+        """Map the prompt over the chunks and merge the results into one.
+
+        ``complete`` sends one request and returns the model's answer. The
+        requests of a batch are sent concurrently.
+        """
+        with ThreadPoolExecutor(max_workers=batch_size) as executor:
+            results: List[str] = []
+            for batch in batched(self.requests(lines, batch_size), batch_size):
+                results.extend(executor.map(complete, [r.text for r in batch]))
+            while len(results) > 1:
+                merged: List[str] = []
+                merges = self.merge_requests(results)
+                for batch in batched(merges, batch_size):
+                    merged.extend(executor.map(complete, [r.text for r in batch]))
+                results = merged
+        return results[0] if results else ""
+
+
+def _read_results(stream: Iterable[str]) -> List[str]:
+    """Read results as JSON lines with a ``text`` (or a JSON string each)."""
+    results = []
+    for line in stream:
+        if not line.strip():
+            continue
+        try:
+            value = json.loads(line)
+        except ValueError as e:
+            raise PromptError(f"Result is not JSON: {e}") from e
+        if isinstance(value, dict):
+            value = value.get("text")
+            if not isinstance(value, str):
+                raise PromptError('Result object has no "text" string')
+        results.append(str(value))
+    return results
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    """Plan, map or reduce a prompt over a large argument from the command line."""
+    parser = argparse.ArgumentParser(
+        prog="python -m mcp_vscode_workflow.chunking",
+        description="Render prompts over large arguments in budgeted chunks.",
+    )
+    parser.add_argument(
+        "--prompts-dir",
+        default=str(DEFAULT_PROMPTS_DIR),
+        help="prompt directory (default: .mcp/prompts)",
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("name", help="prompt name")
+    common.add_argument(
+        "arguments", nargs="*", metavar="KEY=VALUE", help="other template arguments"
+    )
+    common.add_argument(
+        "--input", default="-", help="file with the large argument (default: stdin)"
+    )
+    common.add_argument(
+        "--argument", default="code", help="argument to chunk (default: code)"
+    )
+    common.add_argument("--budget", type=int, help="tokens per request")
+    common.add_argument("--role", help="role whose tokenBudget applies")
+    common.add_argument("--language", help="language for syntax boundaries")
+    common.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+
+    subparsers.add_parser(
+        "plan", parents=[common], help="list the chunks without rendering"
+    )
+    subparsers.add_parser(
+        "map", parents=[common], help="print one JSON request per chunk"
+    )
+    subparsers.add_parser(
+        "reduce",
+        parents=[common],
+        help="print merge requests for JSON results read from --input",
+    )
+    args = parser.parse_args(argv)
+
+    arguments = {}
+    for item in args.arguments:
+        key, separator, value = item.partition("=")
+        if not separator:
+            parser.error(f"template argument {item!r} is not KEY=VALUE")
+        arguments[key] = value
+
+    try:
+        with PromptLibrary(args.prompts_dir) as library:
+            prompt = ChunkedPrompt(
+                library,
+                args.name,
+                arguments,
+                argument=args.argument,
+                budget=args.budget,
+                role=args.role,
+                language=args.language
+                or arguments.get("language")
+                or (Path(args.input).suffix if args.input != "-" else None),
+            )
+            source = (
+                sys.stdin
+                if args.input == "-"
+                else open(args.input, "r", encoding="utf-8", errors="replace")
+            )
+            try:
+                if args.command == "plan":
+                    print(f"budget: {prompt.budget} ({prompt.chunk_tokens} per chunk)")
+                    for chunk in prompt.chunks(source):
+                        print(
+                            f"{chunk.index}\tlines {chunk.first_line}-"
+                            f"{chunk.last_line}\t{chunk.tokens}"
+                        )
+                    return 0
+                if args.command == "map":
+                    requests = prompt.requests(source, args.batch_size)
+                else:
+                    requests = prompt.merge_requests(_read_results(source))
+                for request in requests:
+                    print(json.dumps(request._asdict()), flush=True)
+            finally:
+                if source is not sys.stdin:
+                    source.close()
+    except (PromptError, OSError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,1166 @@
+"""
+Index the workspace for text search and symbol lookup, and serve it over MCP.
+
+Finding the context for a review or a stack trace otherwise means walking the
+tree and reading files one by one. ``CodeIndex`` keeps an inverted index of
+the workspace in ``.mcp/cache/codeindex``:
+
+- ``index.json`` lists every file with its size and modification time and the
+  symbols defined in it (functions, classes, shell functions, Terraform
+  blocks, Markdown headings, ...), found with per-language patterns
+- ``trigrams-<generation>.bin`` maps every three-byte sequence of the
+  lowercased file contents to the sorted ids of the files containing it: the
+  posting lists, then a directory of fixed-size records searched by bisection
+  through a memory map
+
+A text search intersects the posting lists of the query's trigrams and reads
+only the candidate files to confirm matches. Refreshes are incremental: files
+whose size and modification time are unchanged keep their postings, changed
+files get new ids (their old ids are dropped from results), and the trigram
+file is rewritten by merging the new postings into the old ones. Once dropped
+ids outnumber live ones the index is rebuilt from scratch. In ``serve`` mode
+inotify events name the directories to list again; without inotify every
+refresh compares the stat data of the whole tree.
+
+``serve`` runs a stdio MCP server with ``code_search``, ``code_symbols``,
+``code_files`` and ``code_trace`` tools and the same queries as
+``codeindex://`` resources. ``code_trace`` maps the frames of a Python,
+JavaScript or ``path:line`` stack trace to indexed files and returns the code
+around each one.
+
+Usage: python -m mcp_vscode_workflow.codeindex
+       update|search|symbols|files|trace|serve [--workspace DIR] ...
+"""
+
+import argparse
+import fnmatch
+import json
+import mmap
+import os
+import re
+import struct
+import sys
+import tempfile
+import time
+from array import array
+from bisect import bisect_right
+from typing import (
+    Any,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+)
+from urllib.parse import unquote
+
+from .config import PathLike
+from .detect import PRUNE_DIRS
+from .watch import Inotify, WatchError
+
+INDEX_VERSION = 1
+INDEX_DIR = os.path.join(".mcp", "cache", "codeindex")
+
+# Larger files are listed but not indexed
+MAX_FILE_BYTES = 1024 * 1024
+# Bytes checked for NUL to tell binary files from text
+BINARY_SNIFF_BYTES = 8192
+# Extensions of binary formats, skipped without reading
+BINARY_EXTENSIONS = frozenset(
+    [
+        ".png",
+        ".jpg",
+        ".jpeg",
+        ".gif",
+        ".ico",
+        ".pdf",
+        ".zip",
+        ".gz",
+        ".tgz",
+        ".bz2",
+        ".xz",
+        ".jar",
+        ".whl",
+        ".so",
+        ".dylib",
+        ".dll",
+        ".exe",
+        ".o",
+        ".a",
+        ".pyc",
+        ".class",
+        ".woff",
+        ".woff2",
+        ".ttf",
+        ".mp3",
+        ".mp4",
+        ".sqlite",
+        ".db",
+    ]
+)
+
+DEFAULT_MAX_RESULTS = 50
+DEFAULT_MAX_PATHS = 200
+DEFAULT_CONTEXT_LINES = 3
+# Longest line returned in search results
+MAX_LINE_LENGTH = 300
+
+PROTOCOL_VERSION = "2024-11-05"
+RESOURCE_SCHEME = "codeindex://"
+
+# Trigram file: magic, record count and directory offset, then the posting
+# lists (file ids in native byte order; the index is a local cache), then the
+# directory records of trigram, first posting and posting count
+TABLE_MAGIC = b"MCPTRI01"
+TABLE_HEADER = struct.Struct("<8sIQ")
+TABLE_RECORD = struct.Struct("<3sxII")
+POSTING_TYPE = "I"
+
+# Definition patterns by file extension: the symbol is group "name", its kind
+# group "kind" when the pattern has one and the given kind otherwise
+_PYTHON = [
+    ("class", r"^[ \t]*class\s+(?P<name>[A-Za-z_]\w*)"),
+    ("function", r"^[ \t]*(?:async\s+)?def\s+(?P<name>[A-Za-z_]\w*)"),
+]
+_JAVASCRIPT = [
+    (
+        "class",
+        r"^[ \t]*(?:export\s+)?(?:default\s+)?(?:abstract\s+)?"
+        r"class\s+(?P<name>[A-Za-z_$][\w$]*)",
+    ),
+    (
+        "function",
+        r"^[ \t]*(?:export\s+)?(?:default\s+)?(?:async\s+)?"
+        r"function\s*\*?\s*(?P<name>[A-Za-z_$][\w$]*)",
+    ),
+    (
+        "function",
+        r"^[ \t]*(?:export\s+)?(?:const|let|var)\s+(?P<name>[A-Za-z_$][\w$]*)"
+        r"\s*=\s*(?:async\s+)?(?:function\b|\([^)\n]*\)\s*=>|[A-Za-z_$][\w$]*\s*=>)",
+    ),
+    (
+        "type",
+        r"^[ \t]*(?:export\s+)?(?P<kind>interface|type|enum)\s+"
+        r"(?P<name>[A-Za-z_$][\w$]*)",
+    ),
+]
+_SHELL = [
+    ("function", r"^[ \t]*function\s+(?P<name>[\w:.-]+)"),
+    ("function", r"^[ \t]*(?P<name>[A-Za-z_][\w:.-]*)\s*\(\)"),
+]
+_GO = [
+    ("function", r"^func\s+(?:\([^)\n]*\)\s*)?(?P<name>[A-Za-z_]\w*)"),
+    ("type", r"^type\s+(?P<name>[A-Za-z_]\w*)"),
+]
+_RUST = [
+    (
+        "function",
+        r"^[ \t]*(?:pub(?:\([^)\n]*\))?\s+)?(?:async\s+)?(?:unsafe\s+)?"
+        r"fn\s+(?P<name>\w+)",
+    ),
+    (
+        "type",
+        r"^[ \t]*(?:pub(?:\([^)\n]*\))?\s+)?(?P<kind>struct|enum|trait)\s+"
+        r"(?P<name>\w+)",
+    ),
+]
+_JVM = [
+    (
+        "class",
+        r"^[ \t]*(?:(?:public|private|protected|internal|abstract|final|static|"
+        r"sealed|partial|data|open)\s+)*(?P<kind>class|interface|enum|record)\s+"
+        r"(?P<name>[A-Za-z_]\w*)",
+    ),
+]
+_TERRAFORM = [
+    (
+        "block",
+        r'^[ \t]*(?P<kind>resource|data|module|variable|output|provider)\s+"'
+        r'(?:[^"\n]+"\s+")?(?P<name>[^"\n]+)"',
+    ),
+]
+_MARKDOWN = [("heading", r"^#{1,6}[ \t]+(?P<name>\S[^\n]*?)[ \t#]*$")]
+
+SYMBOL_PATTERNS: Dict[str, List[Tuple[str, "re.Pattern[str]"]]] = {}
+for _extensions, _patterns in (
+    ((".py", ".pyi"), _PYTHON),
+    ((".js", ".jsx", ".mjs", ".cjs", ".ts", ".tsx"), _JAVASCRIPT),
+    ((".sh", ".bash", ".zsh"), _SHELL),
+    ((".go",), _GO),
+    ((".rs",), _RUST),
+    ((".java", ".kt", ".cs", ".scala"), _JVM),
+    ((".tf", ".hcl"), _TERRAFORM),
+    ((".md", ".markdown"), _MARKDOWN),
+):
+    for _extension in _extensions:
+        SYMBOL_PATTERNS[_extension] = [
+            (kind, re.compile(pattern, re.MULTILINE)) for kind, pattern in _patterns
+        ]
+
+# Stack trace frames: Python, JavaScript, then any ``path.ext:line``
+TRACE_PATTERNS = (
+    re.compile(
+        r'File "(?P<path>[^"]+)", line (?P<line>\d+)(?:, in (?P<function>\S+))?'
+    ),
+    re.compile(
+        r"\bat (?:(?P<function>[^\s(]+) \()?(?P<path>[^\s()]+?):(?P<line>\d+):\d+\)?"
+    ),
+    re.compile(r"(?P<path>[\w.~/\\-]*[\w-]\.[A-Za-z0-9]+):(?P<line>\d+)"),
+)
+
+
+class CodeIndexError(Exception):
+    """Raised when the workspace cannot be indexed or a query is invalid."""
+
+
+class FileEntry(NamedTuple):
+    """An indexed file; ``text`` is False for binary and oversized files."""
+
+    path: str
+    size: int
+    mtime_ns: int
+    text: bool
+    symbols: List[Tuple[str, str, int]]
+
+
+def trigrams(data: bytes) -> Set[bytes]:
+    """Return the three-byte sequences of ``data``, lowercased."""
+    data = data.lower()
+    return {data[i : i + 3] for i in range(len(data) - 2)}
+
+
+def find_symbols(path: str, text: str) -> List[Tuple[str, str, int]]:
+    """Return the ``(name, kind, line)`` definitions found in a file."""
+    patterns = SYMBOL_PATTERNS.get(os.path.splitext(path)[1].lower())
+    if not patterns:
+        return []
+    line_starts: Optional[List[int]] = None
+    found: Dict[int, Tuple[str, str, int]] = {}
+    for kind, pattern in patterns:
+        for match in pattern.finditer(text):
+            if line_starts is None:
+                line_starts = [0] + [m.end() for m in re.finditer("\n", text)]
+            line = bisect_right(line_starts, match.start())
+            groups = match.groupdict()
+            found.setdefault(line, (groups["name"], groups.get("kind") or kind, line))
+    return [found[line] for line in sorted(found)]
+
+
+def _path_matches(path: str, pattern: str) -> bool:
+    """Match a glob against the path or its name, or a plain substring."""
+    if any(c in pattern for c in "*?["):
+        return fnmatch.fnmatchcase(path, pattern) or fnmatch.fnmatchcase(
+            path.rsplit("/", 1)[-1], pattern
+        )
+    return pattern in path
+
+
+class _TrigramTable:
+    """Read access to a trigram file through a memory map."""
+
+    def __init__(self, path: str) -> None:
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            magic, self.count, self._directory = TABLE_HEADER.unpack_from(self._mmap)
+        except struct.error:
+            magic = b""
+        end = self._directory + self.count * TABLE_RECORD.size if magic else 0
+        if magic != TABLE_MAGIC or end != len(self._mmap):
+            self._mmap.close()
+            raise CodeIndexError(f"Corrupt trigram file: {path}")
+        self.path = path
+
+    def _record(self, i: int) -> Tuple[bytes, int, int]:
+        return TABLE_RECORD.unpack_from(
+            self._mmap, self._directory + i * TABLE_RECORD.size
+        )
+
+    def _postings(self, first: int, count: int) -> bytes:
+        start = TABLE_HEADER.size + first * 4
+        return self._mmap[start : start + count * 4]
+
+    def postings(self, trigram: bytes) -> array:
+        """Return the file ids of ``trigram``'s posting list."""
+        low, high = 0, self.count
+        while low < high:
+            middle = (low + high) // 2
+            key, first, count = self._record(middle)
+            if key < trigram:
+                low = middle + 1
+            elif key > trigram:
+                high = middle
+            else:
+                ids = array(POSTING_TYPE)
+                ids.frombytes(self._postings(first, count))
+                return ids
+        return array(POSTING_TYPE)
+
+    def items(self) -> Iterator[Tuple[bytes, bytes]]:
+        """Yield each trigram with its raw posting list, in order."""
+        for i in range(self.count):
+            key, first, count = self._record(i)
+            yield key, self._postings(first, count)
+
+    def close(self) -> None:
+        self._mmap.close()
+
+
+def _merge(
+    old: Iterable[Tuple[bytes, bytes]], new: Dict[bytes, List[int]]
+) -> Iterator[Tuple[bytes, bytes]]:
+    """Merge new postings into an old table; new ids are all larger."""
+    keys = sorted(new)
+    k = 0
+    for key, raw in old:
+        while k < len(keys) and keys[k] < key:
+            yield keys[k], array(POSTING_TYPE, new[keys[k]]).tobytes()
+            k += 1
+        if k < len(keys) and keys[k] == key:
+            raw += array(POSTING_TYPE, new[key]).tobytes()
+            k += 1
+        yield key, raw
+    for key in keys[k:]:
+        yield key, array(POSTING_TYPE, new[key]).tobytes()
+
+
+def _write_table(path: str, items: Iterable[Tuple[bytes, bytes]]) -> int:
+    """Write a trigram file atomically; return its number of trigrams."""
+    directory = bytearray()
+    count = first = 0
+    fd, temp = tempfile.mkstemp(prefix=".tmp-", dir=os.path.dirname(path))
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(bytes(TABLE_HEADER.size))
+            for key, raw in items:
+                f.write(raw)
+                directory += TABLE_RECORD.pack(key, first, len(raw) // 4)
+                first += len(raw) // 4
+                count += 1
+            f.write(directory)
+            f.seek(0)
+            f.write(
+                TABLE_HEADER.pack(TABLE_MAGIC, count, TABLE_HEADER.size + first * 4)
+            )
+        os.replace(temp, path)
+    except BaseException:
+        os.unlink(temp)
+        raise
+    return count
+
+
+class CodeIndex:
+    """The trigram and symbol index of one workspace."""
+
+    def __init__(
+        self,
+        workspace: PathLike = ".",
+        index_dir: Optional[PathLike] = None,
+        use_inotify: bool = False,
+    ) -> None:
+        self.root = os.path.realpath(workspace)
+        if not os.path.isdir(self.root):
+            raise CodeIndexError(f"Not a directory: {workspace}")
+        self.index_dir = os.fspath(index_dir or os.path.join(self.root, INDEX_DIR))
+        try:
+            os.makedirs(self.index_dir, exist_ok=True)
+        except OSError as e:
+            raise CodeIndexError(f"Cannot create {self.index_dir}: {e}") from e
+        self.files: List[Optional[FileEntry]] = []
+        self.ids: Dict[str, int] = {}
+        # Absolute paths of the listed directories
+        self.dirs: Set[str] = set()
+        self.generation = 0
+        self.table: Optional[_TrigramTable] = None
+        self.trigram_count = 0
+        self._symbols: Optional[Dict[str, List[Tuple[str, str, int]]]] = None
+        self._by_name: Optional[Dict[str, List[str]]] = None
+        self._inotify: Optional[Inotify] = None
+        self.refreshes = 0
+        self.refresh_ms = 0.0
+        self.searches = 0
+        self.files_read = 0
+        self._load()
+        if use_inotify:
+            try:
+                self._inotify = Inotify()
+            except WatchError:
+                pass
+        self.refresh(full=True)
+
+    def close(self) -> None:
+        """Unmap the trigram file and drop the watches."""
+        if self.table is not None:
+            self.table.close()
+            self.table = None
+        if self._inotify is not None:
+            self._inotify.close()
+            self._inotify = None
+
+    # Loading and saving
+
+    def _load(self) -> None:
+        """Read the saved index; a missing or stale one starts empty."""
+        try:
+            with open(os.path.join(self.index_dir, "index.json")) as f:
+                data = json.load(f)
+            if data.get("version") != INDEX_VERSION or data.get("root") != self.root:
+                return
+            table = _TrigramTable(os.path.join(self.index_dir, data["table"]))
+        except (OSError, ValueError, KeyError, TypeError, CodeIndexError):
+            return
+        self.table = table
+        self.trigram_count = table.count
+        self.generation = data["generation"]
+        for i, entry in enumerate(data["files"]):
+            if entry is None:
+                self.files.append(None)
+                continue
+            path, size, mtime_ns, text, symbols = entry
+            self.files.append(
+                FileEntry(path, size, mtime_ns, bool(text), [tuple(s) for s in symbols])
+            )
+            self.ids[path] = i
+
+    def _save(self) -> None:
+        """Write ``index.json`` for the current trigram file."""
+        assert self.table is not None
+        data = {
+            "version": INDEX_VERSION,
+            "root": self.root,
+            "generation": self.generation,
+            "table": os.path.basename(self.table.path),
+            "files": [
+                None if e is None else [e.path, e.size, e.mtime_ns, e.text, e.symbols]
+                for e in self.files
+            ],
+        }
+        fd, temp = tempfile.mkstemp(prefix=".tmp-", dir=self.index_dir)
+        try:
+            with os.fdopen(fd, "w") as f:
+                json.dump(data, f, separators=(",", ":"))
+            os.replace(temp, os.path.join(self.index_dir, "index.json"))
+        except BaseException:
+            os.unlink(temp)
+            raise
+
+    # Scanning
+
+    def _relative(self, path: str) -> str:
+        return os.path.relpath(path, self.root).replace(os.sep, "/")
+
+    def _list_dir(self, directory: str, found: Dict[str, Tuple[int, int]]) -> List[str]:
+        """Stat the direct files of ``directory`` and return its subdirectories."""
+        self.dirs.add(directory)
+        if self._inotify is not None:
+            try:
+                self._inotify.add(directory)
+            except WatchError:
+                self._inotify.close()
+                self._inotify = None
+        subdirs = []
+        try:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    if entry.name.startswith("."):
+                        continue
+                    if entry.is_dir(follow_symlinks=False):
+                        if entry.name not in PRUNE_DIRS:
+                            subdirs.append(entry.path)
+                    elif entry.is_file(follow_symlinks=False):
+                        st = entry.stat(follow_symlinks=False)
+                        found[self._relative(entry.path)] = (st.st_size, st.st_mtime_ns)
+        except OSError:
+            pass
+        return subdirs
+
+    def _walk(self, top: str, found: Dict[str, Tuple[int, int]]) -> None:
+        stack = [top]
+        while stack:
+            stack.extend(self._list_dir(stack.pop(), found))
+
+    def _drop_tree(self, top: str) -> Set[str]:
+        """Forget the directories below ``top``; return the files they held."""
+        prefix = top + os.sep
+        self.dirs = {d for d in self.dirs if d != top and not d.startswith(prefix)}
+        relative = self._relative(top) + "/"
+        return {path for path in self.ids if path.startswith(relative)}
+
+    def _changed_directories(self) -> Optional[Set[str]]:
+        """Return the directories with inotify events, or None to scan all."""
+        if self._inotify is None:
+            return None
+        changed, overflow = self._inotify.read()
+        return None if overflow else changed
+
+    def _scan(self, full: bool) -> Tuple[Dict[str, Tuple[int, int]], Set[str]]:
+        """Return the stat data of the scanned files and the files seen before.
+
+        A full scan walks the tree; otherwise only the directories with
+        inotify events are listed again, with new subdirectories walked and
+        vanished ones dropped.
+        """
+        found: Dict[str, Tuple[int, int]] = {}
+        changed = None if full else self._changed_directories()
+        if changed is None:
+            self.dirs = set()
+            self._walk(self.root, found)
+            return found, set(self.ids)
+        previous: Set[str] = set()
+        listed: Set[str] = set()
+        for directory in sorted(changed):
+            if directory not in self.dirs:
+                continue  # dropped with a parent, or pruned
+            known = {d for d in self.dirs if os.path.dirname(d) == directory}
+            subdirs = set(self._list_dir(directory, found))
+            listed.add(self._relative(directory))
+            for gone in known - subdirs:
+                previous |= self._drop_tree(gone)
+            for new in subdirs - known:
+                self._walk(new, found)
+        for path in self.ids:
+            parent = path.rsplit("/", 1)[0] if "/" in path else "."
+            if parent in listed:
+                previous.add(path)
+        return found, previous
+
+    def _read(self, path: str) -> Optional[bytes]:
+        """Return a file's content, or None if it is not indexed as text."""
+        if os.path.splitext(path)[1].lower() in BINARY_EXTENSIONS:
+            return None
+        try:
+            with open(os.path.join(self.root, path), "rb") as f:
+                data = f.read(MAX_FILE_BYTES + 1)
+        except OSError:
+            return None
+        if len(data) > MAX_FILE_BYTES or b"\0" in data[:BINARY_SNIFF_BYTES]:
+            return None
+        return data
+
+    # Updating
+
+    def refresh(self, full: bool = False) -> bool:
+        """Bring the index up to date; return whether anything changed."""
+        start = time.monotonic()
+        found, previous = self._scan(full or self.table is None)
+        changed = {
+            path: stamp
+            for path, stamp in found.items()
+            if path not in self.ids
+            or self.files[self.ids[path]][1:3] != stamp  # type: ignore[index]
+        }
+        removed = previous - set(found)
+        updated = bool(changed or removed or self.table is None)
+        if updated:
+            replaced = len((removed | set(changed)) & set(self.ids))
+            dropped = len(self.files) - len(self.ids) + replaced
+            live = len(self.ids) - replaced + len(changed)
+            if self.table is None or dropped > live:
+                self._rebuild(found if full or self.table is None else None)
+            else:
+                self._update(changed, removed)
+        self.refreshes += 1
+        self.refresh_ms = (time.monotonic() - start) * 1000
+        return updated
+
+    def _index_file(
+        self, path: str, stamp: Tuple[int, int], postings: Dict[bytes, List[int]]
+    ) -> None:
+        """Append a file under a new id, adding its trigrams to ``postings``."""
+        file_id = len(self.files)
+        data = self._read(path)
+        symbols: List[Tuple[str, str, int]] = []
+        if data is not None:
+            for trigram in trigrams(data):
+                postings.setdefault(trigram, []).append(file_id)
+            symbols = find_symbols(path, data.decode("utf-8", errors="replace"))
+        self.files.append(
+            FileEntry(path, stamp[0], stamp[1], data is not None, symbols)
+        )
+        self.ids[path] = file_id
+
+    def _update(self, changed: Dict[str, Tuple[int, int]], removed: Set[str]) -> None:
+        """Drop removed and changed files, index changed ones and merge."""
+        for path in removed | set(changed):
+            file_id = self.ids.pop(path, None)
+            if file_id is not None:
+                self.files[file_id] = None
+        postings: Dict[bytes, List[int]] = {}
+        for path in sorted(changed):
+            self._index_file(path, changed[path], postings)
+        assert self.table is not None
+        self._write(_merge(self.table.items(), postings))
+
+    def _rebuild(self, found: Optional[Dict[str, Tuple[int, int]]]) -> None:
+        """Index every file again under fresh ids."""
+        if found is None:
+            found = {}
+            self.dirs = set()
+            self._walk(self.root, found)
+        self.files = []
+        self.ids = {}
+        postings: Dict[bytes, List[int]] = {}
+        for path in sorted(found):
+            self._index_file(path, found[path], postings)
+        self._write(_merge((), postings))
+
+    def _write(self, items: Iterable[Tuple[bytes, bytes]]) -> None:
+        """Write the next trigram file and the index, then drop the old file."""
+        self.generation += 1
+        path = os.path.join(self.index_dir, f"trigrams-{self.generation}.bin")
+        try:
+            self.trigram_count = _write_table(path, items)
+            old, self.table = self.table, _TrigramTable(path)
+            self._save()
+        except OSError as e:
+            raise CodeIndexError(f"Cannot write the index: {e}") from e
+        if old is not None:
+            old.close()
+            if old.path != path:
+                try:
+                    os.unlink(old.path)
+                except OSError:
+                    pass
+        self._symbols = None
+        self._by_name = None
+
+    # Queries
+
+    def _live(self) -> Iterator[FileEntry]:
+        return (entry for entry in self.files if entry is not None)
+
+    def _candidates(self, query: bytes) -> List[int]:
+        """Return the ids of the text files that may contain ``query``."""
+        if len(query) < 3 or self.table is None:
+            ids: Iterable[int] = range(len(self.files))
+        else:
+            lists = sorted((self.table.postings(t) for t in trigrams(query)), key=len)
+            result = set(lists[0])
+            for postings in lists[1:]:
+                if not result:
+                    break
+                result.intersection_update(postings)
+            ids = sorted(result)
+        entries = ((i, self.files[i]) for i in ids)
+        return [i for i, entry in entries if entry is not None and entry.text]
+
+    def search(
+        self,
+        query: str,
+        ignore_case: bool = False,
+        path: Optional[str] = None,
+        max_results: int = DEFAULT_MAX_RESULTS,
+    ) -> Dict[str, Any]:
+        """Return the lines containing ``query``.
+
+        The result has the ``matches`` (``path``, ``line``, ``text``), the
+        number of candidate files read and whether matches were cut off at
+        ``max_results``.
+        """
+        if not query:
+            raise CodeIndexError("Empty search query")
+        self.searches += 1
+        needle = query.lower() if ignore_case else query
+        candidates = self._candidates(query.encode())
+        matches: List[Dict[str, Any]] = []
+        read = 0
+        truncated = False
+        for file_id in candidates:
+            entry = self.files[file_id]
+            assert entry is not None
+            if path and not _path_matches(entry.path, path):
+                continue
+            data = self._read(entry.path)
+            read += 1
+            if data is None:
+                continue
+            for number, line in enumerate(
+                data.decode("utf-8", errors="replace").splitlines(), 1
+            ):
+                if needle in (line.lower() if ignore_case else line):
+                    if len(matches) == max_results:
+                        truncated = True
+                        break
+                    text = line.strip()[:MAX_LINE_LENGTH]
+                    matches.append({"path": entry.path, "line": number, "text": text})
+            if truncated:
+                break
+        self.files_read += read
+        return {"matches": matches, "files_read": read, "truncated": truncated}
+
+    def _symbol_table(self) -> Dict[str, List[Tuple[str, str, int]]]:
+        if self._symbols is None:
+            self._symbols = {}
+            for entry in self._live():
+                for name, kind, line in entry.symbols:
+                    self._symbols.setdefault(name, []).append((entry.path, kind, line))
+        return self._symbols
+
+    def symbols(
+        self,
+        name: str,
+        kind: Optional[str] = None,
+        max_results: int = DEFAULT_MAX_RESULTS,
+    ) -> List[Dict[str, Any]]:
+        """Return the definitions of ``name``.
+
+        A dotted name (``Class.method``) is looked up by its last part, and a
+        name without exact matches is looked up ignoring case.
+        """
+        if not name:
+            raise CodeIndexError("Empty symbol name")
+        table = self._symbol_table()
+        name = name.rsplit(".", 1)[-1] if name not in table else name
+        keys = (
+            [name] if name in table else [k for k in table if k.lower() == name.lower()]
+        )
+        hits = sorted(
+            (path, line, key, kind_) for key in keys for path, kind_, line in table[key]
+        )
+        return [
+            {"name": key, "kind": kind_, "path": path, "line": line}
+            for path, line, key, kind_ in hits
+            if kind is None or kind_ == kind
+        ][:max_results]
+
+    def paths(
+        self, pattern: Optional[str] = None, max_results: int = DEFAULT_MAX_PATHS
+    ) -> List[str]:
+        """Return the indexed paths matching a glob or substring."""
+        return sorted(
+            entry.path
+            for entry in self._live()
+            if not pattern or _path_matches(entry.path, pattern)
+        )[:max_results]
+
+    def resolve(self, path: str) -> Optional[str]:
+        """Return the indexed file a path from a stack trace names.
+
+        Paths inside the workspace resolve directly; others, such as paths
+        from another machine or a container, resolve to the indexed file
+        sharing the longest trailing run of path components.
+        """
+        path = path.replace("\\", "/")
+        if os.path.isabs(path):
+            relative = self._relative(os.path.realpath(path))
+            if relative in self.ids:
+                return relative
+        path = path[2:] if path.startswith("./") else path
+        if path in self.ids:
+            return path
+        if self._by_name is None:
+            self._by_name = {}
+            for entry in self._live():
+                name = entry.path.rsplit("/", 1)[-1]
+                self._by_name.setdefault(name, []).append(entry.path)
+        parts = path.split("/")
+        best: Optional[str] = None
+        best_length = 0
+        for candidate in sorted(self._by_name.get(parts[-1], [])):
+            theirs = candidate.split("/")
+            length = 0
+            while (
+                length < min(len(parts), len(theirs))
+                and parts[-1 - length] == theirs[-1 - length]
+            ):
+                length += 1
+            if length > best_length:
+                best, best_length = candidate, length
+        return best
+
+    def snippet(
+        self, path: str, line: int, context: int = DEFAULT_CONTEXT_LINES
+    ) -> str:
+        """Return numbered lines around ``line`` of an indexed file."""
+        data = self._read(path)
+        if data is None:
+            return ""
+        self.files_read += 1
+        lines = data.decode("utf-8", errors="replace").splitlines()
+        first = max(line - context, 1)
+        return "\n".join(
+            f"{n:>5}{'>' if n == line else ' '} {lines[n - 1]}"
+            for n in range(first, min(line + context, len(lines)) + 1)
+        )
+
+    def trace(
+        self, text: str, context: int = DEFAULT_CONTEXT_LINES
+    ) -> List[Dict[str, Any]]:
+        """Resolve the frames of a stack trace to indexed files.
+
+        Each frame has the ``path`` and ``line`` as written, the ``function``
+        when the trace names one, the indexed file it ``resolved`` to (or
+        None) with a ``snippet`` around the line and, for unresolved frames,
+        the ``definitions`` of the function.
+        """
+        frames = []
+        for raw in text.splitlines():
+            for pattern in TRACE_PATTERNS:
+                match = pattern.search(raw)
+                if match:
+                    break
+            else:
+                continue
+            groups = match.groupdict()
+            frame: Dict[str, Any] = {
+                "path": groups["path"],
+                "line": int(groups["line"]),
+                "function": groups.get("function"),
+                "resolved": self.resolve(groups["path"]),
+            }
+            if frame["resolved"]:
+                frame["snippet"] = self.snippet(
+                    frame["resolved"], frame["line"], context
+                )
+            elif frame["function"] and not frame["function"].startswith("<"):
+                frame["definitions"] = self.symbols(frame["function"], max_results=5)
+            frames.append(frame)
+        return frames
+
+    def stats(self) -> Dict[str, Any]:
+        """Return the index size and query counters."""
+        live = list(self._live())
+        size = 0
+        paths = [os.path.join(self.index_dir, "index.json")]
+        if self.table is not None:
+            paths.append(self.table.path)
+        for path in paths:
+            try:
+                size += os.path.getsize(path)
+            except OSError:
+                pass
+        return {
+            "root": self.root,
+            "files": sum(1 for entry in live if entry.text),
+            "skipped": sum(1 for entry in live if not entry.text),
+            "dropped": len(self.files) - len(live),
+            "symbols": sum(len(entry.symbols) for entry in live),
+            "trigrams": self.trigram_count,
+            "index_bytes": size,
+            "generation": self.generation,
+            "refreshes": self.refreshes,
+            "last_refresh_ms": round(self.refresh_ms, 2),
+            "searches": self.searches,
+            "files_read": self.files_read,
+            "watching": self._inotify is not None,
+        }
+
+
+# Tool definitions served by ``serve``
+TOOLS = [
+    {
+        "name": "code_search",
+        "description": (
+            "Lines of workspace files containing a text, found through the "
+            "trigram index; path limits the files by glob or substring."
+        ),
+        "inputSchema": {
+            "type": "object",
+            "properties": {
+                "query": {"type": "string"},
+                "ignore_case": {"type": "boolean"},
+                "path": {"type": "string"},
+                "max_results": {"type": "integer"},
+            },
+            "required": ["query"],
+        },
+    },
+    {
+        "name": "code_symbols",
+        "description": (
+            "Where a function, class, type, shell function, Terraform block or "
+            "Markdown heading is defined."
+        ),
+        "inputSchema": {
+            "type": "object",
+            "properties": {
+                "name": {"type": "string"},
+                "kind": {"type": "string"},
+                "max_results": {"type": "integer"},
+            },
+            "required": ["name"],
+        },
+    },
+    {
+        "name": "code_files",
+        "description": "Workspace file paths matching a glob or substring.",
+        "inputSchema": {
+            "type": "object",
+            "properties": {
+                "pattern": {"type": "string"},
+                "max_results": {"type": "integer"},
+            },
+        },
+    },
+    {
+        "name": "code_trace",
+        "description": (
+            "Resolve the frames of a Python, JavaScript or path:line stack trace "
+            "to workspace files, with the code around each frame."
+        ),
+        "inputSchema": {
+            "type": "object",
+            "properties": {
+                "trace": {"type": "string"},
+                "context": {"type": "integer"},
+            },
+            "required": ["trace"],
+        },
+    },
+]
+
+# Resources served by ``serve``
+RESOURCES = [
+    {
+        "uri": RESOURCE_SCHEME + "stats",
+        "name": "Code index statistics",
+        "mimeType": "application/json",
+    },
+]
+RESOURCE_TEMPLATES = [
+    {
+        "uriTemplate": RESOURCE_SCHEME + "search/{query}",
+        "name": "Text search",
+        "description": "Lines containing the text",
+        "mimeType": "application/json",
+    },
+    {
+        "uriTemplate": RESOURCE_SCHEME + "symbols/{name}",
+        "name": "Symbol definitions",
+        "description": "Where the symbol is defined",
+        "mimeType": "application/json",
+    },
+    {
+        "uriTemplate": RESOURCE_SCHEME + "files/{pattern}",
+        "name": "File paths",
+        "description": "Indexed paths matching a glob or substring",
+        "mimeType": "application/json",
+    },
+    {
+        "uriTemplate": RESOURCE_SCHEME + "file/{path}",
+        "name": "File content",
+        "description": "An indexed file",
+        "mimeType": "text/plain",
+    },
+]
+
+
+def _query(index: CodeIndex, name: str, arguments: Dict[str, Any]) -> Any:
+    """Answer a tool call or resource query."""
+    limit = int(arguments.get("max_results", DEFAULT_MAX_RESULTS))
+    if name == "code_search":
+        return index.search(
+            str(arguments.get("query", "")),
+            ignore_case=bool(arguments.get("ignore_case")),
+            path=arguments.get("path"),
+            max_results=limit,
+        )
+    if name == "code_symbols":
+        return index.symbols(
+            str(arguments.get("name", "")), arguments.get("kind"), limit
+        )
+    if name == "code_files":
+        return index.paths(
+            arguments.get("pattern"),
+            int(arguments.get("max_results", DEFAULT_MAX_PATHS)),
+        )
+    if name == "code_trace":
+        return index.trace(
+            str(arguments.get("trace", "")),
+            int(arguments.get("context", DEFAULT_CONTEXT_LINES)),
+        )
+    raise CodeIndexError(f"Unknown tool: {name}")
+
+
+def _call_tool(index: CodeIndex, name: str, arguments: Dict[str, Any]) -> Any:
+    """Return the MCP result of a tool call on the refreshed index."""
+    try:
+        index.refresh()
+        text = json.dumps(_query(index, name, arguments), indent=2)
+    except (CodeIndexError, ValueError) as e:
+        return {"content": [{"type": "text", "text": str(e)}], "isError": True}
+    return {"content": [{"type": "text", "text": text}]}
+
+
+def read_resource(index: CodeIndex, uri: str) -> Dict[str, Any]:
+    """Return the MCP contents of a ``codeindex://`` resource."""
+    if not uri.startswith(RESOURCE_SCHEME):
+        raise CodeIndexError(f"Unknown resource: {uri}")
+    kind, _, argument = uri[len(RESOURCE_SCHEME) :].partition("/")
+    argument = unquote(argument)
+    if kind == "file":
+        if argument not in index.ids:
+            raise CodeIndexError(f"Not an indexed file: {argument}")
+        data = index._read(argument)
+        if data is None:
+            raise CodeIndexError(f"Not a text file: {argument}")
+        text, mime_type = data.decode("utf-8", errors="replace"), "text/plain"
+    else:
+        if kind == "stats":
+            result = index.stats()
+        elif kind == "search":
+            result = _query(index, "code_search", {"query": argument})
+        elif kind in ("symbols", "files"):
+            key = "name" if kind == "symbols" else "pattern"
+            result = _query(index, f"code_{kind}", {key: argument})
+        else:
+            raise CodeIndexError(f"Unknown resource: {uri}")
+        text, mime_type = json.dumps(result, indent=2), "application/json"
+    return {"contents": [{"uri": uri, "mimeType": mime_type, "text": text}]}
+
+
+def serve(index: CodeIndex) -> None:
+    """Answer MCP requests on stdin until it closes."""
+    for line in sys.stdin:
+        try:
+            message = json.loads(line)
+        except ValueError:
+            continue
+        if not isinstance(message, dict) or "id" not in message:
+            continue
+        method = message.get("method")
+        params = message.get("params") or {}
+        response: Dict[str, Any] = {"jsonrpc": "2.0", "id": message["id"]}
+        if method == "initialize":
+            response["result"] = {
+                "protocolVersion": PROTOCOL_VERSION,
+                "capabilities": {"tools": {}, "resources": {}},
+                "serverInfo": {"name": "mcp-workflow-code-index"},
+            }
+        elif method == "ping":
+            response["result"] = {}
+        elif method == "tools/list":
+            response["result"] = {"tools": TOOLS}
+        elif method == "tools/call":
+            response["result"] = _call_tool(
+                index, params.get("name", ""), params.get("arguments") or {}
+            )
+        elif method == "resources/list":
+            response["result"] = {"resources": RESOURCES}
+        elif method == "resources/templates/list":
+            response["result"] = {"resourceTemplates": RESOURCE_TEMPLATES}
+        elif method == "resources/read":
+            try:
+                index.refresh()
+                response["result"] = read_resource(index, str(params.get("uri", "")))
+            except (CodeIndexError, ValueError) as e:
+                response["error"] = {"code": -32002, "message": str(e)}
+        elif method == "codeindex/stats":
+            response["result"] = index.stats()
+        else:
+            response["error"] = {"code": -32601, "message": f"Unknown method {method}"}
+        sys.stdout.write(json.dumps(response) + "\n")
+        sys.stdout.flush()
+
+
+def _format_text(command: str, result: Any) -> str:
+    """Render a query result for the terminal."""
+    if command == "search":
+        lines = [f"{m['path']}:{m['line']}: {m['text']}" for m in result["matches"]]
+        if result["truncated"]:
+            lines.append("... (more matches; raise --max-results)")
+        return "\n".join(lines)
+    if command == "symbols":
+        return "\n".join(
+            f"{s['path']}:{s['line']}: {s['kind']} {s['name']}" for s in result
+        )
+    if command == "files":
+        return "\n".join(result)
+    if command == "trace":
+        blocks = []
+        for frame in result:
+            where = frame["resolved"] or f"{frame['path']} (not in the workspace)"
+            header = f"{where}:{frame['line']}"
+            if frame["function"]:
+                header += f" in {frame['function']}"
+            body = frame.get("snippet") or "\n".join(
+                f"  defined at {d['path']}:{d['line']}"
+                for d in frame.get("definitions", [])
+            )
+            blocks.append(f"{header}\n{body}" if body else header)
+        return "\n\n".join(blocks)
+    return "\n".join(f"{key}: {value}" for key, value in result.items())
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    """Update and query the code index from the command line, or serve it."""
+    parser = argparse.ArgumentParser(
+        prog="python -m mcp_vscode_workflow.codeindex",
+        description="Trigram text search and symbol lookup over the workspace.",
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument(
+        "--workspace", default=".", help="workspace directory (default: .)"
+    )
+    common.add_argument("--index-dir", help=f"index directory (default: {INDEX_DIR})")
+    common.add_argument("--format", choices=["text", "json"], default="text")
+
+    subparsers.add_parser("update", parents=[common], help="update the index")
+    search_parser = subparsers.add_parser(
+        "search", parents=[common], help="lines containing a text"
+    )
+    search_parser.add_argument("query", help="text to find")
+    search_parser.add_argument("-i", "--ignore-case", action="store_true")
+    search_parser.add_argument("--path", help="limit to paths (glob or substring)")
+    search_parser.add_argument("--max-results", type=int, default=DEFAULT_MAX_RESULTS)
+    symbols_parser = subparsers.add_parser(
+        "symbols", parents=[common], help="where a symbol is defined"
+    )
+    symbols_parser.add_argument("name", help="symbol name")
+    symbols_parser.add_argument("--kind", help="only this kind (function, class, ...)")
+    files_parser = subparsers.add_parser(
+        "files", parents=[common], help="indexed paths"
+    )
+    files_parser.add_argument("pattern", nargs="?", help="glob or substring")
+    trace_parser = subparsers.add_parser(
+        "trace", parents=[common], help="resolve a stack trace read from stdin"
+    )
+    trace_parser.add_argument("--context", type=int, default=DEFAULT_CONTEXT_LINES)
+    subparsers.add_parser("serve", parents=[common], help="run a stdio MCP server")
+    args = parser.parse_args(argv)
+
+    try:
+        index = CodeIndex(
+            args.workspace, args.index_dir, use_inotify=args.command == "serve"
+        )
+    except CodeIndexError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    try:
+        if args.command == "serve":
+            serve(index)
+            return 0
+        result: Any
+        if args.command == "update":
+            result = index.stats()
+        elif args.command == "search":
+            result = index.search(
+                args.query, args.ignore_case, args.path, args.max_results
+            )
+        elif args.command == "symbols":
+            result = index.symbols(args.name, args.kind)
+        elif args.command == "files":
+            result = index.paths(args.pattern)
+        else:
+            result = index.trace(sys.stdin.read(), args.context)
+        if args.format == "json":
+            print(json.dumps(result, indent=2))
+        else:
+            text = _format_text(args.command, result)
+            if text:
+                print(text)
+        return 0
+    except CodeIndexError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    finally:
+        index.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
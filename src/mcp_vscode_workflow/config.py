@@ -0,0 +1,350 @@
+"""
+Resolve MCP profile configurations and cache them as compiled bundles.
+
+Profile configs (``.mcp/config-<profile>.json``) inherit from other documents
+through ``extends`` references of the form ``<file>#<json-pointer>``, e.g.
+``"../roles.json#/roles/python"``. Resolving a profile follows the whole
+chain, layers it over ``mcp.json`` and merges the result:
+
+- objects merge recursively, with the extending document winning
+- lists of named objects (prompts, tools) merge by ``name``, keeping the
+  position of the first definition
+- other lists are concatenated without duplicates
+- any other value is replaced
+
+The result is written to ``.mcp/cache/bundles/<profile>.json`` together with
+the content hash of every input, so later loads read one file and only
+recompile when an input changed.
+
+Usage: python -m mcp_vscode_workflow.config <profile> [--mcp-dir DIR]
+"""
+
+import argparse
+import copy
+import hashlib
+import json
+import os
+import sys
+import tempfile
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
+
+PathLike = Union[str, "os.PathLike[str]"]
+
+# Bump when the bundle layout or merge rules change to invalidate old bundles
+BUNDLE_VERSION = 1
+
+DEFAULT_MCP_DIR = Path(".mcp")
+BUNDLE_CACHE_SUBDIR = Path("cache") / "bundles"
+
+# Guards against runaway chains in hand-edited configs
+MAX_EXTENDS_DEPTH = 32
+
+
+class ConfigError(Exception):
+    """Raised when a configuration or one of its references cannot be resolved."""
+
+
+def resolve_pointer(document: Any, pointer: str) -> Any:
+    """Return the value at a JSON pointer (RFC 6901) inside ``document``."""
+    if pointer == "":
+        return document
+    if not pointer.startswith("/"):
+        raise ConfigError(f"Invalid JSON pointer: {pointer!r}")
+
+    value = document
+    for token in pointer[1:].split("/"):
+        token = token.replace("~1", "/").replace("~0", "~")
+        if isinstance(value, dict) and token in value:
+            value = value[token]
+        elif isinstance(value, list) and token.isdigit() and int(token) < len(value):
+            value = value[int(token)]
+        else:
+            raise ConfigError(f"JSON pointer {pointer!r} does not resolve")
+    return value
+
+
+def _is_named_list(items: List[Any]) -> bool:
+    """Return True if every item is an object carrying a ``name``."""
+    return all(isinstance(item, dict) and "name" in item for item in items)
+
+
+def merge_configs(base: Any, override: Any) -> Any:
+    """Merge ``override`` onto ``base`` and return the result.
+
+    Neither argument is modified.
+    """
+    if isinstance(base, dict) and isinstance(override, dict):
+        merged = copy.deepcopy(base)
+        for key, value in override.items():
+            if key in merged:
+                merged[key] = merge_configs(merged[key], value)
+            else:
+                merged[key] = copy.deepcopy(value)
+        return merged
+
+    if isinstance(base, list) and isinstance(override, list):
+        if base and override and _is_named_list(base) and _is_named_list(override):
+            merged_items = [copy.deepcopy(item) for item in base]
+            positions = {item["name"]: index for index, item in enumerate(base)}
+            for item in override:
+                if item["name"] in positions:
+                    index = positions[item["name"]]
+                    merged_items[index] = merge_configs(merged_items[index], item)
+                else:
+                    positions[item["name"]] = len(merged_items)
+                    merged_items.append(copy.deepcopy(item))
+            return merged_items
+
+        merged_items = copy.deepcopy(base)
+        for item in override:
+            if item not in merged_items:
+                merged_items.append(copy.deepcopy(item))
+        return merged_items
+
+    return copy.deepcopy(override)
+
+
+class Resolver:
+    """Follow ``extends`` chains, parsing each file once and recording inputs."""
+
+    def __init__(self) -> None:
+        self.documents: Dict[Path, Any] = {}
+
+    def read(self, path: Path) -> Any:
+        """Parse a JSON file, reusing earlier parses of the same file."""
+        path = path.resolve()
+        if path not in self.documents:
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    self.documents[path] = json.load(f)
+            except FileNotFoundError:
+                raise ConfigError(f"Configuration file not found: {path}") from None
+            except json.JSONDecodeError as e:
+                raise ConfigError(f"Invalid JSON in {path}: {e}") from None
+        return self.documents[path]
+
+    def locate(self, reference: str, referrer: Path) -> Tuple[Path, str]:
+        """Split a reference into the file it names and its JSON pointer.
+
+        Paths are relative to the referring file's directory. References such as
+        ``../roles.json`` in ``.mcp/config-python.json`` are written relative to
+        the referring file itself, so that reading is used as a fallback.
+        """
+        target, _, pointer = reference.partition("#")
+        if not target:
+            return referrer, pointer
+
+        candidate = referrer.parent / target
+        if not candidate.exists():
+            fallback = Path(os.path.normpath(referrer / target))
+            if fallback.exists():
+                candidate = fallback
+        return candidate.resolve(), pointer
+
+    def resolve(
+        self,
+        path: Path,
+        pointer: str = "",
+        chain: Tuple[Tuple[Path, str], ...] = (),
+    ) -> Any:
+        """Return the fully merged document at ``path#pointer``."""
+        path = path.resolve()
+        if (path, pointer) in chain:
+            cycle = " -> ".join(f"{p.name}#{ptr}" for p, ptr in chain)
+            raise ConfigError(
+                f"Circular extends chain: {cycle} -> {path.name}#{pointer}"
+            )
+        if len(chain) >= MAX_EXTENDS_DEPTH:
+            raise ConfigError(f"extends chain deeper than {MAX_EXTENDS_DEPTH} levels")
+        chain = chain + ((path, pointer),)
+
+        document = resolve_pointer(self.read(path), pointer)
+        if not isinstance(document, dict) or "extends" not in document:
+            return document
+
+        references = document["extends"]
+        if isinstance(references, str):
+            references = [references]
+        if not isinstance(references, list) or not all(
+            isinstance(reference, str) for reference in references
+        ):
+            raise ConfigError(
+                f"'extends' in {path} must be a string or list of strings"
+            )
+
+        merged: Any = {}
+        for reference in references:
+            target, target_pointer = self.locate(reference, path)
+            merged = merge_configs(merged, self.resolve(target, target_pointer, chain))
+
+        own = {key: value for key, value in document.items() if key != "extends"}
+        return merge_configs(merged, own)
+
+
+def load_config(path: PathLike) -> Any:
+    """Load a configuration file with its ``extends`` chain resolved."""
+    return Resolver().resolve(Path(path))
+
+
+def _file_digest(path: Path) -> str:
+    """Return the SHA-256 hex digest of a file's contents."""
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def _bundle_key(inputs: List[Dict[str, Any]]) -> str:
+    """Return the cache key for a set of inputs: a hash of their content hashes."""
+    digest = hashlib.sha256(f"bundle-v{BUNDLE_VERSION}\n".encode("utf-8"))
+    for entry in inputs:
+        digest.update(f"{entry['path']}\0{entry['sha256']}\n".encode("utf-8"))
+    return digest.hexdigest()
+
+
+def _describe_input(path: Path, mcp_dir: Path) -> Dict[str, Any]:
+    """Return the bundle record for one input file."""
+    stat = path.stat()
+    return {
+        "path": os.path.relpath(path, mcp_dir).replace(os.sep, "/"),
+        "sha256": _file_digest(path),
+        "size": stat.st_size,
+        "mtime_ns": stat.st_mtime_ns,
+    }
+
+
+def compile_profile(profile: str, mcp_dir: PathLike = DEFAULT_MCP_DIR) -> Dict:
+    """Resolve a profile and return its bundle (inputs, cache key and config)."""
+    mcp_dir = Path(mcp_dir).resolve()
+    resolver = Resolver()
+
+    config: Any = {}
+    base_path = mcp_dir / "mcp.json"
+    if base_path.exists():
+        config = resolver.resolve(base_path)
+    config = merge_configs(config, resolver.resolve(mcp_dir / f"config-{profile}.json"))
+
+    inputs = [_describe_input(path, mcp_dir) for path in resolver.documents]
+    return {
+        "bundleVersion": BUNDLE_VERSION,
+        "profile": profile,
+        "key": _bundle_key(inputs),
+        "inputs": inputs,
+        "config": config,
+    }
+
+
+def _bundle_is_current(bundle: Any, mcp_dir: Path) -> bool:
+    """Return True if none of a bundle's inputs changed since it was compiled.
+
+    Inputs whose size and mtime are unchanged are trusted without rehashing.
+    """
+    if not isinstance(bundle, dict) or bundle.get("bundleVersion") != BUNDLE_VERSION:
+        return False
+
+    for entry in bundle.get("inputs", []):
+        path = mcp_dir / entry["path"]
+        try:
+            stat = path.stat()
+        except OSError:
+            return False
+        if stat.st_size == entry["size"] and stat.st_mtime_ns == entry["mtime_ns"]:
+            continue
+        if _file_digest(path) != entry["sha256"]:
+            return False
+    return True
+
+
+def _write_bundle(bundle: Dict, bundle_path: Path) -> None:
+    """Write a bundle atomically so concurrent readers never see a partial file."""
+    bundle_path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(
+        prefix=f".{bundle_path.name}.", dir=str(bundle_path.parent)
+    )
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(bundle, f, indent=2, sort_keys=True)
+            f.write("\n")
+        os.replace(tmp_path, bundle_path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def bundle_path_for(
+    profile: str,
+    mcp_dir: PathLike = DEFAULT_MCP_DIR,
+    cache_dir: Optional[PathLike] = None,
+) -> Path:
+    """Return where the compiled bundle for a profile is stored."""
+    if cache_dir is None:
+        cache_dir = Path(mcp_dir) / BUNDLE_CACHE_SUBDIR
+    return Path(cache_dir) / f"{profile}.json"
+
+
+def load_profile(
+    profile: str,
+    mcp_dir: PathLike = DEFAULT_MCP_DIR,
+    cache_dir: Optional[PathLike] = None,
+) -> Any:
+    """Return a profile's resolved configuration, compiling it only when stale."""
+    mcp_dir = Path(mcp_dir).resolve()
+    bundle_path = bundle_path_for(profile, mcp_dir, cache_dir)
+
+    try:
+        with open(bundle_path, "r", encoding="utf-8") as f:
+            bundle = json.load(f)
+    except (OSError, ValueError):
+        bundle = None
+
+    if not _bundle_is_current(bundle, mcp_dir):
+        bundle = compile_profile(profile, mcp_dir)
+        try:
+            _write_bundle(bundle, bundle_path)
+        except OSError:
+            # A read-only checkout still gets the resolved config, just uncached
+            pass
+
+    return bundle["config"]
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    """Print a profile's resolved configuration as JSON."""
+    parser = argparse.ArgumentParser(
+        prog="python -m mcp_vscode_workflow.config",
+        description="Resolve an MCP profile configuration and cache its bundle.",
+    )
+    parser.add_argument("profile", help="profile name (config-<profile>.json)")
+    parser.add_argument(
+        "--mcp-dir",
+        default=str(DEFAULT_MCP_DIR),
+        help="directory holding mcp.json and the profile configs (default: .mcp)",
+    )
+    parser.add_argument(
+        "--cache-dir",
+        help="bundle cache directory (default: <mcp-dir>/cache/bundles)",
+    )
+    parser.add_argument(
+        "--bundle-path",
+        action="store_true",
+        help="print the path of the compiled bundle instead of the configuration",
+    )
+    args = parser.parse_args(argv)
+
+    try:
+        config = load_profile(args.profile, args.mcp_dir, args.cache_dir)
+    except ConfigError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+
+    if args.bundle_path:
+        print(
+            bundle_path_for(args.profile, Path(args.mcp_dir).resolve(), args.cache_dir)
+        )
+    else:
+        json.dump(config, sys.stdout, indent=2)
+        sys.stdout.write("\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
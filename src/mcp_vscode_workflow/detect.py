@@ -0,0 +1,934 @@
+"""
+Detect the workspace's project type and recommend a profile, in-process.
+
+This is the detection logic of ``bootstrap.sh`` (``scan_workspace``,
+``detect_project_type``, ``calculate_recommendation`` and the confidence
+levels) as a library: ``detect_workspace()`` returns the detected profiles,
+the reasons for each, the recommendation and its confidence without forking
+``find``, ``awk`` or ``grep``.
+
+Profiles, their indicators and the scoring weights are data: the
+``detection`` section of ``.mcp/roles.json``. A profile scores for being
+detected, for its extensions' share of the source bytes in the workspace and
+for interactive answers naming it, so adding a profile is a roles.json edit.
+
+The workspace walk shares ``.mcp/cache/detection.index`` with the shell
+implementation. Only directories modified since the last scan are re-listed,
+new subdirectories are walked and vanished ones are dropped with their
+subtrees, so either implementation can pick up an index the other wrote.
+
+``bootstrap.sh`` calls the command-line entry point with ``--format
+bootstrap`` and falls back to its own implementation when ``python3`` or this
+package is unavailable.
+
+Usage: python -m mcp_vscode_workflow.detect [WORKSPACE] [--rescan] [--format F]
+                                           [--top N]
+"""
+
+import argparse
+import json
+import os
+import re
+import sys
+from typing import (
+    Any,
+    Dict,
+    FrozenSet,
+    Iterable,
+    List,
+    NamedTuple,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+)
+
+from .schema import validator
+
+PathLike = Union[str, "os.PathLike[str]"]
+
+# Roles file whose "detection" section defines profiles, indicators and weights
+DEFAULT_ROLES_FILE = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+    ".mcp",
+    "roles.json",
+)
+
+# Must match DETECTION_INDEX_PATH / DETECTION_INDEX_VERSION in bootstrap.sh
+INDEX_PATH = os.path.join(".mcp", "cache", "detection.index")
+INDEX_VERSION = "2"
+
+# Directories pruned while scanning (hidden entries are always pruned)
+PRUNE_DIRS = frozenset(
+    [
+        "node_modules",
+        "bower_components",
+        "venv",
+        "virtualenv",
+        "site-packages",
+        "__pycache__",
+        "vendor",
+        "build",
+        "dist",
+        "target",
+    ]
+)
+
+# Tracked file categories and their suffixes, in index column order
+CATEGORIES = (
+    ("python", (".py",)),
+    ("terraform", (".tf", ".hcl")),
+    ("docs", (".md", ".rst")),
+    ("yaml", (".yml", ".yaml")),
+    ("javascript", (".js", ".ts", ".jsx", ".tsx")),
+    ("shell", (".sh", ".bash")),
+)
+YAML_COLUMN = 3
+
+# Top-level keys of CI/CD pipeline definitions and pipeline resource kinds;
+# only the first lines of each YAML file are read
+PIPELINE_YAML_PATTERN = re.compile(
+    r"^(jobs|stages|pipelines|workflows|trigger):"
+    r"|^kind:\s*(Pipeline|PipelineRun|Workflow|WorkflowTemplate)\s*$"
+)
+PIPELINE_YAML_PREFIX_LINES = 100
+PIPELINE_NAME_PATTERN = re.compile(r"(ci|cd|pipeline|workflow|build|deploy|release)")
+
+# Weight names in the "detection" section of roles.json
+WEIGHTS = ("detected", "share", "primaryActivity", "toolsPreference")
+
+
+class DetectionError(Exception):
+    """Raised when the detection configuration cannot be used."""
+
+
+class Indicator(NamedTuple):
+    """A file or directory whose presence signals a profile."""
+
+    profile: str
+    kind: str  # "file" or "dir"
+    relpath: str
+    reason: str
+
+
+class ScoringModel:
+    """Profile definitions and weights, compiled into a sparse weight matrix.
+
+    Each profile is a row and each scoring signal a column: one column per
+    detected profile, one per tracked file extension (its share of the bytes
+    in all tracked extensions) and one per interactive answer. Scoring a
+    workspace is a single pass over the non-zero weights of the matrix.
+    """
+
+    def __init__(self, config: Dict[str, Any]) -> None:
+        try:
+            weights = config["weights"]
+            profiles = config["profiles"]
+            self.weights = {name: float(weights.get(name, 0)) for name in WEIGHTS}
+            self.profiles: Tuple[str, ...] = tuple(p["name"] for p in profiles)
+            self.indicators: List[Indicator] = []
+            self.source_reasons: Dict[str, str] = {}
+            self.profile_extensions: Dict[str, Tuple[str, ...]] = {}
+            self.pipeline_profiles: List[str] = []
+            for definition in profiles:
+                self._add_profile(definition)
+        except (AttributeError, KeyError, TypeError, ValueError) as e:
+            raise DetectionError(f"Invalid detection configuration: {e!r}") from e
+        if len(set(self.profiles)) != len(self.profiles):
+            raise DetectionError("Invalid detection configuration: duplicate profile")
+
+        self.extensions = frozenset(
+            ext for exts in self.profile_extensions.values() for ext in exts
+        )
+        # Sparse rows: (signal column, weight) pairs per profile
+        self.columns: Dict[Tuple[str, str], int] = {}
+        self.rows: List[List[Tuple[int, float]]] = []
+        for profile in self.profiles:
+            row = [
+                (self._column("detected", profile), self.weights["detected"]),
+                (self._column("activity", profile), self.weights["primaryActivity"]),
+                (self._column("tools", profile), self.weights["toolsPreference"]),
+            ]
+            row.extend(
+                (self._column("share", ext), self.weights["share"])
+                for ext in self.profile_extensions[profile]
+            )
+            self.rows.append([(column, weight) for column, weight in row if weight])
+
+    def _add_profile(self, definition: Dict[str, Any]) -> None:
+        """Compile one profile definition from the configuration."""
+        profile = definition["name"]
+        for indicator in definition.get("indicators", []):
+            if isinstance(indicator, str):
+                indicator = {"path": indicator}
+            path = indicator["path"]
+            kind = "dir" if path.endswith("/") else "file"
+            path = path.rstrip("/")
+            default_reason = (
+                f"Found {path} directory" if kind == "dir" else f"Found {path}"
+            )
+            self.indicators.append(
+                Indicator(profile, kind, path, indicator.get("reason", default_reason))
+            )
+        extensions = tuple(definition.get("extensions", []))
+        for ext in extensions:
+            if not ext.startswith(".") or " " in ext or "." in ext[1:]:
+                raise ValueError(f"extension {ext!r} is not a single suffix")
+        self.profile_extensions[profile] = extensions
+        if extensions:
+            self.source_reasons[profile] = definition["sourceReason"]
+        if definition.get("pipelineYaml"):
+            self.pipeline_profiles.append(profile)
+
+    def _column(self, kind: str, key: str) -> int:
+        """Return the signal column for ``(kind, key)``, adding it if new."""
+        return self.columns.setdefault((kind, key), len(self.columns))
+
+    def score(
+        self,
+        detected_profiles: Sequence[str] = (),
+        extension_bytes: Optional[Dict[str, int]] = None,
+        primary_activity: str = "unknown",
+        tools_preference: str = "unknown",
+    ) -> Dict[str, float]:
+        """Return the score of every profile for the given signals."""
+        signals = [0.0] * len(self.columns)
+        for profile in detected_profiles:
+            column = self.columns.get(("detected", profile))
+            if column is not None:
+                signals[column] = 1.0
+        for kind, answer in (
+            ("activity", primary_activity),
+            ("tools", tools_preference),
+        ):
+            column = self.columns.get((kind, answer))
+            if column is not None:
+                signals[column] = 1.0
+        if extension_bytes:
+            total = sum(extension_bytes.get(ext, 0) for ext in self.extensions)
+            if total:
+                for ext in self.extensions:
+                    signals[self.columns[("share", ext)]] = (
+                        extension_bytes.get(ext, 0) / total
+                    )
+
+        return {
+            profile: sum(signals[column] * weight for column, weight in row)
+            for profile, row in zip(self.profiles, self.rows)
+        }
+
+    def rank(
+        self, scores: Dict[str, float], top: Optional[int] = None
+    ) -> List[Tuple[str, float]]:
+        """Return ``(profile, score)`` pairs, best first; ties keep profile order."""
+        ranking = sorted(
+            ((profile, scores[profile]) for profile in self.profiles),
+            key=lambda item: -item[1],
+        )
+        return ranking if top is None else ranking[:top]
+
+    def recommend(
+        self, scores: Dict[str, float], detected_profiles: Sequence[str] = ()
+    ) -> str:
+        """Return the highest scoring profile.
+
+        Without any signal the first detected profile, or else the first
+        configured profile, is recommended.
+        """
+        profile, score = self.rank(scores, top=1)[0]
+        if score > 0:
+            return profile
+        return detected_profiles[0] if detected_profiles else self.profiles[0]
+
+
+_MODELS: Dict[str, Tuple[int, ScoringModel]] = {}
+
+
+def load_scoring_model(roles_file: PathLike = DEFAULT_ROLES_FILE) -> ScoringModel:
+    """Return the scoring model of the ``detection`` section of ``roles_file``.
+
+    Models are cached per file until its modification time changes.
+    """
+    path = os.path.abspath(roles_file)
+    try:
+        mtime_ns = os.stat(path).st_mtime_ns
+        cached = _MODELS.get(path)
+        if cached is not None and cached[0] == mtime_ns:
+            return cached[1]
+        with open(path, "r", encoding="utf-8") as f:
+            config = json.load(f)
+    except (OSError, ValueError) as e:
+        raise DetectionError(f"Cannot read {path}: {e}") from e
+    if not isinstance(config, dict) or "detection" not in config:
+        raise DetectionError(f"{path} has no detection section")
+    errors = validator("detection")(config["detection"])
+    if errors:
+        pointer, message = errors[0]
+        raise DetectionError(
+            f"Invalid detection configuration in {path}#/detection{pointer}: "
+            f"{message}"
+        )
+
+    model = ScoringModel(config["detection"])
+    _MODELS[path] = (mtime_ns, model)
+    return model
+
+
+def confidence_level(detected_profiles: Sequence[str]) -> Optional[str]:
+    """Return ``high``, ``medium`` or ``low``, or None when nothing was detected."""
+    if not detected_profiles:
+        return None
+    if len(detected_profiles) == 1:
+        return "high"
+    if len(detected_profiles) <= 3:
+        return "medium"
+    return "low"
+
+
+class Detection(NamedTuple):
+    """Profile signals found in a workspace."""
+
+    workspace: str
+    # Reasons per profile, for every configured profile in order
+    reasons: Dict[str, List[str]]
+    # Tracked file counts per index category
+    counts: Dict[str, int]
+    # YAML file identified as a CI/CD pipeline, if one was looked for and found
+    pipeline_yaml: Optional[str]
+    # (file count, bytes) per tracked file extension
+    extensions: Dict[str, Tuple[int, int]]
+    model: ScoringModel
+
+    @property
+    def profiles(self) -> List[str]:
+        """Detected profiles, in configured order."""
+        return [profile for profile in self.model.profiles if self.reasons[profile]]
+
+    def scores(
+        self, primary_activity: str = "unknown", tools_preference: str = "unknown"
+    ) -> Dict[str, float]:
+        """Score every profile from detection and optional interactive answers."""
+        return self.model.score(
+            self.profiles,
+            {ext: size for ext, (_, size) in self.extensions.items()},
+            primary_activity,
+            tools_preference,
+        )
+
+    def ranking(
+        self,
+        top: Optional[int] = None,
+        primary_activity: str = "unknown",
+        tools_preference: str = "unknown",
+    ) -> List[Tuple[str, float]]:
+        """Return the ``top`` profiles (all by default) with their scores."""
+        return self.model.rank(self.scores(primary_activity, tools_preference), top)
+
+    def recommend(
+        self, primary_activity: str = "unknown", tools_preference: str = "unknown"
+    ) -> str:
+        """Return the recommended profile, weighing in interactive answers."""
+        return self.model.recommend(
+            self.scores(primary_activity, tools_preference), self.profiles
+        )
+
+    @property
+    def recommended(self) -> str:
+        """Profile recommended from detection alone."""
+        return self.recommend()
+
+    @property
+    def confidence(self) -> Optional[str]:
+        """Confidence in the recommendation (None when nothing was detected)."""
+        return confidence_level(self.profiles)
+
+    def to_dict(
+        self,
+        top: Optional[int] = None,
+        primary_activity: str = "unknown",
+        tools_preference: str = "unknown",
+    ) -> Dict[str, Any]:
+        """Return a JSON-serializable summary."""
+        return {
+            "workspace": self.workspace,
+            "profiles": self.profiles,
+            "recommended": self.recommend(primary_activity, tools_preference),
+            "confidence": self.confidence,
+            "ranking": [
+                {"profile": profile, "score": round(score, 3)}
+                for profile, score in self.ranking(
+                    top, primary_activity, tools_preference
+                )
+            ],
+            "reasons": {profile: self.reasons[profile] for profile in self.profiles},
+            "counts": self.counts,
+            "extensions": {
+                ext: {"files": files, "bytes": size}
+                for ext, (files, size) in sorted(self.extensions.items())
+                if files
+            },
+            "pipeline_yaml": self.pipeline_yaml,
+        }
+
+
+def _create_temp(path: str) -> Tuple[int, str]:
+    """Create a temporary file next to ``path`` and return ``(fd, name)``.
+
+    Stands in for ``tempfile.mkstemp``, whose import would add noticeably to
+    the start-up time of the command-line entry point.
+    """
+    for attempt in range(100):
+        tmp_path = f"{path}.{os.getpid()}.{attempt}.tmp"
+        try:
+            return (
+                os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o644),
+                tmp_path,
+            )
+        except FileExistsError:
+            continue
+    raise FileExistsError(f"Cannot create a temporary file next to {path}")
+
+
+def _category(name: str) -> int:
+    """Return the index column of a tracked file name, or -1."""
+    for column, (_, suffixes) in enumerate(CATEGORIES):
+        if name.endswith(suffixes):
+            return column
+    return -1
+
+
+class _Index:
+    """In-memory form of the detection index shared with bootstrap.sh.
+
+    Besides the category counts bootstrap.sh reads, the index keeps
+    ``ext <suffix> <files> <bytes> <dir>`` lines for the extensions the
+    scoring model tracks. bootstrap.sh drops those lines when it rewrites the
+    index, which makes the next load here fall back to a full walk.
+    """
+
+    def __init__(self, root: str, extensions: FrozenSet[str]) -> None:
+        self.root = root
+        self.extensions = extensions
+        self.dirs: Dict[str, List[int]] = {}
+        # Per directory: suffix -> [file count, bytes]
+        self.stats: Dict[str, Dict[str, List[int]]] = {}
+        self.yaml: Dict[str, None] = {}
+        self.pipeline_yaml: Optional[str] = None
+        # Path -> (size, mtime in seconds) of the YAML files pipeline_yaml
+        # was found in
+        self.yaml_stats: Dict[str, Tuple[int, int]] = {}
+
+    @classmethod
+    def load(
+        cls, path: str, root: str, extensions: FrozenSet[str]
+    ) -> Optional["_Index"]:
+        """Read an index for ``root``, or return None if it cannot be used."""
+        try:
+            with open(path, "r", encoding="utf-8", errors="surrogateescape") as f:
+                lines = f.read().splitlines()
+        except OSError:
+            return None
+        if lines[:3] != [
+            f"# bootstrap detection index v{INDEX_VERSION}",
+            f"root {root}",
+            f"extensions {' '.join(sorted(extensions))}".rstrip(),
+        ]:
+            return None
+
+        index = cls(root, extensions)
+        for line in lines[3:]:
+            kind, _, rest = line.partition(" ")
+            if kind == "dir":
+                fields = rest.split(" ", len(CATEGORIES))
+                if len(fields) != len(CATEGORIES) + 1:
+                    return None
+                index.dirs[fields[-1]] = [int(count) for count in fields[:-1]]
+            elif kind == "ext":
+                fields = rest.split(" ", 3)
+                if len(fields) != 4:
+                    return None
+                index.stats.setdefault(fields[3], {})[fields[0]] = [
+                    int(fields[1]),
+                    int(fields[2]),
+                ]
+            elif kind == "yaml":
+                index.yaml[rest] = None
+            elif kind == "yaml_stat":
+                fields = rest.split(" ", 2)
+                if len(fields) != 3:
+                    return None
+                index.yaml_stats[fields[2]] = (int(fields[0]), int(fields[1]))
+            elif kind == "pipeline_yaml":
+                index.pipeline_yaml = rest
+        return index
+
+    def write(self, path: str) -> None:
+        """Write the index via a temporary file and rename."""
+        lines = [
+            f"# bootstrap detection index v{INDEX_VERSION}",
+            f"root {self.root}",
+            f"extensions {' '.join(sorted(self.extensions))}".rstrip(),
+        ]
+        for directory, counts in self.dirs.items():
+            lines.append(f"dir {' '.join(map(str, counts))} {directory}")
+        for directory, stats in self.stats.items():
+            lines.extend(
+                f"ext {ext} {files} {size} {directory}"
+                for ext, (files, size) in stats.items()
+            )
+        lines.extend(f"yaml {path}" for path in self.yaml)
+        if self.pipeline_yaml is not None:
+            lines.extend(
+                f"yaml_stat {size} {mtime} {path}"
+                for path, (size, mtime) in sorted(self.yaml_stats.items())
+            )
+            lines.append(f"pipeline_yaml {self.pipeline_yaml}")
+
+        fd, tmp_path = _create_temp(path)
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8", errors="surrogateescape") as f:
+                f.write("\n".join(lines) + "\n")
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+    def add_file(self, directory: str, entry: "os.DirEntry[str]") -> None:
+        """Count a file found directly in ``directory``."""
+        name = entry.name
+        ext = os.path.splitext(name)[1]
+        if ext in self.extensions:
+            try:
+                size = entry.stat(follow_symlinks=False).st_size
+            except OSError:
+                size = 0
+            stats = self.stats.setdefault(directory, {}).setdefault(ext, [0, 0])
+            stats[0] += 1
+            stats[1] += size
+
+        column = _category(name)
+        if column < 0:
+            return
+        self.dirs.setdefault(directory, [0] * len(CATEGORIES))[column] += 1
+        if column == YAML_COLUMN:
+            self.yaml[os.path.join(directory, name)] = None
+
+    def list_dir(self, directory: str) -> List[str]:
+        """Count the direct files of ``directory`` and return its subdirectories."""
+        self.dirs[directory] = [0] * len(CATEGORIES)
+        self.stats.pop(directory, None)
+        subdirs = []
+        try:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    name = entry.name
+                    if name.startswith("."):
+                        continue
+                    if entry.is_dir(follow_symlinks=False):
+                        if name not in PRUNE_DIRS:
+                            subdirs.append(entry.path)
+                    elif entry.is_file(follow_symlinks=False):
+                        self.add_file(directory, entry)
+        except OSError:
+            pass
+        return subdirs
+
+    def walk(self, top: str) -> List[str]:
+        """Index ``top`` and every directory below it; return those directories."""
+        listed = []
+        stack = [top]
+        while stack:
+            directory = stack.pop()
+            listed.append(directory)
+            stack.extend(self.list_dir(directory))
+        return listed
+
+    def remove_tree(self, top: str) -> None:
+        """Drop ``top`` and its subtree from the index."""
+        prefix = top + os.sep
+        for directory in [d for d in self.dirs if d == top or d.startswith(prefix)]:
+            del self.dirs[directory]
+            self.stats.pop(directory, None)
+        for path in [p for p in self.yaml if p.startswith(prefix)]:
+            del self.yaml[path]
+
+    def refresh(self, stamp_mtime_ns: int) -> bool:
+        """Rescan directories modified after the last scan; return True if any."""
+        changed = []
+        for directory in self.dirs:
+            try:
+                if os.stat(directory).st_mtime_ns > stamp_mtime_ns:
+                    changed.append(directory)
+            except OSError:
+                continue
+        if not changed:
+            return False
+        self.rescan(changed)
+        return True
+
+    def rescan(self, directories: Iterable[str]) -> List[str]:
+        """Re-list indexed ``directories``; return the directories newly indexed.
+
+        New subdirectories are walked and vanished ones are dropped with their
+        subtrees. Directories that are not in the index are ignored.
+        """
+        added = []
+        for directory in directories:
+            if directory not in self.dirs:
+                continue
+            for path in [p for p in self.yaml if os.path.dirname(p) == directory]:
+                del self.yaml[path]
+            known = {d for d in self.dirs if os.path.dirname(d) == directory}
+            seen = set(self.list_dir(directory))
+            for subdir in known - seen:
+                self.remove_tree(subdir)
+            for subdir in seen - known:
+                added.extend(self.walk(subdir))
+        self.pipeline_yaml = None
+        self.yaml_stats = {}
+        return added
+
+    def stat_yaml(self) -> Dict[str, Tuple[int, int]]:
+        """Return the size and mtime (in seconds) of every indexed YAML file."""
+        stats = {}
+        for path in self.yaml:
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            stats[path] = (stat.st_size, stat.st_mtime_ns // 1_000_000_000)
+        return stats
+
+    def totals(self) -> Dict[str, int]:
+        """Return the tracked file count per category."""
+        totals = [0] * len(CATEGORIES)
+        for counts in self.dirs.values():
+            for column, count in enumerate(counts):
+                totals[column] += count
+        return {name: totals[column] for column, (name, _) in enumerate(CATEGORIES)}
+
+    def extension_totals(self) -> Dict[str, Tuple[int, int]]:
+        """Return ``(file count, bytes)`` per tracked extension."""
+        totals = {ext: [0, 0] for ext in self.extensions}
+        for stats in self.stats.values():
+            for ext, (files, size) in stats.items():
+                totals[ext][0] += files
+                totals[ext][1] += size
+        return {ext: (files, size) for ext, (files, size) in totals.items()}
+
+
+def find_pipeline_yaml(yaml_files: Iterable[str]) -> Optional[str]:
+    """Return the first YAML file that looks like a CI/CD pipeline definition.
+
+    Files with pipeline-like names are checked first, and only the first
+    ``PIPELINE_YAML_PREFIX_LINES`` lines of each file are read.
+    """
+    likely, others = [], []
+    for path in yaml_files:
+        name = os.path.basename(path)
+        (likely if PIPELINE_NAME_PATTERN.search(name) else others).append(path)
+
+    for path in likely + others:
+        try:
+            with open(path, "r", encoding="utf-8", errors="replace") as f:
+                for number, line in enumerate(f):
+                    if number >= PIPELINE_YAML_PREFIX_LINES:
+                        break
+                    if PIPELINE_YAML_PATTERN.search(line.rstrip("\n")):
+                        return path
+        except OSError:
+            continue
+    return None
+
+
+def _scan_index(
+    root: str, rescan: bool, extensions: FrozenSet[str], index_file: str
+) -> Tuple[_Index, Optional[str]]:
+    """Bring the workspace's detection index up to date.
+
+    Returns the index and the file it is kept in, or None when the workspace
+    is not writable and the index only lives for this scan.
+    """
+    stamp_file = index_file + ".stamp"
+    try:
+        os.makedirs(os.path.dirname(index_file), exist_ok=True)
+        writable = os.access(os.path.dirname(index_file), os.W_OK)
+    except OSError:
+        writable = False
+
+    if not writable:
+        index = _Index(root, extensions)
+        index.walk(root)
+        return index, None
+
+    index = None
+    if not rescan:
+        try:
+            stamp_mtime_ns = os.stat(stamp_file).st_mtime_ns
+        except OSError:
+            pass
+        else:
+            index = _Index.load(index_file, root, extensions)
+
+    # Stamp the scan start before touching the tree so changes made while
+    # scanning are picked up by the next run
+    fd, new_stamp = _create_temp(stamp_file)
+    os.close(fd)
+    try:
+        if index is None:
+            index = _Index(root, extensions)
+            index.walk(root)
+        elif not index.refresh(stamp_mtime_ns):
+            os.unlink(new_stamp)
+            return index, index_file
+        index.write(index_file)
+        os.replace(new_stamp, stamp_file)
+    except BaseException:
+        if os.path.exists(new_stamp):
+            os.unlink(new_stamp)
+        raise
+    return index, index_file
+
+
+def detect_workspace(
+    workspace: PathLike = ".",
+    rescan: bool = False,
+    roles_file: PathLike = DEFAULT_ROLES_FILE,
+    index_file: Optional[PathLike] = None,
+) -> Detection:
+    """Scan ``workspace`` and return every profile signal found in it.
+
+    Profiles, their indicators and the scoring weights come from the
+    ``detection`` section of ``roles_file``. With ``rescan`` the detection
+    index is rebuilt from scratch. The index is kept in ``INDEX_PATH`` inside
+    the workspace unless ``index_file`` names another location.
+    """
+    model = load_scoring_model(roles_file)
+    root = os.path.abspath(workspace)
+    index, index_file = _scan_index(
+        root,
+        rescan,
+        model.extensions,
+        os.path.abspath(index_file or os.path.join(root, INDEX_PATH)),
+    )
+    return _detect_from_index(root, model, index, index_file)
+
+
+def _detect_from_index(
+    root: str, model: ScoringModel, index: _Index, index_file: Optional[str]
+) -> Detection:
+    """Evaluate the profile indicators against an up-to-date index."""
+    counts = index.totals()
+    extensions = index.extension_totals()
+    reasons: Dict[str, List[str]] = {profile: [] for profile in model.profiles}
+
+    for indicator in model.indicators:
+        path = os.path.join(root, indicator.relpath)
+        if (os.path.isdir if indicator.kind == "dir" else os.path.isfile)(path):
+            reasons[indicator.profile].append(indicator.reason)
+    # Source files are reported after the fixed indicators of each profile
+    for profile, reason in model.source_reasons.items():
+        if any(extensions[ext][0] for ext in model.profile_extensions[profile]):
+            reasons[profile].append(reason)
+
+    # Other YAML files are only inspected when no well-known CI/CD location
+    # exists; the result is cached in the index with the size and mtime of
+    # every YAML file, until the indexed files or one of those change
+    pipeline_yaml = None
+    for profile in model.pipeline_profiles:
+        if reasons[profile] or counts["yaml"] == 0:
+            continue
+        yaml_stats = index.stat_yaml()
+        if index.pipeline_yaml is None or index.yaml_stats != yaml_stats:
+            index.pipeline_yaml = find_pipeline_yaml(index.yaml) or "none"
+            index.yaml_stats = yaml_stats
+            if index_file is not None:
+                index.write(index_file)
+        if index.pipeline_yaml != "none":
+            pipeline_yaml = index.pipeline_yaml
+            relative = os.path.relpath(pipeline_yaml, root)
+            reasons[profile].append(f"Found CI/CD pipeline files ({relative})")
+
+    return Detection(root, reasons, counts, pipeline_yaml, extensions, model)
+
+
+class IncrementalDetector:
+    """Detection kept current by re-listing only the directories that changed.
+
+    Holds the workspace's index in memory for long-running callers such as the
+    watch daemon, which learn from filesystem notifications which directories
+    changed. Every update writes the index and its stamp back, so
+    ``detect_workspace`` and ``bootstrap.sh`` pick up the watcher's work.
+    """
+
+    def __init__(
+        self,
+        workspace: PathLike = ".",
+        rescan: bool = False,
+        roles_file: PathLike = DEFAULT_ROLES_FILE,
+    ) -> None:
+        self.model = load_scoring_model(roles_file)
+        self.root = os.path.abspath(workspace)
+        self._index, self._index_file = _scan_index(
+            self.root,
+            rescan,
+            self.model.extensions,
+            os.path.join(self.root, INDEX_PATH),
+        )
+        self.detection = _detect_from_index(
+            self.root, self.model, self._index, self._index_file
+        )
+
+    @property
+    def directories(self) -> List[str]:
+        """Directories the index covers."""
+        return list(self._index.dirs)
+
+    def update(self, directories: Optional[Iterable[str]] = None) -> List[str]:
+        """Re-list ``directories`` (all modified ones if None) and re-detect.
+
+        Returns the directories newly added to the index.
+        """
+        if self._index_file is None:
+            new_stamp = None
+        else:
+            fd, new_stamp = _create_temp(self._index_file + ".stamp")
+            os.close(fd)
+        try:
+            if directories is None:
+                known = set(self._index.dirs)
+                self._index.refresh(_stamp_mtime_ns(self._index_file))
+                added = [d for d in self._index.dirs if d not in known]
+            else:
+                added = self._index.rescan(directories)
+            if new_stamp is not None:
+                self._index.write(self._index_file)
+                os.replace(new_stamp, self._index_file + ".stamp")
+        except BaseException:
+            if new_stamp is not None and os.path.exists(new_stamp):
+                os.unlink(new_stamp)
+            raise
+        self.detection = _detect_from_index(
+            self.root, self.model, self._index, self._index_file
+        )
+        return added
+
+
+def _stamp_mtime_ns(index_file: Optional[str]) -> int:
+    """Return the time of the last scan recorded for ``index_file`` (0 if none)."""
+    if index_file is None:
+        return 0
+    try:
+        return os.stat(index_file + ".stamp").st_mtime_ns
+    except OSError:
+        return 0
+
+
+def format_bootstrap(detection: Detection, recommended: str) -> str:
+    """Return the line format bootstrap.sh reads back into its scan results."""
+    lines = [
+        f"profiles {' '.join(detection.profiles)}".rstrip(),
+        f"recommended {recommended}",
+        f"confidence {detection.confidence or 'none'}",
+    ]
+    for profile in detection.profiles:
+        lines.extend(
+            f"reason {profile} {reason}" for reason in detection.reasons[profile]
+        )
+    return "\n".join(lines) + "\n"
+
+
+def _format_text(
+    detection: Detection, recommended: str, ranking: Sequence[Tuple[str, float]]
+) -> str:
+    """Return the detection reasoning in the layout bootstrap.sh prints."""
+    lines = []
+    if not detection.profiles:
+        lines.append("No specific project indicators detected")
+    else:
+        for profile in detection.profiles:
+            lines.append(f"\u2713 {profile} profile detected:")
+            lines.extend(f"  \u2022 {reason}" for reason in detection.reasons[profile])
+            lines.append("")
+        lines.append(f"Recommendation: {recommended}")
+        lines.append(f"Confidence: {detection.confidence.capitalize()}")
+    if ranking:
+        lines.append("")
+        lines.append("Ranking:")
+        lines.extend(
+            f"  {rank}. {profile} ({score:.2f})"
+            for rank, (profile, score) in enumerate(ranking, 1)
+        )
+    return "\n".join(lines) + "\n"
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    """Detect a workspace's profiles from the command line."""
+    parser = argparse.ArgumentParser(
+        prog="python -m mcp_vscode_workflow.detect",
+        description="Detect the project type of a workspace and recommend a profile.",
+    )
+    parser.add_argument(
+        "workspace", nargs="?", default=".", help="workspace root (default: .)"
+    )
+    parser.add_argument(
+        "--rescan",
+        action="store_true",
+        help="ignore the detection index and rescan the whole workspace",
+    )
+    parser.add_argument(
+        "--format",
+        choices=["text", "json", "bootstrap"],
+        default="text",
+        help="output format (default: text; bootstrap is read by bootstrap.sh)",
+    )
+    parser.add_argument(
+        "--roles",
+        default=DEFAULT_ROLES_FILE,
+        help="roles file with the detection configuration (default: .mcp/roles.json)",
+    )
+    parser.add_argument(
+        "--top",
+        type=int,
+        metavar="N",
+        help="list the N highest scoring profiles with their scores",
+    )
+    parser.add_argument(
+        "--activity",
+        default="unknown",
+        help="profile of the user's primary activity, weighed into the scores",
+    )
+    parser.add_argument(
+        "--tools",
+        default="unknown",
+        help="profile of the user's preferred tools, weighed into the scores",
+    )
+    args = parser.parse_args(argv)
+
+    if not os.path.isdir(args.workspace):
+        print(f"Error: {args.workspace} is not a directory", file=sys.stderr)
+        return 1
+    try:
+        detection = detect_workspace(
+            args.workspace, rescan=args.rescan, roles_file=args.roles
+        )
+    except DetectionError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    recommended = detection.recommend(args.activity, args.tools)
+
+    if args.format == "json":
+        result = detection.to_dict(args.top, args.activity, args.tools)
+        print(json.dumps(result, indent=2))
+    elif args.format == "bootstrap":
+        sys.stdout.write(format_bootstrap(detection, recommended))
+    else:
+        ranking = (
+            detection.ranking(args.top, args.activity, args.tools) if args.top else []
+        )
+        sys.stdout.write(_format_text(detection, recommended, ranking))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,433 @@
+"""
+Cache a filesystem MCP server's reads in memory.
+
+Every profile runs ``mcp-server-filesystem --root .``, and agents re-read
+and re-list the same files over and over. This proxy sits between a client
+and the filesystem server and answers the read-only tools (``read_file``,
+``list_directory``, ``get_file_info``, ...) from memory once they have been
+answered by the server:
+
+- results are kept in an LRU cache bounded by their encoded size
+  (``--cache-bytes``, 64 MiB by default)
+- inotify watches the directories of cached paths; any event in a directory
+  drops the cached results for the directory itself and the entry named by
+  the event, and a removed or renamed directory drops everything below it
+- other tool calls (``write_file``, ``move_file``, ...) are forwarded and drop
+  the cached results of the paths in their arguments right away, without
+  waiting for inotify
+- without inotify, or once the watch limit is reached, each cached result is
+  checked against the inode, size and modification time of its paths before
+  it is served
+
+Run under ``mcp_vscode_workflow.supervisor``, which puts the proxy in front of
+``mcp-server-filesystem`` automatically, one cache serves every VS Code window
+of the workspace. ``fscache/stats`` returns the cache counters.
+
+Usage: python -m mcp_vscode_workflow.fscache [--root DIR] [--cache-bytes N]
+                                             -- COMMAND [ARGS...]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, NamedTuple, Optional, Sequence, Set, Tuple
+
+from .config import PathLike
+from .watch import Inotify, WatchError
+
+DEFAULT_CACHE_BYTES = 64 * 1024 * 1024
+
+# Largest JSON-RPC line accepted from the client and the server
+MESSAGE_LIMIT = 64 * 1024 * 1024
+
+# Read-only tools of the filesystem server and the argument naming the paths
+# each one reads
+CACHEABLE_TOOLS = {
+    "read_file": "path",
+    "read_text_file": "path",
+    "read_media_file": "path",
+    "read_multiple_files": "paths",
+    "list_directory": "path",
+    "list_directory_with_sizes": "path",
+    "get_file_info": "path",
+}
+
+# Arguments of the other tools that name paths they may change
+PATH_ARGUMENTS = ("path", "paths", "source", "destination")
+
+# inotify(7) bit set on events about a directory
+IN_ISDIR = 0x40000000
+
+Stamp = Optional[Tuple[int, int, int]]
+
+
+class _Entry(NamedTuple):
+    """A cached tool result and the paths it was read from."""
+
+    result: Dict[str, Any]
+    size: int
+    paths: Tuple[str, ...]
+    stamps: Tuple[Stamp, ...]
+
+
+def stat_stamp(path: str) -> Stamp:
+    """Return the inode, size and modification time of ``path``."""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return (stat.st_ino, stat.st_size, stat.st_mtime_ns)
+
+
+def _encode(message: Dict[str, Any]) -> bytes:
+    """Return a JSON-RPC message as one stdio transport line."""
+    return json.dumps(message, separators=(",", ":")).encode() + b"\n"
+
+
+class ReadCache:
+    """Tool results in least-recently-used order, bounded by encoded size.
+
+    Results are indexed by the paths they were read from so a change to a
+    path drops exactly the results that depend on it. With ``validate`` set,
+    each hit is also checked against the paths' current stat stamps.
+    """
+
+    def __init__(self, max_bytes: int = DEFAULT_CACHE_BYTES, validate: bool = False):
+        self.max_bytes = max_bytes
+        self.validate = validate
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        # Bumped on every invalidation, so reads in flight across a change are
+        # not stored
+        self.generation = 0
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._by_path: Dict[str, Set[str]] = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return the cached result for ``key``, or None."""
+        entry = self._entries.get(key)
+        if entry is not None and self.validate:
+            if any(stat_stamp(p) != s for p, s in zip(entry.paths, entry.stamps)):
+                self._drop(key)
+                entry = None
+        if entry is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry.result
+
+    def put(
+        self,
+        key: str,
+        result: Dict[str, Any],
+        paths: Sequence[str],
+        stamps: Sequence[Stamp],
+    ) -> bool:
+        """Cache ``result``, evicting the oldest results over the budget.
+
+        Returns False if the result alone exceeds the budget.
+        """
+        size = len(json.dumps(result, separators=(",", ":")))
+        if size > self.max_bytes:
+            return False
+        self._drop(key)
+        self._entries[key] = _Entry(result, size, tuple(paths), tuple(stamps))
+        for path in paths:
+            self._by_path.setdefault(path, set()).add(key)
+        self.bytes += size
+        while self.bytes > self.max_bytes:
+            self._drop(next(iter(self._entries)))
+            self.evictions += 1
+        return True
+
+    def invalidate(self, path: str, recursive: bool = False) -> None:
+        """Drop the results read from ``path`` (and below it if ``recursive``)."""
+        self.generation += 1
+        keys = self._by_path.get(path, set()).copy()
+        if recursive:
+            prefix = path.rstrip(os.sep) + os.sep
+            for indexed, indexed_keys in self._by_path.items():
+                if indexed.startswith(prefix):
+                    keys |= indexed_keys
+        for key in keys:
+            self._drop(key)
+
+    def clear(self) -> None:
+        """Drop every result."""
+        self.generation += 1
+        self._entries.clear()
+        self._by_path.clear()
+        self.bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """Return the cache counters."""
+        return {
+            "entries": len(self._entries),
+            "bytes": self.bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "validate": self.validate,
+        }
+
+    def _drop(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        self.bytes -= entry.size
+        for path in entry.paths:
+            keys = self._by_path.get(path)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._by_path[path]
+
+
+class CachingProxy:
+    """Relay stdio between a client and a filesystem server, caching reads."""
+
+    def __init__(
+        self,
+        command: Sequence[str],
+        root: PathLike = ".",
+        max_bytes: int = DEFAULT_CACHE_BYTES,
+        use_inotify: bool = True,
+    ) -> None:
+        self.command = list(command)
+        self.root = os.path.abspath(root)
+        self.cache = ReadCache(max_bytes)
+        self._inotify: Optional[Inotify] = None
+        if use_inotify:
+            try:
+                self._inotify = Inotify()
+            except WatchError:
+                pass
+        self.cache.validate = self._inotify is None
+        self._watched: Set[str] = set()
+        # Client request id -> (cache key or None for a change, paths,
+        # stamps, cache generation when sent)
+        self._pending: Dict[Any, Tuple[Optional[str], Tuple[str, ...], Any, int]] = {}
+
+    def close(self) -> None:
+        """Release the inotify descriptor."""
+        if self._inotify is not None:
+            self._inotify.close()
+            self._inotify = None
+
+    def _resolve(
+        self, arguments: Dict[str, Any], names: Iterable[str]
+    ) -> Tuple[str, ...]:
+        """Return the absolute paths named by ``arguments``."""
+        paths = []
+        for name in names:
+            value = arguments.get(name)
+            values = value if isinstance(value, list) else [value]
+            for path in values:
+                if isinstance(path, str):
+                    path = os.path.expanduser(path)
+                    paths.append(os.path.normpath(os.path.join(self.root, path)))
+        return tuple(paths)
+
+    def _watch(self, paths: Iterable[str]) -> None:
+        """Watch the directories whose events change results read from ``paths``."""
+        if self._inotify is None or self.cache.validate:
+            return
+        for path in paths:
+            for directory in (os.path.dirname(path), path):
+                if directory in self._watched or not os.path.isdir(directory):
+                    continue
+                try:
+                    self._inotify.add(directory)
+                except WatchError:
+                    # Out of watches: check stamps on every hit from now on
+                    self.cache.validate = True
+                    return
+                self._watched.add(directory)
+
+    def _invalidate(self, paths: Iterable[str]) -> None:
+        """Drop the results read from ``paths``, their directories and below."""
+        for path in paths:
+            self.cache.invalidate(os.path.dirname(path))
+            self.cache.invalidate(path, recursive=True)
+
+    def on_events(self) -> None:
+        """Drop the results changed by pending inotify events."""
+        assert self._inotify is not None
+        for directory, name, mask in self._inotify.events():
+            if directory is None:
+                self.cache.clear()
+                continue
+            self.cache.invalidate(directory)
+            if name:
+                path = os.path.join(directory, name)
+                self.cache.invalidate(path, recursive=bool(mask & IN_ISDIR))
+
+    def from_client(self, message: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Return the answer to a client message when it needs no server.
+
+        Returns None for messages to forward; cacheable and changing tool
+        calls are remembered so their responses can be handled.
+        """
+        method = message.get("method")
+        if "id" not in message:
+            return None
+        if method == "fscache/stats":
+            return {"jsonrpc": "2.0", "id": message["id"], "result": self.cache.stats()}
+        if method != "tools/call":
+            return None
+
+        params = message.get("params") or {}
+        name = params.get("name")
+        arguments = params.get("arguments") or {}
+        if name in CACHEABLE_TOOLS:
+            key = f"{name} {json.dumps(arguments, sort_keys=True)}"
+            result = self.cache.get(key)
+            if result is not None:
+                return {"jsonrpc": "2.0", "id": message["id"], "result": result}
+            paths = self._resolve(arguments, [CACHEABLE_TOOLS[name]])
+            # Watch and stamp before the server reads, so no change is missed
+            self._watch(paths)
+            stamps = tuple(stat_stamp(path) for path in paths)
+            self._pending[message["id"]] = (key, paths, stamps, self.cache.generation)
+        else:
+            paths = self._resolve(arguments, PATH_ARGUMENTS)
+            if paths:
+                self._invalidate(paths)
+                self._pending[message["id"]] = (None, paths, (), 0)
+        return None
+
+    def from_server(self, message: Dict[str, Any]) -> None:
+        """Cache the result of a remembered read, or drop a change's paths."""
+        if "method" in message:
+            return
+        pending = self._pending.pop(message.get("id"), None)
+        if pending is None:
+            return
+        key, paths, stamps, generation = pending
+        if key is None:
+            self._invalidate(paths)
+            return
+        result = message.get("result")
+        if (
+            isinstance(result, dict)
+            and not result.get("isError")
+            and generation == self.cache.generation
+        ):
+            self.cache.put(key, result, paths, stamps)
+
+    async def run(self) -> int:
+        """Relay until the server exits; return its exit status."""
+        loop = asyncio.get_running_loop()
+        process = await asyncio.create_subprocess_exec(
+            *self.command,
+            cwd=self.root,
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            limit=MESSAGE_LIMIT,
+        )
+        assert process.stdin is not None and process.stdout is not None
+
+        stdin = asyncio.StreamReader(limit=MESSAGE_LIMIT)
+        await loop.connect_read_pipe(
+            lambda: asyncio.StreamReaderProtocol(stdin), sys.stdin
+        )
+        transport, protocol = await loop.connect_write_pipe(
+            asyncio.streams.FlowControlMixin, sys.stdout
+        )
+        stdout = asyncio.StreamWriter(transport, protocol, None, loop)
+        if self._inotify is not None:
+            loop.add_reader(self._inotify.fd, self.on_events)
+
+        async def relay_client() -> None:
+            assert process.stdin is not None
+            while True:
+                line = await stdin.readline()
+                if not line:
+                    break
+                answer = None
+                try:
+                    message = json.loads(line)
+                except ValueError:
+                    message = None
+                if isinstance(message, dict):
+                    answer = self.from_client(message)
+                if answer is not None:
+                    stdout.write(_encode(answer))
+                    await stdout.drain()
+                else:
+                    process.stdin.write(line)
+                    await process.stdin.drain()
+            process.stdin.close()
+
+        client = asyncio.ensure_future(relay_client())
+        try:
+            while True:
+                line = await process.stdout.readline()
+                if not line:
+                    break
+                try:
+                    message = json.loads(line)
+                except ValueError:
+                    message = None
+                if isinstance(message, dict):
+                    self.from_server(message)
+                stdout.write(line)
+                await stdout.drain()
+        finally:
+            client.cancel()
+            if self._inotify is not None:
+                loop.remove_reader(self._inotify.fd)
+        return await process.wait()
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    """Run a filesystem MCP server behind the read cache."""
+    parser = argparse.ArgumentParser(
+        prog="python -m mcp_vscode_workflow.fscache",
+        description="Cache the reads of a filesystem MCP server in memory.",
+    )
+    parser.add_argument(
+        "--root",
+        default=".",
+        help="directory relative tool paths resolve against (default: .)",
+    )
+    parser.add_argument(
+        "--cache-bytes",
+        type=int,
+        default=DEFAULT_CACHE_BYTES,
+        help=f"memory budget for cached results (default: {DEFAULT_CACHE_BYTES})",
+    )
+    parser.add_argument(
+        "--no-inotify",
+        action="store_true",
+        help="check stat stamps on every hit instead of watching directories",
+    )
+    parser.add_argument("command", nargs=argparse.REMAINDER, help="server command")
+    args = parser.parse_args(argv)
+
+    command = args.command[1:] if args.command[:1] == ["--"] else args.command
+    if not command:
+        parser.error("a server command is required after --")
+
+    proxy = CachingProxy(command, args.root, args.cache_bytes, not args.no_inotify)
+    try:
+        return asyncio.run(proxy.run())
+    except OSError as e:
+        print(f"Error: cannot run {command[0]}: {e}", file=sys.stderr)
+        return 1
+    finally:
+        proxy.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,567 @@
+"""
+Answer repeated git queries from one long-lived process.
+
+Review and debugging sessions ask for the same status, diffs, logs and blames
+again and again, and each answer forks git. ``GitContext`` keeps one
+``git cat-file --batch`` process for object lookups (resolving ``HEAD`` and
+revisions, reading file contents at a revision) and caches every query result
+in an LRU bounded by bytes, keyed by what the answer depends on:
+
+- queries about commits only (a log, a diff between two revisions, a blame or
+  show at a revision) are keyed by the resolved object ids and stay valid
+- ``diff --cached`` is keyed by ``HEAD`` and the index file's stat stamp
+- queries reading the working tree are keyed by ``HEAD``, the index stamp and
+  either the stat stamps of the files they name or, for whole-tree queries,
+  a generation counter bumped by inotify events in tracked directories;
+  without inotify whole-tree queries are not cached
+- ``status`` is also keyed by the branch ``HEAD`` names and the upstream's
+  commit, for its branch and ahead/behind line
+
+``batch`` answers several queries at once: duplicates are answered once,
+cache hits without a fork, and the remaining git commands run in parallel.
+
+``serve`` runs a stdio MCP server exposing the queries as tools, to run next
+to ``mcp-server-git`` (under ``mcp_vscode_workflow.supervisor`` one instance
+is shared by every window).
+
+Usage: python -m mcp_vscode_workflow.gitcontext
+       status|diff|log|blame|show|batch|serve [--repository DIR] ...
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Sequence, Set, Tuple
+
+from .config import PathLike
+from .fscache import DEFAULT_CACHE_BYTES, IN_ISDIR, ReadCache, Stamp, stat_stamp
+from .watch import Inotify, WatchError
+
+DEFAULT_WORKERS = 4
+DEFAULT_LOG_COUNT = 20
+
+PROTOCOL_VERSION = "2024-11-05"
+
+# inotify(7) bit for a created entry
+IN_CREATE = 0x00000100
+
+# Queries and the argument names each accepts
+QUERIES = {
+    "status": (),
+    "diff": ("base", "target", "cached", "paths", "context"),
+    "log": ("rev", "max_count", "paths"),
+    "blame": ("path", "rev"),
+    "show": ("rev", "path"),
+}
+
+
+class GitError(Exception):
+    """Raised when git cannot answer a query."""
+
+
+class CatFile:
+    """A ``git cat-file --batch`` process reading objects without forking."""
+
+    def __init__(self, repository: PathLike) -> None:
+        try:
+            self._process = subprocess.Popen(
+                ["git", "cat-file", "--batch"],
+                cwd=repository,
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.DEVNULL,
+            )
+        except OSError as e:
+            raise GitError(f"Cannot run git: {e}") from e
+        self._lock = threading.Lock()
+        self.reads = 0
+
+    def read(self, name: str) -> Optional[Tuple[str, str, bytes]]:
+        """Return ``(oid, type, content)`` of an object name, or None if missing."""
+        if "\n" in name:
+            raise GitError(f"Invalid object name: {name!r}")
+        process = self._process
+        assert process.stdin is not None and process.stdout is not None
+        with self._lock:
+            try:
+                process.stdin.write(name.encode() + b"\n")
+                process.stdin.flush()
+                header = process.stdout.readline().split()
+                if len(header) != 3:
+                    if not header:
+                        raise GitError("git cat-file exited")
+                    return None  # "<name> missing" or "<name> ambiguous"
+                content = process.stdout.read(int(header[2]))
+                process.stdout.read(1)
+            except (OSError, ValueError) as e:
+                raise GitError(f"git cat-file failed: {e}") from e
+            self.reads += 1
+        return header[0].decode(), header[1].decode(), content
+
+    def resolve(self, name: str) -> Optional[str]:
+        """Return the object id ``name`` resolves to, or None."""
+        entry = self.read(name)
+        return entry[0] if entry is not None else None
+
+    def close(self) -> None:
+        """Stop the cat-file process."""
+        if self._process.stdin is not None:
+            self._process.stdin.close()
+        self._process.wait()
+
+
+class GitContext:
+    """Cached git queries for one repository."""
+
+    def __init__(
+        self,
+        repository: PathLike = ".",
+        max_bytes: int = DEFAULT_CACHE_BYTES,
+        use_inotify: bool = True,
+        workers: int = DEFAULT_WORKERS,
+    ) -> None:
+        self.forks = 0
+        self.root, self.git_dir, common_dir = self._git(
+            ["rev-parse", "--show-toplevel", "--absolute-git-dir", "--git-common-dir"],
+            repository,
+        ).splitlines()
+        self.common_dir = os.path.join(os.path.abspath(repository), common_dir)
+        self.cat_file = CatFile(self.root)
+        self.cache = ReadCache(max_bytes)
+        self.workers = workers
+        self._lock = threading.Lock()
+        self._generation = 0
+        # (HEAD and config it was looked up for, upstream ref name or None)
+        self._upstream: Optional[Tuple[List[Any], Optional[str]]] = None
+        self._inotify: Optional[Inotify] = None
+        if use_inotify:
+            self._watch_worktree()
+
+    def close(self) -> None:
+        """Stop the cat-file process and drop the watches."""
+        self.cat_file.close()
+        if self._inotify is not None:
+            self._inotify.close()
+            self._inotify = None
+
+    def _git(self, args: Sequence[str], cwd: Optional[PathLike] = None) -> str:
+        """Run git and return its output.
+
+        Optional locks are off so status does not rewrite the index and
+        change the stamp the answer was cached under.
+        """
+        self.forks += 1
+        try:
+            result = subprocess.run(
+                ["git", "--no-optional-locks", *args],
+                cwd=cwd or self.root,
+                capture_output=True,
+                text=True,
+                errors="replace",
+            )
+        except OSError as e:
+            raise GitError(f"Cannot run git: {e}") from e
+        if result.returncode != 0:
+            raise GitError(result.stderr.strip() or f"git {args[0]} failed")
+        return result.stdout
+
+    def _watch_worktree(self) -> None:
+        """Watch every directory holding tracked files."""
+        directories: Set[str] = {self.root}
+        for path in self._git(["ls-files", "-z"]).split("\0"):
+            directory = os.path.dirname(path)
+            while directory and directory not in directories:
+                directories.add(directory)
+                directory = os.path.dirname(directory)
+        try:
+            self._inotify = Inotify()
+            for directory in directories:
+                self._inotify.add(os.path.join(self.root, directory))
+        except WatchError:
+            if self._inotify is not None:
+                self._inotify.close()
+            self._inotify = None
+
+    def _worktree_generation(self) -> Optional[int]:
+        """Return the working tree generation, or None if it is not watched."""
+        if self._inotify is None:
+            return None
+        for directory, name, mask in self._inotify.events():
+            self._generation += 1
+            if directory is not None and mask & IN_ISDIR and mask & IN_CREATE:
+                try:
+                    self._inotify.add(os.path.join(directory, name))
+                except WatchError:
+                    self._inotify.close()
+                    self._inotify = None
+                    return None
+        return self._generation
+
+    def _index_stamp(self) -> Stamp:
+        return stat_stamp(os.path.join(self.git_dir, "index"))
+
+    def _resolve(self, rev: str) -> str:
+        """Return the commit a revision names."""
+        oid = self.cat_file.resolve(f"{rev}^{{commit}}")
+        if oid is None:
+            raise GitError(f"Unknown revision: {rev}")
+        return oid
+
+    def _worktree_key(self, paths: Sequence[str]) -> Optional[List[Any]]:
+        """Return what a working tree query depends on, or None if uncacheable."""
+        head = self.cat_file.resolve("HEAD")
+        full_paths = [os.path.join(self.root, path) for path in paths]
+        if full_paths and all(os.path.isfile(path) for path in full_paths):
+            return [head, self._index_stamp(), [stat_stamp(p) for p in full_paths]]
+        generation = self._worktree_generation()
+        if generation is None:
+            return None
+        return [head, self._index_stamp(), generation]
+
+    def _branch_key(self) -> List[Any]:
+        """Return what the ``## branch...upstream`` line of status depends on.
+
+        HEAD's commit id misses a renamed or switched branch at the same
+        commit, and ahead/behind counts change when a fetch moves the upstream.
+        """
+        try:
+            with open(os.path.join(self.git_dir, "HEAD"), "r", encoding="utf-8") as f:
+                head_ref = f.read().strip()
+        except OSError:
+            head_ref = None
+        # The upstream's name only changes with HEAD or the config; cat-file
+        # cannot be asked for @{upstream} (it exits when there is none)
+        names_key = [head_ref, stat_stamp(os.path.join(self.common_dir, "config"))]
+        if self._upstream is None or self._upstream[0] != names_key:
+            try:
+                name: Optional[str] = self._git(
+                    ["rev-parse", "--symbolic-full-name", "@{upstream}"]
+                ).strip()
+            except GitError:
+                name = None
+            self._upstream = (names_key, name)
+        upstream = self._upstream[1]
+        return [head_ref, self.cat_file.resolve(upstream) if upstream else None]
+
+    def _plan(self, command: str, args: Dict[str, Any]) -> Tuple[Any, Any]:
+        """Return the cache key of a query and how to answer it.
+
+        The answer is a git argument list, or an ``("object", name)`` pair read
+        through cat-file. The key is None when the answer cannot be cached.
+        """
+        if command not in QUERIES:
+            raise GitError(f"Unknown query: {command}")
+        unknown = set(args) - set(QUERIES[command])
+        if unknown:
+            raise GitError(f"Unknown arguments for {command}: {sorted(unknown)}")
+        paths = list(args.get("paths") or [])
+
+        if command == "status":
+            key = self._worktree_key([])
+            if key is not None:
+                key += self._branch_key()
+            return key, ["status", "--short", "--branch"]
+
+        if command == "diff":
+            git_args = ["diff", f"--unified={int(args.get('context', 3))}"]
+            if args.get("target"):
+                base = self._resolve(args.get("base") or "HEAD")
+                target = self._resolve(args["target"])
+                key: Any = [base, target]
+                git_args += [base, target]
+            elif args.get("cached"):
+                key = [self.cat_file.resolve("HEAD"), self._index_stamp()]
+                git_args += ["--cached"]
+                if args.get("base"):
+                    base = self._resolve(args["base"])
+                    key.append(base)
+                    git_args.append(base)
+            else:
+                key = self._worktree_key(paths)
+                if args.get("base") and key is not None:
+                    base = self._resolve(args["base"])
+                    key.append(base)
+                    git_args.append(base)
+                elif args.get("base"):
+                    git_args.append(args["base"])
+            return key, git_args + ["--", *paths]
+
+        if command == "log":
+            rev = self._resolve(args.get("rev") or "HEAD")
+            count = int(args.get("max_count", DEFAULT_LOG_COUNT))
+            return [rev], ["log", f"--max-count={count}", rev, "--", *paths]
+
+        if command == "blame":
+            if not args.get("path"):
+                raise GitError("blame needs a path")
+            if args.get("rev"):
+                rev = self._resolve(args["rev"])
+                return [rev], ["blame", rev, "--", args["path"]]
+            return self._worktree_key([args["path"]]), ["blame", "--", args["path"]]
+
+        rev = self._resolve(args.get("rev") or "HEAD")
+        if args.get("path"):
+            return [rev], ("object", f"{rev}:{args['path']}")
+        return [rev], ["show", rev]
+
+    def _answer(self, plan: Any) -> str:
+        """Run a planned query."""
+        if isinstance(plan, tuple):
+            entry = self.cat_file.read(plan[1])
+            if entry is None:
+                raise GitError(f"No such file: {plan[1]}")
+            if entry[1] != "blob":
+                raise GitError(f"{plan[1]} is a {entry[1]}, not a file")
+            return entry[2].decode("utf-8", errors="replace")
+        return self._git(plan)
+
+    def _cache_key(self, command: str, args: Dict[str, Any], key: Any) -> str:
+        return json.dumps([command, args, key], sort_keys=True)
+
+    def query(self, command: str, **args: Any) -> str:
+        """Answer one query, from the cache when possible."""
+        result = self.batch([dict(args, command=command)])[0]
+        if "error" in result:
+            raise GitError(result["error"])
+        return result["output"]
+
+    def batch(self, queries: Sequence[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Answer several queries at once.
+
+        Each query is a dict with a ``command`` and its arguments. Returns, in
+        order, a dict per query with the ``output`` or an ``error``, and
+        whether it came from the cache.
+        """
+        results: List[Optional[Dict[str, Any]]] = [None] * len(queries)
+        misses: Dict[str, Tuple[Any, Any, List[int]]] = {}
+        with self._lock:
+            for i, query in enumerate(queries):
+                args = {k: v for k, v in query.items() if k != "command"}
+                try:
+                    key, plan = self._plan(str(query.get("command")), args)
+                except GitError as e:
+                    results[i] = {"error": str(e)}
+                    continue
+                cache_key = self._cache_key(str(query["command"]), args, key)
+                if cache_key in misses:
+                    misses[cache_key][2].append(i)
+                    continue
+                cached = self.cache.get(cache_key) if key is not None else None
+                if cached is not None:
+                    results[i] = {"output": cached["output"], "cached": True}
+                else:
+                    misses[cache_key] = (key, plan, [i])
+
+        def answer(plan: Any) -> Dict[str, Any]:
+            try:
+                return {"output": self._answer(plan), "cached": False}
+            except GitError as e:
+                return {"error": str(e)}
+
+        plans = list(misses.items())
+        if len(plans) > 1 and self.workers > 1:
+            with ThreadPoolExecutor(max_workers=self.workers) as executor:
+                answers = list(executor.map(answer, [p[1][1] for p in plans]))
+        else:
+            answers = [answer(p[1][1]) for p in plans]
+
+        with self._lock:
+            for (cache_key, (key, _, indexes)), result in zip(plans, answers):
+                if key is not None and "output" in result:
+                    self.cache.put(cache_key, {"output": result["output"]}, [], [])
+                for i in indexes:
+                    results[i] = result
+        return [result for result in results if result is not None]
+
+    def stats(self) -> Dict[str, Any]:
+        """Return cache counters and the number of git processes started."""
+        return dict(
+            self.cache.stats(),
+            forks=self.forks,
+            object_reads=self.cat_file.reads,
+            watching=self._inotify is not None,
+        )
+
+
+# Tool definitions served by ``serve``
+TOOLS = [
+    {
+        "name": "git_status",
+        "description": "Short status of the working tree with the branch line.",
+        "inputSchema": {"type": "object", "properties": {}},
+    },
+    {
+        "name": "git_diff",
+        "description": (
+            "Diff of the working tree (default), the index (cached) or between "
+            "two revisions (base and target)."
+        ),
+        "inputSchema": {
+            "type": "object",
+            "properties": {
+                "base": {"type": "string"},
+                "target": {"type": "string"},
+                "cached": {"type": "boolean"},
+                "paths": {"type": "array", "items": {"type": "string"}},
+                "context": {"type": "integer"},
+            },
+        },
+    },
+    {
+        "name": "git_log",
+        "description": "Commit log from a revision (default HEAD).",
+        "inputSchema": {
+            "type": "object",
+            "properties": {
+                "rev": {"type": "string"},
+                "max_count": {"type": "integer"},
+                "paths": {"type": "array", "items": {"type": "string"}},
+            },
+        },
+    },
+    {
+        "name": "git_blame",
+        "description": "Blame of a file in the working tree or at a revision.",
+        "inputSchema": {
+            "type": "object",
+            "properties": {"path": {"type": "string"}, "rev": {"type": "string"}},
+            "required": ["path"],
+        },
+    },
+    {
+        "name": "git_show",
+        "description": "A commit, or a file's content at a revision.",
+        "inputSchema": {
+            "type": "object",
+            "properties": {"rev": {"type": "string"}, "path": {"type": "string"}},
+        },
+    },
+    {
+        "name": "git_batch",
+        "description": (
+            "Several queries in one call; each has a command (status, diff, "
+            "log, blame, show) and that command's arguments."
+        ),
+        "inputSchema": {
+            "type": "object",
+            "properties": {"queries": {"type": "array", "items": {"type": "object"}}},
+            "required": ["queries"],
+        },
+    },
+]
+
+
+def _call_tool(context: GitContext, name: str, arguments: Dict[str, Any]) -> Any:
+    """Return the MCP result of a tool call."""
+    if name == "git_batch":
+        results = context.batch(arguments.get("queries", []))
+        text = json.dumps(results, indent=2)
+        return {"content": [{"type": "text", "text": text}]}
+    command = name[len("git_") :] if name.startswith("git_") else name
+    result = context.batch([dict(arguments, command=command)])[0]
+    if "error" in result:
+        return {"content": [{"type": "text", "text": result["error"]}], "isError": True}
+    return {"content": [{"type": "text", "text": result["output"]}]}
+
+
+def serve(context: GitContext) -> None:
+    """Answer MCP requests on stdin until it closes."""
+    for line in sys.stdin:
+        try:
+            message = json.loads(line)
+        except ValueError:
+            continue
+        if not isinstance(message, dict) or "id" not in message:
+            continue
+        method = message.get("method")
+        params = message.get("params") or {}
+        response: Dict[str, Any] = {"jsonrpc": "2.0", "id": message["id"]}
+        if method == "initialize":
+            response["result"] = {
+                "protocolVersion": PROTOCOL_VERSION,
+                "capabilities": {"tools": {}},
+                "serverInfo": {"name": "mcp-workflow-git-context"},
+            }
+        elif method == "ping":
+            response["result"] = {}
+        elif method == "tools/list":
+            response["result"] = {"tools": TOOLS}
+        elif method == "tools/call":
+            response["result"] = _call_tool(
+                context, params.get("name", ""), params.get("arguments") or {}
+            )
+        elif method == "gitcontext/stats":
+            response["result"] = context.stats()
+        else:
+            response["error"] = {"code": -32601, "message": f"Unknown method {method}"}
+        sys.stdout.write(json.dumps(response) + "\n")
+        sys.stdout.flush()
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    """Answer git queries from the command line, or serve them over MCP."""
+    parser = argparse.ArgumentParser(
+        prog="python -m mcp_vscode_workflow.gitcontext",
+        description="Cached, batched git status, diff, log, blame and show.",
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument(
+        "--repository", default=".", help="repository directory (default: .)"
+    )
+
+    subparsers.add_parser("status", parents=[common], help="short status")
+    diff_parser = subparsers.add_parser("diff", parents=[common], help="a diff")
+    diff_parser.add_argument("base", nargs="?", help="revision to compare with")
+    diff_parser.add_argument("target", nargs="?", help="second revision")
+    diff_parser.add_argument("--cached", action="store_true", help="diff the index")
+    diff_parser.add_argument("--paths", nargs="*", default=[], help="limit to paths")
+    log_parser = subparsers.add_parser("log", parents=[common], help="commit log")
+    log_parser.add_argument("rev", nargs="?", help="revision (default: HEAD)")
+    log_parser.add_argument("--max-count", type=int, default=DEFAULT_LOG_COUNT)
+    blame_parser = subparsers.add_parser("blame", parents=[common], help="blame")
+    blame_parser.add_argument("path", help="file to blame")
+    blame_parser.add_argument("--rev", help="revision (default: working tree)")
+    show_parser = subparsers.add_parser("show", parents=[common], help="show")
+    show_parser.add_argument("rev", nargs="?", help="revision (default: HEAD)")
+    show_parser.add_argument("--path", help="print this file at the revision")
+    subparsers.add_parser(
+        "batch",
+        parents=[common],
+        help="answer a JSON list of queries from stdin",
+    )
+    subparsers.add_parser("serve", parents=[common], help="run a stdio MCP server")
+    args = parser.parse_args(argv)
+
+    try:
+        context = GitContext(args.repository, use_inotify=args.command == "serve")
+    except GitError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    try:
+        if args.command == "serve":
+            serve(context)
+            return 0
+        if args.command == "batch":
+            print(json.dumps(context.batch(json.load(sys.stdin)), indent=2))
+            return 0
+        query = {
+            k: v
+            for k, v in vars(args).items()
+            if k in QUERIES[args.command] and v not in (None, [], False)
+        }
+        sys.stdout.write(context.query(args.command, **query))
+        return 0
+    except (GitError, ValueError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    finally:
+        context.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,346 @@
+"""
+Detect a profile per top-level subtree of a monorepo.
+
+Whole-workspace detection gives one recommendation for the root; a monorepo
+with ``services/`` (Python), ``infra/`` (Terraform), ``docs/`` (mkdocs) and
+``web/`` (TypeScript) side by side only ever gets "Confidence: Low". Here each
+top-level directory is detected on its own, in parallel with one worker
+process per subtree, and the resulting map from subtree to profile drives a
+multi-root VS Code workspace:
+
+- ``<workspace>.code-workspace`` lists each detected subtree as a folder,
+  named after its profile, followed by the workspace root itself, and
+  recommends the extensions of every profile in use
+- each subtree's ``.vscode/settings.json`` receives the settings of its
+  profile, composed from ``.vscode/profiles`` (see
+  ``mcp_vscode_workflow.vscodeprofile``); keys already present in the file
+  are left alone. The file is read as JSONC, as VS Code does; one with
+  comments that would need new keys is left untouched and reported, since
+  rewriting it would drop the comments
+
+Each subtree keeps its detection index under the root's
+``.mcp/cache/subtrees/`` so the subtrees themselves are not written to while
+detecting.
+
+Usage: python -m mcp_vscode_workflow.monorepo [WORKSPACE] [--workers N]
+                                             [--format F] [--write-workspace]
+"""
+
+import argparse
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from .detect import (
+    DEFAULT_ROLES_FILE,
+    PRUNE_DIRS,
+    Detection,
+    DetectionError,
+    PathLike,
+    detect_workspace,
+)
+from .vscodeprofile import (
+    DEFAULT_PROFILES_DIR,
+    ProfileError,
+    compose_profile,
+    read_jsonc,
+)
+
+# Per-subtree detection indexes, relative to the workspace root
+SUBTREE_INDEX_DIR = os.path.join(".mcp", "cache", "subtrees")
+
+WORKSPACE_FILE_SUFFIX = ".code-workspace"
+
+
+class MonorepoError(Exception):
+    """Raised when a monorepo workspace cannot be generated."""
+
+
+class WorkspaceFiles(NamedTuple):
+    """The multi-root workspace written for a monorepo."""
+
+    path: str
+    # Subtrees whose settings.json has comments and was left untouched
+    skipped: List[str]
+
+
+def list_subtrees(workspace: PathLike) -> List[str]:
+    """Return the top-level directories detection looks at, sorted by name.
+
+    Hidden directories and dependency or build trees are skipped, as in the
+    workspace scan.
+    """
+    subtrees = []
+    with os.scandir(workspace) as entries:
+        for entry in entries:
+            if entry.name.startswith(".") or entry.name in PRUNE_DIRS:
+                continue
+            if entry.is_dir(follow_symlinks=False):
+                subtrees.append(entry.name)
+    return sorted(subtrees)
+
+
+def _detect_subtree(root: str, name: str, rescan: bool, roles_file: str) -> Detection:
+    """Detect one subtree, keeping its index under the root's cache."""
+    return detect_workspace(
+        os.path.join(root, name),
+        rescan=rescan,
+        roles_file=roles_file,
+        index_file=os.path.join(root, SUBTREE_INDEX_DIR, f"{name}.index"),
+    )
+
+
+def detect_subtrees(
+    workspace: PathLike = ".",
+    rescan: bool = False,
+    roles_file: PathLike = DEFAULT_ROLES_FILE,
+    workers: Optional[int] = None,
+) -> Dict[str, Detection]:
+    """Detect every top-level subtree of ``workspace`` in parallel.
+
+    Returns the detections of the subtrees where any profile was detected,
+    by subtree name. ``workers`` caps the worker processes (default: one per
+    subtree, up to the CPU count); 1 detects in this process.
+    """
+    root = os.path.abspath(workspace)
+    roles_file = os.path.abspath(roles_file)
+    subtrees = list_subtrees(root)
+    os.makedirs(os.path.join(root, SUBTREE_INDEX_DIR), exist_ok=True)
+
+    if workers is None:
+        workers = min(len(subtrees), os.cpu_count() or 1)
+    if workers <= 1 or len(subtrees) <= 1:
+        detections = [
+            _detect_subtree(root, name, rescan, roles_file) for name in subtrees
+        ]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = [
+                executor.submit(_detect_subtree, root, name, rescan, roles_file)
+                for name in subtrees
+            ]
+            detections = [future.result() for future in futures]
+
+    return {
+        name: detection
+        for name, detection in zip(subtrees, detections)
+        if detection.profiles
+    }
+
+
+def subtree_profiles(detections: Dict[str, Detection]) -> Dict[str, str]:
+    """Return the recommended profile of each subtree."""
+    return {name: detection.recommended for name, detection in detections.items()}
+
+
+def load_profile_settings(
+    profile: str, profiles_dir: PathLike = DEFAULT_PROFILES_DIR
+) -> Dict[str, Any]:
+    """Return the composed VS Code profile document for ``profile``."""
+    try:
+        return compose_profile(profile, profiles_dir)
+    except ProfileError as e:
+        raise MonorepoError(str(e)) from e
+
+
+def build_workspace(
+    workspace: PathLike,
+    profiles: Dict[str, str],
+    profiles_dir: PathLike = DEFAULT_PROFILES_DIR,
+) -> Dict[str, Any]:
+    """Return a multi-root workspace document for a subtree-to-profile map."""
+    root_name = os.path.basename(os.path.abspath(workspace))
+    folders = [
+        {"name": f"{name} ({profile})", "path": name}
+        for name, profile in sorted(profiles.items())
+    ]
+    folders.append({"name": root_name, "path": "."})
+
+    recommendations: List[str] = []
+    for profile in sorted(set(profiles.values())):
+        document = load_profile_settings(profile, profiles_dir)
+        for extension in document.get("extensions", {}).get("recommendations", []):
+            if extension not in recommendations:
+                recommendations.append(extension)
+
+    return {
+        "folders": folders,
+        "settings": {},
+        "extensions": {"recommendations": recommendations},
+    }
+
+
+def _write_json_if_changed(path: str, document: Any) -> bool:
+    """Write ``document`` to ``path`` unless it already holds it; True if written."""
+    content = json.dumps(document, indent=2) + "\n"
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            if f.read() == content:
+                return False
+    except OSError:
+        pass
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(content)
+    return True
+
+
+def write_folder_settings(
+    folder: PathLike, profile: str, profiles_dir: PathLike = DEFAULT_PROFILES_DIR
+) -> Optional[bool]:
+    """Apply a profile's settings to ``folder/.vscode/settings.json``.
+
+    Settings already in the file win over the profile's. Returns True if the
+    file was written, False if it already held every setting and None if it
+    was left untouched because rewriting it would drop its comments.
+    """
+    path = os.path.join(folder, ".vscode", "settings.json")
+    try:
+        existing = read_jsonc(path)
+    except ProfileError as e:
+        raise MonorepoError(str(e)) from e
+
+    settings = dict(load_profile_settings(profile, profiles_dir).get("settings", {}))
+    settings.update(existing.document)
+    if settings == existing.document and os.path.exists(path):
+        return False
+    if existing.commented:
+        return None
+    return _write_json_if_changed(path, settings)
+
+
+def write_workspace(
+    workspace: PathLike,
+    profiles: Dict[str, str],
+    profiles_dir: PathLike = DEFAULT_PROFILES_DIR,
+) -> WorkspaceFiles:
+    """Write the multi-root workspace file and each subtree's folder settings.
+
+    Returns the path of the ``.code-workspace`` file and the subtrees whose
+    settings were left untouched.
+    """
+    root = os.path.abspath(workspace)
+    skipped = []
+    for name, profile in profiles.items():
+        folder = os.path.join(root, name)
+        if write_folder_settings(folder, profile, profiles_dir) is None:
+            skipped.append(name)
+
+    path = os.path.join(root, os.path.basename(root) + WORKSPACE_FILE_SUFFIX)
+    _write_json_if_changed(path, build_workspace(root, profiles, profiles_dir))
+    return WorkspaceFiles(path, skipped)
+
+
+def _format_text(detections: Dict[str, Detection]) -> str:
+    """Return one line per subtree with its profile and confidence."""
+    if not detections:
+        return "No specific project indicators detected in any subtree\n"
+    width = max(len(name) for name in detections)
+    return "".join(
+        f"{name:<{width}}  {detection.recommended} "
+        f"(confidence: {detection.confidence})\n"
+        for name, detection in detections.items()
+    )
+
+
+def _format_bootstrap(
+    detections: Dict[str, Detection], workspace_file: Optional[str]
+) -> str:
+    """Return the line format bootstrap.sh reads back."""
+    lines: List[Tuple[str, ...]] = [
+        ("subtree", detection.recommended, detection.confidence or "none", name)
+        for name, detection in detections.items()
+    ]
+    if workspace_file is not None:
+        lines.append(("workspace", workspace_file))
+    return "".join(" ".join(line) + "\n" for line in lines)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    """Detect per-subtree profiles from the command line."""
+    parser = argparse.ArgumentParser(
+        prog="python -m mcp_vscode_workflow.monorepo",
+        description="Detect a profile for each top-level subtree of a workspace.",
+    )
+    parser.add_argument(
+        "workspace", nargs="?", default=".", help="workspace root (default: .)"
+    )
+    parser.add_argument(
+        "--rescan",
+        action="store_true",
+        help="ignore the detection indexes and rescan every subtree",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        help="worker processes (default: one per subtree, up to the CPU count)",
+    )
+    parser.add_argument(
+        "--roles",
+        default=DEFAULT_ROLES_FILE,
+        help="roles file with the detection configuration (default: .mcp/roles.json)",
+    )
+    parser.add_argument(
+        "--profiles-dir",
+        default=DEFAULT_PROFILES_DIR,
+        help="directory of VS Code profile settings (default: .vscode/profiles)",
+    )
+    parser.add_argument(
+        "--write-workspace",
+        action="store_true",
+        help="write a multi-root .code-workspace file and per-folder settings",
+    )
+    parser.add_argument(
+        "--format",
+        choices=["text", "json", "bootstrap"],
+        default="text",
+        help="output format (default: text; bootstrap is read by bootstrap.sh)",
+    )
+    args = parser.parse_args(argv)
+
+    if not os.path.isdir(args.workspace):
+        print(f"Error: {args.workspace} is not a directory", file=sys.stderr)
+        return 1
+    try:
+        detections = detect_subtrees(
+            args.workspace, args.rescan, args.roles, workers=args.workers
+        )
+        workspace_file = None
+        if args.write_workspace and detections:
+            written = write_workspace(
+                args.workspace, subtree_profiles(detections), args.profiles_dir
+            )
+            workspace_file = written.path
+            for name in written.skipped:
+                print(
+                    f"Warning: left {name}/.vscode/settings.json unchanged; "
+                    "it has comments, add the profile settings by hand",
+                    file=sys.stderr,
+                )
+    except (DetectionError, MonorepoError, OSError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+
+    if args.format == "json":
+        result = {
+            "workspace": os.path.abspath(args.workspace),
+            "subtrees": {
+                name: detection.to_dict() for name, detection in detections.items()
+            },
+            "profiles": subtree_profiles(detections),
+            "workspace_file": workspace_file,
+        }
+        print(json.dumps(result, indent=2))
+    elif args.format == "bootstrap":
+        sys.stdout.write(_format_bootstrap(detections, workspace_file))
+    else:
+        sys.stdout.write(_format_text(detections))
+        if workspace_file is not None:
+            print(f"Workspace: {workspace_file}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
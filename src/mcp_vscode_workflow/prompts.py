@@ -0,0 +1,438 @@
+"""
+Indexed, lazily loaded access to the prompt library in ``.mcp/prompts``.
+
+The first open builds ``.mcp/cache/prompts/index.json`` and packs every prompt
+body into one ``library-<hash>.bin`` file. The index records each prompt's
+name, role (from ``roles.json`` ``promptFile`` entries), byte offset and size
+in the pack, content hash, approximate token count and template variables.
+
+Later opens read only the index and memory-map the pack, so start-up cost does
+not grow with prompt size. Bodies are sliced out of the map when requested,
+and rendered prompts (bodies with ``{{VARIABLE}}`` substitutions applied) are
+kept in a bounded LRU.
+
+The index is rebuilt when a prompt is added, removed or renamed (the prompts
+directory mtime changes), when ``roles.json`` changes, or when a prompt being
+read no longer matches its recorded size and mtime.
+
+Usage: python -m mcp_vscode_workflow.prompts list|show|render ...
+"""
+
+import argparse
+import hashlib
+import json
+import mmap
+import os
+import re
+import sys
+import tempfile
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, List, Mapping, NamedTuple, Optional, Sequence, Union
+
+PathLike = Union[str, "os.PathLike[str]"]
+
+# Bump when the index layout changes to force a rebuild
+INDEX_VERSION = 1
+
+DEFAULT_PROMPTS_DIR = Path(".mcp") / "prompts"
+DEFAULT_RENDER_CACHE_SIZE = 128
+
+# Rough characters-per-token ratio for English prose and code
+CHARS_PER_TOKEN = 4
+
+VARIABLE_PATTERN = re.compile(r"\{\{([A-Z][A-Z0-9_]*)\}\}")
+
+# Prompt argument names (as declared in mcp.json) whose template variable differs
+ARGUMENT_ALIASES = {
+    "code": "CODE_BLOCK",
+    "error": "ERROR_MESSAGE",
+}
+
+
+class PromptError(Exception):
+    """Raised when a prompt is unknown or the library cannot be read."""
+
+
+class PromptEntry(NamedTuple):
+    """Index record for one prompt; the body itself is loaded on demand."""
+
+    name: str
+    role: Optional[str]
+    path: str
+    offset: int
+    size: int
+    sha256: str
+    tokens: int
+    variables: List[str]
+    source_size: int
+    source_mtime_ns: int
+
+
+def estimate_tokens(text: str) -> int:
+    """Return an approximate token count for ``text``."""
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def render_template(body: str, arguments: Mapping[str, Any]) -> str:
+    """Substitute ``{{VARIABLE}}`` placeholders from ``arguments``.
+
+    Argument names match variables case-insensitively (``language`` fills
+    ``{{LANGUAGE}}``), with ``ARGUMENT_ALIASES`` covering names that differ.
+    Placeholders without a matching argument are left in place.
+    """
+    values = {}
+    for key, value in arguments.items():
+        values[ARGUMENT_ALIASES.get(key, key.upper())] = str(value)
+
+    def substitute(match: "re.Match[str]") -> str:
+        return values.get(match.group(1), match.group(0))
+
+    return VARIABLE_PATTERN.sub(substitute, body)
+
+
+def _atomic_write(path: Path, data: bytes) -> None:
+    """Write ``data`` to ``path`` via a temporary file and rename."""
+    fd, tmp_path = tempfile.mkstemp(prefix=f".{path.name}.", dir=str(path.parent))
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def _prompt_roles(roles_file: Path, prompts_dir: Path) -> Dict[str, str]:
+    """Map prompt file names to the role whose ``promptFile`` points at them."""
+    try:
+        with open(roles_file, "r", encoding="utf-8") as f:
+            roles = json.load(f).get("roles", {})
+    except (OSError, ValueError):
+        return {}
+
+    prompt_roles = {}
+    for role, definition in roles.items():
+        prompt_file = (
+            definition.get("promptFile") if isinstance(definition, dict) else None
+        )
+        if prompt_file:
+            target = (roles_file.parent / prompt_file).resolve()
+            if target.parent == prompts_dir.resolve():
+                prompt_roles[target.name] = role
+    return prompt_roles
+
+
+def _stat_signature(path: Path) -> Optional[List[int]]:
+    """Return ``[size, mtime_ns]`` for ``path``, or None if it is missing."""
+    try:
+        stat = path.stat()
+    except OSError:
+        return None
+    return [stat.st_size, stat.st_mtime_ns]
+
+
+class PromptLibrary:
+    """Read-only view of a prompt directory backed by a cached index and pack."""
+
+    def __init__(
+        self,
+        prompts_dir: PathLike = DEFAULT_PROMPTS_DIR,
+        roles_file: Optional[PathLike] = None,
+        cache_dir: Optional[PathLike] = None,
+        render_cache_size: int = DEFAULT_RENDER_CACHE_SIZE,
+    ) -> None:
+        self.prompts_dir = Path(prompts_dir)
+        if not self.prompts_dir.is_dir():
+            raise PromptError(f"Prompt directory not found: {self.prompts_dir}")
+        self.roles_file = (
+            Path(roles_file)
+            if roles_file is not None
+            else self.prompts_dir.parent / "roles.json"
+        )
+        self.cache_dir = (
+            Path(cache_dir)
+            if cache_dir is not None
+            else self.prompts_dir.parent / "cache" / "prompts"
+        )
+        self.render_cache_size = render_cache_size
+
+        self._entries: Dict[str, PromptEntry] = {}
+        self._pack: Optional[mmap.mmap] = None
+        self._pack_file: Optional[Any] = None
+        self._rendered: "OrderedDict[Any, str]" = OrderedDict()
+        self._open()
+
+    # -- index management -------------------------------------------------
+
+    def _index_path(self) -> Path:
+        return self.cache_dir / "index.json"
+
+    def _open(self) -> None:
+        """Load the cached index, rebuilding it if it is missing or stale."""
+        index = self._read_index()
+        if index is None or not self._map_pack(index.get("pack")):
+            index = self._build_index()
+            if index.get("pack") is not None:
+                self._map_pack(index["pack"])
+        self._entries = {
+            entry["name"]: PromptEntry(**entry) for entry in index["entries"]
+        }
+
+    def _read_index(self) -> Optional[Dict[str, Any]]:
+        """Return the cached index if it still describes the prompt directory."""
+        try:
+            with open(self._index_path(), "r", encoding="utf-8") as f:
+                index = json.load(f)
+        except (OSError, ValueError):
+            return None
+
+        if (
+            index.get("version") != INDEX_VERSION
+            or index.get("prompts_dir") != _stat_signature(self.prompts_dir)[1:]
+            or index.get("roles_file") != _stat_signature(self.roles_file)
+        ):
+            return None
+        return index
+
+    def _map_pack(self, pack_name: Optional[str]) -> bool:
+        """Memory-map the pack named by the index; False if it is unusable."""
+        self._close_pack()
+        if pack_name is None:
+            # An empty library, or a cache directory we could not write to
+            return True
+        try:
+            pack_file = open(self.cache_dir / pack_name, "rb")
+        except OSError:
+            return False
+        try:
+            self._pack = mmap.mmap(pack_file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            pack_file.close()
+            return False
+        self._pack_file = pack_file
+        return True
+
+    def _build_index(self) -> Dict[str, Any]:
+        """Scan the prompt directory, write the pack and index, and return it."""
+        prompt_roles = _prompt_roles(self.roles_file, self.prompts_dir)
+        entries = []
+        chunks = []
+        offset = 0
+        pack_digest = hashlib.sha256()
+        for path in sorted(self.prompts_dir.glob("*.md")):
+            signature = _stat_signature(path)
+            data = path.read_bytes()
+            text = data.decode("utf-8")
+            entries.append(
+                {
+                    "name": path.stem,
+                    "role": prompt_roles.get(path.name),
+                    "path": path.name,
+                    "offset": offset,
+                    "size": len(data),
+                    "sha256": hashlib.sha256(data).hexdigest(),
+                    "tokens": estimate_tokens(text),
+                    "variables": sorted(set(VARIABLE_PATTERN.findall(text))),
+                    "source_size": signature[0] if signature else len(data),
+                    "source_mtime_ns": signature[1] if signature else 0,
+                }
+            )
+            chunks.append(data)
+            pack_digest.update(data)
+            offset += len(data)
+
+        index: Dict[str, Any] = {
+            "version": INDEX_VERSION,
+            "prompts_dir": _stat_signature(self.prompts_dir)[1:],
+            "roles_file": _stat_signature(self.roles_file),
+            "pack": None,
+            "entries": entries,
+        }
+        if offset == 0:
+            self._write_index(index)
+            return index
+
+        pack_name = f"library-{pack_digest.hexdigest()[:16]}.bin"
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            if not (self.cache_dir / pack_name).exists():
+                _atomic_write(self.cache_dir / pack_name, b"".join(chunks))
+        except OSError:
+            # Uncached: bodies are read from the prompt files on demand
+            return index
+
+        index["pack"] = pack_name
+        if self._write_index(index):
+            self._remove_stale_packs(pack_name)
+        return index
+
+    def _write_index(self, index: Dict[str, Any]) -> bool:
+        """Persist the index; returns False if the cache is not writable."""
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            _atomic_write(
+                self._index_path(), json.dumps(index, indent=2).encode("utf-8")
+            )
+        except OSError:
+            return False
+        return True
+
+    def _remove_stale_packs(self, current: str) -> None:
+        """Delete packs no longer referenced by the index."""
+        for pack in self.cache_dir.glob("library-*.bin"):
+            if pack.name != current:
+                try:
+                    pack.unlink()
+                except OSError:
+                    pass
+
+    def _close_pack(self) -> None:
+        if self._pack is not None:
+            self._pack.close()
+            self._pack = None
+        if self._pack_file is not None:
+            self._pack_file.close()
+            self._pack_file = None
+
+    def close(self) -> None:
+        """Release the memory map and cached bodies."""
+        self._close_pack()
+        self._rendered.clear()
+
+    def __enter__(self) -> "PromptLibrary":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+    # -- lookups --------------------------------------------------------------
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, name: object) -> bool:
+        return name in self._entries
+
+    def names(self) -> List[str]:
+        """Return the prompt names in index order."""
+        return list(self._entries)
+
+    def entries(self) -> List[PromptEntry]:
+        """Return every index record without loading any bodies."""
+        return list(self._entries.values())
+
+    def entry(self, name: str) -> PromptEntry:
+        """Return the index record for a prompt."""
+        try:
+            return self._entries[name]
+        except KeyError:
+            raise PromptError(f"Unknown prompt: {name}") from None
+
+    def for_role(self, role: str) -> PromptEntry:
+        """Return the index record of the prompt a role points at."""
+        for entry in self._entries.values():
+            if entry.role == role:
+                return entry
+        raise PromptError(f"No prompt registered for role: {role}")
+
+    def _current_entry(self, name: str) -> PromptEntry:
+        """Return a prompt's record, reindexing if its file was edited in place."""
+        entry = self.entry(name)
+        source = self.prompts_dir / entry.path
+        if _stat_signature(source) != [entry.source_size, entry.source_mtime_ns]:
+            self._reload()
+            entry = self.entry(name)
+        return entry
+
+    def _read_body(self, entry: PromptEntry) -> str:
+        """Slice a prompt body out of the pack (or its file when uncached)."""
+        if self._pack is not None:
+            data = self._pack[entry.offset : entry.offset + entry.size]
+        else:
+            data = (self.prompts_dir / entry.path).read_bytes()
+        return data.decode("utf-8")
+
+    def get(self, name: str) -> str:
+        """Return a prompt's raw body; bodies are not retained between calls."""
+        return self._read_body(self._current_entry(name))
+
+    def render(self, name: str, arguments: Optional[Mapping[str, Any]] = None) -> str:
+        """Return a prompt with its template variables substituted."""
+        entry = self._current_entry(name)
+        arguments = arguments or {}
+        key = (
+            name,
+            entry.sha256,
+            tuple(sorted((k, str(v)) for k, v in arguments.items())),
+        )
+        if key in self._rendered:
+            self._rendered.move_to_end(key)
+            return self._rendered[key]
+
+        rendered = render_template(self._read_body(entry), arguments)
+        self._rendered[key] = rendered
+        if len(self._rendered) > self.render_cache_size:
+            self._rendered.popitem(last=False)
+        return rendered
+
+    def _reload(self) -> None:
+        """Rebuild the index after the prompt files changed."""
+        self._rendered.clear()
+        index = self._build_index()
+        self._map_pack(index.get("pack"))
+        self._entries = {
+            entry["name"]: PromptEntry(**entry) for entry in index["entries"]
+        }
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    """List, show or render prompts from the command line."""
+    parser = argparse.ArgumentParser(
+        prog="python -m mcp_vscode_workflow.prompts",
+        description="Inspect the indexed MCP prompt library.",
+    )
+    parser.add_argument(
+        "--prompts-dir",
+        default=str(DEFAULT_PROMPTS_DIR),
+        help="prompt directory (default: .mcp/prompts)",
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    subparsers.add_parser("list", help="list prompts with role, size and tokens")
+    show_parser = subparsers.add_parser("show", help="print a prompt's raw body")
+    show_parser.add_argument("name")
+    render_parser = subparsers.add_parser("render", help="render a prompt")
+    render_parser.add_argument("name")
+    render_parser.add_argument(
+        "arguments", nargs="*", metavar="KEY=VALUE", help="template arguments"
+    )
+    args = parser.parse_args(argv)
+
+    arguments = {}
+    if args.command == "render":
+        for item in args.arguments:
+            key, separator, value = item.partition("=")
+            if not separator:
+                parser.error(f"template argument {item!r} is not KEY=VALUE")
+            arguments[key] = value
+
+    try:
+        with PromptLibrary(args.prompts_dir) as library:
+            if args.command == "list":
+                for entry in library.entries():
+                    print(
+                        f"{entry.name}\t{entry.role or '-'}\t"
+                        f"{entry.size}\t{entry.tokens}"
+                    )
+            elif args.command == "show":
+                sys.stdout.write(library.get(args.name))
+            else:
+                sys.stdout.write(library.render(args.name, arguments))
+    except PromptError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,745 @@
+"""
+Validate the .mcp and .vscode/profiles configurations against their schemas.
+
+Each kind of configuration file has a schema written in a subset of JSON
+Schema (``type``, ``properties``, ``required``, ``additionalProperties``,
+``items``, ``enum``, ``const``, ``pattern``, ``minLength``, ``minimum``,
+``minItems``, ``uniqueItems``, ``anyOf``, ``allOf`` and ``$ref`` into
+``#/definitions``). A schema is compiled once into a tree of closures and
+the compiled validator is cached, so checking a file is a single walk over
+its document with no schema interpretation left to do.
+
+The kind is chosen from the file name:
+
+- ``roles.json``: role definitions, shared prompts and the detection model
+- ``mcp.json``: the base MCP configuration
+- ``config-<profile>.json``: profile configs (prompts, tools, servers, extends)
+- ``.vscode/profiles/*.json``: VS Code profiles
+
+Validating a workspace reads every file once, checks it, and then checks the
+references between files: ``extends`` chains must resolve and role prompt
+files must exist. Every problem is reported with the JSON pointer of the
+offending value instead of stopping at the first one.
+
+Usage: python -m mcp_vscode_workflow.schema [FILE ...] [--workspace DIR]
+"""
+
+import argparse
+import functools
+import json
+import re
+import sys
+from pathlib import Path
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    List,
+    NamedTuple,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+)
+
+from .config import ConfigError, PathLike, Resolver, resolve_pointer
+
+# A compiled check appends (pointer, message) pairs for everything it rejects
+Errors = List[Tuple[str, str]]
+Check = Callable[[Any, str, Errors], None]
+
+JSON_TYPES: Dict[str, Callable[[Any], bool]] = {
+    "object": lambda value: isinstance(value, dict),
+    "array": lambda value: isinstance(value, list),
+    "string": lambda value: isinstance(value, str),
+    "integer": lambda value: isinstance(value, int) and not isinstance(value, bool),
+    "number": lambda value: isinstance(value, (int, float))
+    and not isinstance(value, bool),
+    "boolean": lambda value: isinstance(value, bool),
+    "null": lambda value: value is None,
+}
+
+# Definitions shared by every schema below
+DEFINITIONS: Dict[str, Any] = {
+    "name": {"type": "string", "minLength": 1},
+    "names": {
+        "type": "array",
+        "items": {"$ref": "#/definitions/name"},
+        "uniqueItems": True,
+    },
+    "strings": {"type": "array", "items": {"type": "string"}},
+    "mcpVersion": {"type": "string", "pattern": r"^\d{4}-\d{2}-\d{2}$"},
+    "extends": {
+        "anyOf": [
+            {"$ref": "#/definitions/reference"},
+            {
+                "type": "array",
+                "items": {"$ref": "#/definitions/reference"},
+                "minItems": 1,
+            },
+        ]
+    },
+    "reference": {"type": "string", "pattern": r"^[^#]*(#(/[^/]*)*)?$"},
+    "prompt": {
+        "type": "object",
+        "required": ["name"],
+        "properties": {
+            "name": {"$ref": "#/definitions/name"},
+            "description": {"type": "string"},
+            "arguments": {"type": "array", "items": {"$ref": "#/definitions/argument"}},
+        },
+    },
+    "argument": {
+        "type": "object",
+        "required": ["name"],
+        "properties": {
+            "name": {"$ref": "#/definitions/name"},
+            "description": {"type": "string"},
+            "required": {"type": "boolean"},
+        },
+    },
+    "command": {
+        "type": "object",
+        "required": ["command"],
+        "properties": {
+            "name": {"$ref": "#/definitions/name"},
+            "command": {"type": "string", "minLength": 1},
+            "args": {"$ref": "#/definitions/strings"},
+            "env": {
+                "type": "object",
+                "additionalProperties": {"type": "string"},
+            },
+        },
+    },
+    "tool": {
+        "allOf": [
+            {"$ref": "#/definitions/command"},
+            {"type": "object", "required": ["name"]},
+        ]
+    },
+    "resource": {
+        "type": "object",
+        "required": ["uri"],
+        "properties": {
+            "uri": {"type": "string", "minLength": 1},
+            "name": {"type": "string"},
+            "description": {"type": "string"},
+            "mimeType": {"type": "string"},
+        },
+    },
+    "tokenBudget": {"type": "integer", "minimum": 1},
+    "role": {
+        "type": "object",
+        "required": ["name", "promptFile"],
+        "properties": {
+            "name": {"$ref": "#/definitions/name"},
+            "description": {"type": "string"},
+            "promptFile": {"type": "string", "pattern": r"\.md$"},
+            "capabilities": {"$ref": "#/definitions/names"},
+            "mcpServers": {"$ref": "#/definitions/names"},
+            "tokenBudget": {"$ref": "#/definitions/tokenBudget"},
+        },
+    },
+    "detection": {
+        "type": "object",
+        "required": ["weights", "profiles"],
+        "additionalProperties": False,
+        "properties": {
+            "weights": {
+                "type": "object",
+                "additionalProperties": False,
+                "properties": {
+                    weight: {"type": "number", "minimum": 0}
+                    for weight in (
+                        "detected",
+                        "share",
+                        "primaryActivity",
+                        "toolsPreference",
+                    )
+                },
+            },
+            "profiles": {
+                "type": "array",
+                "items": {"$ref": "#/definitions/detectionProfile"},
+            },
+        },
+    },
+    "detectionProfile": {
+        "type": "object",
+        "required": ["name"],
+        "additionalProperties": False,
+        "properties": {
+            "name": {"$ref": "#/definitions/name"},
+            "indicators": {
+                "type": "array",
+                "items": {
+                    "anyOf": [
+                        {"type": "string", "minLength": 1},
+                        {
+                            "type": "object",
+                            "required": ["path"],
+                            "additionalProperties": False,
+                            "properties": {
+                                "path": {"type": "string", "minLength": 1},
+                                "reason": {"type": "string"},
+                            },
+                        },
+                    ]
+                },
+            },
+            "extensions": {
+                "type": "array",
+                "items": {"type": "string", "pattern": r"^\.[^. ]+$"},
+                "uniqueItems": True,
+            },
+            "sourceReason": {"type": "string"},
+            "pipelineYaml": {"type": "boolean"},
+        },
+    },
+    "task": {
+        "type": "object",
+        "required": ["label", "type"],
+        "properties": {
+            "label": {"type": "string", "minLength": 1},
+            "type": {"type": "string", "minLength": 1},
+            "command": {"type": "string"},
+            "args": {"$ref": "#/definitions/strings"},
+            "group": {
+                "anyOf": [
+                    {"type": "string"},
+                    {
+                        "type": "object",
+                        "required": ["kind"],
+                        "properties": {
+                            "kind": {"type": "string"},
+                            "isDefault": {"type": "boolean"},
+                        },
+                    },
+                ]
+            },
+            "presentation": {"type": "object"},
+            "problemMatcher": {
+                "anyOf": [
+                    {"type": "string"},
+                    {"type": "array", "items": {"type": ["string", "object"]}},
+                ]
+            },
+        },
+    },
+}
+
+ROLES_SCHEMA: Dict[str, Any] = {
+    "type": "object",
+    "required": ["mcpVersion", "name", "roles"],
+    "properties": {
+        "mcpVersion": {"$ref": "#/definitions/mcpVersion"},
+        "name": {"$ref": "#/definitions/name"},
+        "description": {"type": "string"},
+        "roles": {
+            "type": "object",
+            "additionalProperties": {"$ref": "#/definitions/role"},
+        },
+        "commonPrompts": {"$ref": "#/definitions/names"},
+        "commonMcpServers": {"$ref": "#/definitions/names"},
+        "defaultTokenBudget": {"$ref": "#/definitions/tokenBudget"},
+        "detection": {"$ref": "#/definitions/detection"},
+    },
+}
+
+MCP_SCHEMA: Dict[str, Any] = {
+    "type": "object",
+    "required": ["mcpVersion", "name"],
+    "properties": {
+        "mcpVersion": {"$ref": "#/definitions/mcpVersion"},
+        "name": {"$ref": "#/definitions/name"},
+        "description": {"type": "string"},
+        "extends": {"$ref": "#/definitions/extends"},
+        "prompts": {"type": "array", "items": {"$ref": "#/definitions/prompt"}},
+        "tools": {"type": "array", "items": {"$ref": "#/definitions/tool"}},
+        "resources": {"type": "array", "items": {"$ref": "#/definitions/resource"}},
+        "servers": {
+            "type": "object",
+            "additionalProperties": {"$ref": "#/definitions/command"},
+        },
+    },
+}
+
+PROFILE_CONFIG_SCHEMA: Dict[str, Any] = dict(
+    MCP_SCHEMA, required=["mcpVersion", "name", "extends"]
+)
+
+VSCODE_PROFILE_SCHEMA: Dict[str, Any] = {
+    "type": "object",
+    "required": ["name", "settings"],
+    "additionalProperties": False,
+    "properties": {
+        "name": {"$ref": "#/definitions/name"},
+        "settings": {"type": "object"},
+        "extensions": {
+            "type": "object",
+            "properties": {
+                "recommendations": {
+                    "type": "array",
+                    "items": {
+                        "type": "string",
+                        "pattern": r"^[A-Za-z0-9][\w-]*\.[A-Za-z0-9][\w.-]*$",
+                    },
+                    "uniqueItems": True,
+                },
+                "unwantedRecommendations": {"$ref": "#/definitions/strings"},
+            },
+        },
+        "tasks": {
+            "type": "object",
+            "required": ["version", "tasks"],
+            "properties": {
+                "version": {"const": "2.0.0"},
+                "tasks": {"type": "array", "items": {"$ref": "#/definitions/task"}},
+            },
+        },
+        "contextTriggers": {
+            "type": "object",
+            "additionalProperties": False,
+            "properties": {
+                "filePatterns": {"$ref": "#/definitions/strings"},
+                "workspaceContains": {"$ref": "#/definitions/strings"},
+            },
+        },
+    },
+}
+
+# Schema of each kind of file, and of the sections other modules check alone
+SCHEMAS: Dict[str, Dict[str, Any]] = {
+    "roles": ROLES_SCHEMA,
+    "mcp": MCP_SCHEMA,
+    "profile-config": PROFILE_CONFIG_SCHEMA,
+    "vscode-profile": VSCODE_PROFILE_SCHEMA,
+    "detection": {"$ref": "#/definitions/detection"},
+}
+
+
+class SchemaError(Exception):
+    """Raised when a schema is invalid or a file has no schema."""
+
+
+class Violation(NamedTuple):
+    """One value that does not match its schema."""
+
+    path: str
+    pointer: str
+    message: str
+
+    def __str__(self) -> str:
+        return f"{self.path}#{self.pointer}: {self.message}"
+
+
+def _child(pointer: str, key: Union[str, int]) -> str:
+    """Return the JSON pointer of ``key`` below ``pointer``."""
+    token = str(key).replace("~", "~0").replace("/", "~1")
+    return f"{pointer}/{token}"
+
+
+def _json_type(value: Any) -> str:
+    """Return the JSON type name of a parsed value."""
+    for name in ("boolean", "integer", "number", "string", "array", "object"):
+        if JSON_TYPES[name](value):
+            return name
+    return "null"
+
+
+class _Compiler:
+    """Compile the schemas below one root into checks, sharing ``$ref`` targets."""
+
+    def __init__(self, root: Dict[str, Any]) -> None:
+        self.root = root
+        self.references: Dict[str, Check] = {}
+
+    def reference(self, reference: str) -> Check:
+        """Return the check of a ``$ref``, compiling each target only once.
+
+        The check is looked up when called, so recursive definitions compile.
+        """
+        if not reference.startswith("#"):
+            raise SchemaError(f"Only local references are supported: {reference!r}")
+        if reference not in self.references:
+            try:
+                target = resolve_pointer(self.root, reference[1:])
+            except ConfigError as e:
+                raise SchemaError(str(e)) from None
+            self.references[reference] = lambda value, pointer, errors: None
+            self.references[reference] = self.compile(target)
+        references = self.references
+        return lambda value, pointer, errors: references[reference](
+            value, pointer, errors
+        )
+
+    def compile(self, schema: Dict[str, Any]) -> Check:
+        """Return the check for one schema node."""
+        if not isinstance(schema, dict):
+            raise SchemaError(f"Schema must be an object: {schema!r}")
+
+        checks: List[Check] = []
+        if "$ref" in schema:
+            checks.append(self.reference(schema["$ref"]))
+        for sub_schema in schema.get("allOf", []):
+            checks.append(self.compile(sub_schema))
+        if "const" in schema:
+            checks.append(_check_enum([schema["const"]]))
+        if "enum" in schema:
+            checks.append(_check_enum(schema["enum"]))
+        if "anyOf" in schema:
+            checks.append(self._any_of(schema["anyOf"]))
+        checks.extend(self._string_checks(schema))
+        if "minimum" in schema:
+            minimum = schema["minimum"]
+
+            def check_minimum(value: Any, pointer: str, errors: Errors) -> None:
+                if JSON_TYPES["number"](value) and value < minimum:
+                    errors.append((pointer, f"must be at least {minimum}"))
+
+            checks.append(check_minimum)
+        checks.extend(self._array_checks(schema))
+        checks.extend(self._object_checks(schema))
+
+        types = schema.get("type")
+        if types is None:
+            return _all_of(checks)
+        if isinstance(types, str):
+            types = [types]
+        try:
+            predicates = [JSON_TYPES[name] for name in types]
+        except KeyError as e:
+            raise SchemaError(f"Unknown schema type {e.args[0]!r}") from None
+        expected = " or ".join(types)
+        rest = _all_of(checks)
+
+        def check_type(value: Any, pointer: str, errors: Errors) -> None:
+            if not any(predicate(value) for predicate in predicates):
+                # Checks of the wrong type would only repeat this error
+                errors.append(
+                    (pointer, f"expected {expected}, got {_json_type(value)}")
+                )
+                return
+            rest(value, pointer, errors)
+
+        return check_type
+
+    def _any_of(self, alternatives: List[Dict[str, Any]]) -> Check:
+        """Return a check passing values that match at least one alternative."""
+        compiled = [self.compile(alternative) for alternative in alternatives]
+
+        def check_any_of(value: Any, pointer: str, errors: Errors) -> None:
+            attempts = []
+            for check in compiled:
+                attempt: Errors = []
+                check(value, pointer, attempt)
+                if not attempt:
+                    return
+                attempts.append(attempt)
+            # Report the alternative that got furthest: the one failing deepest
+            furthest = max(attempts, key=lambda a: max(len(p) for p, _ in a))
+            if any(p != pointer for p, _ in furthest):
+                errors.extend(furthest)
+                return
+            reasons = dict.fromkeys(m for attempt in attempts for _, m in attempt)
+            errors.append((pointer, "matches no allowed form: " + "; ".join(reasons)))
+
+        return check_any_of
+
+    def _string_checks(self, schema: Dict[str, Any]) -> List[Check]:
+        """Return the ``minLength`` and ``pattern`` checks of a schema."""
+        checks: List[Check] = []
+        if "minLength" in schema:
+            min_length = schema["minLength"]
+
+            def check_min_length(value: Any, pointer: str, errors: Errors) -> None:
+                if isinstance(value, str) and len(value) < min_length:
+                    errors.append(
+                        (pointer, f"must be at least {min_length} characters long")
+                    )
+
+            checks.append(check_min_length)
+        if "pattern" in schema:
+            pattern = re.compile(schema["pattern"])
+
+            def check_pattern(value: Any, pointer: str, errors: Errors) -> None:
+                if isinstance(value, str) and not pattern.search(value):
+                    errors.append(
+                        (pointer, f"{value!r} does not match {pattern.pattern!r}")
+                    )
+
+            checks.append(check_pattern)
+        return checks
+
+    def _array_checks(self, schema: Dict[str, Any]) -> List[Check]:
+        """Return the ``items``, ``minItems`` and ``uniqueItems`` checks."""
+        checks: List[Check] = []
+        if "items" in schema:
+            item_check = self.compile(schema["items"])
+
+            def check_items(value: Any, pointer: str, errors: Errors) -> None:
+                if isinstance(value, list):
+                    for index, item in enumerate(value):
+                        item_check(item, _child(pointer, index), errors)
+
+            checks.append(check_items)
+        if "minItems" in schema:
+            min_items = schema["minItems"]
+
+            def check_min_items(value: Any, pointer: str, errors: Errors) -> None:
+                if isinstance(value, list) and len(value) < min_items:
+                    errors.append((pointer, f"must have at least {min_items} items"))
+
+            checks.append(check_min_items)
+        if schema.get("uniqueItems"):
+
+            def check_unique(value: Any, pointer: str, errors: Errors) -> None:
+                if not isinstance(value, list):
+                    return
+                seen: List[str] = []
+                for index, item in enumerate(value):
+                    key = json.dumps(item, sort_keys=True)
+                    if key in seen:
+                        errors.append(
+                            (_child(pointer, index), f"duplicate item {item!r}")
+                        )
+                    seen.append(key)
+
+            checks.append(check_unique)
+        return checks
+
+    def _object_checks(self, schema: Dict[str, Any]) -> List[Check]:
+        """Return the ``required``, ``properties`` and ``additionalProperties``
+        checks."""
+        checks: List[Check] = []
+        required = list(schema.get("required", []))
+        if required:
+
+            def check_required(value: Any, pointer: str, errors: Errors) -> None:
+                if isinstance(value, dict):
+                    for name in required:
+                        if name not in value:
+                            errors.append((pointer, f"missing required {name!r}"))
+
+            checks.append(check_required)
+
+        properties = {
+            name: self.compile(sub_schema)
+            for name, sub_schema in schema.get("properties", {}).items()
+        }
+        additional = schema.get("additionalProperties", True)
+        if not properties and additional is True:
+            return checks
+        other: Optional[Check] = None
+        if isinstance(additional, dict):
+            other = self.compile(additional)
+
+        def check_properties(value: Any, pointer: str, errors: Errors) -> None:
+            if not isinstance(value, dict):
+                return
+            for name, item in value.items():
+                check = properties.get(name, other)
+                if check is not None:
+                    check(item, _child(pointer, name), errors)
+                elif additional is False:
+                    errors.append((_child(pointer, name), "unexpected property"))
+
+        checks.append(check_properties)
+        return checks
+
+
+def _check_enum(allowed: List[Any]) -> Check:
+    """Return a check accepting only the values in ``allowed``."""
+    choices = ", ".join(json.dumps(choice) for choice in allowed)
+
+    def check_enum(value: Any, pointer: str, errors: Errors) -> None:
+        # Compare types too: JSON keeps true and 1 apart, Python does not
+        if not any(
+            value == choice and type(value) is type(choice) for choice in allowed
+        ):
+            errors.append((pointer, f"must be one of {choices}"))
+
+    return check_enum
+
+
+def _all_of(checks: List[Check]) -> Check:
+    """Return one check running every check in order."""
+    if len(checks) == 1:
+        return checks[0]
+
+    def check_all(value: Any, pointer: str, errors: Errors) -> None:
+        for check in checks:
+            check(value, pointer, errors)
+
+    return check_all
+
+
+def compile_schema(
+    schema: Dict[str, Any], definitions: Optional[Dict[str, Any]] = None
+) -> Callable[[Any], Errors]:
+    """Compile a schema into a function returning the (pointer, message) errors
+    of a document.
+
+    ``definitions`` are added under ``#/definitions`` for ``$ref`` to point into.
+    """
+    root = dict(schema)
+    if definitions is not None:
+        root["definitions"] = dict(definitions, **schema.get("definitions", {}))
+    check = _Compiler(root).compile(root)
+
+    def validate(document: Any) -> Errors:
+        errors: Errors = []
+        check(document, "", errors)
+        return errors
+
+    return validate
+
+
+@functools.lru_cache(maxsize=None)
+def validator(kind: str) -> Callable[[Any], Errors]:
+    """Return the compiled validator of a kind of document (see SCHEMAS)."""
+    try:
+        schema = SCHEMAS[kind]
+    except KeyError:
+        raise SchemaError(f"Unknown schema {kind!r}") from None
+    return compile_schema(schema, DEFINITIONS)
+
+
+def schema_kind(path: PathLike) -> Optional[str]:
+    """Return the kind of configuration a file holds, from its name."""
+    path = Path(path)
+    if path.suffix != ".json":
+        return None
+    if path.name == "roles.json":
+        return "roles"
+    if path.name == "mcp.json":
+        return "mcp"
+    if path.name.startswith("config-"):
+        return "profile-config"
+    if path.parent.name == "profiles" and path.parent.parent.name == ".vscode":
+        return "vscode-profile"
+    return None
+
+
+def workspace_files(workspace: PathLike = ".") -> List[Path]:
+    """Return the configuration files of a workspace that have a schema."""
+    workspace = Path(workspace)
+    candidates = sorted((workspace / ".mcp").glob("*.json")) + sorted(
+        (workspace / ".vscode" / "profiles").glob("*.json")
+    )
+    return [path for path in candidates if schema_kind(path) is not None]
+
+
+def _display_path(path: Path, base: Optional[Path]) -> str:
+    """Return ``path`` relative to ``base`` when below it."""
+    if base is not None:
+        try:
+            return path.resolve().relative_to(base.resolve()).as_posix()
+        except ValueError:
+            pass
+    return str(path)
+
+
+def _references(kind: str, document: Any, path: Path, resolver: Resolver) -> Errors:
+    """Return the errors of references from one valid document to other files."""
+    errors: Errors = []
+    if kind == "roles":
+        for name, role in document.get("roles", {}).items():
+            if not (path.parent / role["promptFile"]).is_file():
+                errors.append(
+                    (
+                        _child(_child("/roles", name), "promptFile"),
+                        f"prompt file {role['promptFile']!r} not found",
+                    )
+                )
+    elif "extends" in document:
+        try:
+            resolver.resolve(path)
+        except ConfigError as e:
+            errors.append(("/extends", str(e)))
+    return errors
+
+
+def validate_files(
+    paths: Iterable[PathLike], base: Optional[PathLike] = None
+) -> List[Violation]:
+    """Validate configuration files in one pass and return every violation.
+
+    Each file is parsed once; ``extends`` chains are resolved against the same
+    parsed documents. Paths in the result are relative to ``base`` when given.
+    """
+    base_path = Path(base) if base is not None else None
+    resolver = Resolver()
+    violations: List[Violation] = []
+    checked = []
+
+    for path in map(Path, paths):
+        shown = _display_path(path, base_path)
+        kind = schema_kind(path)
+        if kind is None:
+            violations.append(Violation(shown, "", "no schema for this file"))
+            continue
+        try:
+            document = resolver.read(path)
+        except ConfigError as e:
+            violations.append(Violation(shown, "", str(e)))
+            continue
+        errors = validator(kind)(document)
+        violations.extend(Violation(shown, *error) for error in errors)
+        if not errors:
+            checked.append((shown, kind, document, path))
+
+    # References last, so every file they may point to is already parsed
+    for shown, kind, document, path in checked:
+        errors = _references(kind, document, path, resolver)
+        violations.extend(Violation(shown, *error) for error in errors)
+    return violations
+
+
+def validate_workspace(workspace: PathLike = ".") -> List[Violation]:
+    """Validate every .mcp and .vscode/profiles configuration of a workspace."""
+    return validate_files(workspace_files(workspace), base=workspace)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    """Validate configuration files; exit 1 if any violates its schema."""
+    parser = argparse.ArgumentParser(
+        prog="python -m mcp_vscode_workflow.schema",
+        description="Validate the .mcp and .vscode/profiles configurations.",
+    )
+    parser.add_argument(
+        "files",
+        nargs="*",
+        metavar="FILE",
+        help="files to validate (default: every configuration in the workspace)",
+    )
+    parser.add_argument(
+        "--workspace",
+        default=".",
+        help="workspace holding .mcp and .vscode (default: current directory)",
+    )
+    parser.add_argument(
+        "--format",
+        choices=("text", "json"),
+        default="text",
+        help="output format (default: text)",
+    )
+    args = parser.parse_args(argv)
+
+    if args.files:
+        violations = validate_files(args.files, base=args.workspace)
+    else:
+        violations = validate_workspace(args.workspace)
+
+    if args.format == "json":
+        json.dump([v._asdict() for v in violations], sys.stdout, indent=2)
+        sys.stdout.write("\n")
+    else:
+        for violation in violations:
+            print(violation)
+    return 1 if violations else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
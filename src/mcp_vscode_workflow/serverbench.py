@@ -0,0 +1,700 @@
+"""
+Benchmark MCP server startup and request latency over stdio.
+
+Every server declared in the profile configs (``mcp-server-git --repository
+.``, ``mcp-server-testing --framework pytest``, ...) is launched the way a
+client launches it, with a synthetic fixture workspace as its working
+directory, and driven through a scripted JSON-RPC session:
+
+1. ``initialize``, then the ``notifications/initialized`` notification
+2. ``--requests`` rounds of ``tools/list``, ``prompts/list``, ``prompts/get``
+   (for the first listed prompt) and ``resources/list``, then ``ping``
+
+Each server gets ``--repeat`` sessions. The first gives the cold start (spawn
+to the ``initialize`` response), the median of the others the warm start.
+Request latencies are pooled over all sessions for the p50 and p99, overall
+and per method. The peak RSS is the summed ``VmHWM`` of the server and its
+child processes (the node process under npx), read from /proc at the end of
+each session; it is not reported where /proc is unavailable.
+
+With ``--npx`` the three packages that ``install-mcp-npx.sh`` verifies are
+benchmarked too. Servers whose command is not installed are replaced by the
+bundled stub server (``serverbench stub``), so the harness runs anywhere and
+measures its own overhead; such cases are marked as stubs in the results.
+
+Results use the format of ``mcp_vscode_workflow.benchmark`` and are compared
+against a baseline the same way, except that a case measured with the stub on
+one side and the real server on the other is skipped and reported instead.
+
+Usage: python -m mcp_vscode_workflow.serverbench run|compare|stub ...
+"""
+
+import argparse
+import json
+import os
+import platform
+import queue
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from .benchmark import (
+    DEFAULT_MIN_DELTA_MS,
+    DEFAULT_THRESHOLD,
+    RESULTS_VERSION,
+    BenchmarkError,
+    compare_results,
+    generate_workspace,
+    load_results,
+    report_regressions,
+)
+from .config import PathLike
+from .supervisor import PROTOCOL_VERSION, SupervisorError, load_servers
+
+DEFAULT_MCP_DIR = Path(__file__).resolve().parents[2] / ".mcp"
+DEFAULT_WORK_DIR = Path(tempfile.gettempdir()) / "mcp-vscode-workflow-serverbench"
+
+# Fixture workspace the servers run in
+FIXTURE_KIND = "mixed"
+FIXTURE_FILES = 200
+
+DEFAULT_REPEAT = 5
+DEFAULT_REQUESTS = 20
+DEFAULT_TIMEOUT = 60.0
+
+# Must match the packages verified by install-mcp-npx.sh
+NPX_PACKAGES = (
+    ("sequential-thinking", ("-y", "@modelcontextprotocol/server-sequential-thinking")),
+    ("task-master", ("-y", "--package=task-master-ai", "task-master-ai")),
+    ("context7", ("-y", "@upstash/context7-mcp")),
+)
+
+# Methods of one request round, in order; prompts/get follows prompts/list
+ROUND = ("tools/list", "prompts/list", "prompts/get", "resources/list", "ping")
+
+METHOD_NOT_FOUND = -32601
+
+# Directory holding the mcp_vscode_workflow package, for the stub's PYTHONPATH
+SRC_DIR = str(Path(__file__).resolve().parents[1])
+
+
+class ServerBenchError(Exception):
+    """Raised when a server cannot be launched or stops answering."""
+
+
+class Target(NamedTuple):
+    """One server command to benchmark."""
+
+    name: str
+    command: Tuple[str, ...]
+    env: Dict[str, str]
+    profiles: Tuple[str, ...]
+    # True when the bundled stub stands in for a command that is not installed
+    stub: bool
+
+
+def stub_command(name: str) -> Tuple[str, ...]:
+    """Return the command running the bundled stub server as ``name``."""
+    return (sys.executable, "-m", "mcp_vscode_workflow.serverbench", "stub", name)
+
+
+def _target(
+    name: str,
+    command: Tuple[str, ...],
+    env: Dict[str, str],
+    profiles: Tuple[str, ...],
+    stub_only: bool,
+) -> Target:
+    """Return a target, falling back to the stub if its command is missing."""
+    if stub_only or shutil.which(command[0]) is None:
+        return Target(name, stub_command(name), {}, profiles, True)
+    return Target(name, command, env, profiles, False)
+
+
+def list_targets(
+    profiles: Sequence[str],
+    mcp_dir: PathLike = DEFAULT_MCP_DIR,
+    npx: bool = False,
+    stub_only: bool = False,
+) -> List[Target]:
+    """Return the servers of ``profiles`` (and the npx packages), deduplicated.
+
+    A server declared with different commands by different profiles gets one
+    target per command, named ``<server>[<profile>]``.
+    """
+    commands: Dict[str, Dict[Tuple[str, ...], Tuple[Dict[str, str], List[str]]]] = {}
+    for profile in profiles:
+        try:
+            specs = load_servers(profile, mcp_dir)
+        except SupervisorError as e:
+            raise ServerBenchError(str(e)) from e
+        for spec in specs:
+            command = (spec.command, *spec.args)
+            entry = commands.setdefault(spec.name, {}).setdefault(
+                command, (spec.env, [])
+            )
+            entry[1].append(profile)
+
+    targets = []
+    for name, variants in sorted(commands.items()):
+        for command, (env, declared_by) in variants.items():
+            label = name if len(variants) == 1 else f"{name}[{declared_by[0]}]"
+            targets.append(_target(label, command, env, tuple(declared_by), stub_only))
+    if npx:
+        for name, args in NPX_PACKAGES:
+            targets.append(_target(name, ("npx", *args), {}, (), stub_only))
+    return targets
+
+
+def available_profiles(mcp_dir: PathLike = DEFAULT_MCP_DIR) -> List[str]:
+    """Return the profiles with a ``config-<profile>.json`` in ``mcp_dir``."""
+    return sorted(
+        path.stem[len("config-") :] for path in Path(mcp_dir).glob("config-*.json")
+    )
+
+
+def prepare_fixture(work_dir: PathLike = DEFAULT_WORK_DIR) -> Path:
+    """Create (or reuse) the fixture workspace, as a git repository if possible."""
+    try:
+        root = generate_workspace(
+            Path(work_dir) / "fixture", FIXTURE_KIND, FIXTURE_FILES
+        )
+    except (BenchmarkError, OSError) as e:
+        raise ServerBenchError(f"Cannot create the fixture workspace: {e}") from e
+    if not (root / ".git").exists() and shutil.which("git"):
+        subprocess.run(
+            ["git", "init", "-q", str(root)],
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+    return root
+
+
+def percentile(values: Sequence[float], fraction: float) -> float:
+    """Return the nearest-rank percentile of ``values``."""
+    ordered = sorted(values)
+    rank = max(1, -(-len(ordered) * fraction // 1))
+    return ordered[int(rank) - 1]
+
+
+class _Session:
+    """One server process driven over stdio."""
+
+    def __init__(
+        self, target: Target, workspace: Path, timeout: float = DEFAULT_TIMEOUT
+    ) -> None:
+        self.target = target
+        self.timeout = timeout
+        self.next_id = 0
+        self.lines: "queue.Queue[Optional[bytes]]" = queue.Queue()
+        env = dict(os.environ, **target.env)
+        if target.stub:
+            env["PYTHONPATH"] = os.pathsep.join(
+                filter(None, [SRC_DIR, env.get("PYTHONPATH")])
+            )
+        self.started = time.perf_counter()
+        try:
+            self.process = subprocess.Popen(
+                list(target.command),
+                cwd=str(workspace),
+                env=env,
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.DEVNULL,
+            )
+        except OSError as e:
+            raise ServerBenchError(f"Cannot start {target.name}: {e}") from e
+        self.reader = threading.Thread(target=self._read, daemon=True)
+        self.reader.start()
+
+    def _read(self) -> None:
+        """Queue every line the server writes, then None at end of output."""
+        assert self.process.stdout is not None
+        for line in self.process.stdout:
+            self.lines.put(line)
+        self.lines.put(None)
+
+    def _send(self, message: Dict[str, Any]) -> None:
+        """Write one JSON-RPC message."""
+        assert self.process.stdin is not None
+        try:
+            self.process.stdin.write(json.dumps(message).encode() + b"\n")
+            self.process.stdin.flush()
+        except OSError as e:
+            raise ServerBenchError(f"{self.target.name} closed its input") from e
+
+    def notify(self, method: str) -> None:
+        """Send a notification."""
+        self._send({"jsonrpc": "2.0", "method": method})
+
+    def request(self, method: str, params: Dict[str, Any]) -> Tuple[float, Any]:
+        """Send a request; return its round-trip time (ms) and the response."""
+        self.next_id += 1
+        request_id = self.next_id
+        start = time.perf_counter()
+        self._send(
+            {"jsonrpc": "2.0", "id": request_id, "method": method, "params": params}
+        )
+        deadline = start + self.timeout
+        while True:
+            try:
+                line = self.lines.get(timeout=max(0.0, deadline - time.perf_counter()))
+            except queue.Empty:
+                raise ServerBenchError(
+                    f"{self.target.name} did not answer {method} "
+                    f"within {self.timeout:g}s"
+                ) from None
+            if line is None:
+                raise ServerBenchError(f"{self.target.name} exited during {method}")
+            try:
+                message = json.loads(line)
+            except ValueError:
+                # Servers that log to stdout
+                continue
+            if isinstance(message, dict) and message.get("id") == request_id:
+                return (time.perf_counter() - start) * 1000, message
+
+    def close(self) -> Optional[int]:
+        """Stop the server; return its peak RSS in KiB, if known."""
+        assert self.process.stdin is not None and self.process.stdout is not None
+        # Sampled while the server and its children still run
+        peak = read_peak_rss_kb(self.process.pid)
+        try:
+            self.process.stdin.close()
+        except OSError:
+            pass
+        try:
+            self.process.wait(timeout=self.timeout)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
+            self.process.wait()
+        self.reader.join(timeout=self.timeout)
+        self.process.stdout.close()
+        return peak
+
+
+def _children(pid: int) -> List[int]:
+    """Return the child processes of ``pid`` from /proc."""
+    children = []
+    try:
+        for task in os.listdir(f"/proc/{pid}/task"):
+            with open(f"/proc/{pid}/task/{task}/children", "r") as f:
+                children += [int(child) for child in f.read().split()]
+    except (OSError, ValueError):
+        pass
+    return children
+
+
+def read_peak_rss_kb(pid: int) -> Optional[int]:
+    """Return the summed peak RSS (VmHWM) of ``pid`` and its descendants.
+
+    The rusage of a waited-for child is not used: on Linux its ``ru_maxrss``
+    starts from the RSS of the harness that forked it. Returns None without
+    /proc (the peak is then not reported).
+    """
+    total = None
+    pending = [pid]
+    while pending:
+        current = pending.pop()
+        try:
+            with open(f"/proc/{current}/status", "r", encoding="ascii") as f:
+                for line in f:
+                    if line.startswith("VmHWM:"):
+                        total = (total or 0) + int(line.split()[1])
+                        break
+        except (OSError, ValueError, IndexError):
+            continue
+        pending += _children(current)
+    return total
+
+
+def run_session(
+    target: Target,
+    workspace: Path,
+    requests: int = DEFAULT_REQUESTS,
+    timeout: float = DEFAULT_TIMEOUT,
+) -> Dict[str, Any]:
+    """Run one scripted session; return its start time, latencies and RSS."""
+    session = _Session(target, workspace, timeout)
+    try:
+        _, response = session.request(
+            "initialize",
+            {
+                "protocolVersion": PROTOCOL_VERSION,
+                "capabilities": {},
+                "clientInfo": {"name": "mcp-serverbench", "version": "1"},
+            },
+        )
+        start_ms = (time.perf_counter() - session.started) * 1000
+        if "error" in response:
+            raise ServerBenchError(
+                f"{target.name} rejected initialize: {response['error']}"
+            )
+        session.notify("notifications/initialized")
+
+        latencies: Dict[str, List[float]] = {method: [] for method in ROUND}
+        unsupported = set()
+        prompt = None
+        for _ in range(requests):
+            for method in ROUND:
+                params: Dict[str, Any] = {}
+                if method == "prompts/get":
+                    if prompt is None:
+                        continue
+                    params = {"name": prompt, "arguments": {}}
+                elapsed, response = session.request(method, params)
+                latencies[method].append(elapsed)
+                error = response.get("error")
+                if isinstance(error, dict) and error.get("code") == METHOD_NOT_FOUND:
+                    unsupported.add(method)
+                if method == "prompts/list" and prompt is None:
+                    prompts = (response.get("result") or {}).get("prompts") or []
+                    prompt = prompts[0].get("name") if prompts else None
+    finally:
+        peak_rss_kb = session.close()
+    return {
+        "start_ms": start_ms,
+        "latencies": latencies,
+        "unsupported": unsupported,
+        "peak_rss_kb": peak_rss_kb,
+    }
+
+
+def benchmark_target(
+    target: Target,
+    workspace: Path,
+    repeat: int = DEFAULT_REPEAT,
+    requests: int = DEFAULT_REQUESTS,
+    timeout: float = DEFAULT_TIMEOUT,
+) -> Dict[str, Any]:
+    """Benchmark one server and return its results case."""
+    case: Dict[str, Any] = {
+        "command": list(target.command),
+        "profiles": list(target.profiles),
+        "stub": target.stub,
+    }
+    try:
+        sessions = [
+            run_session(target, workspace, requests, timeout) for _ in range(repeat)
+        ]
+    except ServerBenchError as e:
+        case["error"] = str(e)
+        case["metrics"] = {}
+        return case
+
+    starts = [session["start_ms"] for session in sessions]
+    pooled: Dict[str, List[float]] = {method: [] for method in ROUND}
+    for session in sessions:
+        for method, values in session["latencies"].items():
+            pooled[method].extend(values)
+    everything = [value for values in pooled.values() for value in values]
+
+    metrics = {"cold_start_ms": starts[0]}
+    if len(starts) > 1:
+        metrics["warm_start_ms"] = statistics.median(starts[1:])
+    if everything:
+        metrics["request_p50_ms"] = percentile(everything, 0.5)
+        metrics["request_p99_ms"] = percentile(everything, 0.99)
+    case["metrics"] = metrics
+    case["requests"] = {
+        method: {
+            "count": len(values),
+            "p50_ms": percentile(values, 0.5),
+            "p99_ms": percentile(values, 0.99),
+        }
+        for method, values in pooled.items()
+        if values
+    }
+    case["unsupported"] = sorted(set().union(*(s["unsupported"] for s in sessions)))
+    rss = [s["peak_rss_kb"] for s in sessions if s["peak_rss_kb"] is not None]
+    case["peak_rss_kb"] = max(rss) if rss else None
+    return case
+
+
+def run_benchmarks(
+    targets: Sequence[Target],
+    workspace: Path,
+    repeat: int = DEFAULT_REPEAT,
+    requests: int = DEFAULT_REQUESTS,
+    timeout: float = DEFAULT_TIMEOUT,
+    progress: Optional[Any] = None,
+) -> Dict[str, Any]:
+    """Benchmark every target and return the results document."""
+    if repeat < 1 or requests < 1:
+        raise ServerBenchError("--repeat and --requests must be at least 1")
+    results: Dict[str, Any] = {
+        "version": RESULTS_VERSION,
+        "created": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "host": {
+            "name": platform.node(),
+            "system": platform.system(),
+            "machine": platform.machine(),
+        },
+        "repeat": repeat,
+        "requests": requests,
+        "cases": {},
+    }
+    for target in targets:
+        if progress:
+            kind = " (stub)" if target.stub else ""
+            print(f"Benchmarking {target.name}{kind}...", file=progress, flush=True)
+        results["cases"][target.name] = benchmark_target(
+            target, workspace, repeat, requests, timeout
+        )
+    return results
+
+
+def comparable_baseline(
+    baseline: Dict[str, Any], results: Dict[str, Any]
+) -> Tuple[Dict[str, Any], List[str]]:
+    """Return ``baseline`` without the cases measured differently in ``results``.
+
+    A case run with the stub on one side and the real server on the other
+    compares two different programs. Such cases are dropped from the returned
+    baseline and their names returned.
+    """
+    cases = baseline.get("cases", {})
+    mismatched = [
+        name
+        for name, case in results.get("cases", {}).items()
+        if name in cases and bool(cases[name].get("stub")) != bool(case.get("stub"))
+    ]
+    comparable = {name: case for name, case in cases.items() if name not in mismatched}
+    return dict(baseline, cases=comparable), mismatched
+
+
+def compare_servers(
+    baseline: Dict[str, Any],
+    results: Dict[str, Any],
+    threshold: float = DEFAULT_THRESHOLD,
+    min_delta_ms: float = DEFAULT_MIN_DELTA_MS,
+) -> int:
+    """Print the regressions of ``results`` and return the exit status for them."""
+    baseline, mismatched = comparable_baseline(baseline, results)
+    for name in mismatched:
+        print(f"SKIPPED {name}: the stub ran on one side and the server on the other")
+    regressions = compare_results(baseline, results, threshold, min_delta_ms)
+    return report_regressions(regressions, threshold)
+
+
+def format_results(results: Dict[str, Any]) -> str:
+    """Return one line per server with its metrics and peak RSS."""
+    lines = []
+    for name, case in results["cases"].items():
+        label = f"{name} (stub)" if case.get("stub") else name
+        if "error" in case:
+            lines.append(f"{label}\tERROR {case['error']}")
+            continue
+        fields = [f"{metric}={value:.1f}" for metric, value in case["metrics"].items()]
+        if case.get("peak_rss_kb") is not None:
+            fields.append(f"peak_rss_kb={case['peak_rss_kb']}")
+        lines.append(f"{label}\t{'  '.join(fields)}")
+    return "\n".join(lines)
+
+
+def serve_stub(name: str, startup_ms: float = 0.0) -> int:
+    """Answer MCP requests on stdio like a small server, until end of input.
+
+    Resources are the files of the working directory, so listing them does a
+    little real work in the fixture workspace.
+    """
+    if startup_ms:
+        time.sleep(startup_ms / 1000)
+    prompts = [{"name": f"{name}-review", "description": "Review code"}]
+    tools = [
+        {
+            "name": f"{name}-echo",
+            "description": "Echo the arguments",
+            "inputSchema": {"type": "object"},
+        }
+    ]
+    for line in sys.stdin:
+        try:
+            message = json.loads(line)
+        except ValueError:
+            continue
+        if not isinstance(message, dict) or "id" not in message:
+            continue
+        method = message.get("method")
+        params = message.get("params") or {}
+        result: Any
+        if method == "initialize":
+            result = {
+                "protocolVersion": PROTOCOL_VERSION,
+                "capabilities": {"tools": {}, "prompts": {}, "resources": {}},
+                "serverInfo": {"name": name, "version": "stub"},
+            }
+        elif method == "tools/list":
+            result = {"tools": tools}
+        elif method == "prompts/list":
+            result = {"prompts": prompts}
+        elif method == "prompts/get":
+            result = {
+                "messages": [
+                    {
+                        "role": "user",
+                        "content": {"type": "text", "text": params.get("name", "")},
+                    }
+                ]
+            }
+        elif method == "resources/list":
+            result = {
+                "resources": [
+                    {"uri": Path(entry).resolve().as_uri(), "name": entry}
+                    for entry in sorted(os.listdir("."))
+                ]
+            }
+        elif method == "ping":
+            result = {}
+        else:
+            response = {
+                "jsonrpc": "2.0",
+                "id": message["id"],
+                "error": {"code": METHOD_NOT_FOUND, "message": f"Unknown: {method}"},
+            }
+            print(json.dumps(response), flush=True)
+            continue
+        print(json.dumps({"jsonrpc": "2.0", "id": message["id"], "result": result}))
+        sys.stdout.flush()
+    return 0
+
+
+def _csv(value: str) -> List[str]:
+    """Split a comma-separated option value."""
+    return [item for item in value.split(",") if item]
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    """Benchmark MCP servers, compare results, or run the stub server."""
+    parser = argparse.ArgumentParser(
+        prog="python -m mcp_vscode_workflow.serverbench",
+        description="Benchmark MCP server startup and request latency over stdio.",
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    comparison = argparse.ArgumentParser(add_help=False)
+    comparison.add_argument(
+        "--threshold",
+        type=float,
+        default=DEFAULT_THRESHOLD,
+        help=f"relative slowdown that counts as a regression "
+        f"(default: {DEFAULT_THRESHOLD})",
+    )
+    comparison.add_argument(
+        "--min-delta-ms",
+        type=float,
+        default=DEFAULT_MIN_DELTA_MS,
+        help=f"ignore slowdowns below this many ms (default: {DEFAULT_MIN_DELTA_MS})",
+    )
+
+    run_parser = subparsers.add_parser(
+        "run", parents=[comparison], help="benchmark the configured servers"
+    )
+    run_parser.add_argument(
+        "--profiles",
+        type=_csv,
+        help="comma-separated profiles whose servers to run (default: all)",
+    )
+    run_parser.add_argument(
+        "--mcp-dir",
+        default=str(DEFAULT_MCP_DIR),
+        help="directory holding the profile configs",
+    )
+    run_parser.add_argument(
+        "--npx",
+        action="store_true",
+        help="also benchmark the npx packages install-mcp-npx.sh verifies",
+    )
+    run_parser.add_argument(
+        "--stub-only",
+        action="store_true",
+        help="run the bundled stub for every server, to measure the harness",
+    )
+    run_parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT)
+    run_parser.add_argument(
+        "--requests",
+        type=int,
+        default=DEFAULT_REQUESTS,
+        help=f"request rounds per session (default: {DEFAULT_REQUESTS})",
+    )
+    run_parser.add_argument(
+        "--timeout",
+        type=float,
+        default=DEFAULT_TIMEOUT,
+        help="seconds to wait for any one response",
+    )
+    run_parser.add_argument(
+        "--work-dir",
+        default=str(DEFAULT_WORK_DIR),
+        help="where the fixture workspace is kept between runs",
+    )
+    run_parser.add_argument("--output", help="write the results JSON here")
+    run_parser.add_argument("--compare", metavar="BASELINE", help="baseline to check")
+
+    compare_parser = subparsers.add_parser(
+        "compare", parents=[comparison], help="compare results with a baseline"
+    )
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("results")
+
+    stub_parser = subparsers.add_parser("stub", help="run the bundled stub server")
+    stub_parser.add_argument("name", nargs="?", default="stub")
+    stub_parser.add_argument(
+        "--startup-ms",
+        type=float,
+        default=0.0,
+        help="time to wait before answering, to mimic a slow start",
+    )
+    args = parser.parse_args(argv)
+
+    if args.command == "stub":
+        return serve_stub(args.name, args.startup_ms)
+
+    try:
+        if args.command == "compare":
+            return compare_servers(
+                load_results(args.baseline),
+                load_results(args.results),
+                args.threshold,
+                args.min_delta_ms,
+            )
+
+        baseline = load_results(args.compare) if args.compare else None
+        targets = list_targets(
+            args.profiles or available_profiles(args.mcp_dir),
+            args.mcp_dir,
+            args.npx,
+            args.stub_only,
+        )
+        results = run_benchmarks(
+            targets,
+            prepare_fixture(args.work_dir),
+            args.repeat,
+            args.requests,
+            args.timeout,
+            progress=sys.stderr,
+        )
+    except (BenchmarkError, ServerBenchError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+
+    print(format_results(results))
+    if args.output:
+        output = Path(args.output)
+        output.parent.mkdir(parents=True, exist_ok=True)
+        output.write_text(json.dumps(results, indent=2) + "\n", encoding="utf-8")
+    failed = any("error" in case for case in results["cases"].values())
+    if baseline is not None:
+        status = compare_servers(baseline, results, args.threshold, args.min_delta_ms)
+        return status or int(failed)
+    return int(failed)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,899 @@
+"""
+Run a profile's MCP servers once and share them between clients.
+
+The ``servers`` block of a profile config (``mcp-server-filesystem``,
+``mcp-server-git``, ...) is otherwise launched by every client that reads
+it, so each VS Code window spawns its own copies. The supervisor starts each
+server of a profile once per workspace and multiplexes clients onto it over a
+Unix socket per server:
+
+- requests are forwarded with supervisor-assigned ids and the responses are
+  routed back to the client that asked, under its original id
+- ``initialize`` is answered from the server's cached initialize result, and
+  server notifications are broadcast to every connected client
+- servers are health-checked with the JSON-RPC ``ping`` method and restarted
+  with exponential backoff when they exit or stop answering; requests in
+  flight get an error response
+- ``status`` reports per-server state, RSS, start latency (spawn to
+  initialize response), request and restart counts
+- ``mcp-server-filesystem`` runs behind the read cache of
+  ``mcp_vscode_workflow.fscache``, shared by all clients
+
+Clients launch ``connect <profile> <server>`` instead of the server command;
+it bridges stdio to the server's socket and starts the supervisor if needed.
+``clients`` prints that configuration for a profile.
+
+Usage: python -m mcp_vscode_workflow.supervisor
+       serve|start|status|stop|connect|clients ...
+"""
+
+import argparse
+import asyncio
+import fcntl
+import functools
+import hashlib
+import json
+import os
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence, Set, Tuple
+
+from .config import ConfigError, PathLike, load_profile
+from .fscache import DEFAULT_CACHE_BYTES
+
+# Seconds between health checks, and to wait for a ping or initialize answer
+HEALTH_INTERVAL = 15.0
+HEALTH_TIMEOUT = 5.0
+START_TIMEOUT = 30.0
+
+# Restart backoff: doubles from the initial delay up to the maximum, and
+# starts over once a server stayed up for STABLE_AFTER seconds
+BACKOFF_INITIAL = 0.5
+BACKOFF_MAX = 30.0
+STABLE_AFTER = 60.0
+
+# Largest JSON-RPC line accepted from servers and clients
+MESSAGE_LIMIT = 64 * 1024 * 1024
+
+PROTOCOL_VERSION = "2024-11-05"
+CONTROL_SOCKET = "control.sock"
+# Held by a serving supervisor for its lifetime
+SUPERVISOR_LOCK = "supervisor.lock"
+# Held by start_supervisor around the check for a running supervisor and the
+# spawn, so concurrent clients start one supervisor between them
+START_LOCK = "start.lock"
+
+# JSON-RPC error code for requests lost with a restarted server
+INTERNAL_ERROR = -32603
+
+# Server commands run behind the read cache of mcp_vscode_workflow.fscache
+CACHED_SERVERS = frozenset({"mcp-server-filesystem"})
+
+
+class SupervisorError(Exception):
+    """Raised when a server or the supervisor cannot be reached or started."""
+
+
+class ServerSpec(NamedTuple):
+    """How to launch one MCP server of a profile."""
+
+    name: str
+    command: str
+    args: Tuple[str, ...]
+    env: Dict[str, str]
+
+
+def load_servers(profile: str, mcp_dir: PathLike) -> List[ServerSpec]:
+    """Return the servers declared by a profile's resolved configuration."""
+    try:
+        config = load_profile(profile, mcp_dir)
+    except (ConfigError, OSError) as e:
+        raise SupervisorError(f"Cannot load profile {profile}: {e}") from e
+    specs = []
+    for name, server in sorted(config.get("servers", {}).items()):
+        if not isinstance(server, dict) or "command" not in server:
+            raise SupervisorError(f"Server {name} of profile {profile} has no command")
+        specs.append(
+            ServerSpec(
+                name,
+                server["command"],
+                tuple(server.get("args", [])),
+                dict(server.get("env", {})),
+            )
+        )
+    return specs
+
+
+def cached_spec(spec: ServerSpec, cache_bytes: int) -> ServerSpec:
+    """Return ``spec`` run behind the read cache if its command is cacheable."""
+    if os.path.basename(spec.command) not in CACHED_SERVERS:
+        return spec
+    args = ["-m", "mcp_vscode_workflow.fscache", "--cache-bytes", str(cache_bytes)]
+    return spec._replace(
+        command=sys.executable, args=(*args, "--", spec.command, *spec.args)
+    )
+
+
+def runtime_dir(workspace: PathLike, profile: str) -> str:
+    """Return the directory holding the sockets of a workspace's supervisor.
+
+    It lives under the temporary directory, keyed by a hash of the workspace
+    and profile, because socket paths are limited to about 100 bytes.
+    """
+    key = f"{os.path.abspath(workspace)}\0{profile}".encode()
+    return os.path.join(
+        tempfile.gettempdir(),
+        f"mcp-supervisor-{os.getuid()}",
+        hashlib.sha256(key).hexdigest()[:16],
+    )
+
+
+def server_socket_path(workspace: PathLike, profile: str, server: str) -> str:
+    """Return the socket clients connect to for ``server``."""
+    return os.path.join(runtime_dir(workspace, profile), f"{server}.sock")
+
+
+def read_rss_kb(pid: int) -> Optional[int]:
+    """Return the resident set size of ``pid`` in KiB, if it can be read."""
+    try:
+        with open(f"/proc/{pid}/status", "r", encoding="ascii") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1])
+    except (OSError, ValueError, IndexError):
+        pass
+    try:
+        output = subprocess.run(
+            ["ps", "-o", "rss=", "-p", str(pid)],
+            capture_output=True,
+            text=True,
+            timeout=5,
+        ).stdout
+        return int(output.strip())
+    except (OSError, ValueError, subprocess.SubprocessError):
+        return None
+
+
+def _encode(message: Dict[str, Any]) -> bytes:
+    """Return a JSON-RPC message as one stdio transport line."""
+    return json.dumps(message, separators=(",", ":")).encode() + b"\n"
+
+
+def _error_response(request_id: Any, message: str) -> Dict[str, Any]:
+    """Return a JSON-RPC error response."""
+    return {
+        "jsonrpc": "2.0",
+        "id": request_id,
+        "error": {"code": INTERNAL_ERROR, "message": message},
+    }
+
+
+class _Client:
+    """A connection multiplexed onto a server."""
+
+    def __init__(self, writer: asyncio.StreamWriter) -> None:
+        self.writer = writer
+        self.outstanding = 0
+        self.idle = asyncio.Event()
+        self.idle.set()
+
+    def send(self, message: Dict[str, Any]) -> None:
+        """Queue ``message`` for the client unless it has disconnected."""
+        if not self.writer.is_closing():
+            self.writer.write(_encode(message))
+
+    def expect(self) -> None:
+        """Count a request forwarded on the client's behalf."""
+        self.outstanding += 1
+        self.idle.clear()
+
+    def answer(self, message: Dict[str, Any]) -> None:
+        """Send the response to one of the client's requests."""
+        self.send(message)
+        self.outstanding -= 1
+        if not self.outstanding:
+            self.idle.set()
+
+
+class ManagedServer:
+    """One supervised MCP server process shared by all its clients."""
+
+    def __init__(
+        self,
+        spec: ServerSpec,
+        cwd: str,
+        log_path: str,
+        health_interval: float = HEALTH_INTERVAL,
+    ) -> None:
+        self.spec = spec
+        self.cwd = cwd
+        self.log_path = log_path
+        self.health_interval = health_interval
+        self.state = "stopped"
+        self.process: Optional[asyncio.subprocess.Process] = None
+        self.init_result: Optional[Dict[str, Any]] = None
+        self.ready = asyncio.Event()
+        self.clients: Set[_Client] = set()
+        self.requests = 0
+        self.restarts = 0
+        self.start_latency_ms: Optional[float] = None
+        self.last_error: Optional[str] = None
+        self._started_at: Optional[float] = None
+        self._failures = 0
+        self._next_id = 0
+        # Supervisor id -> (client, client's id) or a future of our own call
+        self._pending: Dict[int, Tuple[Optional[_Client], Any, Optional[Any]]] = {}
+        self._last_client: Optional[_Client] = None
+        self._reader: Optional["asyncio.Future[None]"] = None
+        self._stopping = False
+
+    async def run(self) -> None:
+        """Keep the server running, restarting it with backoff, until stopped."""
+        while not self._stopping:
+            try:
+                await self._start()
+                await self._supervise()
+            except (OSError, SupervisorError, asyncio.TimeoutError) as e:
+                self.last_error = str(e) or type(e).__name__
+            await self._terminate()
+            if self._stopping:
+                break
+
+            uptime = time.monotonic() - (self._started_at or time.monotonic())
+            if uptime >= STABLE_AFTER:
+                self._failures = 0
+            delay = min(BACKOFF_INITIAL * 2**self._failures, BACKOFF_MAX)
+            self._failures += 1
+            self.state = "backoff"
+            await asyncio.sleep(delay)
+            self.restarts += 1
+        self.state = "stopped"
+
+    async def stop(self) -> None:
+        """Stop supervising and terminate the server."""
+        self._stopping = True
+        await self._terminate()
+
+    async def _start(self) -> None:
+        """Spawn the server and complete the initialize handshake."""
+        self.state = "starting"
+        self.ready.clear()
+        self._started_at = None
+        spawned = time.monotonic()
+        with open(self.log_path, "ab") as log:
+            self.process = await asyncio.create_subprocess_exec(
+                self.spec.command,
+                *self.spec.args,
+                cwd=self.cwd,
+                env=dict(os.environ, **self.spec.env),
+                stdin=asyncio.subprocess.PIPE,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=log,
+                limit=MESSAGE_LIMIT,
+            )
+        self._reader = asyncio.ensure_future(self._read_loop(self.process))
+
+        self.init_result = await asyncio.wait_for(
+            self._call(
+                "initialize",
+                {
+                    "protocolVersion": PROTOCOL_VERSION,
+                    "capabilities": {},
+                    "clientInfo": {"name": "mcp-vscode-workflow-supervisor"},
+                },
+            ),
+            START_TIMEOUT,
+        )
+        await self._send({"jsonrpc": "2.0", "method": "notifications/initialized"})
+        self._started_at = time.monotonic()
+        self.start_latency_ms = (self._started_at - spawned) * 1000
+        self.state = "running"
+        self.ready.set()
+
+    async def _supervise(self) -> None:
+        """Return once the server exits or fails a health check."""
+        assert self._reader is not None and self.process is not None
+        while True:
+            done, _ = await asyncio.wait({self._reader}, timeout=self.health_interval)
+            if not done:
+                # Any answer to the ping, even an error, shows the server is alive
+                ping = asyncio.ensure_future(self._call("ping", {}))
+                done, _ = await asyncio.wait(
+                    {self._reader, ping},
+                    timeout=HEALTH_TIMEOUT,
+                    return_when=asyncio.FIRST_COMPLETED,
+                )
+                if ping in done and self._reader not in done:
+                    if not isinstance(ping.exception(), OSError):
+                        continue
+                ping.cancel()
+            if self._reader in done:
+                raise SupervisorError(
+                    f"{self.spec.name} exited with status {self.process.returncode}"
+                )
+            raise SupervisorError(f"{self.spec.name} did not answer a ping")
+
+    async def _terminate(self) -> None:
+        """Stop the process and fail the requests it still owed."""
+        self.ready.clear()
+        process, self.process = self.process, None
+        if process is not None and process.returncode is None:
+            process.terminate()
+            try:
+                await asyncio.wait_for(process.wait(), 5)
+            except asyncio.TimeoutError:
+                process.kill()
+                await process.wait()
+        if self._reader is not None:
+            self._reader.cancel()
+            self._reader = None
+
+        pending, self._pending = self._pending, {}
+        for client, request_id, future in pending.values():
+            if future is not None:
+                if not future.done():
+                    future.set_exception(SupervisorError("server stopped"))
+            elif client is not None:
+                client.answer(
+                    _error_response(
+                        request_id, f"MCP server {self.spec.name} restarted"
+                    )
+                )
+
+    async def _send(self, message: Dict[str, Any]) -> None:
+        """Write a message to the server."""
+        if self.process is None or self.process.stdin is None:
+            raise SupervisorError(f"{self.spec.name} is not running")
+        self.process.stdin.write(_encode(message))
+        await self.process.stdin.drain()
+
+    def _new_id(self) -> int:
+        self._next_id += 1
+        return self._next_id
+
+    async def _call(self, method: str, params: Dict[str, Any]) -> Any:
+        """Send a request of the supervisor's own and return its result."""
+        future = asyncio.get_running_loop().create_future()
+        request_id = self._new_id()
+        self._pending[request_id] = (None, None, future)
+        message = {"jsonrpc": "2.0", "id": request_id, "method": method}
+        await self._send(dict(message, params=params))
+        response = await future
+        if "error" in response:
+            raise SupervisorError(f"{method} failed: {response['error']}")
+        return response.get("result")
+
+    async def forward(self, client: _Client, message: Dict[str, Any]) -> None:
+        """Forward a client's message, remapping request ids."""
+        await self.ready.wait()
+        if "method" in message and "id" in message:
+            self.requests += 1
+            request_id = self._new_id()
+            self._pending[request_id] = (client, message["id"], None)
+            client.expect()
+            self._last_client = client
+            message = dict(message, id=request_id)
+        elif message.get("method") == "notifications/cancelled":
+            params = message.get("params", {})
+            for request_id, (owner, original, _) in self._pending.items():
+                if owner is client and original == params.get("requestId"):
+                    message = dict(message, params=dict(params, requestId=request_id))
+                    break
+        try:
+            await self._send(message)
+        except (OSError, SupervisorError):
+            # The server is going down; the restart fails the pending request
+            pass
+
+    async def _read_loop(self, process: asyncio.subprocess.Process) -> None:
+        """Route the server's messages until its stdout closes."""
+        assert process.stdout is not None
+        while True:
+            line = await process.stdout.readline()
+            if not line:
+                await process.wait()
+                return
+            try:
+                message = json.loads(line)
+            except ValueError:
+                continue
+            if not isinstance(message, dict):
+                continue
+
+            if "method" not in message:
+                pending = self._pending.pop(message.get("id"), None)
+                if pending is None:
+                    continue
+                client, original_id, future = pending
+                if future is not None:
+                    if not future.done():
+                        future.set_result(message)
+                elif client is not None:
+                    client.answer(dict(message, id=original_id))
+            elif "id" in message:
+                # A request from the server (sampling, roots) goes to the
+                # client that was active last; its response is forwarded as is
+                client = self._last_client
+                if client in self.clients:
+                    client.send(message)
+                else:
+                    await self._send(
+                        _error_response(message["id"], "No client connected")
+                    )
+            else:
+                for client in list(self.clients):
+                    client.send(message)
+
+    def status(self) -> Dict[str, Any]:
+        """Return the server's state and metrics."""
+        pid = self.process.pid if self.process is not None else None
+        uptime = None
+        if self.state == "running" and self._started_at is not None:
+            uptime = round(time.monotonic() - self._started_at, 1)
+        return {
+            "state": self.state,
+            "pid": pid,
+            "rss_kb": read_rss_kb(pid) if pid is not None else None,
+            "start_latency_ms": (
+                round(self.start_latency_ms, 1)
+                if self.start_latency_ms is not None
+                else None
+            ),
+            "uptime_s": uptime,
+            "requests": self.requests,
+            "restarts": self.restarts,
+            "clients": len(self.clients),
+            "last_error": self.last_error,
+        }
+
+
+class Supervisor:
+    """Serve every MCP server of a profile to clients of one workspace.
+
+    Create it inside the event loop that runs :meth:`serve`.
+    """
+
+    def __init__(
+        self,
+        profile: str,
+        workspace: PathLike = ".",
+        mcp_dir: Optional[PathLike] = None,
+        health_interval: float = HEALTH_INTERVAL,
+        fs_cache_bytes: int = DEFAULT_CACHE_BYTES,
+    ) -> None:
+        self.profile = profile
+        self.root = os.path.abspath(workspace)
+        self.runtime_dir = runtime_dir(self.root, profile)
+        specs = load_servers(profile, mcp_dir or os.path.join(self.root, ".mcp"))
+        if fs_cache_bytes > 0:
+            specs = [cached_spec(spec, fs_cache_bytes) for spec in specs]
+        self.servers = {
+            spec.name: ManagedServer(
+                spec,
+                self.root,
+                os.path.join(self.runtime_dir, f"{spec.name}.log"),
+                health_interval,
+            )
+            for spec in specs
+        }
+        self._stopped: Optional[asyncio.Event] = None
+
+    def status(self) -> Dict[str, Any]:
+        """Return the supervisor's and each server's status."""
+        return {
+            "pid": os.getpid(),
+            "profile": self.profile,
+            "workspace": self.root,
+            "runtime_dir": self.runtime_dir,
+            "servers": {name: s.status() for name, s in self.servers.items()},
+        }
+
+    async def serve(self) -> None:
+        """Start the servers and accept clients until stopped."""
+        self._stopped = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for signum in (signal.SIGTERM, signal.SIGINT):
+            loop.add_signal_handler(signum, self._stopped.set)
+
+        os.makedirs(self.runtime_dir, mode=0o700, exist_ok=True)
+        with open(os.path.join(self.runtime_dir, SUPERVISOR_LOCK), "a") as lock:
+            try:
+                fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                # Another supervisor owns the sockets; leave them alone
+                raise SupervisorError(
+                    f"A supervisor for {self.profile} already runs in {self.root}"
+                ) from None
+            await self._serve()
+
+    async def _serve(self) -> None:
+        """Listen on the sockets and run the servers; the lock is held."""
+        assert self._stopped is not None
+        listeners = []
+        paths = []
+        for name, server in self.servers.items():
+            path = os.path.join(self.runtime_dir, f"{name}.sock")
+            listeners.append(await self._listen(path, self._serve_client, server))
+            paths.append(path)
+        control_path = os.path.join(self.runtime_dir, CONTROL_SOCKET)
+        tasks = [asyncio.ensure_future(s.run()) for s in self.servers.values()]
+        # The control socket appears last: once it answers, clients can connect
+        listeners.append(await self._listen(control_path, self._serve_control))
+        paths.append(control_path)
+
+        try:
+            await self._stopped.wait()
+        finally:
+            for listener in listeners:
+                listener.close()
+            for path in paths:
+                if os.path.exists(path):
+                    os.unlink(path)
+            await asyncio.gather(*(s.stop() for s in self.servers.values()))
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _listen(self, path: str, handler: Any, *args: Any) -> Any:
+        """Listen on a Unix socket at ``path``, replacing a stale one.
+
+        Only the holder of the supervisor lock listens, so an existing socket
+        was left behind by a supervisor that died.
+        """
+        if os.path.exists(path):
+            os.unlink(path)
+        return await asyncio.start_unix_server(
+            functools.partial(handler, *args), path=path, limit=MESSAGE_LIMIT
+        )
+
+    async def _serve_client(
+        self,
+        server: ManagedServer,
+        reader: asyncio.StreamReader,
+        writer: asyncio.StreamWriter,
+    ) -> None:
+        """Relay one client connection to ``server``."""
+        client = _Client(writer)
+        server.clients.add(client)
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                try:
+                    message = json.loads(line)
+                except ValueError:
+                    continue
+                if not isinstance(message, dict):
+                    continue
+                method = message.get("method")
+                if method == "initialize" and "id" in message:
+                    await server.ready.wait()
+                    client.send(
+                        {
+                            "jsonrpc": "2.0",
+                            "id": message["id"],
+                            "result": server.init_result,
+                        }
+                    )
+                elif method == "notifications/initialized":
+                    continue
+                else:
+                    await server.forward(client, message)
+                await writer.drain()
+            # The client closed its side; deliver what it still waits for
+            await asyncio.wait_for(client.idle.wait(), START_TIMEOUT)
+            await writer.drain()
+        except asyncio.TimeoutError:
+            pass
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            server.clients.discard(client)
+            writer.close()
+
+    async def _serve_control(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        """Answer one ``status`` or ``stop`` command."""
+        try:
+            command = (await reader.readline()).decode().strip()
+            if command == "stop":
+                assert self._stopped is not None
+                writer.write(_encode({"stopping": True, "pid": os.getpid()}))
+                self._stopped.set()
+            else:
+                writer.write(_encode(self.status()))
+            await writer.drain()
+        finally:
+            writer.close()
+
+
+async def serve(
+    profile: str,
+    workspace: PathLike = ".",
+    mcp_dir: Optional[PathLike] = None,
+    health_interval: float = HEALTH_INTERVAL,
+    fs_cache_bytes: int = DEFAULT_CACHE_BYTES,
+) -> None:
+    """Supervise a profile's servers until a ``stop`` command or signal."""
+    supervisor = Supervisor(
+        profile, workspace, mcp_dir, health_interval, fs_cache_bytes
+    )
+    await supervisor.serve()
+
+
+def control_request(
+    workspace: PathLike, profile: str, command: str = "status"
+) -> Optional[Dict[str, Any]]:
+    """Send a command to the workspace's supervisor; None if none is running."""
+    path = os.path.join(runtime_dir(workspace, profile), CONTROL_SOCKET)
+    client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    client.settimeout(10.0)
+    try:
+        client.connect(path)
+        client.sendall(command.encode() + b"\n")
+        data = b""
+        while not data.endswith(b"\n"):
+            chunk = client.recv(65536)
+            if not chunk:
+                break
+            data += chunk
+        return json.loads(data)
+    except (OSError, ValueError):
+        return None
+    finally:
+        client.close()
+
+
+def start_supervisor(
+    workspace: PathLike,
+    profile: str,
+    args: Sequence[str] = (),
+    timeout: float = START_TIMEOUT,
+) -> int:
+    """Start a detached supervisor unless one runs; return its pid."""
+    status = control_request(workspace, profile)
+    if status is not None:
+        return status["pid"]
+
+    directory = runtime_dir(workspace, profile)
+    os.makedirs(directory, mode=0o700, exist_ok=True)
+    with open(os.path.join(directory, START_LOCK), "a") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        # Another client may have started it while this one waited
+        status = control_request(workspace, profile)
+        if status is not None:
+            return status["pid"]
+        return _spawn_supervisor(workspace, profile, directory, args, timeout)
+
+
+def _spawn_supervisor(
+    workspace: PathLike,
+    profile: str,
+    directory: str,
+    args: Sequence[str],
+    timeout: float,
+) -> int:
+    """Spawn ``serve`` and wait until its control socket answers."""
+    src_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [src_dir, env.get("PYTHONPATH")]))
+    command = [sys.executable, "-m", "mcp_vscode_workflow.supervisor", "serve"]
+    command += [profile, "--workspace", os.path.abspath(workspace), *args]
+    with open(os.path.join(directory, "supervisor.log"), "ab") as log:
+        process = subprocess.Popen(
+            command,
+            stdin=subprocess.DEVNULL,
+            stdout=log,
+            stderr=log,
+            env=env,
+            start_new_session=True,
+        )
+
+    deadline = time.monotonic() + timeout
+    while True:
+        status = control_request(workspace, profile)
+        if status is not None:
+            return status["pid"]
+        if process.poll() is not None or time.monotonic() > deadline:
+            raise SupervisorError(
+                f"Supervisor did not start; see {directory}/supervisor.log"
+            )
+        time.sleep(0.05)
+
+
+def connect(
+    workspace: PathLike, profile: str, server: str, args: Sequence[str] = ()
+) -> int:
+    """Bridge stdin/stdout to a supervised server, starting the supervisor."""
+    path = server_socket_path(workspace, profile, server)
+    if control_request(workspace, profile) is None:
+        start_supervisor(workspace, profile, args)
+    connection = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        connection.connect(path)
+    except OSError as e:
+        raise SupervisorError(f"Cannot connect to {server}: {e}") from e
+
+    def pump_stdin() -> None:
+        stdin = sys.stdin.buffer
+        try:
+            for line in iter(stdin.readline, b""):
+                connection.sendall(line)
+        except OSError:
+            pass
+        finally:
+            try:
+                connection.shutdown(socket.SHUT_WR)
+            except OSError:
+                pass
+
+    threading.Thread(target=pump_stdin, daemon=True).start()
+    stdout = sys.stdout.buffer
+    while True:
+        data = connection.recv(65536)
+        if not data:
+            break
+        stdout.write(data)
+        stdout.flush()
+    connection.close()
+    return 0
+
+
+def client_config(
+    workspace: PathLike, profile: str, mcp_dir: Optional[PathLike] = None
+) -> Dict[str, Any]:
+    """Return a ``servers`` block that reaches the profile's servers via ``connect``."""
+    root = os.path.abspath(workspace)
+    specs = load_servers(profile, mcp_dir or os.path.join(root, ".mcp"))
+    src_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    return {
+        "servers": {
+            spec.name: {
+                "command": sys.executable,
+                "args": [
+                    "-m",
+                    "mcp_vscode_workflow.supervisor",
+                    "connect",
+                    profile,
+                    spec.name,
+                    "--workspace",
+                    root,
+                ],
+                "env": {"PYTHONPATH": src_dir},
+            }
+            for spec in specs
+        }
+    }
+
+
+def _format_status(status: Dict[str, Any]) -> str:
+    """Return a table of the supervised servers."""
+    lines = [f"Supervisor {status['pid']} ({status['profile']}, {status['workspace']})"]
+    for name, server in status["servers"].items():
+        rss = f"{server['rss_kb'] / 1024:.1f} MiB" if server["rss_kb"] else "-"
+        latency = (
+            f"{server['start_latency_ms']:.0f} ms"
+            if server["start_latency_ms"] is not None
+            else "-"
+        )
+        lines.append(
+            f"  {name}: {server['state']}, pid {server['pid'] or '-'}, rss {rss}, "
+            f"start {latency}, {server['requests']} requests, "
+            f"{server['restarts']} restarts, {server['clients']} clients"
+        )
+        if server["last_error"]:
+            lines.append(f"    last error: {server['last_error']}")
+    return "\n".join(lines) + "\n"
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    """Serve, start, query, stop or connect to a profile's supervised servers."""
+    parser = argparse.ArgumentParser(
+        prog="python -m mcp_vscode_workflow.supervisor",
+        description="Share a profile's MCP servers between clients of a workspace.",
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("profile", help="profile name (config-<profile>.json)")
+    common.add_argument("--workspace", default=".", help="workspace root (default: .)")
+    serving = argparse.ArgumentParser(add_help=False)
+    serving.add_argument(
+        "--mcp-dir", help="directory holding the profile configs (default: .mcp)"
+    )
+    serving.add_argument(
+        "--health-interval",
+        type=float,
+        default=HEALTH_INTERVAL,
+        help=f"seconds between ping health checks (default: {HEALTH_INTERVAL})",
+    )
+    serving.add_argument(
+        "--fs-cache-bytes",
+        type=int,
+        default=DEFAULT_CACHE_BYTES,
+        help="read cache budget in front of mcp-server-filesystem; 0 disables it "
+        f"(default: {DEFAULT_CACHE_BYTES})",
+    )
+
+    subparsers.add_parser(
+        "serve", parents=[common, serving], help="supervise in the foreground"
+    )
+    subparsers.add_parser(
+        "start", parents=[common, serving], help="start a background supervisor"
+    )
+    status_parser = subparsers.add_parser(
+        "status", parents=[common], help="print server states and metrics"
+    )
+    status_parser.add_argument(
+        "--format", choices=["text", "json"], default="text", help="output format"
+    )
+    subparsers.add_parser("stop", parents=[common], help="stop the supervisor")
+    connect_parser = subparsers.add_parser(
+        "connect",
+        parents=[common, serving],
+        help="bridge stdio to a supervised server (the command clients run)",
+    )
+    connect_parser.add_argument("server", help="server name in the profile config")
+    subparsers.add_parser(
+        "clients",
+        parents=[common, serving],
+        help="print client configuration that connects through the supervisor",
+    )
+    args = parser.parse_args(argv)
+
+    forwarded: List[str] = []
+    if getattr(args, "mcp_dir", None):
+        forwarded += ["--mcp-dir", os.path.abspath(args.mcp_dir)]
+    if getattr(args, "health_interval", HEALTH_INTERVAL) != HEALTH_INTERVAL:
+        forwarded += ["--health-interval", str(args.health_interval)]
+    if getattr(args, "fs_cache_bytes", DEFAULT_CACHE_BYTES) != DEFAULT_CACHE_BYTES:
+        forwarded += ["--fs-cache-bytes", str(args.fs_cache_bytes)]
+
+    try:
+        if args.command == "serve":
+            asyncio.run(
+                serve(
+                    args.profile,
+                    args.workspace,
+                    args.mcp_dir,
+                    args.health_interval,
+                    args.fs_cache_bytes,
+                )
+            )
+            return 0
+        if args.command == "start":
+            pid = start_supervisor(args.workspace, args.profile, forwarded)
+            print(f"Supervisor running (pid {pid})")
+            return 0
+        if args.command == "connect":
+            return connect(args.workspace, args.profile, args.server, forwarded)
+        if args.command == "clients":
+            config = client_config(args.workspace, args.profile, args.mcp_dir)
+            print(json.dumps(config, indent=2))
+            return 0
+    except SupervisorError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+
+    status = control_request(args.workspace, args.profile, args.command)
+    if status is None:
+        print("No supervisor is running", file=sys.stderr)
+        return 1
+    if args.command == "stop":
+        print(f"Stopping supervisor (pid {status['pid']})")
+    elif args.format == "json":
+        print(json.dumps(status, indent=2))
+    else:
+        sys.stdout.write(_format_status(status))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
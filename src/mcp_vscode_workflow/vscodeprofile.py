@@ -0,0 +1,556 @@
+"""
+Compose VS Code profiles and materialize them into a workspace.
+
+The files in ``.vscode/profiles`` are overlays. ``base.json`` holds what every
+profile shares (format on save, the Copilot and MCP extensions) and
+``<profile>.json`` adds the profile's own settings, tasks and extensions. A
+profile is composed as:
+
+1. ``base.json``
+2. ``<profile>.json``, merged over it with the ``extends`` rules of
+   ``mcp_vscode_workflow.config`` (objects recursively, lists without
+   duplicates, the overlay winning)
+3. the language settings of every other profile detected in the workspace:
+   their ``files.associations``, language-scoped settings such as
+   ``"[markdown]"`` and their extension recommendations. These never
+   override the profile's own values.
+
+Materializing writes the composed settings to ``<workspace>/.vscode/
+settings.json`` and the recommendations to ``.vscode/extensions.json``. The
+content hash of the composed profile and of both written files is kept in
+``.mcp/cache/vscode-profile.json``. Detection and composition always run, but
+when the composed profile and both files are unchanged since the last run,
+the existing files are not parsed, merged or written. Settings changed or
+added by hand since the last write are kept. Existing files are read as JSONC
+(comments and trailing commas allowed, as VS Code does). One that cannot be
+parsed, or that has comments and needs changes, is left untouched and
+reported: writing it back as JSON would drop the comments.
+
+Missing extensions are installed with one ``code --list-extensions`` call and
+one batched ``code --install-extension A --install-extension B ...`` call, and
+not even listed again until the recommendations change.
+
+Usage: python -m mcp_vscode_workflow.vscodeprofile {compose,apply} PROFILE
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import re
+import subprocess
+import sys
+import tempfile
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Sequence
+
+from .config import merge_configs
+from .detect import DEFAULT_ROLES_FILE, DetectionError, PathLike, detect_workspace
+
+# Profile overlays shipped with the repository
+DEFAULT_PROFILES_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+    ".vscode",
+    "profiles",
+)
+
+# Overlay every profile is composed on
+BASE_PROFILE = "base"
+
+# Hashes of the last materialized profile, relative to the workspace root
+STATE_PATH = os.path.join(".mcp", "cache", "vscode-profile.json")
+
+# Bump when the composition rules or the state layout change
+STATE_VERSION = 1
+
+# Files written below <workspace>/.vscode
+SETTINGS_FILE = "settings.json"
+EXTENSIONS_FILE = "extensions.json"
+
+# Settings another detected profile contributes besides language-scoped ones
+LANGUAGE_SETTINGS = ("files.associations",)
+
+INSTALL_TIMEOUT = 600
+
+# VS Code reads its JSON files as JSONC: comments and trailing commas are
+# allowed. Strings are matched first so their contents are left alone.
+_JSONC_COMMENT = re.compile(r'("(?:\\.|[^"\\])*")|//[^\n]*|/\*.*?\*/', re.S)
+_JSONC_TRAILING_COMMA = re.compile(r'("(?:\\.|[^"\\])*")|,(?=\s*[}\]])')
+
+
+class ProfileError(Exception):
+    """Raised when a profile cannot be composed, written or installed."""
+
+
+class JsoncFile(NamedTuple):
+    """A VS Code JSON file read as JSONC."""
+
+    document: Dict[str, Any]
+    # True when the file has comments, which rewriting it would drop
+    commented: bool
+
+
+class Materialized(NamedTuple):
+    """What applying a profile to a workspace did."""
+
+    profile: str
+    hash: str
+    # Files below .vscode that were (re)written, empty when up to date
+    written: List[str]
+    # Files below .vscode left untouched because they could not be parsed,
+    # or have comments that rewriting them would drop
+    skipped: List[str]
+    # Extensions installed; None when the recommendations were unchanged
+    installed: Optional[List[str]]
+
+
+def load_overlay(
+    profile: str, profiles_dir: PathLike = DEFAULT_PROFILES_DIR
+) -> Dict[str, Any]:
+    """Return the overlay document for ``profile`` (empty if missing)."""
+    return _read_object(os.path.join(profiles_dir, f"{profile}.json"))
+
+
+def _recommendations(document: Dict[str, Any]) -> List[str]:
+    """Return the extension recommendations of a profile document."""
+    return list(document.get("extensions", {}).get("recommendations", []))
+
+
+def language_settings(document: Dict[str, Any]) -> Dict[str, Any]:
+    """Return the settings of a profile that describe its languages."""
+    return {
+        key: value
+        for key, value in document.get("settings", {}).items()
+        if key in LANGUAGE_SETTINGS or key.startswith("[")
+    }
+
+
+def compose_profile(
+    profile: str,
+    profiles_dir: PathLike = DEFAULT_PROFILES_DIR,
+    languages: Iterable[str] = (),
+) -> Dict[str, Any]:
+    """Return the composed profile: base, overlay, then other languages."""
+    overlay = load_overlay(profile, profiles_dir)
+    document = merge_configs(load_overlay(BASE_PROFILE, profiles_dir), overlay)
+    document["name"] = overlay.get("name", profile)
+    settings = document.setdefault("settings", {})
+    recommendations = _recommendations(document)
+
+    for language in languages:
+        if language in (profile, BASE_PROFILE):
+            continue
+        overlay = load_overlay(language, profiles_dir)
+        for key, value in language_settings(overlay).items():
+            settings[key] = (
+                merge_configs(value, settings[key]) if key in settings else value
+            )
+        for extension in _recommendations(overlay):
+            if extension not in recommendations:
+                recommendations.append(extension)
+
+    document.setdefault("extensions", {})["recommendations"] = recommendations
+    return document
+
+
+def detected_languages(
+    workspace: PathLike = ".", roles_file: PathLike = DEFAULT_ROLES_FILE
+) -> List[str]:
+    """Return the profiles detected in ``workspace``, in configured order."""
+    try:
+        return detect_workspace(workspace, roles_file=roles_file).profiles
+    except (DetectionError, OSError) as e:
+        raise ProfileError(f"Cannot detect the workspace languages: {e}") from e
+
+
+def content_hash(document: Any) -> str:
+    """Return the SHA-256 hex digest of a JSON document's canonical form."""
+    canonical = json.dumps(document, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(f"v{STATE_VERSION}\n{canonical}".encode("utf-8")).hexdigest()
+
+
+def _file_record(path: str) -> Dict[str, Any]:
+    """Return the size, modification time and hash of a written file."""
+    with open(path, "rb") as f:
+        digest = hashlib.sha256(f.read()).hexdigest()
+    stat = os.stat(path)
+    return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "sha256": digest}
+
+
+def _file_is_current(path: str, record: Any) -> bool:
+    """Return True if a file still holds what was written, per its record.
+
+    Files whose size and mtime are unchanged are trusted without rehashing.
+    """
+    if not isinstance(record, dict):
+        return False
+    try:
+        stat = os.stat(path)
+        if stat.st_size == record["size"] and stat.st_mtime_ns == record["mtime_ns"]:
+            return True
+        return _file_record(path)["sha256"] == record["sha256"]
+    except (OSError, KeyError):
+        return False
+
+
+def _keep_strings(match: "re.Match[str]") -> str:
+    """Return the string a JSONC pattern matched, dropping anything else."""
+    return match.group(1) or ""
+
+
+def _parse_object(path: PathLike, text: str) -> Dict[str, Any]:
+    """Return the JSON object in ``text``, read from ``path``."""
+    try:
+        document = json.loads(text)
+    except ValueError as e:
+        raise ProfileError(f"Cannot read {path}: {e}") from e
+    if not isinstance(document, dict):
+        raise ProfileError(f"{path} is not a JSON object")
+    return document
+
+
+def _read_object(path: str) -> Dict[str, Any]:
+    """Return the JSON object in ``path``, or an empty one if it is missing."""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            text = f.read()
+    except FileNotFoundError:
+        return {}
+    except OSError as e:
+        raise ProfileError(f"Cannot read {path}: {e}") from e
+    return _parse_object(path, text)
+
+
+def read_jsonc(path: PathLike) -> JsoncFile:
+    """Return the object in a VS Code JSON file, read as JSONC.
+
+    Comments and trailing commas are accepted as VS Code does. A missing file
+    reads as an empty object.
+    """
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            text = f.read()
+    except FileNotFoundError:
+        return JsoncFile({}, False)
+    except OSError as e:
+        raise ProfileError(f"Cannot read {path}: {e}") from e
+    uncommented = _JSONC_COMMENT.sub(_keep_strings, text)
+    document = _parse_object(
+        path, _JSONC_TRAILING_COMMA.sub(_keep_strings, uncommented)
+    )
+    return JsoncFile(document, uncommented != text)
+
+
+def _write_json(path: str, document: Any) -> None:
+    """Write a JSON document atomically."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(
+        prefix=f".{os.path.basename(path)}.", dir=os.path.dirname(path)
+    )
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(document, f, indent=2)
+            f.write("\n")
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def _load_state(workspace: str) -> Dict[str, Any]:
+    """Return the state of the last materialized profile (empty if none)."""
+    try:
+        state = _read_object(os.path.join(workspace, STATE_PATH))
+    except ProfileError:
+        return {}
+    return state if state.get("version") == STATE_VERSION else {}
+
+
+def _keep_user_values(
+    existing: Dict[str, Any], previous: Dict[str, Any]
+) -> Dict[str, Any]:
+    """Return the entries of ``existing`` not written by the previous run."""
+    return {
+        key: value
+        for key, value in existing.items()
+        if key not in previous or previous[key] != value
+    }
+
+
+def materialize(
+    profile: str,
+    document: Dict[str, Any],
+    workspace: PathLike = ".",
+    force: bool = False,
+) -> Materialized:
+    """Write a composed profile's settings and recommendations to the workspace.
+
+    Nothing is written when the profile and both files are unchanged since
+    the last run, unless ``force`` is set.
+    """
+    root = os.path.abspath(workspace)
+    vscode_dir = os.path.join(root, ".vscode")
+    state = _load_state(root)
+    digest = content_hash(document)
+    files = state.get("files", {})
+    if (
+        not force
+        and state.get("hash") == digest
+        and all(
+            _file_is_current(os.path.join(vscode_dir, name), files.get(name))
+            for name in (SETTINGS_FILE, EXTENSIONS_FILE)
+        )
+    ):
+        return Materialized(profile, digest, [], [], None)
+
+    # A file that cannot be parsed even as JSONC, or whose comments would be
+    # lost by rewriting it, is left as it is; the other one is still written
+    existing: Dict[str, Optional[JsoncFile]] = {}
+    for name in (SETTINGS_FILE, EXTENSIONS_FILE):
+        try:
+            existing[name] = read_jsonc(os.path.join(vscode_dir, name))
+        except ProfileError:
+            existing[name] = None
+
+    contents = {}
+    existing_settings = existing[SETTINGS_FILE]
+    if existing_settings is not None:
+        settings = dict(document.get("settings", {}))
+        settings.update(
+            _keep_user_values(existing_settings.document, state.get("settings", {}))
+        )
+        contents[SETTINGS_FILE] = settings
+
+    existing_extensions = existing[EXTENSIONS_FILE]
+    if existing_extensions is not None:
+        generated = _recommendations(document)
+        previous = set(state.get("recommendations", []))
+        extensions = dict(existing_extensions.document)
+        extensions["recommendations"] = generated + [
+            extension
+            for extension in existing_extensions.document.get("recommendations", [])
+            if extension not in previous and extension not in generated
+        ]
+        contents[EXTENSIONS_FILE] = extensions
+
+    written = []
+    skipped = []
+    for name in (SETTINGS_FILE, EXTENSIONS_FILE):
+        current = existing[name]
+        status = None
+        if current is not None:
+            status = _write_changed(
+                os.path.join(vscode_dir, name), contents[name], current
+            )
+        if status is None:
+            skipped.append(f".vscode/{name}")
+        elif status:
+            written.append(f".vscode/{name}")
+    if f".vscode/{SETTINGS_FILE}" not in skipped:
+        state["settings"] = document.get("settings", {})
+    if f".vscode/{EXTENSIONS_FILE}" not in skipped:
+        state["recommendations"] = _recommendations(document)
+
+    state.update(
+        {
+            "version": STATE_VERSION,
+            "profile": profile,
+            "hash": digest,
+            # A skipped file has no record, so the next run tries it again
+            "files": {
+                name: _file_record(os.path.join(vscode_dir, name))
+                for name in (SETTINGS_FILE, EXTENSIONS_FILE)
+                if f".vscode/{name}" not in skipped
+            },
+        }
+    )
+    _save_state(root, state)
+    return Materialized(profile, digest, written, skipped, None)
+
+
+def _write_changed(
+    path: str, content: Dict[str, Any], existing: JsoncFile
+) -> Optional[bool]:
+    """Write ``content`` unless ``path`` already holds it.
+
+    Returns True if written, False if up to date and None if the file was left
+    untouched because rewriting it would drop its comments.
+    """
+    if content == existing.document and os.path.exists(path):
+        return False
+    if existing.commented:
+        return None
+    _write_json(path, content)
+    return True
+
+
+def _save_state(root: str, state: Dict[str, Any]) -> None:
+    """Write the materialization state, ignoring read-only workspaces."""
+    try:
+        _write_json(os.path.join(root, STATE_PATH), state)
+    except OSError:
+        pass
+
+
+def install_extensions(recommendations: Sequence[str], code: str = "code") -> List[str]:
+    """Install the recommended extensions VS Code does not have yet.
+
+    Installed extensions are listed once and the missing ones installed in a
+    single ``code`` call. Returns the extensions that were installed.
+    """
+    try:
+        listed = subprocess.run(
+            [code, "--list-extensions"],
+            capture_output=True,
+            text=True,
+            timeout=INSTALL_TIMEOUT,
+            check=True,
+        )
+        # Extension identifiers are case-insensitive
+        installed = {line.strip().lower() for line in listed.stdout.splitlines()}
+        missing = [
+            extension
+            for extension in dict.fromkeys(recommendations)
+            if extension.lower() not in installed
+        ]
+        if missing:
+            command = [code]
+            for extension in missing:
+                command += ["--install-extension", extension]
+            subprocess.run(
+                command, capture_output=True, timeout=INSTALL_TIMEOUT, check=True
+            )
+    except FileNotFoundError:
+        raise ProfileError(f"VS Code CLI not found: {code}") from None
+    except subprocess.CalledProcessError as e:
+        raise ProfileError(
+            f"{' '.join(e.cmd[:2])} exited with status {e.returncode}"
+        ) from e
+    except subprocess.TimeoutExpired as e:
+        raise ProfileError(f"{' '.join(e.cmd[:2])} timed out") from e
+    return missing
+
+
+def apply_profile(
+    profile: str,
+    workspace: PathLike = ".",
+    profiles_dir: PathLike = DEFAULT_PROFILES_DIR,
+    roles_file: Optional[PathLike] = DEFAULT_ROLES_FILE,
+    install: bool = True,
+    code: str = "code",
+    force: bool = False,
+) -> Materialized:
+    """Compose a profile for ``workspace``, write it and install its extensions.
+
+    Languages are detected with ``roles_file`` unless it is None. Extensions
+    are only checked when the recommendations changed since the last
+    successful install.
+    """
+    languages = detected_languages(workspace, roles_file) if roles_file else []
+    document = compose_profile(profile, profiles_dir, languages)
+    result = materialize(profile, document, workspace, force)
+    if not install:
+        return result
+
+    root = os.path.abspath(workspace)
+    recommendations = _recommendations(document)
+    installed_hash = content_hash(sorted(recommendations))
+    state = _load_state(root)
+    if not force and state.get("installed") == installed_hash:
+        return result
+
+    installed = install_extensions(recommendations, code)
+    state["installed"] = installed_hash
+    _save_state(root, state)
+    return result._replace(installed=installed)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    """Compose a profile, or apply it to a workspace."""
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("profile", help="profile name (<profile>.json overlay)")
+    common.add_argument(
+        "--workspace",
+        default=".",
+        help="workspace directory (default: current directory)",
+    )
+    common.add_argument(
+        "--profiles-dir",
+        default=DEFAULT_PROFILES_DIR,
+        help="directory holding base.json and the profile overlays",
+    )
+    common.add_argument(
+        "--roles",
+        default=DEFAULT_ROLES_FILE,
+        help="roles.json with the detection configuration",
+    )
+    common.add_argument(
+        "--no-detect",
+        action="store_true",
+        help="do not add the settings of other languages found in the workspace",
+    )
+
+    parser = argparse.ArgumentParser(
+        prog="python -m mcp_vscode_workflow.vscodeprofile",
+        description="Compose VS Code profiles and materialize them into a workspace.",
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    subparsers.add_parser(
+        "compose", parents=[common], help="print the composed profile as JSON"
+    )
+    apply_parser = subparsers.add_parser(
+        "apply",
+        parents=[common],
+        help="write the profile to <workspace>/.vscode and install its extensions",
+    )
+    apply_parser.add_argument(
+        "--no-install", action="store_true", help="do not install extensions"
+    )
+    apply_parser.add_argument(
+        "--code", default="code", help="VS Code command line (default: code)"
+    )
+    apply_parser.add_argument(
+        "--force", action="store_true", help="write and check extensions regardless"
+    )
+    args = parser.parse_args(argv)
+    roles_file = None if args.no_detect else args.roles
+
+    try:
+        if args.command == "compose":
+            languages = (
+                detected_languages(args.workspace, roles_file) if roles_file else []
+            )
+            document = compose_profile(args.profile, args.profiles_dir, languages)
+            json.dump(document, sys.stdout, indent=2)
+            sys.stdout.write("\n")
+            return 0
+
+        result = apply_profile(
+            args.profile,
+            args.workspace,
+            args.profiles_dir,
+            roles_file,
+            install=not args.no_install,
+            code=args.code,
+            force=args.force,
+        )
+    except ProfileError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+
+    for path in result.written:
+        print(f"wrote {path}")
+    for path in result.skipped:
+        print(
+            f"Warning: left {path} unchanged; it is not valid JSON or has comments,"
+            " merge the profile settings by hand",
+            file=sys.stderr,
+        )
+    if not result.written and not result.skipped:
+        print(f"{result.profile} profile is up to date")
+    for extension in result.installed or []:
+        print(f"installed {extension}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,604 @@
+"""
+Keep workspace detection current in a background watcher.
+
+Detection otherwise only runs when ``bootstrap.sh`` is invoked, so the
+recommended profile drifts as a repository changes. The watcher holds the
+detection index in memory, subscribes to inotify events for every indexed
+directory and, a short debounce after files are created, deleted, moved or
+written, re-lists only the directories that changed and re-detects.
+
+The current result is published in three places under ``.mcp/cache/``:
+
+- ``detection.status``: the ``--format bootstrap`` lines of
+  ``mcp_vscode_workflow.detect`` after a ``watcher <pid> <root>`` header,
+  read by ``bootstrap.sh`` instead of scanning while the watcher is alive
+- ``detection.status.json``: the JSON summary, for editors and tools
+- ``detection.sock``: a Unix socket answering every connection with the JSON
+  summary of the moment
+
+Without inotify (non-Linux systems, or when the watch limit is reached) the
+watcher polls directory modification times instead.
+
+Usage: python -m mcp_vscode_workflow.watch run|start|status|stop [WORKSPACE]
+"""
+
+import argparse
+import ctypes
+import ctypes.util
+import errno
+import json
+import os
+import selectors
+import signal
+import socket
+import struct
+import subprocess
+import sys
+import time
+from typing import Any, Dict, Iterable, Iterator, Optional, Sequence, Set, Tuple
+
+from .detect import (
+    DEFAULT_ROLES_FILE,
+    DetectionError,
+    IncrementalDetector,
+    PathLike,
+    format_bootstrap,
+)
+
+STATUS_PATH = os.path.join(".mcp", "cache", "detection.status")
+STATUS_JSON_PATH = STATUS_PATH + ".json"
+SOCKET_PATH = os.path.join(".mcp", "cache", "detection.sock")
+LOG_PATH = os.path.join(".mcp", "cache", "watch.log")
+
+# Seconds to wait for more events before re-detecting, and between scans
+# when polling
+DEFAULT_DEBOUNCE = 0.2
+DEFAULT_POLL_INTERVAL = 2.0
+
+# Seconds "start" waits for a new watcher to publish its first status
+START_TIMEOUT = 10.0
+
+# inotify(7) event bits
+IN_MODIFY_EVENTS = (
+    0x00000008  # IN_CLOSE_WRITE
+    | 0x00000040  # IN_MOVED_FROM
+    | 0x00000080  # IN_MOVED_TO
+    | 0x00000100  # IN_CREATE
+    | 0x00000200  # IN_DELETE
+)
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+WATCH_MASK = IN_MODIFY_EVENTS | IN_DELETE_SELF | IN_MOVE_SELF | IN_ONLYDIR
+EVENT_HEADER = struct.Struct("iIII")
+
+
+class WatchError(Exception):
+    """Raised when filesystem notifications cannot be used."""
+
+
+class _Stop(Exception):
+    """Raised from signal handlers to leave the event loop."""
+
+
+class Inotify:
+    """Minimal ctypes binding of inotify(7) for directory watches."""
+
+    def __init__(self) -> None:
+        if not sys.platform.startswith("linux"):
+            raise WatchError("inotify is only available on Linux")
+        try:
+            libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+            self._add_watch = libc.inotify_add_watch
+            self._rm_watch = libc.inotify_rm_watch
+            init = libc.inotify_init1
+        except (OSError, AttributeError) as e:
+            raise WatchError(f"inotify is unavailable: {e}") from e
+        self._add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        self.fd = init(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise WatchError(f"inotify_init1 failed: {os.strerror(ctypes.get_errno())}")
+        # Watch descriptor -> directory whose changes it reports
+        self.paths: Dict[int, str] = {}
+
+    def add(self, directory: str, report_as: Optional[str] = None) -> None:
+        """Watch ``directory``; its events are reported as ``report_as``."""
+        wd = self._add_watch(self.fd, os.fsencode(directory), WATCH_MASK)
+        if wd < 0:
+            error = ctypes.get_errno()
+            if error in (errno.ENOSPC, errno.ENOMEM):
+                raise WatchError(f"inotify watch limit reached at {directory}")
+            return  # vanished or unreadable; the parent's events cover it
+        self.paths[wd] = report_as or directory
+
+    def events(self) -> Iterator[Tuple[Optional[str], str, int]]:
+        """Yield ``(directory, name, mask)`` for each pending event.
+
+        ``directory`` is None when the queue overflowed and events were lost.
+        """
+        while True:
+            try:
+                data = os.read(self.fd, 65536)
+            except BlockingIOError:
+                return
+            offset = 0
+            while offset < len(data):
+                wd, mask, _, length = EVENT_HEADER.unpack_from(data, offset)
+                offset += EVENT_HEADER.size
+                name = os.fsdecode(data[offset : offset + length].rstrip(b"\0"))
+                offset += length
+                if mask & IN_Q_OVERFLOW:
+                    yield None, "", mask
+                elif mask & IN_IGNORED:
+                    self.paths.pop(wd, None)
+                elif mask & (IN_DELETE_SELF | IN_MOVE_SELF):
+                    # The parent directory reports the change; a moved
+                    # directory is watched again under its new path
+                    self._rm_watch(self.fd, wd)
+                    self.paths.pop(wd, None)
+                elif wd in self.paths:
+                    yield self.paths[wd], name, mask
+
+    def read(self) -> Tuple[Set[str], bool]:
+        """Return the directories with pending events and whether any were lost."""
+        changed: Set[str] = set()
+        overflow = False
+        for directory, _, _ in self.events():
+            if directory is None:
+                overflow = True
+            else:
+                changed.add(directory)
+        return changed, overflow
+
+    def close(self) -> None:
+        """Close the inotify descriptor and drop every watch."""
+        os.close(self.fd)
+
+
+def _write_atomic(path: str, content: str) -> None:
+    """Replace ``path`` with ``content`` through a temporary file."""
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(content)
+    os.replace(tmp_path, path)
+
+
+def _pid_alive(pid: int) -> bool:
+    """Return True if a process with ``pid`` exists."""
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class Watcher:
+    """Re-detect a workspace as its files change and publish the result."""
+
+    def __init__(
+        self,
+        workspace: PathLike = ".",
+        roles_file: PathLike = DEFAULT_ROLES_FILE,
+        rescan: bool = False,
+        debounce: float = DEFAULT_DEBOUNCE,
+        poll_interval: float = DEFAULT_POLL_INTERVAL,
+        use_inotify: bool = True,
+        use_socket: bool = True,
+    ) -> None:
+        self.detector = IncrementalDetector(workspace, rescan, roles_file)
+        self.root = self.detector.root
+        self.debounce = debounce
+        self.poll_interval = poll_interval
+        self.updates = 0
+        self._pending: Set[str] = set()
+        self._overflow = False
+        self._deadline: Optional[float] = None
+        self._next_poll = time.monotonic() + poll_interval
+        self._selector = selectors.DefaultSelector()
+
+        self._inotify: Optional[Inotify] = None
+        if use_inotify:
+            try:
+                self._inotify = Inotify()
+                self._watch(self.detector.directories)
+            except WatchError as e:
+                print(f"Polling for changes: {e}", file=sys.stderr)
+                self._close_inotify()
+        if self._inotify is not None:
+            self._selector.register(self._inotify.fd, selectors.EVENT_READ, "inotify")
+
+        self._server: Optional[socket.socket] = None
+        if use_socket:
+            self._server = self._listen()
+        self.publish()
+
+    @property
+    def polling(self) -> bool:
+        """True when changes are found by polling instead of inotify."""
+        return self._inotify is None
+
+    def _watch(self, directories: Iterable[str]) -> None:
+        """Watch indexed directories and the parents of nested indicators."""
+        assert self._inotify is not None
+        for directory in directories:
+            self._inotify.add(directory)
+        self._watch_indicators()
+
+    def _watch_indicators(self) -> None:
+        """Watch the existing part of each nested indicator's parent path.
+
+        Indicators such as .github/workflows live in pruned hidden trees, so
+        the index never adds them; changes there only matter to the root's
+        indicator checks. Watching each existing ancestor as well means that
+        creating ``.github`` and then ``.github/workflows`` is seen too.
+        """
+        assert self._inotify is not None
+        indexed = set(self.detector.directories)
+        for indicator in self.detector.model.indicators:
+            parent = os.path.dirname(indicator.relpath)
+            path = self.root
+            for part in parent.split("/") if parent else ():
+                path = os.path.join(path, part)
+                if not os.path.isdir(path):
+                    break
+                if path not in indexed:
+                    self._inotify.add(path, self.root)
+
+    def _close_inotify(self) -> None:
+        """Stop using inotify and fall back to polling."""
+        if self._inotify is not None:
+            self._inotify.close()
+            self._inotify = None
+
+    def _listen(self) -> Optional[socket.socket]:
+        """Open the status socket, or return None if it cannot be bound."""
+        path = os.path.join(self.root, SOCKET_PATH)
+        if os.path.exists(path):
+            os.unlink(path)
+        server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            server.bind(path)
+        except OSError as e:
+            # e.g. a workspace path longer than sockaddr_un allows
+            print(f"Status socket disabled: {e}", file=sys.stderr)
+            server.close()
+            return None
+        server.listen(8)
+        server.setblocking(False)
+        self._selector.register(server, selectors.EVENT_READ, "socket")
+        return server
+
+    def status(self) -> Dict[str, Any]:
+        """Return the current detection summary with watcher details."""
+        result = self.detector.detection.to_dict()
+        result["watcher"] = {
+            "pid": os.getpid(),
+            "updated": time.time(),
+            "updates": self.updates,
+            "mode": "polling" if self.polling else "inotify",
+        }
+        return result
+
+    def publish(self) -> None:
+        """Write the status files."""
+        detection = self.detector.detection
+        _write_atomic(
+            os.path.join(self.root, STATUS_PATH),
+            f"watcher {os.getpid()} {self.root}\n"
+            + format_bootstrap(detection, detection.recommended),
+        )
+        _write_atomic(
+            os.path.join(self.root, STATUS_JSON_PATH),
+            json.dumps(self.status(), indent=2) + "\n",
+        )
+
+    def _add_watches(self, watch: Any, *args: Any) -> None:
+        """Call ``watch``, falling back to polling when inotify gives out."""
+        try:
+            watch(*args)
+        except WatchError as e:
+            print(f"Polling for changes: {e}", file=sys.stderr)
+            assert self._inotify is not None
+            self._selector.unregister(self._inotify.fd)
+            self._close_inotify()
+
+    def update(self, directories: Optional[Iterable[str]] = None) -> None:
+        """Re-detect from ``directories`` (all modified ones if None) and publish."""
+        if directories is not None:
+            directories = list(directories)
+        # Root events include those of indicator ancestors; watch what
+        # appeared before re-detecting so nothing created meanwhile is lost
+        if self._inotify is not None and (
+            directories is None or self.root in directories
+        ):
+            self._add_watches(self._watch_indicators)
+        added = self.detector.update(directories)
+        if self._inotify is not None and added:
+            self._add_watches(self._watch, added)
+        self.updates += 1
+        self.publish()
+
+    def _answer(self) -> None:
+        """Send the current status to a connected client."""
+        assert self._server is not None
+        try:
+            connection, _ = self._server.accept()
+        except BlockingIOError:
+            return
+        with connection:
+            connection.setblocking(True)
+            connection.settimeout(1.0)
+            try:
+                connection.sendall(json.dumps(self.status()).encode() + b"\n")
+            except OSError:
+                pass
+
+    def step(self, timeout: Optional[float] = None) -> bool:
+        """Handle pending events for up to ``timeout`` seconds.
+
+        Returns True if detection was updated.
+        """
+        now = time.monotonic()
+        if self._deadline is not None:
+            wait = max(0.0, self._deadline - now)
+        elif self.polling:
+            wait = max(0.0, self._next_poll - now)
+        else:
+            wait = None
+        if timeout is not None:
+            wait = timeout if wait is None else min(wait, timeout)
+
+        for key, _ in self._selector.select(wait):
+            if key.data == "socket":
+                self._answer()
+            elif self._inotify is not None:
+                changed, overflow = self._inotify.read()
+                self._pending |= changed
+                self._overflow |= overflow
+                if self._deadline is None and (changed or overflow):
+                    self._deadline = time.monotonic() + self.debounce
+
+        now = time.monotonic()
+        if self._deadline is not None and now >= self._deadline:
+            pending = None if self._overflow else sorted(self._pending)
+            self._pending, self._overflow, self._deadline = set(), False, None
+            self.update(pending)
+            return True
+        if self.polling and now >= self._next_poll:
+            self._next_poll = now + self.poll_interval
+            self.update()
+            return True
+        return False
+
+    def run(self) -> None:
+        """Watch until SIGTERM or SIGINT, then remove the published status."""
+
+        def stop(signum: int, frame: Any) -> None:
+            raise _Stop()
+
+        signal.signal(signal.SIGTERM, stop)
+        signal.signal(signal.SIGINT, stop)
+        try:
+            while True:
+                self.step()
+        except _Stop:
+            pass
+        finally:
+            self.close()
+
+    def close(self) -> None:
+        """Release the watches and socket and remove the status files."""
+        self._selector.close()
+        self._close_inotify()
+        if self._server is not None:
+            self._server.close()
+            self._server = None
+        for path in (STATUS_PATH, STATUS_JSON_PATH, SOCKET_PATH):
+            try:
+                os.unlink(os.path.join(self.root, path))
+            except FileNotFoundError:
+                pass
+
+
+def read_status(workspace: PathLike = ".") -> Optional[Dict[str, Any]]:
+    """Return the status of the workspace's live watcher, or None.
+
+    The socket is asked first; the JSON status file is the fallback.
+    """
+    root = os.path.abspath(workspace)
+    client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    client.settimeout(2.0)
+    try:
+        client.connect(os.path.join(root, SOCKET_PATH))
+        data = b""
+        while not data.endswith(b"\n"):
+            chunk = client.recv(65536)
+            if not chunk:
+                break
+            data += chunk
+        return json.loads(data)
+    except (OSError, ValueError):
+        pass
+    finally:
+        client.close()
+
+    try:
+        with open(os.path.join(root, STATUS_JSON_PATH), "r", encoding="utf-8") as f:
+            status = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if not _pid_alive(status.get("watcher", {}).get("pid", 0) or 0):
+        return None
+    return status
+
+
+def start_watcher(
+    workspace: PathLike = ".", args: Sequence[str] = (), timeout: float = START_TIMEOUT
+) -> int:
+    """Start a detached watcher for ``workspace`` and return its pid.
+
+    An already running watcher is reused. ``args`` are passed on to ``run``.
+    """
+    root = os.path.abspath(workspace)
+    status = read_status(root)
+    if status is not None:
+        return status["watcher"]["pid"]
+
+    status_file = os.path.join(root, STATUS_PATH)
+    if os.path.exists(status_file):
+        os.unlink(status_file)
+    os.makedirs(os.path.dirname(status_file), exist_ok=True)
+    src_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [src_dir, env.get("PYTHONPATH")]))
+    with open(os.path.join(root, LOG_PATH), "ab") as log:
+        process = subprocess.Popen(
+            [sys.executable, "-m", "mcp_vscode_workflow.watch", "run", root, *args],
+            stdin=subprocess.DEVNULL,
+            stdout=log,
+            stderr=log,
+            env=env,
+            start_new_session=True,
+        )
+
+    deadline = time.monotonic() + timeout
+    while not os.path.exists(status_file):
+        if process.poll() is not None or time.monotonic() > deadline:
+            raise WatchError(
+                f"Watcher did not start; see {os.path.join(root, LOG_PATH)}"
+            )
+        time.sleep(0.05)
+    return process.pid
+
+
+def stop_watcher(workspace: PathLike = ".") -> Optional[int]:
+    """Stop the workspace's watcher; return its pid, or None if none ran."""
+    status = read_status(workspace)
+    if status is None:
+        return None
+    pid = status["watcher"]["pid"]
+    os.kill(pid, signal.SIGTERM)
+    return pid
+
+
+def _format_status(status: Dict[str, Any]) -> str:
+    """Return a short human-readable status."""
+    watcher = status["watcher"]
+    updated = time.strftime("%H:%M:%S", time.localtime(watcher["updated"]))
+    return (
+        f"Watcher {watcher['pid']} ({watcher['mode']}, "
+        f"{watcher['updates']} updates, last at {updated})\n"
+        f"Profiles: {' '.join(status['profiles']) or 'none'}\n"
+        f"Recommendation: {status['recommended']}\n"
+        f"Confidence: {status['confidence'] or 'none'}\n"
+    )
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    """Run, start, query or stop a detection watcher."""
+    parser = argparse.ArgumentParser(
+        prog="python -m mcp_vscode_workflow.watch",
+        description="Keep a workspace's profile detection current in the background.",
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    workspace = argparse.ArgumentParser(add_help=False)
+    workspace.add_argument(
+        "workspace", nargs="?", default=".", help="workspace root (default: .)"
+    )
+    watching = argparse.ArgumentParser(add_help=False)
+    watching.add_argument(
+        "--roles",
+        default=DEFAULT_ROLES_FILE,
+        help="roles file with the detection configuration (default: .mcp/roles.json)",
+    )
+    watching.add_argument(
+        "--debounce",
+        type=float,
+        default=DEFAULT_DEBOUNCE,
+        help=f"seconds to collect events before re-detecting "
+        f"(default: {DEFAULT_DEBOUNCE})",
+    )
+    watching.add_argument(
+        "--poll-interval",
+        type=float,
+        default=DEFAULT_POLL_INTERVAL,
+        help=f"seconds between scans without inotify "
+        f"(default: {DEFAULT_POLL_INTERVAL})",
+    )
+    watching.add_argument(
+        "--poll", action="store_true", help="poll even when inotify is available"
+    )
+
+    subparsers.add_parser(
+        "run", parents=[workspace, watching], help="watch in the foreground"
+    )
+    subparsers.add_parser(
+        "start", parents=[workspace, watching], help="start a background watcher"
+    )
+    status_parser = subparsers.add_parser(
+        "status", parents=[workspace], help="print the watcher's current detection"
+    )
+    status_parser.add_argument(
+        "--format",
+        choices=["text", "json"],
+        default="text",
+        help="output format (default: text)",
+    )
+    subparsers.add_parser("stop", parents=[workspace], help="stop the watcher")
+    args = parser.parse_args(argv)
+
+    if not os.path.isdir(args.workspace):
+        print(f"Error: {args.workspace} is not a directory", file=sys.stderr)
+        return 1
+
+    try:
+        if args.command == "run":
+            Watcher(
+                args.workspace,
+                args.roles,
+                debounce=args.debounce,
+                poll_interval=args.poll_interval,
+                use_inotify=not args.poll,
+            ).run()
+            return 0
+        if args.command == "start":
+            forwarded = [
+                "--roles",
+                os.path.abspath(args.roles),
+                "--debounce",
+                str(args.debounce),
+                "--poll-interval",
+                str(args.poll_interval),
+            ] + (["--poll"] if args.poll else [])
+            print(f"Watcher running (pid {start_watcher(args.workspace, forwarded)})")
+            return 0
+    except (DetectionError, WatchError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+
+    if args.command == "stop":
+        pid = stop_watcher(args.workspace)
+        if pid is None:
+            print("No watcher is running", file=sys.stderr)
+            return 1
+        print(f"Stopped watcher (pid {pid})")
+        return 0
+
+    status = read_status(args.workspace)
+    if status is None:
+        print("No watcher is running", file=sys.stderr)
+        return 1
+    if args.format == "json":
+        print(json.dumps(status, indent=2))
+    else:
+        sys.stdout.write(_format_status(status))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
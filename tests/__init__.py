@@ -5,12 +5,14 @@ This module provides test utilities and fixtures for testing
 Python components if they are added to the project.
 """
 
+import shutil
 import sys
 from pathlib import Path
 
-# Add the project root to the Python path
+# Add the project root and the package sources to the Python path
 project_root = Path(__file__).parent.parent
 sys.path.insert(0, str(project_root))
+sys.path.insert(0, str(project_root / "src"))
 
 # Test configuration
 TEST_DATA_DIR = project_root / "tests" / "data"
@@ -42,3 +44,28 @@ def get_mcp_config_path(config_name):
 def get_vscode_profile_path(profile_name):
     """Get the path to a VS Code profile file."""
     return VSCODE_PROFILES_DIR / profile_name
+
+
+def create_stub_command(bin_dir, name, body):
+    """Create an executable shell stub named ``name`` running ``body``."""
+    stub_path = Path(bin_dir) / name
+    stub_path.write_text(f"#!/bin/sh\n{body}\n")
+    stub_path.chmod(0o755)
+    return stub_path
+
+
+def create_isolated_path(base_dir, utilities):
+    """Create a stub bin directory plus a PATH exposing only ``utilities``.
+
+    Returns ``(bin_dir, search_path)``; stubs written to ``bin_dir`` take
+    precedence over the linked system utilities.
+    """
+    bin_dir = Path(base_dir) / "bin"
+    utils_dir = Path(base_dir) / "utils"
+    bin_dir.mkdir()
+    utils_dir.mkdir()
+    for utility in utilities:
+        utility_path = shutil.which(utility)
+        if utility_path:
+            (utils_dir / utility).symlink_to(utility_path)
+    return bin_dir, f"{bin_dir}:{utils_dir}"
@@ -0,0 +1,181 @@
+"""
+Shared fixtures for the bootstrap.sh tests.
+
+Bootstrap runs reach out to VS Code, npm and npx and validate the profile
+tools. The fixtures here put stub executables for those commands first on
+PATH so every run completes in well under a second, and build the synthetic
+workspaces once per session. Everything lives under pytest's temporary
+directories, which are separate per pytest-xdist worker, so the tests can be
+spread across cores with ``pytest -n auto``.
+"""
+
+import json
+import os
+import subprocess
+import time
+from typing import NamedTuple
+
+import pytest
+
+from tests import create_stub_command, get_script_path
+
+# Commands bootstrap.sh validates, launches or installs packages with
+STUB_VERSIONS = {
+    "code": "1.90.0",
+    "uv": "uv 0.4.0",
+    "shellcheck": "version: 0.10.0",
+    "terraform": "Terraform v1.9.0",
+    "terragrunt": "terragrunt version v0.67.0",
+    "ansible": "ansible [core 2.17.0]",
+    "docker": "Docker version 27.0.0",
+    "jq": "jq-1.7",
+    "npx": "10.0.0",
+}
+
+# npm answers package lookups so install-mcp-npx.sh never hits the network
+NPM_VIEW_OUTPUT = json.dumps(
+    {
+        "version": "1.2.3",
+        "dist.integrity": "sha512-stub",
+        "dist.tarball": "https://registry.example/stub-1.2.3.tgz",
+    }
+)
+
+# Environment variables that would change what a bootstrap run does
+BOOTSTRAP_ENV_OVERRIDES = (
+    "MCP_DETECT_ENGINE",
+    "MCP_NPM_REGISTRY",
+    "MCP_OFFLINE",
+    "MCP_TRACE_FILE",
+)
+
+# Synthetic workspaces, as relative path -> file content (None for a directory)
+WORKSPACES = {
+    "python": {
+        "requirements.txt": "requests\n",
+        "main.py": "import requests\n",
+    },
+    "infra": {
+        "main.tf": 'terraform {\n  required_version = ">= 1.0"\n}\n',
+        "variables.tf": 'variable "environment" {\n  type = string\n}\n',
+        "terraform": None,
+    },
+    "docs": {
+        "README.md": "# Documentation Project\n",
+        "mkdocs.yml": "site_name: My Docs\n",
+        "docs/index.md": "# Home\n",
+    },
+    "mixed": {
+        "requirements.txt": "flask\n",
+        "app.py": "from flask import Flask\n",
+        "README.md": "# Mixed Project\n",
+        "Dockerfile": "FROM python:3.9\n",
+        "docs": None,
+    },
+    "reasoning": {
+        "pyproject.toml": "[build-system]\n",
+        "requirements.txt": "requests\n",
+        "app.py": "print('hello')\n",
+        "README.md": "# Project\n",
+        "docs": None,
+        ".github/workflows/test.yml": "name: test\n",
+    },
+    "empty": {},
+}
+
+
+class QuickRun(NamedTuple):
+    """A ``--quick`` bootstrap run and how long it took."""
+
+    result: subprocess.CompletedProcess
+    seconds: float
+
+
+def write_workspace(root, files):
+    """Create ``files`` (see WORKSPACES) below ``root`` and return it."""
+    root.mkdir(parents=True, exist_ok=True)
+    for relative, content in files.items():
+        path = root / relative
+        if content is None:
+            path.mkdir(parents=True, exist_ok=True)
+        else:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_text(content)
+    return root
+
+
+@pytest.fixture(scope="session")
+def stub_bin(tmp_path_factory):
+    """Return a directory of stub executables for the bootstrap commands."""
+    bin_dir = tmp_path_factory.mktemp("stub-bin")
+    for name, version in STUB_VERSIONS.items():
+        create_stub_command(
+            bin_dir, name, f'[ "$1" = "--version" ] && echo "{version}"\nexit 0'
+        )
+    create_stub_command(
+        bin_dir,
+        "npm",
+        '[ "$1" = "--version" ] && echo 10.0.0 && exit 0\n'
+        f'[ "$1" = "view" ] && echo \'{NPM_VIEW_OUTPUT}\'\nexit 0',
+    )
+    return bin_dir
+
+
+@pytest.fixture(scope="session")
+def bootstrap_env(stub_bin, tmp_path_factory):
+    """Return the environment for bootstrap runs, with the stubs on PATH."""
+    env = dict(os.environ)
+    for name in BOOTSTRAP_ENV_OVERRIDES:
+        env.pop(name, None)
+    env["PATH"] = f"{stub_bin}{os.pathsep}{env.get('PATH', '')}"
+    env["XDG_CACHE_HOME"] = str(tmp_path_factory.mktemp("cache"))
+    return env
+
+
+@pytest.fixture(scope="session")
+def run_bootstrap(bootstrap_env, tmp_path_factory):
+    """Return a function running bootstrap.sh with the stubbed environment.
+
+    Runs without a ``cwd`` use a scratch directory, never the repository.
+    """
+    script_path = get_script_path("bootstrap.sh")
+    scratch = tmp_path_factory.mktemp("scratch")
+
+    def run(*args, input=None, cwd=None, timeout=30):
+        return subprocess.run(
+            ["bash", str(script_path), *args],
+            input=input,
+            cwd=str(cwd or scratch),
+            env=bootstrap_env,
+            capture_output=True,
+            text=True,
+            timeout=timeout,
+        )
+
+    return run
+
+
+@pytest.fixture(scope="session")
+def quick_run(run_bootstrap, tmp_path_factory):
+    """Return one ``--quick`` run shared by the tests that only read its output."""
+    start = time.monotonic()
+    result = run_bootstrap("--quick", cwd=tmp_path_factory.mktemp("quick"))
+    return QuickRun(result, time.monotonic() - start)
+
+
+@pytest.fixture(scope="session")
+def workspaces(tmp_path_factory):
+    """Return a function giving the named synthetic workspace.
+
+    Each workspace is built once per session; tests that change files
+    should build their own under ``tmp_path`` instead.
+    """
+    root = tmp_path_factory.mktemp("workspaces")
+    built = {}
+
+    def workspace(name):
+        if name not in built:
+            built[name] = write_workspace(root / name, WORKSPACES[name])
+        return built[name]
+
+    return workspace
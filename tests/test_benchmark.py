@@ -0,0 +1,166 @@
+"""
+Test the synthetic workspace benchmark suite.
+"""
+
+import json
+
+import pytest
+
+from mcp_vscode_workflow.benchmark import (
+    RESULTS_VERSION,
+    WORKSPACE_KINDS,
+    WORKSPACE_MARKER,
+    BenchmarkError,
+    Regression,
+    compare_results,
+    generate_workspace,
+    main,
+    run_benchmarks,
+    workspace_files,
+)
+from tests import SCRIPTS_DIR
+
+
+def results_with(metrics):
+    """Build a results document with one python-10 case."""
+    return {
+        "version": RESULTS_VERSION,
+        "cases": {"python-10": {"kind": "python", "metrics": metrics}},
+    }
+
+
+class TestWorkspaceGeneration:
+    """Test the synthetic workspace layouts."""
+
+    @pytest.mark.parametrize("kind", sorted(WORKSPACE_KINDS))
+    @pytest.mark.parametrize("files", [1, 10, 5000])
+    def test_layout_has_requested_file_count(self, kind, files):
+        """Test that every kind produces exactly the requested number of files."""
+        assert len(workspace_files(kind, files)) == files
+
+    def test_dependency_trees_are_deep(self):
+        """Test that dependency trees nest like real node_modules and venvs."""
+        layout = workspace_files("mixed", 20000)
+
+        node_modules = [path for path in layout if path.startswith("node_modules/")]
+        venv = [path for path in layout if path.startswith("venv/")]
+        assert len(node_modules) == 6000
+        assert len(venv) == 4000
+        assert max(path.count("/node_modules/") for path in node_modules) >= 2
+        assert all("/site-packages/" in path for path in venv)
+        assert "requirements.txt" in layout
+        assert ".github/workflows/ci.yml" in layout
+
+    def test_unknown_kind_is_rejected(self):
+        """Test that an unknown workspace kind raises BenchmarkError."""
+        with pytest.raises(BenchmarkError):
+            workspace_files("cobol", 10)
+
+    def test_generated_workspace_is_reused(self, tmp_path):
+        """Test that a workspace is only regenerated when its spec changes."""
+        root = generate_workspace(tmp_path / "ws", "python", 100)
+        extra = root / "extra.py"
+        extra.write_text("")
+
+        generate_workspace(root, "python", 100)
+        assert extra.exists()
+
+        generate_workspace(root, "python", 200)
+        assert not extra.exists()
+        assert json.loads((root / WORKSPACE_MARKER).read_text())["files"] == 200
+
+
+class TestComparison:
+    """Test regression detection against a baseline."""
+
+    def test_slowdown_beyond_threshold_is_flagged(self):
+        """Test that only metrics beyond the threshold and noise floor regress."""
+        baseline = results_with(
+            {"autodetect_cold_ms": 100.0, "reasoning_ms": 2.0, "scan_warm_ms": 50.0}
+        )
+        current = results_with(
+            {"autodetect_cold_ms": 130.0, "reasoning_ms": 4.0, "scan_warm_ms": 55.0}
+        )
+
+        regressions = compare_results(baseline, current, threshold=0.2)
+
+        # reasoning_ms doubled, but by less than the 5 ms noise floor
+        assert regressions == [
+            Regression("python-10", "autodetect_cold_ms", 100.0, 130.0)
+        ]
+        assert regressions[0].change == pytest.approx(0.3)
+
+    def test_missing_cases_are_not_compared(self):
+        """Test that cases and metrics absent from the baseline are skipped."""
+        baseline = {"version": RESULTS_VERSION, "cases": {}}
+        current = results_with({"autodetect_cold_ms": 1000.0})
+
+        assert compare_results(baseline, current) == []
+
+    def test_compare_command_exit_status(self, tmp_path, capsys):
+        """Test that the compare command exits non-zero on regressions."""
+        baseline = tmp_path / "baseline.json"
+        current = tmp_path / "current.json"
+        baseline.write_text(json.dumps(results_with({"bootstrap_ms": 1000.0})))
+        current.write_text(json.dumps(results_with({"bootstrap_ms": 1500.0})))
+
+        assert main(["compare", str(baseline), str(current)]) == 1
+        assert "REGRESSION python-10 bootstrap_ms" in capsys.readouterr().out
+        assert main(["compare", str(baseline), str(current), "--threshold", "1"]) == 0
+
+    def test_compare_rejects_unversioned_results(self, tmp_path):
+        """Test that files that are not benchmark results are refused."""
+        baseline = tmp_path / "baseline.json"
+        baseline.write_text("{}")
+
+        assert main(["compare", str(baseline), str(baseline)]) == 1
+
+
+class TestBenchmarkRun:
+    """Test benchmark runs against the real scripts."""
+
+    def test_detect_scenario_records_metrics(self, tmp_path):
+        """Test that a detect run times detection and reads the recommendation."""
+        results = run_benchmarks(
+            ["terraform"],
+            [50],
+            scenarios=["detect"],
+            repeat=1,
+            work_dir=tmp_path,
+            scripts_dir=SCRIPTS_DIR,
+        )
+
+        case = results["cases"]["terraform-50"]
+        assert case["files"] == 50
+        assert case["recommended"] == "infra"
+        for metric in ("autodetect_cold_ms", "autodetect_warm_ms", "reasoning_ms"):
+            assert case["metrics"][metric] > 0
+            assert len(case["runs"][metric]) == 1
+        # Detection left its index in the generated workspace
+        assert (tmp_path / "terraform-50" / ".mcp" / "cache").is_dir()
+
+    def test_run_command_writes_baseline(self, tmp_path, capsys):
+        """Test that run --output writes a results file compare can read."""
+        output = tmp_path / "baseline.json"
+
+        status = main(
+            [
+                "run",
+                "--kinds",
+                "docs",
+                "--sizes",
+                "10",
+                "--scenarios",
+                "detect",
+                "--repeat",
+                "1",
+                "--work-dir",
+                str(tmp_path / "work"),
+                "--output",
+                str(output),
+            ]
+        )
+
+        assert status == 0
+        assert "docs-10" in capsys.readouterr().out
+        assert main(["compare", str(output), str(output)]) == 0
@@ -0,0 +1,131 @@
+"""
+Test the non-interactive, machine-readable mode of bootstrap.sh.
+"""
+
+import json
+
+from tests.conftest import write_workspace
+
+
+def load_report(result):
+    """Parse the JSON report a non-interactive run printed on stdout."""
+    return json.loads(result.stdout)
+
+
+class TestBootstrapNonInteractive:
+    """Test the --non-interactive and --answers options of bootstrap.sh."""
+
+    def test_detected_profile_is_used_without_prompting(
+        self, run_bootstrap, workspaces
+    ):
+        """Test that the recommendation is applied and reported as JSON."""
+        result = run_bootstrap("--non-interactive", cwd=workspaces("python"))
+
+        assert result.returncode == 0
+        assert "Your choice" not in result.stderr
+        report = load_report(result)
+        assert report["status"] == "success"
+        assert report["profile"] == "python"
+        assert report["profile_source"] == "detected"
+        detection = report["detection"]
+        assert detection["confidence"] == "high"
+        assert detection["profiles"][0]["name"] == "python"
+        assert "Found requirements.txt" in detection["profiles"][0]["reasons"]
+
+    def test_report_lists_tools_packages_and_phases(self, run_bootstrap, workspaces):
+        """Test the tool inventory, package status and phase durations."""
+        report = load_report(
+            run_bootstrap("--non-interactive", cwd=workspaces("python"))
+        )
+
+        tools = {tool["name"]: tool for tool in report["tools"]}
+        assert set(tools) == {"python", "uv"}
+        assert tools["uv"]["status"] == "installed"
+        assert tools["uv"]["required"] is True
+        assert tools["uv"]["version"] == "0.4.0"
+        assert len(report["packages"]) == 3
+        assert all(package["version"] == "1.2.3" for package in report["packages"])
+        phases = [phase["name"] for phase in report["phases"]]
+        assert phases[0] == "detection"
+        assert "tool validation" in phases and "install mcp packages" in phases
+        assert "open vscode" not in phases
+        assert report["vscode"] == {"cli": True, "opened": False}
+        assert report["duration_ms"] >= sum(
+            phase["duration_ms"] for phase in report["phases"]
+        )
+
+    def test_answers_file_and_flag_precedence(
+        self, run_bootstrap, workspaces, tmp_path
+    ):
+        """Test that answers come from the file unless given as flags."""
+        answers = tmp_path / "answers"
+        answers.write_text("# provisioning answers\nprofile = docs\ntools=bash\n")
+
+        report = load_report(
+            run_bootstrap("--answers", str(answers), cwd=workspaces("python"))
+        )
+        assert (report["profile"], report["profile_source"]) == ("docs", "answers")
+        assert report["detection"]["recommended"] == "python"
+
+        report = load_report(
+            run_bootstrap(
+                "--answers",
+                str(answers),
+                "--profile",
+                "infra",
+                cwd=workspaces("python"),
+            )
+        )
+        assert (report["profile"], report["profile_source"]) == ("infra", "flag")
+
+    def test_activity_answer_without_detection(self, run_bootstrap, workspaces):
+        """Test that an empty workspace is settled by the activity answer."""
+        report = load_report(
+            run_bootstrap(
+                "--non-interactive", "--activity", "docs", cwd=workspaces("empty")
+            )
+        )
+
+        assert report["status"] == "success"
+        assert (report["profile"], report["profile_source"]) == ("docs", "recommended")
+        assert report["detection"]["confidence"] == "none"
+
+    def test_failures_are_reported(self, run_bootstrap, workspaces, tmp_path):
+        """Test that failed runs still print a report with the first error."""
+        result = run_bootstrap("--non-interactive", cwd=workspaces("empty"))
+        assert result.returncode == 1
+        report = load_report(result)
+        assert report["status"] == "failed"
+        assert report["exit_code"] == 1
+        assert report["profile"] is None
+        assert "No project type detected" in report["error"]
+
+        answers = write_workspace(tmp_path, {"answers": "colour=blue\n"}) / "answers"
+        report = load_report(run_bootstrap("--answers", str(answers)))
+        assert "Unknown answer 'colour'" in report["error"]
+
+    def test_trace_is_kept_alongside_the_report(
+        self, run_bootstrap, workspaces, tmp_path
+    ):
+        """Test that --trace still writes the full trace of the run."""
+        trace_file = tmp_path / "trace.jsonl"
+
+        result = run_bootstrap(
+            "--non-interactive",
+            "--trace",
+            str(trace_file),
+            cwd=workspaces("python"),
+        )
+
+        assert load_report(result)["status"] == "success"
+        names = [
+            json.loads(line)["name"] for line in trace_file.read_text().splitlines()
+        ]
+        assert "detection" in names and "bootstrap" in names
+
+    def test_conflicting_modes_fail(self, run_bootstrap):
+        """Test that --non-interactive cannot be combined with prompting modes."""
+        result = run_bootstrap("--non-interactive", "--interactive")
+
+        assert result.returncode == 1
+        assert "Cannot use --non-interactive" in result.stdout
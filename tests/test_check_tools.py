@@ -0,0 +1,131 @@
+"""
+Test the tool validation and inventory cache in check-tools.sh.
+"""
+
+import json
+import os
+import shutil
+import subprocess
+import tempfile
+from pathlib import Path
+
+from tests import create_isolated_path, create_stub_command, get_script_path
+
+# Utilities check-tools.sh itself relies on, exposed on an isolated PATH
+SCRIPT_UTILITIES = [
+    "awk",
+    "cat",
+    "date",
+    "mkdir",
+    "mktemp",
+    "mv",
+    "rm",
+    "timeout",
+    "uname",
+]
+
+
+def make_stub_tool(bin_dir, name, version_output):
+    """Create an executable stub that prints the given --version output."""
+    return create_stub_command(bin_dir, name, f"echo '{version_output}'")
+
+
+class TestCheckToolsInventory:
+    """Test concurrent probing and the per-host tool inventory cache."""
+
+    def run_check_tools(self, tmpdir, search_path, *args, trace_file=None):
+        """Run check-tools.sh with an isolated cache and PATH."""
+        env = dict(os.environ)
+        if trace_file is not None:
+            env["MCP_TRACE_FILE"] = str(trace_file)
+        env["XDG_CACHE_HOME"] = str(Path(tmpdir) / "cache")
+        env["PATH"] = search_path
+        return subprocess.run(
+            [shutil.which("bash"), str(get_script_path("check-tools.sh")), *args],
+            capture_output=True,
+            text=True,
+            timeout=30,
+            env=env,
+        )
+
+    def inventory_files(self, tmpdir):
+        """Return the inventory cache files written under the isolated cache."""
+        return list((Path(tmpdir) / "cache" / "mcp-vscode-workflow").glob("*.tsv"))
+
+    def test_inventory_records_version_and_path(self):
+        """Test that probed tools are cached with their version and path."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            bin_dir, search_path = create_isolated_path(tmpdir, SCRIPT_UTILITIES)
+            jq_path = make_stub_tool(bin_dir, "jq", "jq-1.7.1")
+            make_stub_tool(bin_dir, "shellcheck", "version: 0.10.0")
+
+            result = self.run_check_tools(tmpdir, search_path, "--profile", "bash")
+
+            assert result.returncode == 0
+            assert f"✓ jq is installed (1.7.1, {jq_path})" in result.stdout
+            assert "✓ shellcheck is installed (0.10.0" in result.stdout
+
+            inventory = self.inventory_files(tmpdir)
+            assert len(inventory) == 1
+            lines = inventory[0].read_text().splitlines()
+            assert lines[0] == f"# path {search_path}"
+            assert any(
+                line.startswith(f"jq\tinstalled\t1.7.1\t{jq_path}\t") for line in lines
+            )
+
+    def test_repeat_validation_uses_cache(self):
+        """Test that a repeat validation reuses cached entries without probing."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            bin_dir, search_path = create_isolated_path(tmpdir, SCRIPT_UTILITIES)
+            make_stub_tool(bin_dir, "jq", "jq-1.7.1")
+            make_stub_tool(bin_dir, "shellcheck", "version: 0.10.0")
+            self.run_check_tools(tmpdir, search_path, "bash")
+
+            # A new version is only seen once the tool is probed again
+            make_stub_tool(bin_dir, "jq", "jq-1.8.0")
+            result = self.run_check_tools(tmpdir, search_path, "bash")
+            assert "✓ jq is installed (1.7.1" in result.stdout
+
+            result = self.run_check_tools(tmpdir, search_path, "--refresh", "bash")
+            assert "✓ jq is installed (1.8.0" in result.stdout
+
+    def test_refresh_probes_each_tool_once(self):
+        """Test that --refresh over all profiles probes every tool exactly once."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            bin_dir, search_path = create_isolated_path(tmpdir, SCRIPT_UTILITIES)
+            make_stub_tool(bin_dir, "jq", "jq-1.7.1")
+            trace_file = Path(tmpdir) / "trace.json"
+
+            self.run_check_tools(
+                tmpdir, search_path, "--refresh", trace_file=trace_file
+            )
+
+            spans = [json.loads(line) for line in trace_file.read_text().splitlines()]
+            probes = sorted(s["name"] for s in spans if s.get("cat") == "probe")
+            assert len(probes) == 10
+            assert len(set(probes)) == 10
+
+    def test_removed_tool_invalidates_cache_entry(self):
+        """Test that a cached tool whose binary disappeared is reported missing."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            bin_dir, search_path = create_isolated_path(tmpdir, SCRIPT_UTILITIES)
+            jq_path = make_stub_tool(bin_dir, "jq", "jq-1.7.1")
+            make_stub_tool(bin_dir, "shellcheck", "version: 0.10.0")
+            self.run_check_tools(tmpdir, search_path, "bash")
+
+            jq_path.unlink()
+            result = self.run_check_tools(tmpdir, search_path, "bash")
+
+            assert result.returncode == 1
+            assert "✗ jq is missing (required)" in result.stdout
+
+    def test_all_missing_required_tools_are_reported(self):
+        """Test that every missing required tool is reported, not just the first."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            bin_dir, search_path = create_isolated_path(tmpdir, SCRIPT_UTILITIES)
+            result = self.run_check_tools(tmpdir, search_path, "node")
+
+            assert result.returncode == 1
+            assert "✗ node is missing (required)" in result.stdout
+            assert "✗ npx is missing (required)" in result.stdout
+            assert "2 required tool(s) missing for node profile" in result.stdout
@@ -0,0 +1,212 @@
+"""
+Test budgeted chunking and map/reduce rendering of large prompt arguments.
+"""
+
+import json
+
+import pytest
+
+from mcp_vscode_workflow.chunking import (
+    ChunkedPrompt,
+    batched,
+    chunk_lines,
+    main,
+)
+from mcp_vscode_workflow.prompts import PromptError, PromptLibrary, estimate_tokens
+
+
+def python_module(functions, body_lines=8):
+    """Return the lines of a module with ``functions`` top-level functions."""
+    lines = ["import os\n", "\n"]
+    for i in range(functions):
+        lines += ["\n", "@cached\n", f"def function_{i}(value):\n"]
+        lines += [f"    value = value + {n}  # step {n}\n" for n in range(body_lines)]
+        lines.append("    return value\n")
+    return lines
+
+
+@pytest.fixture
+def library(tmp_path):
+    """Return a prompt library with role budgets and a profile prompt."""
+    mcp_dir = tmp_path / ".mcp"
+    prompts_dir = mcp_dir / "prompts"
+    prompts_dir.mkdir(parents=True)
+    (prompts_dir / "code-review.md").write_text(
+        "Review this {{LANGUAGE}} code:\n{{CODE_BLOCK}}\nContext: {{CONTEXT}}\n"
+    )
+    (prompts_dir / "python-specialist.md").write_text("# Python Specialist\n")
+    (mcp_dir / "roles.json").write_text(
+        json.dumps(
+            {
+                "defaultTokenBudget": 1000,
+                "roles": {
+                    "python": {
+                        "promptFile": "prompts/python-specialist.md",
+                        "tokenBudget": 2000,
+                    }
+                },
+            }
+        )
+    )
+    (mcp_dir / "config-python.json").write_text(
+        json.dumps({"prompts": [{"name": "python-testing"}]})
+    )
+    with PromptLibrary(prompts_dir) as library:
+        yield library
+
+
+class TestChunkLines:
+    """Test streaming and syntax-aware chunk boundaries."""
+
+    def test_chunks_fit_and_split_between_definitions(self):
+        """Test that chunks stay in budget and start at a decorated function."""
+        chunks = list(chunk_lines(python_module(40), 300, "python"))
+
+        assert len(chunks) > 1
+        assert all(chunk.tokens <= 300 for chunk in chunks)
+        assert "".join(chunk.text for chunk in chunks) == "".join(python_module(40))
+        for chunk in chunks[1:]:
+            assert chunk.text.lstrip("\n").startswith("@cached\ndef function_")
+        assert [c.first_line for c in chunks[1:]] == [
+            c.last_line + 1 for c in chunks[:-1]
+        ]
+
+    def test_diffs_split_at_file_headers(self):
+        """Test that a diff is cut between files before hunks."""
+        diff = []
+        for name in ("a.py", "b.py", "c.py"):
+            diff += [f"diff --git a/{name} b/{name}\n", "@@ -1,40 +1,40 @@\n"]
+            diff += [f"+line {n} of {name}\n" for n in range(40)]
+
+        chunks = list(chunk_lines(diff, 250))
+
+        assert all(chunk.text.startswith("diff --git") for chunk in chunks)
+
+    def test_long_lines_are_cut(self):
+        """Test that a line longer than the budget is split across chunks."""
+        chunks = list(chunk_lines(["x" * 1000 + "\n", "y\n"], 100))
+
+        assert all(len(chunk.text) <= 400 for chunk in chunks)
+        assert chunks[0].first_line == chunks[1].last_line == 1
+
+    def test_input_is_consumed_lazily(self):
+        """Test that memory is bounded: lines are read as chunks are needed."""
+        read = []
+
+        def lines():
+            for n in range(100000):
+                read.append(n)
+                yield f"line {n}\n"
+
+        first = next(chunk_lines(lines(), 100))
+
+        assert first.first_line == 1
+        assert len(read) < 100
+
+    def test_batched(self):
+        """Test fixed-size batches with a shorter last one."""
+        assert list(batched(range(5), 2)) == [[0, 1], [2, 3], [4]]
+
+
+class TestChunkedPrompt:
+    """Test budgets, map requests and the merge step."""
+
+    def test_budget_comes_from_the_role(self, library):
+        """Test role budgets, the default budget and profile-declared prompts."""
+        assert ChunkedPrompt(library, "code-review").budget == 1000
+        assert ChunkedPrompt(library, "code-review", role="python").budget == 2000
+        testing = ChunkedPrompt(library, "python-testing")
+        assert (testing.role, testing.budget) == ("python", 2000)
+        assert testing.template == "# Python Specialist\n"
+        with pytest.raises(PromptError):
+            ChunkedPrompt(library, "no-such-prompt")
+        with pytest.raises(PromptError):
+            ChunkedPrompt(library, "code-review", budget=100)
+
+    def test_small_argument_renders_like_the_prompt(self, library):
+        """Test that an argument within budget gives one plain request."""
+        prompt = ChunkedPrompt(library, "code-review", {"language": "python"})
+
+        requests = list(prompt.requests(["x = 1\n"]))
+
+        assert len(requests) == 1 and requests[0].last
+        assert requests[0].text == library.render(
+            "code-review", {"language": "python", "code": "x = 1\n"}
+        )
+
+    def test_map_requests_fit_the_budget(self, library):
+        """Test that every map request names its part and fits the budget."""
+        prompt = ChunkedPrompt(library, "python-testing", budget=600)
+
+        requests = list(prompt.requests(python_module(40), batch_size=2))
+
+        assert len(requests) > 2
+        assert all(r.tokens <= 600 for r in requests)
+        assert all(estimate_tokens(r.text) == r.tokens for r in requests)
+        assert requests[0].text.startswith("Part 1 (lines 1-")
+        assert [r.batch for r in requests[:4]] == [0, 0, 1, 1]
+        assert [r.last for r in requests].count(True) == 1
+
+    def test_run_maps_and_merges_to_one_result(self, library):
+        """Test that results are merged in rounds until one is left."""
+        prompt = ChunkedPrompt(library, "code-review", budget=400)
+        sent = []
+
+        def complete(text):
+            sent.append(text)
+            return f"finding {len(sent)} " + "detail " * 60
+
+        result = prompt.run(python_module(40), complete, batch_size=3)
+
+        merges = [text for text in sent if "Merge the results" in text]
+        assert result.startswith(f"finding {len(sent)}")
+        assert len(merges) >= 2
+        assert all(estimate_tokens(text) <= 400 for text in merges)
+
+
+class TestCommandLine:
+    """Test the map and reduce commands."""
+
+    def test_map_then_reduce(self, library, tmp_path, capsys):
+        """Test that map prints JSON requests and reduce merges JSON results."""
+        source = tmp_path / "module.py"
+        source.write_text("".join(python_module(40)))
+        prompts_dir = str(library.prompts_dir)
+
+        assert (
+            main(
+                ["--prompts-dir", prompts_dir, "map", "code-review"]
+                + ["language=python", "--input", str(source), "--budget", "500"]
+            )
+            == 0
+        )
+        requests = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+        assert {r["stage"] for r in requests} == {"map"}
+        assert all(r["tokens"] <= 500 for r in requests)
+
+        results = tmp_path / "results.jsonl"
+        results.write_text(
+            "".join(json.dumps({"text": f"ok {r['index']}"}) + "\n" for r in requests)
+        )
+        assert (
+            main(
+                ["--prompts-dir", prompts_dir, "reduce", "code-review"]
+                + ["--input", str(results), "--budget", "500"]
+            )
+            == 0
+        )
+        merges = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+        assert len(merges) == 1
+        assert merges[0]["last_part"] == len(requests)
+        assert f"## Part {len(requests)}\n\nok {len(requests)}" in merges[0]["text"]
+
+    def test_reduce_rejects_results_without_text(self, library, tmp_path, capsys):
+        """Test that a result object without a text string is a clean error."""
+        results = tmp_path / "results.jsonl"
+        prompts_dir = str(library.prompts_dir)
+        args = ["--prompts-dir", prompts_dir, "reduce", "code-review"]
+
+        for line in ('{"x": 1}', '{"text": 3}'):
+            results.write_text(line + "\n")
+            assert main(args + ["--input", str(results)]) == 1
+            assert '"text"' in capsys.readouterr().err
@@ -0,0 +1,271 @@
+"""
+Test the workspace code index and its MCP server.
+"""
+
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+from mcp_vscode_workflow.codeindex import CodeIndex, CodeIndexError, main
+
+SRC_DIR = Path(__file__).parent.parent / "src"
+
+requires_inotify = pytest.mark.skipif(
+    not sys.platform.startswith("linux"), reason="inotify is Linux-only"
+)
+
+SOURCES = {
+    "app/models.py": (
+        "class Order:\n"
+        "    def save(self):\n"
+        "        raise ValueError('Order total is negative')\n"
+    ),
+    "app/views.py": "from app.models import Order\n\n\nasync def checkout():\n",
+    "web/cart.js": (
+        "export function addItem(cart, item) {}\n"
+        "const removeItem = (cart, item) => cart;\n"
+        "export class Cart {}\n"
+    ),
+    "scripts/deploy.sh": (
+        "#!/bin/bash\nfunction deploy() {\n  echo\n}\ncleanup() {\n}\n"
+    ),
+    "infra/main.tf": 'resource "aws_instance" "web" {\n}\nmodule "vpc" {\n}\n',
+    "README.md": "# Shop\n\n## Checkout flow\n",
+}
+
+
+def write(root, files):
+    """Write ``files`` (relative path -> content) below ``root``."""
+    for relative, content in files.items():
+        path = root / relative
+        path.parent.mkdir(parents=True, exist_ok=True)
+        if isinstance(content, bytes):
+            path.write_bytes(content)
+        else:
+            path.write_text(content)
+
+
+def touch_later(path, content):
+    """Rewrite a file with a modification time the index cannot miss."""
+    path.write_text(content)
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+
+
+@pytest.fixture
+def workspace(tmp_path):
+    """Return a workspace with a few small projects."""
+    write(tmp_path, SOURCES)
+    return tmp_path
+
+
+@pytest.fixture
+def index(workspace):
+    """Return a CodeIndex of the workspace, closed afterwards."""
+    index = CodeIndex(workspace)
+    yield index
+    index.close()
+
+
+class TestCodeIndex:
+    """Test indexing, incremental refreshes and queries."""
+
+    def test_search_reads_only_candidate_files(self, index):
+        """Test that a search confirms matches in the files the trigrams allow."""
+        result = index.search("total is negative")
+
+        assert result["matches"] == [
+            {
+                "path": "app/models.py",
+                "line": 3,
+                "text": "raise ValueError('Order total is negative')",
+            }
+        ]
+        assert result["files_read"] == 1
+        assert index.search("no such text anywhere")["files_read"] == 0
+
+    def test_case_short_queries_and_path_filter(self, index):
+        """Test case folding, queries under three characters and path limits."""
+        assert index.search("ORDER")["matches"] == []
+        paths = {m["path"] for m in index.search("ORDER", ignore_case=True)["matches"]}
+        assert paths == {"app/models.py", "app/views.py"}
+        assert index.search("vp")["matches"][0]["path"] == "infra/main.tf"
+        assert index.search("item", path="*.js")["matches"][0]["line"] == 1
+        with pytest.raises(CodeIndexError):
+            index.search("")
+
+    def test_symbols_by_language(self, index):
+        """Test definitions in Python, JavaScript, shell, Terraform and Markdown."""
+        found = {
+            name: [(s["path"], s["kind"], s["line"]) for s in index.symbols(name)]
+            for name in ("Order", "checkout", "removeItem", "cleanup", "web", "vpc")
+        }
+
+        assert found["Order"] == [("app/models.py", "class", 1)]
+        assert found["checkout"] == [("app/views.py", "function", 4)]
+        assert found["removeItem"] == [("web/cart.js", "function", 2)]
+        assert found["cleanup"] == [("scripts/deploy.sh", "function", 5)]
+        assert found["web"] == [("infra/main.tf", "resource", 1)]
+        assert found["vpc"] == [("infra/main.tf", "module", 3)]
+        assert index.symbols("Order.save")[0]["line"] == 2
+        assert index.symbols("checkout flow")[0]["kind"] == "heading"
+
+    def test_binary_hidden_and_pruned_files_are_skipped(self, workspace):
+        """Test that only text files outside pruned directories are searched."""
+        write(
+            workspace,
+            {
+                "node_modules/lib/index.js": "needle\n",
+                ".git/config": "needle\n",
+                "data.bin": b"needle\0",
+                "notes.txt": "needle\n",
+            },
+        )
+        index = CodeIndex(workspace)
+        try:
+            paths = [m["path"] for m in index.search("needle")["matches"]]
+            assert paths == ["notes.txt"]
+            assert index.stats()["skipped"] == 1
+        finally:
+            index.close()
+
+    def test_refresh_reindexes_only_changed_files(self, index, workspace):
+        """Test that a change gives the file a new id and merges its postings."""
+        assert not index.refresh()
+        generation = index.generation
+
+        touch_later(workspace / "app" / "views.py", "def pay():\n    pass\n")
+        (workspace / "README.md").unlink()
+        write(workspace, {"app/refunds.py": "def refund():\n"})
+
+        assert index.refresh()
+        assert index.generation == generation + 1
+        assert index.stats()["dropped"] == 2
+        assert index.search("checkout")["matches"] == []
+        assert index.symbols("pay")[0]["path"] == "app/views.py"
+        assert index.symbols("refund")[0]["path"] == "app/refunds.py"
+        assert "README.md" not in index.paths()
+
+    def test_rebuild_once_dropped_ids_outnumber_live_ones(self, index, workspace):
+        """Test that the index compacts itself after many changes."""
+        source = workspace / "app" / "models.py"
+        for i in range(len(SOURCES) + 1):
+            touch_later(source, f"def version_{i}():\n")
+            index.refresh()
+
+        assert index.stats()["dropped"] <= index.stats()["files"]
+        assert [s["line"] for s in index.symbols(f"version_{len(SOURCES)}")] == [1]
+
+    def test_saved_index_is_reused(self, index, workspace):
+        """Test that a new CodeIndex loads the files and trigrams from disk."""
+        generation = index.generation
+        index.close()
+
+        reopened = CodeIndex(workspace)
+        try:
+            assert reopened.generation == generation
+            assert reopened.search("addItem")["matches"][0]["path"] == "web/cart.js"
+            files = os.listdir(workspace / ".mcp" / "cache" / "codeindex")
+            assert sorted(files) == ["index.json", f"trigrams-{generation}.bin"]
+        finally:
+            reopened.close()
+
+    def test_trace_resolves_frames(self, index):
+        """Test Python and JavaScript frames from another machine's paths."""
+        trace = (
+            "Traceback (most recent call last):\n"
+            '  File "/srv/shop/app/models.py", line 3, in save\n'
+            "ValueError: Order total is negative\n"
+            "    at addItem (/build/web/cart.js:1:8)\n"
+            '  File "/usr/lib/python3/site.py", line 9, in checkout\n'
+        )
+
+        frames = index.trace(trace, context=1)
+
+        assert [f["resolved"] for f in frames] == [
+            "app/models.py",
+            "web/cart.js",
+            None,
+        ]
+        assert "    3> " in frames[0]["snippet"]
+        assert frames[1]["function"] == "addItem"
+        assert frames[2]["definitions"][0]["path"] == "app/views.py"
+
+    @requires_inotify
+    def test_inotify_refresh_lists_changed_directories(self, workspace):
+        """Test that new directories are found from events, without a full walk."""
+        index = CodeIndex(workspace, use_inotify=True)
+        try:
+            assert index.stats()["watching"]
+            write(workspace, {"app/payments/stripe.py": "class Gateway:\n"})
+
+            assert index.refresh()
+            assert index.symbols("Gateway")[0]["path"] == "app/payments/stripe.py"
+            write(workspace, {"app/payments/paypal.py": "class Paypal:\n"})
+            assert index.refresh()
+            assert index.symbols("Paypal")
+        finally:
+            index.close()
+
+
+class TestCommandLine:
+    """Test the command line and the MCP server mode."""
+
+    def test_search_command(self, workspace, capsys):
+        """Test that search prints path:line: text."""
+        assert main(["search", "removeItem", "--workspace", str(workspace)]) == 0
+        assert capsys.readouterr().out == (
+            "web/cart.js:2: const removeItem = (cart, item) => cart;\n"
+        )
+
+    def test_serve_answers_tools_and_resources(self, workspace):
+        """Test that the MCP server lists and answers tools and resources."""
+        messages = [
+            {"jsonrpc": "2.0", "id": 1, "method": "initialize", "params": {}},
+            {"jsonrpc": "2.0", "id": 2, "method": "tools/list"},
+            {
+                "jsonrpc": "2.0",
+                "id": 3,
+                "method": "tools/call",
+                "params": {"name": "code_symbols", "arguments": {"name": "Cart"}},
+            },
+            {"jsonrpc": "2.0", "id": 4, "method": "resources/templates/list"},
+            {
+                "jsonrpc": "2.0",
+                "id": 5,
+                "method": "resources/read",
+                "params": {"uri": "codeindex://search/total%20is"},
+            },
+            {
+                "jsonrpc": "2.0",
+                "id": 6,
+                "method": "resources/read",
+                "params": {"uri": "codeindex://file/..%2Fsecret"},
+            },
+        ]
+        result = subprocess.run(
+            [sys.executable, "-m", "mcp_vscode_workflow.codeindex", "serve"],
+            input="".join(json.dumps(m) + "\n" for m in messages),
+            cwd=str(workspace),
+            capture_output=True,
+            text=True,
+            timeout=30,
+            env=dict(os.environ, PYTHONPATH=str(SRC_DIR)),
+        )
+
+        responses = [json.loads(line) for line in result.stdout.splitlines()]
+        assert [r["id"] for r in responses] == [1, 2, 3, 4, 5, 6]
+        assert "resources" in responses[0]["result"]["capabilities"]
+        tools = {tool["name"] for tool in responses[1]["result"]["tools"]}
+        assert tools == {"code_search", "code_symbols", "code_files", "code_trace"}
+        symbols = json.loads(responses[2]["result"]["content"][0]["text"])
+        assert symbols[0]["path"] == "web/cart.js"
+        templates = responses[3]["result"]["resourceTemplates"]
+        assert "codeindex://file/{path}" in [t["uriTemplate"] for t in templates]
+        search = json.loads(responses[4]["result"]["contents"][0]["text"])
+        assert search["matches"][0]["line"] == 3
+        assert "Not an indexed file" in responses[5]["error"]["message"]
@@ -0,0 +1,271 @@
+"""
+Test profile configuration resolution and compiled bundles.
+"""
+
+import json
+import os
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+import pytest
+
+from mcp_vscode_workflow.config import (
+    ConfigError,
+    bundle_path_for,
+    compile_profile,
+    load_config,
+    load_profile,
+    merge_configs,
+    resolve_pointer,
+)
+from tests import MCP_CONFIG_DIR, get_project_root
+
+PROFILES = ["python", "infra", "docs", "bash", "cicd"]
+
+
+def write_json(path, document):
+    """Write a JSON document, creating parent directories."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(document))
+    return path
+
+
+def create_mcp_dir(base_dir):
+    """Create a minimal .mcp directory with a base, a role and one profile."""
+    mcp_dir = Path(base_dir) / ".mcp"
+    write_json(
+        mcp_dir / "mcp.json",
+        {"name": "base", "prompts": [{"name": "code-review", "description": "base"}]},
+    )
+    write_json(
+        mcp_dir / "roles.json",
+        {
+            "roles": {
+                "python": {"promptFile": "prompts/python.md", "mcpServers": ["git"]}
+            }
+        },
+    )
+    write_json(
+        mcp_dir / "config-python.json",
+        {
+            "name": "python-profile",
+            "extends": "../roles.json#/roles/python",
+            "prompts": [{"name": "python-testing"}],
+            "servers": {"git": {"command": "mcp-server-git"}},
+        },
+    )
+    return mcp_dir
+
+
+class TestResolvePointer:
+    """Test JSON pointer resolution."""
+
+    def test_resolves_nested_keys_and_indices(self):
+        """Test that object keys and array indices are followed."""
+        document = {"roles": {"python": {"servers": ["filesystem", "git"]}}}
+
+        assert resolve_pointer(document, "") is document
+        assert resolve_pointer(document, "/roles/python/servers/1") == "git"
+
+    def test_unescapes_tokens(self):
+        """Test that ~1 and ~0 decode to / and ~."""
+        document = {"a/b": {"c~d": 1}}
+
+        assert resolve_pointer(document, "/a~1b/c~0d") == 1
+
+    def test_missing_target_raises(self):
+        """Test that a pointer to a missing member raises ConfigError."""
+        with pytest.raises(ConfigError):
+            resolve_pointer({"roles": {}}, "/roles/python")
+
+
+class TestMergeConfigs:
+    """Test the deterministic merge rules."""
+
+    def test_named_lists_merge_by_name(self):
+        """Test that named items override in place and new items are appended."""
+        base = [{"name": "a", "x": 1}, {"name": "b", "x": 1}]
+        override = [{"name": "c"}, {"name": "a", "x": 2}]
+
+        merged = merge_configs(base, override)
+
+        assert merged == [{"name": "a", "x": 2}, {"name": "b", "x": 1}, {"name": "c"}]
+        assert base[0]["x"] == 1
+
+    def test_plain_lists_concatenate_without_duplicates(self):
+        """Test that unnamed lists are unioned in order."""
+        assert merge_configs(["filesystem", "git"], ["git", "docker"]) == [
+            "filesystem",
+            "git",
+            "docker",
+        ]
+
+    def test_objects_merge_recursively(self):
+        """Test that nested objects merge and scalars are replaced."""
+        base = {"servers": {"git": {"command": "a", "args": ["."]}}, "name": "x"}
+        override = {"servers": {"git": {"command": "b"}}, "name": "y"}
+
+        assert merge_configs(base, override) == {
+            "servers": {"git": {"command": "b", "args": ["."]}},
+            "name": "y",
+        }
+
+
+class TestProfileResolution:
+    """Test extends chains against the shipped and synthetic configurations."""
+
+    @pytest.mark.parametrize("profile", PROFILES)
+    def test_shipped_profiles_resolve(self, profile):
+        """Test that every shipped profile resolves its role reference."""
+        roles = json.loads((MCP_CONFIG_DIR / "roles.json").read_text())
+        role = roles["roles"][profile]
+
+        config = compile_profile(profile, MCP_CONFIG_DIR)["config"]
+
+        assert "extends" not in config
+        assert config["promptFile"] == role["promptFile"]
+        for server in role["mcpServers"]:
+            assert server in config["mcpServers"]
+        prompt_names = [prompt["name"] for prompt in config["prompts"]]
+        for common_prompt in roles["commonPrompts"]:
+            assert common_prompt in prompt_names
+
+    def test_chained_extends(self):
+        """Test that a referenced document's own extends is followed."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            base = Path(tmpdir)
+            write_json(base / "a.json", {"extends": "b.json#/role", "name": "a"})
+            write_json(
+                base / "b.json",
+                {"role": {"extends": "c.json", "tools": ["lint"]}},
+            )
+            write_json(base / "c.json", {"tools": ["fmt"], "level": "c"})
+
+            assert load_config(base / "a.json") == {
+                "tools": ["fmt", "lint"],
+                "level": "c",
+                "name": "a",
+            }
+
+    def test_circular_extends_raises(self):
+        """Test that an extends cycle is reported instead of recursing forever."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            base = Path(tmpdir)
+            write_json(base / "a.json", {"extends": "b.json"})
+            write_json(base / "b.json", {"extends": "a.json"})
+
+            with pytest.raises(ConfigError, match="Circular extends chain"):
+                load_config(base / "a.json")
+
+
+class TestProfileBundles:
+    """Test the compiled, hash-keyed profile bundle cache."""
+
+    def test_bundle_records_inputs_and_merged_config(self):
+        """Test that loading a profile writes a bundle covering all inputs."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            mcp_dir = create_mcp_dir(tmpdir)
+
+            config = load_profile("python", mcp_dir)
+
+            assert [prompt["name"] for prompt in config["prompts"]] == [
+                "code-review",
+                "python-testing",
+            ]
+            assert config["mcpServers"] == ["git"]
+            bundle = json.loads(bundle_path_for("python", mcp_dir).read_text())
+            assert sorted(entry["path"] for entry in bundle["inputs"]) == [
+                "config-python.json",
+                "mcp.json",
+                "roles.json",
+            ]
+            assert bundle["config"] == config
+
+    def test_unchanged_inputs_reuse_bundle(self, monkeypatch):
+        """Test that a current bundle is loaded without recompiling."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            mcp_dir = create_mcp_dir(tmpdir)
+            load_profile("python", mcp_dir)
+
+            def fail_compile(*args, **kwargs):
+                raise AssertionError("bundle should not be recompiled")
+
+            monkeypatch.setattr(
+                "mcp_vscode_workflow.config.compile_profile", fail_compile
+            )
+            assert load_profile("python", mcp_dir)["name"] == "python-profile"
+
+    def test_touched_but_identical_input_keeps_key(self):
+        """Test that the bundle key depends on content, not timestamps."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            mcp_dir = create_mcp_dir(tmpdir)
+            first_key = compile_profile("python", mcp_dir)["key"]
+
+            roles_path = mcp_dir / "roles.json"
+            stat = roles_path.stat()
+            os.utime(roles_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+
+            assert compile_profile("python", mcp_dir)["key"] == first_key
+
+    def test_changed_input_recompiles_bundle(self):
+        """Test that editing an extended document invalidates the bundle."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            mcp_dir = create_mcp_dir(tmpdir)
+            load_profile("python", mcp_dir)
+            first_key = json.loads(bundle_path_for("python", mcp_dir).read_text())[
+                "key"
+            ]
+
+            write_json(
+                mcp_dir / "roles.json",
+                {"roles": {"python": {"mcpServers": ["git", "python-tools"]}}},
+            )
+            config = load_profile("python", mcp_dir)
+
+            assert config["mcpServers"] == ["git", "python-tools"]
+            bundle = json.loads(bundle_path_for("python", mcp_dir).read_text())
+            assert bundle["key"] != first_key
+
+    def test_command_line_prints_config(self):
+        """Test the module's command-line entry point."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            mcp_dir = create_mcp_dir(tmpdir)
+            env = dict(os.environ)
+            env["PYTHONPATH"] = str(get_project_root() / "src")
+
+            result = subprocess.run(
+                [
+                    sys.executable,
+                    "-m",
+                    "mcp_vscode_workflow.config",
+                    "python",
+                    "--mcp-dir",
+                    str(mcp_dir),
+                ],
+                capture_output=True,
+                text=True,
+                timeout=30,
+                env=env,
+            )
+
+            assert result.returncode == 0, result.stderr
+            assert json.loads(result.stdout)["name"] == "python-profile"
+
+            result = subprocess.run(
+                [
+                    sys.executable,
+                    "-m",
+                    "mcp_vscode_workflow.config",
+                    "missing",
+                    "--mcp-dir",
+                    str(mcp_dir),
+                ],
+                capture_output=True,
+                text=True,
+                timeout=30,
+                env=env,
+            )
+            assert result.returncode == 1
+            assert "Configuration file not found" in result.stderr
@@ -0,0 +1,334 @@
+"""
+Test the in-process workspace detection engine.
+"""
+
+import json
+import os
+import subprocess
+from pathlib import Path
+
+import pytest
+
+from mcp_vscode_workflow.detect import (
+    INDEX_PATH,
+    DetectionError,
+    ScoringModel,
+    confidence_level,
+    detect_workspace,
+    load_scoring_model,
+    main,
+)
+from tests import MCP_CONFIG_DIR, get_script_path
+
+
+def create_files(root, *paths, content=""):
+    """Create empty (or ``content``) files at the given relative paths."""
+    for relative_path in paths:
+        path = Path(root) / relative_path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(content)
+
+
+def run_bootstrap_detection(workspace, engine):
+    """Run bootstrap.sh auto-detect with a detection engine and cancel it."""
+    env = dict(os.environ, MCP_DETECT_ENGINE=engine)
+    return subprocess.run(
+        ["bash", str(get_script_path("bootstrap.sh"))],
+        input="4\n",  # Cancel
+        cwd=str(workspace),
+        capture_output=True,
+        text=True,
+        timeout=30,
+        env=env,
+    )
+
+
+def reasoning_block(output):
+    """Return the detection reasoning and recommendation part of the output."""
+    start = output.index("=== Detection Reasoning ===")
+    end = output.index("Choose an option:")
+    return output[start:end]
+
+
+class TestRecommendation:
+    """Test profile scoring and confidence levels."""
+
+    @pytest.fixture
+    def model(self):
+        """Return the scoring model configured in .mcp/roles.json."""
+        return load_scoring_model(MCP_CONFIG_DIR / "roles.json")
+
+    def test_detected_profiles_win_ties_in_profile_order(self, model):
+        """Test that ties between detected profiles go to the earlier profile."""
+        scores = model.score(["docs", "infra"])
+        assert model.recommend(scores, ["docs", "infra"]) == "infra"
+        scores = model.score(["bash", "node"])
+        assert model.recommend(scores, ["bash", "node"]) == "node"
+
+    def test_answers_add_to_detection(self, model):
+        """Test that interactive answers are weighed against detection."""
+        scores = model.score(["python", "node"], primary_activity="node")
+        assert model.recommend(scores) == "node"
+        # Both answers together only tie with one detected profile
+        scores = model.score(["python"], None, "node", "node")
+        assert model.recommend(scores) == "python"
+
+    def test_byte_share_outweighs_profile_order(self, model):
+        """Test that the profile with more source bytes wins among detected ones."""
+        scores = model.score(["python", "docs"], {".py": 100, ".md": 900})
+
+        assert scores["docs"] == pytest.approx(3 + 2 * 0.9)
+        assert scores["python"] == pytest.approx(3 + 2 * 0.1)
+        assert model.recommend(scores) == "docs"
+
+    def test_nothing_detected_defaults_to_first_profile(self, model):
+        """Test the default recommendation without any signal."""
+        assert model.recommend(model.score()) == "python"
+
+    def test_profiles_and_weights_come_from_config(self):
+        """Test that a configured profile is scored without code changes."""
+        model = ScoringModel(
+            {
+                "weights": {"detected": 1, "share": 10},
+                "profiles": [
+                    {"name": "python", "extensions": [".py"], "sourceReason": "py"},
+                    {"name": "go", "extensions": [".go"], "sourceReason": "go"},
+                ],
+            }
+        )
+
+        scores = model.score(["python", "go"], {".py": 10, ".go": 30})
+
+        assert model.rank(scores) == [("go", 8.5), ("python", 3.5)]
+        assert model.rank(scores, top=1) == [("go", 8.5)]
+
+    def test_invalid_config_is_rejected(self, tmp_path):
+        """Test that malformed detection configuration raises DetectionError."""
+        with pytest.raises(DetectionError):
+            ScoringModel({"weights": {}, "profiles": [{"extensions": [".py"]}]})
+        with pytest.raises(DetectionError):
+            ScoringModel(
+                {"weights": {}, "profiles": [{"name": "x", "extensions": [".tar.gz"]}]}
+            )
+
+        roles_file = tmp_path / "roles.json"
+        roles_file.write_text(json.dumps({"roles": {}}))
+        with pytest.raises(DetectionError):
+            load_scoring_model(roles_file)
+        roles_file.write_text(
+            json.dumps({"detection": {"weights": {"share": "2"}, "profiles": []}})
+        )
+        with pytest.raises(DetectionError, match="#/detection/weights/share"):
+            load_scoring_model(roles_file)
+
+    @pytest.mark.parametrize(
+        "profiles, expected",
+        [
+            ([], None),
+            (["python"], "high"),
+            (["python", "docs", "cicd"], "medium"),
+            (["python", "docs", "cicd", "node"], "low"),
+        ],
+    )
+    def test_confidence_levels(self, profiles, expected):
+        """Test confidence by number of detected profiles."""
+        assert confidence_level(profiles) == expected
+
+
+class TestDetectWorkspace:
+    """Test detection against workspaces on disk."""
+
+    def test_python_project(self, tmp_path):
+        """Test that a Python project is detected with high confidence."""
+        create_files(tmp_path, "requirements.txt", "src/app/main.py")
+
+        detection = detect_workspace(tmp_path)
+
+        assert detection.profiles == ["python"]
+        assert detection.reasons["python"] == [
+            "Found requirements.txt",
+            "Found Python (.py) source files",
+        ]
+        assert detection.recommended == "python"
+        assert detection.confidence == "high"
+        assert detection.counts["python"] == 1
+        assert detection.extensions[".py"] == (1, 0)
+
+    def test_dependency_and_hidden_trees_are_pruned(self, tmp_path):
+        """Test that vendored, build and hidden trees contribute no signals."""
+        create_files(
+            tmp_path,
+            "main.py",
+            "build/package.sh",
+            "vendor/lib/index.js",
+            ".cache/tool/run.sh",
+            "node_modules/x/index.js",
+        )
+
+        detection = detect_workspace(tmp_path)
+
+        assert detection.counts["shell"] == 0
+        assert detection.counts["javascript"] == 0
+        # node_modules at the root is still a node indicator in its own right
+        assert detection.reasons["node"] == ["Found node_modules directory"]
+
+    def test_pipeline_yaml_requires_pipeline_content(self, tmp_path):
+        """Test that only YAML shaped like a pipeline triggers cicd detection."""
+        create_files(
+            tmp_path,
+            "charts/app/templates/cm.yaml",
+            content="kind: ConfigMap\nmetadata:\n  name: decision-cache\n",
+        )
+        assert "cicd" not in detect_workspace(tmp_path).profiles
+
+        create_files(tmp_path, "deploy/release.yml", content="stages:\n  - build\n")
+        detection = detect_workspace(tmp_path)
+
+        assert detection.reasons["cicd"] == [
+            "Found CI/CD pipeline files (deploy/release.yml)"
+        ]
+        assert detection.pipeline_yaml == str(tmp_path / "deploy" / "release.yml")
+
+    def test_pipeline_yaml_is_rechecked_when_a_yaml_file_changes(self, tmp_path):
+        """Test that editing a YAML file in place redoes the pipeline check."""
+        create_files(tmp_path, "deploy/build.yml", content="name: x\n")
+        assert detect_workspace(tmp_path).pipeline_yaml is None
+
+        # Rewriting a file leaves its directory's mtime alone
+        (tmp_path / "deploy" / "build.yml").write_text("jobs:\n")
+        detection = detect_workspace(tmp_path)
+
+        assert detection.pipeline_yaml == str(tmp_path / "deploy" / "build.yml")
+        index = (tmp_path / INDEX_PATH).read_text()
+        assert "yaml_stat 6 " in index
+
+    def test_index_tracks_new_and_removed_subtrees(self, tmp_path):
+        """Test that the index picks up new subtrees and drops removed ones."""
+        create_files(tmp_path, "requirements.txt", "src/main.py")
+        assert detect_workspace(tmp_path).profiles == ["python"]
+        assert (tmp_path / INDEX_PATH).is_file()
+
+        create_files(tmp_path, "infra/modules/vpc.tf")
+        assert detect_workspace(tmp_path).profiles == ["python", "infra"]
+
+        (tmp_path / "infra" / "modules" / "vpc.tf").unlink()
+        (tmp_path / "infra" / "modules").rmdir()
+        (tmp_path / "infra").rmdir()
+        assert detect_workspace(tmp_path).profiles == ["python"]
+        assert detect_workspace(tmp_path, rescan=True).profiles == ["python"]
+
+    def test_json_output(self, tmp_path, capsys):
+        """Test the structured command-line output."""
+        create_files(tmp_path, "main.tf", "README.md")
+
+        assert main([str(tmp_path), "--format", "json"]) == 0
+
+        result = json.loads(capsys.readouterr().out)
+        assert result["profiles"] == ["infra", "docs"]
+        assert result["recommended"] == "infra"
+        assert result["confidence"] == "medium"
+        assert result["reasons"]["infra"][0] == "Found main.tf"
+        assert [entry["profile"] for entry in result["ranking"][:2]] == [
+            "infra",
+            "docs",
+        ]
+
+    def test_byte_counts_follow_index_updates(self, tmp_path):
+        """Test that per-extension bytes are kept in and refreshed from the index."""
+        create_files(tmp_path, "docs/guide.md", content="x" * 500)
+        create_files(tmp_path, "app/main.py", content="x" * 100)
+        detection = detect_workspace(tmp_path)
+        assert detection.recommended == "docs"
+        assert detection.ranking(top=2) == [
+            ("docs", pytest.approx(3 + 2 * 500 / 600)),
+            ("python", pytest.approx(3 + 2 * 100 / 600)),
+        ]
+
+        create_files(tmp_path, "app/models.py", content="x" * 1000)
+        detection = detect_workspace(tmp_path)
+        assert detection.extensions[".py"] == (2, 1100)
+        assert detection.recommended == "python"
+
+    def test_top_and_answers_on_the_command_line(self, tmp_path, capsys):
+        """Test ranked output and interactive answers passed as options."""
+        create_files(tmp_path, "main.tf", "README.md")
+
+        assert main([str(tmp_path), "--top", "2", "--activity", "docs"]) == 0
+
+        output = capsys.readouterr().out
+        assert "Recommendation: docs" in output
+        assert "  1. docs (5.00)\n  2. infra (3.00)\n" in output
+
+    def test_missing_workspace_is_an_error(self, tmp_path):
+        """Test that a missing workspace directory is reported."""
+        assert main([str(tmp_path / "missing")]) == 1
+
+
+class TestBootstrapEngines:
+    """Test that bootstrap.sh gives the same results with either engine."""
+
+    def test_python_and_bash_engines_agree(self, tmp_path):
+        """Test that both engines print the same reasoning and recommendation."""
+        create_files(
+            tmp_path,
+            "pyproject.toml",
+            "app/main.py",
+            "docs/index.md",
+            "web/src/app.ts",
+            "scripts/release.sh",
+            "infra/main.hcl",
+        )
+        create_files(tmp_path, "ci/pipeline.yml", content="jobs:\n  test: {}\n")
+
+        bash_result = run_bootstrap_detection(tmp_path, "bash")
+        python_result = run_bootstrap_detection(tmp_path, "python")
+
+        assert bash_result.returncode == python_result.returncode == 0
+        assert reasoning_block(python_result.stderr) == reasoning_block(
+            bash_result.stderr
+        )
+        assert "Found CI/CD pipeline files (ci/pipeline.yml)" in python_result.stderr
+
+    def test_engines_share_the_detection_index(self, tmp_path):
+        """Test that each engine updates an index the other one wrote."""
+        create_files(tmp_path, "requirements.txt", "src/main.py")
+        run_bootstrap_detection(tmp_path, "bash")
+
+        create_files(tmp_path, "infra/vpc.tf")
+        assert detect_workspace(tmp_path).profiles == ["python", "infra"]
+
+        create_files(tmp_path, "tools/deploy.sh")
+        result = run_bootstrap_detection(tmp_path, "bash")
+        assert "bash profile detected" in result.stderr
+        assert "infra profile detected" in result.stderr
+
+        # The cached pipeline check is shared too, and redone by either engine
+        create_files(tmp_path, "deploy/build.yml", content="name: x\n")
+        assert detect_workspace(tmp_path).pipeline_yaml is None
+        (tmp_path / "deploy" / "build.yml").write_text("jobs:\n")
+        result = run_bootstrap_detection(tmp_path, "bash")
+        assert "Found CI/CD pipeline files (deploy/build.yml)" in result.stderr
+
+    def test_bash_engine_rechecks_changed_yaml(self, tmp_path):
+        """Test that editing a YAML file redoes the cached pipeline check."""
+        create_files(tmp_path, "README.md")
+        create_files(tmp_path, "deploy/build.yml", content="name: x\n")
+        result = run_bootstrap_detection(tmp_path, "bash")
+        assert "cicd profile detected" not in result.stderr
+
+        # Rewriting a file leaves its directory's mtime alone
+        (tmp_path / "deploy" / "build.yml").write_text("jobs:\n")
+        result = run_bootstrap_detection(tmp_path, "bash")
+
+        assert "Found CI/CD pipeline files (deploy/build.yml)" in result.stderr
+
+    def test_python_engine_recommends_by_byte_share(self, tmp_path):
+        """Test that bootstrap.sh uses the engine's weighted recommendation."""
+        create_files(tmp_path, "app/main.py", content="x" * 10)
+        create_files(tmp_path, "docs/guide.md", content="x" * 900)
+
+        bash_result = run_bootstrap_detection(tmp_path, "bash")
+        python_result = run_bootstrap_detection(tmp_path, "python")
+
+        assert "we recommend: \x1b[1;33mpython" in bash_result.stderr
+        assert "we recommend: \x1b[1;33mdocs" in python_result.stderr
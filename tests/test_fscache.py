@@ -0,0 +1,199 @@
+"""
+Test the read cache in front of the filesystem MCP server.
+"""
+
+import json
+import os
+import subprocess
+import sys
+import textwrap
+import time
+from pathlib import Path
+
+import pytest
+
+from mcp_vscode_workflow.fscache import ReadCache
+from mcp_vscode_workflow.supervisor import ServerSpec, cached_spec
+
+SRC_DIR = Path(__file__).parent.parent / "src"
+
+requires_inotify = pytest.mark.skipif(
+    not sys.platform.startswith("linux"), reason="inotify is Linux-only"
+)
+
+# A filesystem server whose read results carry the number of reads it served
+FAKE_SERVER = textwrap.dedent("""
+    import json, os, sys
+
+    reads = 0
+    for line in sys.stdin:
+        message = json.loads(line)
+        arguments = message["params"]["arguments"]
+        if message["params"]["name"] == "read_file":
+            reads += 1
+            with open(arguments["path"]) as f:
+                text = f.read()
+        else:
+            with open(arguments["path"], "w") as f:
+                f.write(arguments["content"])
+            text = "written"
+        result = {"content": [{"type": "text", "text": text}], "reads": reads}
+        response = {"jsonrpc": "2.0", "id": message["id"], "result": result}
+        sys.stdout.write(json.dumps(response) + "\\n")
+        sys.stdout.flush()
+    """)
+
+
+class Proxy:
+    """The caching proxy in front of the fake server, driven over stdio."""
+
+    def __init__(self, root, *options):
+        server = Path(root) / "fake_server.py"
+        server.write_text(FAKE_SERVER)
+        self.process = subprocess.Popen(
+            [sys.executable, "-m", "mcp_vscode_workflow.fscache", *options]
+            + ["--root", str(root), "--", sys.executable, str(server)],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            env=dict(os.environ, PYTHONPATH=str(SRC_DIR)),
+        )
+        self.next_id = 0
+
+    def request(self, method, params=None):
+        self.next_id += 1
+        message = {"jsonrpc": "2.0", "id": self.next_id, "method": method}
+        message["params"] = params or {}
+        self.process.stdin.write(json.dumps(message).encode() + b"\n")
+        self.process.stdin.flush()
+        response = json.loads(self.process.stdout.readline())
+        assert response["id"] == self.next_id
+        return response["result"]
+
+    def call(self, tool, **arguments):
+        return self.request("tools/call", {"name": tool, "arguments": arguments})
+
+    def close(self):
+        self.process.stdin.close()
+        assert self.process.wait(timeout=10) == 0
+
+
+@pytest.fixture
+def workspace(tmp_path):
+    """Return a workspace with one text file."""
+    (tmp_path / "notes.txt").write_text("first")
+    return tmp_path
+
+
+class TestReadCache:
+    """Test LRU eviction and path invalidation."""
+
+    def test_eviction_is_least_recently_used_by_bytes(self):
+        """Test that the oldest unused results go once the budget is exceeded."""
+        result = {"text": "x" * 80}
+        size = len(json.dumps(result, separators=(",", ":")))
+        cache = ReadCache(max_bytes=size * 2)
+
+        cache.put("a", result, ["/w/a"], [None])
+        cache.put("b", result, ["/w/b"], [None])
+        assert cache.get("a") == result
+        cache.put("c", result, ["/w/c"], [None])
+
+        assert cache.get("b") is None
+        assert cache.get("a") == cache.get("c") == result
+        assert cache.bytes == size * 2
+        assert cache.evictions == 1
+
+    def test_result_over_budget_is_not_cached(self):
+        """Test that a result larger than the whole budget is refused."""
+        cache = ReadCache(max_bytes=10)
+
+        assert not cache.put("a", {"text": "x" * 20}, ["/w/a"], [None])
+        assert len(cache) == 0
+
+    def test_invalidation_by_path(self):
+        """Test exact and recursive invalidation."""
+        cache = ReadCache()
+        cache.put("file", {}, ["/w/src/a.py"], [None])
+        cache.put("listing", {}, ["/w/src"], [None])
+        cache.put("other", {}, ["/w/srcs/b.py"], [None])
+
+        cache.invalidate("/w/src")
+        assert cache.get("listing") is None
+        assert cache.get("file") is not None
+
+        cache.invalidate("/w/src", recursive=True)
+        assert cache.get("file") is None
+        assert cache.get("other") is not None
+
+    def test_validation_compares_stamps(self, workspace):
+        """Test that a changed file is not served when validating."""
+        path = str(workspace / "notes.txt")
+        cache = ReadCache(validate=True)
+        cache.put("notes", {}, [path], [(0, 0, 0)])
+
+        assert cache.get("notes") is None
+
+
+class TestCachingProxy:
+    """Test reads through the proxy."""
+
+    @requires_inotify
+    def test_repeated_reads_are_served_from_memory(self, workspace):
+        """Test that only changed files reach the server again."""
+        proxy = Proxy(workspace)
+        try:
+            first = proxy.call("read_file", path="notes.txt")
+            assert first["content"][0]["text"] == "first"
+            assert proxy.call("read_file", path="notes.txt") == first
+
+            (workspace / "notes.txt").write_text("second")
+            deadline = time.monotonic() + 5
+            while True:
+                result = proxy.call("read_file", path="notes.txt")
+                if result["content"][0]["text"] == "second":
+                    break
+                assert time.monotonic() < deadline, "change was not noticed"
+                time.sleep(0.02)
+            assert result["reads"] == 2
+
+            stats = proxy.request("fscache/stats")
+            assert stats["hits"] >= 1
+            assert stats["entries"] == 1
+            assert not stats["validate"]
+        finally:
+            proxy.close()
+
+    def test_writes_through_the_proxy_invalidate(self, workspace):
+        """Test that a write tool drops the cached read at once."""
+        proxy = Proxy(workspace, "--no-inotify")
+        try:
+            proxy.call("read_file", path="notes.txt")
+            proxy.call("write_file", path="notes.txt", content="third")
+
+            result = proxy.call("read_file", path="notes.txt")
+            assert result["content"][0]["text"] == "third"
+            assert result["reads"] == 2
+            assert proxy.request("fscache/stats")["validate"]
+        finally:
+            proxy.close()
+
+
+class TestSupervisorIntegration:
+    """Test that the supervisor puts the cache in front of the server."""
+
+    def test_filesystem_server_is_wrapped(self):
+        """Test that only mcp-server-filesystem runs behind the cache."""
+        spec = ServerSpec("filesystem", "mcp-server-filesystem", ("--root", "."), {})
+
+        wrapped = cached_spec(spec, 1024)
+
+        assert wrapped.command == sys.executable
+        assert wrapped.args[:4] == (
+            "-m",
+            "mcp_vscode_workflow.fscache",
+            "--cache-bytes",
+            "1024",
+        )
+        assert wrapped.args[-3:] == ("mcp-server-filesystem", "--root", ".")
+        git = ServerSpec("git", "mcp-server-git", (), {})
+        assert cached_spec(git, 1024) == git
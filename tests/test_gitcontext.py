@@ -0,0 +1,217 @@
+"""
+Test the cached, batched git context provider.
+"""
+
+import json
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+from mcp_vscode_workflow.gitcontext import GitContext, GitError, main
+
+SRC_DIR = Path(__file__).parent.parent / "src"
+
+requires_inotify = pytest.mark.skipif(
+    not sys.platform.startswith("linux"), reason="inotify is Linux-only"
+)
+
+
+def git(repository, *args):
+    """Run git in ``repository`` and return its output."""
+    return subprocess.run(
+        ["git", *args],
+        cwd=str(repository),
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout
+
+
+@pytest.fixture
+def repository(tmp_path):
+    """Return a repository with two commits touching app/main.py."""
+    git(tmp_path, "init", "-q")
+    git(tmp_path, "config", "user.email", "dev@example.com")
+    git(tmp_path, "config", "user.name", "Dev")
+    source = tmp_path / "app" / "main.py"
+    source.parent.mkdir()
+    source.write_text("print('one')\n")
+    git(tmp_path, "add", ".")
+    git(tmp_path, "commit", "-q", "-m", "First")
+    source.write_text("print('one')\nprint('two')\n")
+    git(tmp_path, "commit", "-q", "-am", "Second")
+    return tmp_path
+
+
+@pytest.fixture
+def context(repository):
+    """Return a GitContext for the repository, closed afterwards."""
+    context = GitContext(repository)
+    yield context
+    context.close()
+
+
+class TestGitContext:
+    """Test caching and batching of git queries."""
+
+    def test_commit_queries_are_cached(self, context):
+        """Test that repeated log, diff and blame at revisions do not fork."""
+        log = context.query("log")
+        diff = context.query("diff", base="HEAD~1", target="HEAD")
+        blame = context.query("blame", path="app/main.py", rev="HEAD~1")
+        forks = context.forks
+
+        assert context.query("log") == log
+        assert context.query("diff", base="HEAD~1", target="HEAD") == diff
+        assert context.query("blame", path="app/main.py", rev="HEAD~1") == blame
+        assert context.forks == forks
+        assert "Second" in log and "+print('two')" in diff
+
+    def test_file_at_revision_is_read_without_forking(self, context):
+        """Test that show with a path reads the blob through cat-file."""
+        forks = context.forks
+
+        assert context.query("show", rev="HEAD~1", path="app/main.py") == (
+            "print('one')\n"
+        )
+        assert context.forks == forks
+
+    def test_new_commit_changes_the_log(self, context, repository):
+        """Test that moving HEAD gives a fresh log."""
+        context.query("log")
+        (repository / "README.md").write_text("readme\n")
+        git(repository, "add", "README.md")
+        git(repository, "commit", "-q", "-m", "Third")
+
+        assert "Third" in context.query("log")
+
+    def test_index_changes_invalidate_cached_diff(self, context, repository):
+        """Test that staging a change refreshes diff --cached."""
+        assert context.query("diff", cached=True) == ""
+
+        (repository / "app" / "main.py").write_text("print('three')\n")
+        git(repository, "add", "app/main.py")
+
+        assert "+print('three')" in context.query("diff", cached=True)
+
+    def test_worktree_blame_follows_file_changes(self, context, repository):
+        """Test that a working tree blame is keyed by the file's stamp."""
+        context.query("blame", path="app/main.py")
+        source = repository / "app" / "main.py"
+        source.write_text(source.read_text() + "print('uncommitted')\n")
+
+        assert "Not Committed Yet" in context.query("blame", path="app/main.py")
+
+    @requires_inotify
+    def test_status_is_refreshed_by_inotify(self, context, repository):
+        """Test that a cached status is dropped when the working tree changes."""
+        assert context.query("status").strip().startswith("##")
+        forks = context.forks
+        context.query("status")
+        assert context.forks == forks
+
+        (repository / "app" / "new.py").write_text("")
+        deadline = time.monotonic() + 5
+        while "new.py" not in context.query("status"):
+            assert time.monotonic() < deadline, "status was not refreshed"
+            time.sleep(0.02)
+
+    def test_status_follows_branch_and_upstream(self, context, repository):
+        """Test that a renamed branch and a moved upstream refresh the status."""
+        base = git(repository, "symbolic-ref", "--short", "HEAD").strip()
+        git(repository, "checkout", "-q", "-b", "feature", "--track", base)
+        assert context.query("status").startswith(f"## feature...{base}\n")
+
+        git(repository, "branch", "-m", "renamed")
+        assert context.query("status").startswith(f"## renamed...{base}\n")
+
+        git(repository, "update-ref", f"refs/heads/{base}", "HEAD~1")
+        assert context.query("status").startswith(f"## renamed...{base} [ahead 1]")
+
+    def test_batch_deduplicates_and_reports_errors(self, context):
+        """Test one answer per distinct query and per-query errors."""
+        results = context.batch(
+            [
+                {"command": "log", "max_count": 1},
+                {"command": "show", "rev": "no-such-rev"},
+                {"command": "log", "max_count": 1},
+                {"command": "diff", "base": "HEAD~1", "target": "HEAD"},
+            ]
+        )
+
+        assert results[0] == results[2]
+        assert "Unknown revision" in results[1]["error"]
+        assert "+print('two')" in results[3]["output"]
+        assert context.stats()["misses"] == 2
+
+    def test_unknown_query_is_an_error(self, context):
+        """Test that unknown commands and arguments raise GitError."""
+        with pytest.raises(GitError):
+            context.query("push")
+        with pytest.raises(GitError):
+            context.query("log", force=True)
+
+    def test_outside_a_repository_is_an_error(self, tmp_path):
+        """Test that a directory without a repository raises GitError."""
+        with pytest.raises(GitError):
+            GitContext(tmp_path)
+
+
+class TestCommandLine:
+    """Test the command line and the MCP server mode."""
+
+    def test_show_file_at_revision(self, repository, capsys):
+        """Test the show command with --path."""
+        assert (
+            main(
+                [
+                    "show",
+                    "HEAD~1",
+                    "--path",
+                    "app/main.py",
+                    "--repository",
+                    str(repository),
+                ]
+            )
+            == 0
+        )
+        assert capsys.readouterr().out == "print('one')\n"
+
+    def test_serve_answers_tool_calls(self, repository):
+        """Test that the MCP server lists and calls the git tools."""
+        messages = [
+            {"jsonrpc": "2.0", "id": 1, "method": "initialize", "params": {}},
+            {"jsonrpc": "2.0", "id": 2, "method": "tools/list"},
+            {
+                "jsonrpc": "2.0",
+                "id": 3,
+                "method": "tools/call",
+                "params": {"name": "git_log", "arguments": {"max_count": 1}},
+            },
+            {
+                "jsonrpc": "2.0",
+                "id": 4,
+                "method": "tools/call",
+                "params": {"name": "git_blame", "arguments": {"path": "missing.py"}},
+            },
+        ]
+        result = subprocess.run(
+            [sys.executable, "-m", "mcp_vscode_workflow.gitcontext", "serve"],
+            input="".join(json.dumps(m) + "\n" for m in messages),
+            cwd=str(repository),
+            capture_output=True,
+            text=True,
+            timeout=30,
+            env=dict(os.environ, PYTHONPATH=str(SRC_DIR)),
+        )
+
+        responses = [json.loads(line) for line in result.stdout.splitlines()]
+        assert [r["id"] for r in responses] == [1, 2, 3, 4]
+        tools = {tool["name"] for tool in responses[1]["result"]["tools"]}
+        assert {"git_status", "git_diff", "git_batch"} <= tools
+        assert "Second" in responses[2]["result"]["content"][0]["text"]
+        assert responses[3]["result"]["isError"]
@@ -0,0 +1,378 @@
+"""
+Test concurrent MCP package verification in install-mcp-npx.sh.
+"""
+
+import json
+import os
+import shutil
+import subprocess
+import tempfile
+import time
+from pathlib import Path
+
+import pytest
+
+from tests import create_isolated_path, create_stub_command, get_script_path
+
+# Utilities install-mcp-npx.sh itself relies on, exposed on an isolated PATH
+# (node is the real interpreter; the script parses registry metadata with it)
+SCRIPT_UTILITIES = [
+    "awk",
+    "cat",
+    "date",
+    "du",
+    "head",
+    "ln",
+    "mkdir",
+    "mktemp",
+    "mv",
+    "node",
+    "rm",
+    "sleep",
+    "timeout",
+    "touch",
+]
+
+PACKAGES = ["Sequential Thinking", "Task Master", "Context7"]
+
+PACKAGE_NAMES = [
+    "@modelcontextprotocol/server-sequential-thinking",
+    "task-master-ai",
+    "@upstash/context7-mcp",
+]
+
+VIEW_OUTPUT = json.dumps(
+    {
+        "version": "1.2.3",
+        "dist.integrity": "sha512-stub",
+        "dist.tarball": "https://registry.example/stub-1.2.3.tgz",
+    }
+)
+
+
+# npm install stub: lays out node_modules/<name> with a 4 KiB server entry point
+NPM_INSTALL_STUB = """
+if [ "$1" = "install" ]; then
+    prefix="$3"
+    for spec; do :; done
+    name="${spec%@*}"
+    mkdir -p "$prefix/node_modules/$name" "$prefix/node_modules/.bin"
+    echo "{\\"name\\": \\"$name\\", \\"bin\\": {\\"mcp-server\\": \\"index.js\\"}}" \\
+        > "$prefix/node_modules/$name/package.json"
+    head -c 4096 /dev/zero > "$prefix/node_modules/$name/index.js"
+    ln -s "../$name/index.js" "$prefix/node_modules/.bin/mcp-server"
+    echo "$spec" >> "$prefix/../installs.log"
+fi
+"""
+
+
+def create_npm_stubs(bin_dir, download_seconds, calls_log=None):
+    """Create npm/npx stubs; npx downloads take ``download_seconds``.
+
+    When ``calls_log`` is given, every npm/npx invocation is appended to it.
+    """
+    record = f'echo "$0 $*" >> "{calls_log}"\n' if calls_log else ""
+    create_stub_command(
+        bin_dir,
+        "npm",
+        f'{record}[ "$1" = "view" ] && echo \'{VIEW_OUTPUT}\'\n{NPM_INSTALL_STUB}',
+    )
+    create_stub_command(
+        bin_dir,
+        "npx",
+        f'{record}[ "$1" = "--version" ] && echo 10.0.0 && exit 0\n'
+        f"sleep {download_seconds}",
+    )
+
+
+def create_local_registry(registry_dir, version):
+    """Write registry package documents for every MCP package."""
+    for name in PACKAGE_NAMES:
+        document = Path(registry_dir) / f"{name}.json"
+        document.parent.mkdir(parents=True, exist_ok=True)
+        document.write_text(
+            json.dumps(
+                {
+                    "name": name,
+                    "dist-tags": {"latest": version},
+                    "versions": {
+                        version: {
+                            "dist": {
+                                "integrity": f"sha512-{version}",
+                                "tarball": f"https://registry.example/{version}.tgz",
+                            }
+                        }
+                    },
+                }
+            )
+        )
+
+
+class TestInstallMcpNpx:
+    """Test the package verification workers in install-mcp-npx.sh."""
+
+    @pytest.fixture(autouse=True)
+    def isolated_cache(self, tmp_path):
+        """Keep the package metadata cache out of the user's cache directory."""
+        self.cache_home = tmp_path / "cache"
+
+    def run_installer(self, search_path, *args):
+        """Run install-mcp-npx.sh with the given PATH and an isolated cache."""
+        env = dict(os.environ)
+        env["PATH"] = search_path
+        env["XDG_CACHE_HOME"] = str(self.cache_home)
+        env.pop("MCP_NPM_REGISTRY", None)
+        env.pop("MCP_OFFLINE", None)
+        return subprocess.run(
+            [shutil.which("bash"), str(get_script_path("install-mcp-npx.sh")), *args],
+            capture_output=True,
+            text=True,
+            timeout=60,
+            env=env,
+        )
+
+    def test_help_lists_jobs_option(self):
+        """Test that the help message documents the worker cap."""
+        result = self.run_installer(os.environ["PATH"], "--help")
+
+        assert result.returncode == 0
+        assert "--jobs" in result.stdout
+        assert "MCP_INSTALL_JOBS" in result.stdout
+
+    def test_packages_verified_concurrently(self):
+        """Test that packages are verified in parallel up to the worker cap."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            bin_dir, search_path = create_isolated_path(tmpdir, SCRIPT_UTILITIES)
+            create_npm_stubs(bin_dir, download_seconds=1)
+
+            start_time = time.time()
+            result = self.run_installer(search_path, "--jobs", "3")
+            execution_time = time.time() - start_time
+
+            assert result.returncode == 0
+            assert "up to 3 concurrent worker(s)" in result.stdout
+            assert "All MCP packages verified successfully!" in result.stdout
+            # Three one-second downloads in parallel, not back to back
+            assert execution_time < 2.5, f"Verification took {execution_time:.2f}s"
+
+    def test_package_output_is_not_interleaved(self):
+        """Test that each package's output is printed as one ordered block."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            bin_dir, search_path = create_isolated_path(tmpdir, SCRIPT_UTILITIES)
+            create_npm_stubs(bin_dir, download_seconds=0)
+
+            result = self.run_installer(search_path, "--jobs", "2")
+
+            assert result.returncode == 0
+            output = result.stdout
+            previous_end = 0
+            for index, name in enumerate(PACKAGES, start=1):
+                start = output.index(f"Processing package {index} of 3: {name}")
+                end = output.index(f"Completed {name} ({index}/3)")
+                assert previous_end <= start < end
+                block = output[start:end]
+                assert f"Checking availability of {name}" in block
+                for other in PACKAGES:
+                    if other != name:
+                        assert f"Checking availability of {other}" not in block
+                previous_end = end
+
+    def test_invalid_jobs_value_falls_back_to_sequential(self):
+        """Test that an invalid worker count verifies packages one at a time."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            bin_dir, search_path = create_isolated_path(tmpdir, SCRIPT_UTILITIES)
+            create_npm_stubs(bin_dir, download_seconds=0)
+
+            result = self.run_installer(search_path, "--jobs", "zero")
+
+            assert result.returncode == 0
+            assert "verifying packages one at a time" in result.stdout
+            assert "All MCP packages verified successfully!" in result.stdout
+
+    def test_metadata_cached_after_verification(self):
+        """Test that a repeat run within the TTL skips the registry and npx."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            bin_dir, search_path = create_isolated_path(tmpdir, SCRIPT_UTILITIES)
+            calls_log = Path(tmpdir) / "calls.log"
+            create_npm_stubs(bin_dir, download_seconds=0, calls_log=calls_log)
+
+            result = self.run_installer(search_path)
+            assert result.returncode == 0
+            assert "(version: 1.2.3)" in result.stdout
+            assert "Integrity: sha512-stub" in result.stdout
+            # One metadata query per package, not one per field
+            view_calls = [
+                line for line in calls_log.read_text().splitlines() if " view " in line
+            ]
+            assert len(view_calls) == 3
+
+            cache_file = (
+                self.cache_home
+                / "mcp-vscode-workflow"
+                / "mcp-packages"
+                / "@upstash__context7-mcp.tsv"
+            )
+            fields = cache_file.read_text().rstrip("\n").split("\t")
+            assert fields[:3] == [
+                "1.2.3",
+                "sha512-stub",
+                "https://registry.example/stub-1.2.3.tgz",
+            ]
+
+            calls_log.write_text("")
+            result = self.run_installer(search_path)
+            assert result.returncode == 0
+            assert result.stdout.count("verified from metadata cache") == 3
+            assert [
+                line
+                for line in calls_log.read_text().splitlines()
+                if "--version" not in line
+            ] == []
+
+            result = self.run_installer(search_path, "--refresh")
+            assert "verified from metadata cache" not in result.stdout
+            assert "Querying npm registry" in result.stdout
+
+    def test_local_registry_verifies_without_network(self):
+        """Test that a file:// registry is read directly without npm or npx."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            bin_dir, search_path = create_isolated_path(tmpdir, SCRIPT_UTILITIES)
+            calls_log = Path(tmpdir) / "calls.log"
+            create_npm_stubs(bin_dir, download_seconds=0, calls_log=calls_log)
+            registry_dir = Path(tmpdir) / "registry"
+            create_local_registry(registry_dir, "2.0.0")
+
+            result = self.run_installer(
+                search_path, "--registry", f"file://{registry_dir}"
+            )
+
+            assert result.returncode == 0
+            assert result.stdout.count("(version: 2.0.0)") == 3
+            assert "Integrity: sha512-2.0.0" in result.stdout
+            assert f"verified against local registry {registry_dir}" in result.stdout
+            assert [
+                line
+                for line in calls_log.read_text().splitlines()
+                if "--version" not in line
+            ] == []
+
+    def test_cache_is_scoped_to_registry(self):
+        """Test that metadata cached for one registry is not reused for another."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            bin_dir, search_path = create_isolated_path(tmpdir, SCRIPT_UTILITIES)
+            create_npm_stubs(bin_dir, download_seconds=0)
+            first_registry = Path(tmpdir) / "first"
+            second_registry = Path(tmpdir) / "second"
+            create_local_registry(first_registry, "1.0.0")
+            create_local_registry(second_registry, "2.0.0")
+
+            self.run_installer(search_path, "--registry", f"file://{first_registry}")
+            result = self.run_installer(
+                search_path, "--registry", f"file://{second_registry}"
+            )
+
+            assert result.stdout.count("(version: 2.0.0)") == 3
+            assert "verified from metadata cache" not in result.stdout
+
+    def test_offline_mode_uses_stale_cache(self):
+        """Test that offline runs fall back to expired cache entries."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            bin_dir, search_path = create_isolated_path(tmpdir, SCRIPT_UTILITIES)
+            calls_log = Path(tmpdir) / "calls.log"
+            create_npm_stubs(bin_dir, download_seconds=0, calls_log=calls_log)
+            self.run_installer(search_path)
+
+            calls_log.write_text("")
+            result = self.run_installer(search_path, "--refresh", "--offline")
+
+            assert result.returncode == 0
+            assert result.stdout.count("Offline mode: using cached metadata") == 3
+            assert "(version: 1.2.3)" in result.stdout
+            assert [
+                line
+                for line in calls_log.read_text().splitlines()
+                if "--version" not in line
+            ] == []
+
+    def test_prefetch_installs_pinned_versions(self):
+        """Test that prefetch installs each package once into a versioned cache."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            bin_dir, search_path = create_isolated_path(tmpdir, SCRIPT_UTILITIES)
+            create_npm_stubs(bin_dir, download_seconds=0)
+            server_cache = self.cache_home / "mcp-vscode-workflow" / "mcp-servers"
+
+            result = self.run_installer(search_path, "--prefetch")
+
+            assert result.returncode == 0, result.stdout
+            assert result.stdout.count("1.2.3 prefetched: ") == 3
+            assert "bytes in " in result.stdout
+            installs = (server_cache / "installs.log").read_text().splitlines()
+            assert sorted(installs) == sorted(f"{name}@1.2.3" for name in PACKAGE_NAMES)
+
+            context7 = server_cache / "@upstash__context7-mcp"
+            assert os.readlink(context7) == "@upstash__context7-mcp@1.2.3"
+            assert (context7 / ".complete").is_file()
+            launcher = context7 / "node_modules" / ".bin" / "mcp-server"
+            assert f"Launch command: {launcher}" in result.stdout
+
+            # A second prefetch finds everything already installed
+            result = self.run_installer(search_path, "--prefetch")
+            assert result.returncode == 0
+            assert result.stdout.count("already prefetched") == 3
+            assert len((server_cache / "installs.log").read_text().splitlines()) == 3
+
+    def test_prefetch_fails_without_metadata(self):
+        """Test that prefetch reports packages it cannot resolve as failures."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            bin_dir, search_path = create_isolated_path(tmpdir, SCRIPT_UTILITIES)
+            create_npm_stubs(bin_dir, download_seconds=0)
+
+            result = self.run_installer(search_path, "--prefetch", "--offline")
+
+            assert result.returncode == 1
+            assert "Cannot prefetch Context7 without its package metadata" in (
+                result.stdout
+            )
+
+    def test_trace_records_npm_and_npx_calls(self, monkeypatch, tmp_path):
+        """Test that MCP_TRACE_FILE receives a span for every npm/npx call."""
+        trace_file = tmp_path / "trace.jsonl"
+        monkeypatch.setenv("MCP_TRACE_FILE", str(trace_file))
+        with tempfile.TemporaryDirectory() as tmpdir:
+            bin_dir, search_path = create_isolated_path(tmpdir, SCRIPT_UTILITIES)
+            create_npm_stubs(bin_dir, download_seconds=0)
+
+            result = self.run_installer(search_path)
+
+            assert result.returncode == 0
+            events = [json.loads(line) for line in trace_file.read_text().splitlines()]
+            spans = {event["name"]: event for event in events if event["ph"] == "X"}
+            for name in PACKAGE_NAMES:
+                assert spans[f"npm view {name}"]["cat"] == "npm"
+                assert spans[f"npx {name} --version"]["cat"] == "npx"
+            for name in PACKAGES:
+                assert spans[name]["cat"] == "package"
+                assert spans[name]["dur"] >= 0
+
+    def test_metadata_only_reports_each_package(self, monkeypatch, tmp_path):
+        """Test that --metadata-only skips npx and reports every package."""
+        report_file = tmp_path / "packages.tsv"
+        monkeypatch.setenv("MCP_PACKAGE_REPORT_FILE", str(report_file))
+        with tempfile.TemporaryDirectory() as tmpdir:
+            bin_dir, search_path = create_isolated_path(tmpdir, SCRIPT_UTILITIES)
+            calls_log = Path(tmpdir) / "calls.log"
+            create_npm_stubs(bin_dir, download_seconds=5, calls_log=calls_log)
+
+            result = self.run_installer(search_path, "--metadata-only")
+
+            assert result.returncode == 0
+            assert "npx --yes" not in calls_log.read_text()
+            lines = sorted(report_file.read_text().splitlines())
+            assert lines == sorted(f"{name}\tverified\t1.2.3" for name in PACKAGE_NAMES)
+
+            report_file.unlink()
+            assert self.run_installer(search_path).returncode == 0
+            statuses = {
+                line.split("\t")[1] for line in report_file.read_text().splitlines()
+            }
+            assert statuses == {"cached"}
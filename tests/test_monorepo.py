@@ -0,0 +1,180 @@
+"""
+Test per-subtree detection and multi-root workspace generation.
+"""
+
+import json
+import subprocess
+from pathlib import Path
+
+from mcp_vscode_workflow.monorepo import (
+    SUBTREE_INDEX_DIR,
+    detect_subtrees,
+    list_subtrees,
+    load_profile_settings,
+    main,
+    subtree_profiles,
+    write_workspace,
+)
+from tests import VSCODE_PROFILES_DIR, get_script_path
+
+
+def create_monorepo(root):
+    """Create services/, infra/, docs/ and web/ subtrees plus noise."""
+    for relative_path in (
+        "services/requirements.txt",
+        "services/api/main.py",
+        "infra/modules/vpc.tf",
+        "docs/mkdocs.yml",
+        "docs/index.md",
+        "web/package.json",
+        "web/src/app.ts",
+        "assets/logo.svg",
+        "node_modules/x/index.js",
+        ".github/workflows/ci.yml",
+        "README.md",
+    ):
+        path = Path(root) / relative_path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text("")
+
+
+class TestDetectSubtrees:
+    """Test detection of each top-level subtree."""
+
+    def test_each_subtree_gets_its_own_profile(self, tmp_path):
+        """Test that parallel workers return one profile per subtree."""
+        create_monorepo(tmp_path)
+
+        detections = detect_subtrees(tmp_path, workers=2)
+
+        assert subtree_profiles(detections) == {
+            "docs": "docs",
+            "infra": "infra",
+            "services": "python",
+            "web": "node",
+        }
+        assert all(d.confidence == "high" for d in detections.values())
+        # Indexes live under the root's cache, not inside the subtrees
+        assert (tmp_path / SUBTREE_INDEX_DIR / "services.index").is_file()
+        assert not (tmp_path / "services" / ".mcp").exists()
+
+    def test_hidden_and_dependency_trees_are_not_subtrees(self, tmp_path):
+        """Test that hidden and pruned directories are not listed."""
+        create_monorepo(tmp_path)
+
+        assert list_subtrees(tmp_path) == ["assets", "docs", "infra", "services", "web"]
+
+    def test_in_process_detection_matches_workers(self, tmp_path):
+        """Test that a single worker gives the same map as parallel workers."""
+        create_monorepo(tmp_path)
+
+        parallel = subtree_profiles(detect_subtrees(tmp_path, workers=4))
+
+        assert subtree_profiles(detect_subtrees(tmp_path, workers=1)) == parallel
+
+
+class TestWorkspaceGeneration:
+    """Test the multi-root workspace written from the subtree map."""
+
+    def test_workspace_lists_subtrees_and_root(self, tmp_path):
+        """Test the folders and extension recommendations of the workspace."""
+        workspace_file = write_workspace(
+            tmp_path, {"services": "python", "docs": "docs"}, VSCODE_PROFILES_DIR
+        ).path
+
+        workspace = json.loads(Path(workspace_file).read_text())
+        assert workspace_file.endswith(f"{tmp_path.name}.code-workspace")
+        assert workspace["folders"] == [
+            {"name": "docs (docs)", "path": "docs"},
+            {"name": "services (python)", "path": "services"},
+            {"name": tmp_path.name, "path": "."},
+        ]
+        recommendations = workspace["extensions"]["recommendations"]
+        assert "ms-python.python" in recommendations
+        assert "yzhang.markdown-all-in-one" in recommendations
+        assert len(recommendations) == len(set(recommendations))
+
+    def test_folder_settings_keep_existing_values(self, tmp_path):
+        """Test that profile settings are merged under a folder's own settings."""
+        settings_file = tmp_path / "docs" / ".vscode" / "settings.json"
+        settings_file.parent.mkdir(parents=True)
+        settings_file.write_text(json.dumps({"editor.tabSize": 8}))
+        profile = json.loads((VSCODE_PROFILES_DIR / "docs.json").read_text())
+
+        write_workspace(tmp_path, {"docs": "docs"}, VSCODE_PROFILES_DIR)
+
+        settings = json.loads(settings_file.read_text())
+        assert settings["editor.tabSize"] == 8
+        assert settings["editor.wordWrap"] == profile["settings"]["editor.wordWrap"]
+
+    def test_folder_settings_with_comments(self, tmp_path, capsys):
+        """Test that commented settings are read and never stripped of comments."""
+        create_monorepo(tmp_path)
+        profile = load_profile_settings("docs", VSCODE_PROFILES_DIR)
+        complete = tmp_path / "docs" / ".vscode" / "settings.json"
+        complete.parent.mkdir()
+        complete.write_text(
+            "{\n  // keep my wrapping\n"
+            + json.dumps(profile["settings"])[1:-1]
+            + ",\n}\n"
+        )
+        partial = tmp_path / "services" / ".vscode" / "settings.json"
+        partial.parent.mkdir()
+        partial.write_text('{\n  /* mine */ "editor.tabSize": 8,\n}\n')
+        before = {path: path.read_text() for path in (complete, partial)}
+
+        assert main([str(tmp_path), "--write-workspace"]) == 0
+
+        assert {path: path.read_text() for path in before} == before
+        err = capsys.readouterr().err
+        assert "left services/.vscode/settings.json unchanged" in err
+        assert "docs/" not in err
+
+    def test_bootstrap_format(self, tmp_path, capsys):
+        """Test the lines bootstrap.sh reads from the command line."""
+        create_monorepo(tmp_path)
+
+        assert main([str(tmp_path), "--format", "bootstrap", "--write-workspace"]) == 0
+
+        lines = capsys.readouterr().out.splitlines()
+        assert "subtree python high services" in lines
+        assert "subtree node high web" in lines
+        assert lines[-1] == f"workspace {tmp_path / tmp_path.name}.code-workspace"
+
+
+class TestBootstrapMonorepo:
+    """Test the --monorepo option of bootstrap.sh."""
+
+    def test_monorepo_with_profile_fails(self, tmp_path):
+        """Test that --monorepo cannot be combined with --profile."""
+        result = subprocess.run(
+            [
+                "bash",
+                str(get_script_path("bootstrap.sh")),
+                "--monorepo",
+                "--profile",
+                "docs",
+            ],
+            cwd=str(tmp_path),
+            capture_output=True,
+            text=True,
+            timeout=30,
+        )
+
+        assert result.returncode == 1
+        assert "Cannot use --monorepo" in result.stderr + result.stdout
+
+    def test_monorepo_without_subtree_signals_fails(self, tmp_path):
+        """Test that a workspace without detectable subtrees is reported."""
+        (tmp_path / "assets").mkdir()
+
+        result = subprocess.run(
+            ["bash", str(get_script_path("bootstrap.sh")), "--monorepo"],
+            cwd=str(tmp_path),
+            capture_output=True,
+            text=True,
+            timeout=30,
+        )
+
+        assert result.returncode == 1
+        assert "No project indicators detected" in result.stderr + result.stdout
@@ -8,6 +8,7 @@ import subprocess
 
 import pytest
 
+from mcp_vscode_workflow.schema import validate_files
 from tests import get_mcp_config_path, get_project_root, get_script_path
 
 
@@ -107,17 +108,14 @@ class TestScripts:
 class TestMCPConfigurations:
     """Test MCP configuration files."""
 
-    def test_mcp_config_files_are_valid_json(self):
-        """Test that MCP configuration files are valid JSON."""
+    def test_mcp_config_files_are_valid(self):
+        """Test that every MCP configuration file matches its schema."""
         mcp_dir = get_project_root() / ".mcp"
-        json_files = list(mcp_dir.glob("*.json"))
+        json_files = sorted(mcp_dir.glob("*.json"))
 
-        for json_file in json_files:
-            with open(json_file, "r", encoding="utf-8") as f:
-                try:
-                    json.load(f)
-                except json.JSONDecodeError as e:
-                    pytest.fail(f"Invalid JSON in {json_file.name}: {e}")
+        assert json_files
+        violations = validate_files(json_files, base=get_project_root())
+        assert violations == [], "\n".join(map(str, violations))
 
     def test_roles_json_structure(self):
         """Test that roles.json has the expected structure."""
@@ -126,36 +124,26 @@ class TestMCPConfigurations:
         if not roles_path.exists():
             pytest.skip("roles.json not found")
 
-        with open(roles_path, "r", encoding="utf-8") as f:
-            roles_config = json.load(f)
-
-        # Check required top-level keys
-        assert "mcpVersion" in roles_config
-        assert "name" in roles_config
-        assert "roles" in roles_config
-
-        # Check that roles is a dictionary
-        assert isinstance(roles_config["roles"], dict)
+        assert validate_files([roles_path]) == []
+        # Every profile config extends one of the roles
+        roles = json.loads(roles_path.read_text(encoding="utf-8"))["roles"]
+        for config_path in roles_path.parent.glob("config-*.json"):
+            config = json.loads(config_path.read_text(encoding="utf-8"))
+            assert config["extends"].rpartition("/")[2] in roles
 
 
 class TestVSCodeProfiles:
     """Test VS Code profile configurations."""
 
-    def test_vscode_profiles_are_valid_json(self):
-        """Test that VS Code profile files are valid JSON."""
+    def test_vscode_profiles_are_valid(self):
+        """Test that every VS Code profile matches the profile schema."""
         profiles_dir = get_project_root() / ".vscode" / "profiles"
 
         if not profiles_dir.exists():
             pytest.skip("VS Code profiles directory not found")
 
-        json_files = list(profiles_dir.glob("*.json"))
-
-        for json_file in json_files:
-            with open(json_file, "r", encoding="utf-8") as f:
-                try:
-                    json.load(f)
-                except json.JSONDecodeError as e:
-                    pytest.fail(f"Invalid JSON in {json_file.name}: {e}")
+        violations = validate_files(sorted(profiles_dir.glob("*.json")))
+        assert violations == [], "\n".join(map(str, violations))
 
 
 class TestDocumentation:
@@ -0,0 +1,173 @@
+"""
+Test the indexed prompt library.
+"""
+
+import json
+import os
+import tempfile
+from pathlib import Path
+
+import pytest
+
+from mcp_vscode_workflow.prompts import (
+    PromptError,
+    PromptLibrary,
+    estimate_tokens,
+    render_template,
+)
+from tests import MCP_CONFIG_DIR
+
+
+def create_prompt_dir(base_dir):
+    """Create a .mcp directory with two prompts and a role pointing at one."""
+    mcp_dir = Path(base_dir) / ".mcp"
+    prompts_dir = mcp_dir / "prompts"
+    prompts_dir.mkdir(parents=True)
+    (prompts_dir / "code-review.md").write_text(
+        "Review this {{LANGUAGE}} code:\n{{CODE_BLOCK}}\n"
+    )
+    (prompts_dir / "python-specialist.md").write_text("# Python Specialist\n")
+    (mcp_dir / "roles.json").write_text(
+        json.dumps(
+            {"roles": {"python": {"promptFile": "prompts/python-specialist.md"}}}
+        )
+    )
+    return prompts_dir
+
+
+def bump_mtime(path):
+    """Move a file's mtime forward so the change is visible at any resolution."""
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+
+
+class TestRenderTemplate:
+    """Test template variable substitution."""
+
+    def test_arguments_fill_variables(self):
+        """Test case-insensitive names, aliases and untouched placeholders."""
+        body = "{{LANGUAGE}}: {{CODE_BLOCK}} ({{CONTEXT}})"
+
+        assert render_template(body, {"language": "python", "code": "x = 1"}) == (
+            "python: x = 1 ({{CONTEXT}})"
+        )
+
+    def test_estimate_tokens(self):
+        """Test the approximate token count."""
+        assert estimate_tokens("") == 0
+        assert estimate_tokens("abcde") == 2
+
+
+class TestPromptLibrary:
+    """Test the prompt index, lazy loading and the render cache."""
+
+    def test_index_records_prompt_metadata(self):
+        """Test that the index holds offsets, sizes, hashes, tokens and roles."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            prompts_dir = create_prompt_dir(tmpdir)
+
+            with PromptLibrary(prompts_dir) as library:
+                review = library.entry("code-review")
+                specialist = library.entry("python-specialist")
+
+                assert library.names() == ["code-review", "python-specialist"]
+                assert review.offset == 0
+                assert specialist.offset == review.size
+                assert review.variables == ["CODE_BLOCK", "LANGUAGE"]
+                assert review.tokens == estimate_tokens(
+                    (prompts_dir / "code-review.md").read_text()
+                )
+                assert review.role is None
+                assert library.for_role("python") == specialist
+                assert library.get("python-specialist") == "# Python Specialist\n"
+
+            cache_dir = prompts_dir.parent / "cache" / "prompts"
+            assert (cache_dir / "index.json").is_file()
+            assert len(list(cache_dir.glob("library-*.bin"))) == 1
+
+    def test_reopen_does_not_read_prompt_files(self, monkeypatch):
+        """Test that a current index is used without touching prompt bodies."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            prompts_dir = create_prompt_dir(tmpdir)
+            PromptLibrary(prompts_dir).close()
+
+            def fail_read(self):
+                raise AssertionError(f"{self} should not be read")
+
+            monkeypatch.setattr(Path, "read_bytes", fail_read)
+            with PromptLibrary(prompts_dir) as library:
+                assert len(library) == 2
+                assert library.get("code-review").startswith("Review this")
+
+    def test_edited_prompt_is_reindexed(self):
+        """Test that an in-place edit is picked up on the next read."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            prompts_dir = create_prompt_dir(tmpdir)
+
+            with PromptLibrary(prompts_dir) as library:
+                first_hash = library.entry("python-specialist").sha256
+                prompt_path = prompts_dir / "python-specialist.md"
+                prompt_path.write_text("# Python Specialist v2\n")
+                bump_mtime(prompt_path)
+
+                assert library.get("python-specialist") == "# Python Specialist v2\n"
+                assert library.entry("python-specialist").sha256 != first_hash
+                assert library.get("code-review").startswith("Review this")
+
+    def test_added_prompt_is_indexed_on_open(self):
+        """Test that a new prompt file invalidates the cached index."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            prompts_dir = create_prompt_dir(tmpdir)
+            PromptLibrary(prompts_dir).close()
+
+            (prompts_dir / "bug-analysis.md").write_text("{{ERROR_MESSAGE}}\n")
+            bump_mtime(prompts_dir)
+
+            with PromptLibrary(prompts_dir) as library:
+                assert "bug-analysis" in library
+                assert library.render("bug-analysis", {"error": "boom"}) == "boom\n"
+
+    def test_render_cache_is_bounded(self):
+        """Test that rendered prompts are cached and evicted least recently used."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            prompts_dir = create_prompt_dir(tmpdir)
+
+            with PromptLibrary(prompts_dir, render_cache_size=2) as library:
+                first = library.render("code-review", {"language": "python"})
+                assert library.render("code-review", {"language": "python"}) is first
+
+                library.render("code-review", {"language": "bash"})
+                library.render("code-review", {"language": "go"})
+
+                again = library.render("code-review", {"language": "python"})
+                assert again == first
+                assert again is not first
+
+    def test_unwritable_cache_falls_back_to_files(self):
+        """Test that prompts are still served when the index cannot be written."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            prompts_dir = create_prompt_dir(tmpdir)
+            blocked = Path(tmpdir) / "blocked"
+            blocked.write_text("not a directory")
+
+            with PromptLibrary(prompts_dir, cache_dir=blocked / "prompts") as library:
+                assert library.get("python-specialist") == "# Python Specialist\n"
+
+    def test_unknown_prompt_raises(self):
+        """Test that looking up a missing prompt raises PromptError."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            with PromptLibrary(create_prompt_dir(tmpdir)) as library:
+                with pytest.raises(PromptError):
+                    library.get("missing")
+
+    def test_shipped_roles_have_prompts(self):
+        """Test that every role in roles.json maps to an indexed prompt."""
+        roles = json.loads((MCP_CONFIG_DIR / "roles.json").read_text())["roles"]
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            library = PromptLibrary(MCP_CONFIG_DIR / "prompts", cache_dir=tmpdir)
+            with library:
+                for role, definition in roles.items():
+                    entry = library.for_role(role)
+                    assert Path(definition["promptFile"]).stem == entry.name
+                    assert library.get(entry.name).startswith("#")
@@ -0,0 +1,243 @@
+"""
+Test the compiled configuration schemas and the batched validation pass.
+"""
+
+import json
+
+import pytest
+
+from mcp_vscode_workflow.schema import (
+    SchemaError,
+    Violation,
+    compile_schema,
+    main,
+    schema_kind,
+    validate_files,
+    validate_workspace,
+    validator,
+)
+from tests import get_project_root
+
+TREE = {
+    "definitions": {
+        "node": {
+            "type": "object",
+            "required": ["id"],
+            "additionalProperties": False,
+            "properties": {
+                "id": {"type": "integer", "minimum": 0},
+                "tag": {"type": "string", "pattern": "^[a-z]+$"},
+                "mode": {"enum": [1, "fast"]},
+                "children": {
+                    "type": "array",
+                    "items": {"$ref": "#/definitions/node"},
+                    "uniqueItems": True,
+                },
+                "alias": {
+                    "anyOf": [
+                        {"type": "string"},
+                        {"type": "array", "items": {"type": "string"}},
+                    ]
+                },
+            },
+        }
+    },
+    "$ref": "#/definitions/node",
+}
+
+
+def write_json(path, document):
+    """Write a JSON document, creating parent directories."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(document))
+    return path
+
+
+@pytest.fixture
+def workspace(tmp_path):
+    """Return a workspace with one valid file of every kind."""
+    mcp_dir = tmp_path / ".mcp"
+    (mcp_dir / "prompts").mkdir(parents=True)
+    (mcp_dir / "prompts" / "python.md").write_text("# Python\n")
+    header = {"mcpVersion": "2024-11-05", "name": "base"}
+    write_json(mcp_dir / "mcp.json", dict(header, prompts=[{"name": "review"}]))
+    write_json(
+        mcp_dir / "roles.json",
+        dict(
+            header,
+            roles={"python": {"name": "Python", "promptFile": "prompts/python.md"}},
+            detection={
+                "weights": {"detected": 3},
+                "profiles": [{"name": "python", "extensions": [".py"]}],
+            },
+        ),
+    )
+    write_json(
+        mcp_dir / "config-python.json",
+        dict(
+            header,
+            extends="../roles.json#/roles/python",
+            tools=[{"name": "lint", "command": "flake8", "args": ["."]}],
+            servers={"git": {"command": "mcp-server-git"}},
+        ),
+    )
+    write_json(
+        tmp_path / ".vscode" / "profiles" / "python.json",
+        {
+            "name": "Python",
+            "settings": {"editor.formatOnSave": True},
+            "extensions": {"recommendations": ["ms-python.python"]},
+            "tasks": {
+                "version": "2.0.0",
+                "tasks": [{"label": "Test", "type": "shell", "command": "pytest"}],
+            },
+        },
+    )
+    return tmp_path
+
+
+class TestCompiledSchemas:
+    """Test schema compilation and the errors it reports."""
+
+    def test_every_error_is_reported_with_its_pointer(self):
+        """Test that one pass reports all errors, including recursive ones."""
+        validate = compile_schema(TREE)
+
+        errors = validate(
+            {
+                "id": -1,
+                "tag": "Upper",
+                "mode": True,
+                "children": [
+                    {"id": "2", "extra": 1},
+                    {"children": [{"id": 3}, {"id": 3}]},
+                ],
+                "alias": ["a", 2],
+            }
+        )
+
+        assert errors == [
+            ("/id", "must be at least 0"),
+            ("/tag", "'Upper' does not match '^[a-z]+$'"),
+            ("/mode", 'must be one of 1, "fast"'),
+            ("/children/0/id", "expected integer, got string"),
+            ("/children/0/extra", "unexpected property"),
+            ("/children/1", "missing required 'id'"),
+            ("/children/1/children/1", "duplicate item {'id': 3}"),
+            ("/alias/1", "expected string, got integer"),
+        ]
+        assert validate({"id": 0, "alias": "x"}) == []
+
+    def test_wrong_type_stops_at_the_value(self):
+        """Test that a value of the wrong type gets one error, not one per rule."""
+        validate = compile_schema(TREE)
+
+        assert validate([]) == [("", "expected object, got array")]
+        assert validate({"id": 1, "alias": 5}) == [
+            (
+                "/alias",
+                "matches no allowed form: expected string, got integer; "
+                "expected array, got integer",
+            )
+        ]
+
+    def test_validators_are_compiled_once(self):
+        """Test that validators are cached per kind and unknown kinds fail."""
+        assert validator("roles") is validator("roles")
+        with pytest.raises(SchemaError):
+            validator("no-such-kind")
+        with pytest.raises(SchemaError):
+            compile_schema({"$ref": "#/definitions/missing"})
+
+    @pytest.mark.parametrize(
+        "path, kind",
+        [
+            (".mcp/roles.json", "roles"),
+            (".mcp/mcp.json", "mcp"),
+            (".mcp/config-go.json", "profile-config"),
+            (".vscode/profiles/go.json", "vscode-profile"),
+            (".vscode/settings.json", None),
+            (".mcp/prompts/index.md", None),
+        ],
+    )
+    def test_schema_kind(self, path, kind):
+        """Test that the schema is chosen from the file name."""
+        assert schema_kind(path) == kind
+
+
+class TestValidation:
+    """Test the batched pass over a workspace."""
+
+    def test_shipped_configurations_are_valid(self):
+        """Test that the repository's own configurations pass."""
+        assert validate_workspace(get_project_root()) == []
+
+    def test_valid_workspace(self, workspace):
+        """Test that the synthetic workspace passes."""
+        assert validate_workspace(workspace) == []
+
+    def test_all_files_are_reported_in_one_pass(self, workspace):
+        """Test schema, JSON and cross-file errors from several files at once."""
+        mcp_dir = workspace / ".mcp"
+        roles = json.loads((mcp_dir / "roles.json").read_text())
+        roles["roles"]["python"]["promptFile"] = "prompts/missing.md"
+        write_json(mcp_dir / "roles.json", roles)
+        config = json.loads((mcp_dir / "config-python.json").read_text())
+        config["extends"] = "../roles.json#/roles/go"
+        config["servers"]["git"]["args"] = "--repository ."
+        write_json(mcp_dir / "config-python.json", config)
+        write_json(mcp_dir / "config-docs.json", dict(config, servers={}))
+        (mcp_dir / "config-bash.json").write_text("{")
+        write_json(
+            workspace / ".vscode" / "profiles" / "docs.json",
+            {"name": "Docs", "settings": [], "theme": "dark"},
+        )
+
+        violations = validate_workspace(workspace)
+
+        assert [(v.path, v.pointer) for v in violations] == [
+            (".mcp/config-bash.json", ""),
+            (".mcp/config-python.json", "/servers/git/args"),
+            (".vscode/profiles/docs.json", "/settings"),
+            (".vscode/profiles/docs.json", "/theme"),
+            (".mcp/config-docs.json", "/extends"),
+            (".mcp/roles.json", "/roles/python/promptFile"),
+        ]
+        assert "Invalid JSON" in violations[0].message
+        assert "does not resolve" in violations[4].message
+
+    def test_unknown_files_are_reported(self, tmp_path):
+        """Test that a file without a schema is a violation, not skipped."""
+        path = write_json(tmp_path / "other.json", {})
+
+        assert validate_files([path]) == [
+            Violation(str(path), "", "no schema for this file")
+        ]
+
+
+class TestCommandLine:
+    """Test the validate command line."""
+
+    def test_exit_status_and_formats(self, workspace, capsys):
+        """Test text and JSON output and the exit status."""
+        assert main(["--workspace", str(workspace)]) == 0
+        assert capsys.readouterr().out == ""
+
+        write_json(
+            workspace / ".mcp" / "mcp.json", {"mcpVersion": "latest", "name": "x"}
+        )
+        assert main(["--workspace", str(workspace)]) == 1
+        assert capsys.readouterr().out == (
+            ".mcp/mcp.json#/mcpVersion: 'latest' does not match "
+            "'^\\\\d{4}-\\\\d{2}-\\\\d{2}$'\n"
+        )
+
+        path = str(workspace / ".mcp" / "mcp.json")
+        assert main(["--workspace", str(workspace), "--format", "json", path]) == 1
+        assert json.loads(capsys.readouterr().out) == [
+            {
+                "path": ".mcp/mcp.json",
+                "pointer": "/mcpVersion",
+                "message": "'latest' does not match '^\\\\d{4}-\\\\d{2}-\\\\d{2}$'",
+            }
+        ]
@@ -0,0 +1,237 @@
+"""
+Test the MCP server startup and latency benchmark.
+"""
+
+import json
+import os
+import subprocess
+import sys
+import textwrap
+from pathlib import Path
+
+import pytest
+
+from mcp_vscode_workflow.benchmark import RESULTS_VERSION
+from mcp_vscode_workflow.serverbench import (
+    Target,
+    benchmark_target,
+    list_targets,
+    main,
+    percentile,
+    stub_command,
+)
+
+SRC_DIR = Path(__file__).parent.parent / "src"
+
+requires_proc = pytest.mark.skipif(
+    not os.path.exists("/proc/self/status"), reason="peak RSS is read from /proc"
+)
+
+# A stdio server that logs to stdout, answers everything but prompts/list,
+# sends a notification before each response and lists the working directory
+FAKE_SERVER = textwrap.dedent("""
+    import json, os, sys
+
+    print("fake server starting", flush=True)
+    for line in sys.stdin:
+        message = json.loads(line)
+        if "id" not in message:
+            continue
+        method = message["method"]
+        if method == "prompts/list":
+            response = {"error": {"code": -32601, "message": "not found"}}
+        else:
+            response = {"result": {"method": method, "files": os.listdir(".")}}
+        note = {"jsonrpc": "2.0", "method": "notifications/message"}
+        sys.stdout.write(json.dumps(note) + "\\n")
+        response.update(jsonrpc="2.0", id=message["id"])
+        sys.stdout.write(json.dumps(response) + "\\n")
+        sys.stdout.flush()
+    """)
+
+
+@pytest.fixture
+def mcp_dir(tmp_path):
+    """Return a config directory whose profiles declare servers."""
+    server = tmp_path / "fake_server.py"
+    server.write_text(FAKE_SERVER)
+    mcp_dir = tmp_path / ".mcp"
+    mcp_dir.mkdir()
+    fake = {"command": sys.executable, "args": [str(server)]}
+    missing = {"command": "no-such-mcp-server", "args": ["--flag"]}
+    (mcp_dir / "config-one.json").write_text(
+        json.dumps({"servers": {"fake": fake, "missing": missing}})
+    )
+    (mcp_dir / "config-two.json").write_text(
+        json.dumps(
+            {"servers": {"fake": fake, "missing": dict(missing, args=["--other"])}}
+        )
+    )
+    return mcp_dir
+
+
+@pytest.fixture
+def fixture_dir(tmp_path):
+    """Return a small workspace for the servers to run in."""
+    root = tmp_path / "fixture"
+    root.mkdir()
+    (root / "main.py").write_text("print('hi')\n")
+    return root
+
+
+@pytest.fixture(autouse=True)
+def stub_path(monkeypatch):
+    """Make the stub server importable by its subprocess."""
+    monkeypatch.setenv("PYTHONPATH", str(SRC_DIR))
+
+
+class TestTargets:
+    """Test which servers are benchmarked."""
+
+    def test_servers_are_deduplicated_across_profiles(self, mcp_dir):
+        """Test one target per distinct command, and stubs for missing ones."""
+        targets = list_targets(["one", "two"], mcp_dir)
+
+        assert [t.name for t in targets] == ["fake", "missing[one]", "missing[two]"]
+        assert targets[0].profiles == ("one", "two") and not targets[0].stub
+        assert targets[1].stub and targets[1].command == stub_command("missing[one]")
+
+    def test_npx_packages_and_stub_only(self, mcp_dir):
+        """Test that --npx adds the packages and --stub-only replaces everything."""
+        targets = list_targets(["one"], mcp_dir, npx=True, stub_only=True)
+
+        assert [t.name for t in targets] == [
+            "fake",
+            "missing",
+            "sequential-thinking",
+            "task-master",
+            "context7",
+        ]
+        assert all(t.stub for t in targets)
+
+    def test_percentile(self):
+        """Test nearest-rank percentiles."""
+        values = list(range(1, 101))
+        assert percentile(values, 0.5) == 50
+        assert percentile(values, 0.99) == 99
+        assert percentile([7.0], 0.99) == 7.0
+
+
+class TestBenchmark:
+    """Test scripted sessions against real processes."""
+
+    def test_stub_answers_the_script(self, fixture_dir):
+        """Test that the bundled stub supports every scripted method."""
+        target = Target("git", stub_command("git"), {}, (), True)
+
+        case = benchmark_target(target, fixture_dir, repeat=2, requests=3)
+
+        assert "error" not in case and case["unsupported"] == []
+        assert set(case["metrics"]) == {
+            "cold_start_ms",
+            "warm_start_ms",
+            "request_p50_ms",
+            "request_p99_ms",
+        }
+        assert case["requests"]["prompts/get"]["count"] == 6
+
+    @requires_proc
+    def test_peak_rss_is_the_servers_own(self, fixture_dir):
+        """Test that the harness's memory does not show in the server's peak RSS."""
+        target = Target("git", stub_command("git"), {}, (), True)
+        before = benchmark_target(target, fixture_dir, repeat=1, requests=1)
+
+        ballast = b"x" * (200 * 1024 * 1024)
+        after = benchmark_target(target, fixture_dir, repeat=1, requests=1)
+        del ballast
+
+        assert 0 < before["peak_rss_kb"] < 100 * 1024
+        assert abs(after["peak_rss_kb"] - before["peak_rss_kb"]) < 20 * 1024
+
+    def test_server_output_is_filtered(self, mcp_dir, fixture_dir):
+        """Test logs and notifications are skipped and errors recorded."""
+        target = list_targets(["one"], mcp_dir)[0]
+
+        case = benchmark_target(target, fixture_dir, repeat=1, requests=4)
+
+        metrics = case["metrics"]
+        assert "warm_start_ms" not in metrics
+        assert metrics["request_p99_ms"] >= metrics["request_p50_ms"] > 0
+        assert case["unsupported"] == ["prompts/list"]
+        assert "prompts/get" not in case["requests"]
+        assert case["requests"]["ping"]["count"] == 4
+
+    def test_failing_server_is_reported(self, fixture_dir):
+        """Test that a server exiting early is an error, not a crash."""
+        command = (sys.executable, "-c", "import sys; sys.exit(1)")
+        target = Target("broken", command, {}, (), False)
+
+        case = benchmark_target(target, fixture_dir, repeat=2, requests=1, timeout=5)
+
+        assert case["metrics"] == {}
+        assert "exited during initialize" in case["error"]
+
+
+class TestCommandLine:
+    """Test the run and stub commands."""
+
+    def test_run_writes_comparable_results(self, mcp_dir, tmp_path, capsys):
+        """Test the results file, the stub marker and a baseline comparison."""
+        output = tmp_path / "results.json"
+        args = ["run", "--mcp-dir", str(mcp_dir), "--profiles", "one"]
+        args += ["--repeat", "2", "--requests", "2", "--work-dir", str(tmp_path)]
+
+        assert main(args + ["--output", str(output)]) == 0
+
+        lines = capsys.readouterr().out.splitlines()
+        assert [line.split("\t")[0] for line in lines] == ["fake", "missing (stub)"]
+        results = json.loads(output.read_text())
+        assert results["version"] == RESULTS_VERSION
+        assert results["cases"]["missing"]["command"][-2:] == ["stub", "missing"]
+        assert (tmp_path / "fixture" / "main.tf").exists()
+
+        assert main(["compare", str(output), str(output)]) == 0
+
+    def test_compare_skips_stub_against_real_server(self, tmp_path, capsys):
+        """Test that a stub case is never compared with the real server."""
+
+        def write(name, stub, cold_start_ms):
+            path = tmp_path / name
+            cases = {
+                server: {"stub": stub, "metrics": {"cold_start_ms": cold_start_ms}}
+                for server in ("git", "testing")
+            }
+            cases["testing"]["stub"] = False
+            path.write_text(json.dumps({"version": RESULTS_VERSION, "cases": cases}))
+            return str(path)
+
+        baseline = write("baseline.json", True, 50.0)
+
+        assert main(["compare", baseline, write("real.json", False, 500.0)]) == 1
+
+        out = capsys.readouterr().out
+        assert "SKIPPED git:" in out
+        assert "REGRESSION testing cold_start_ms" in out
+        assert "REGRESSION git" not in out
+
+    def test_stub_command(self, tmp_path):
+        """Test the stub server over stdio, including unknown methods."""
+        requests = [
+            {"jsonrpc": "2.0", "id": 1, "method": "initialize", "params": {}},
+            {"jsonrpc": "2.0", "method": "notifications/initialized"},
+            {"jsonrpc": "2.0", "id": 2, "method": "tools/call", "params": {}},
+        ]
+        (tmp_path / "main.py").write_text("")
+
+        result = subprocess.run(
+            list(stub_command("demo")) + ["--startup-ms", "10"],
+            input="\n".join(json.dumps(r) for r in requests) + "\n",
+            capture_output=True,
+            text=True,
+            cwd=tmp_path,
+            timeout=30,
+        )
+
+        responses = [json.loads(line) for line in result.stdout.splitlines()]
+        assert responses[0]["result"]["serverInfo"]["name"] == "demo"
+        assert responses[1]["error"]["code"] == -32601
@@ -0,0 +1,280 @@
+"""
+Test the supervised MCP server pool.
+"""
+
+import json
+import os
+import socket
+import subprocess
+import sys
+import textwrap
+import time
+from pathlib import Path
+
+import pytest
+
+from mcp_vscode_workflow.supervisor import (
+    SupervisorError,
+    client_config,
+    control_request,
+    load_servers,
+    main,
+    server_socket_path,
+    start_supervisor,
+)
+
+SRC_DIR = Path(__file__).parent.parent / "src"
+
+# A minimal stdio MCP server: answers initialize, ping and tools/list, and
+# exits on tools/call so restarts can be tested
+FAKE_SERVER = textwrap.dedent("""
+    import json, os, sys
+
+    calls = 0
+    for line in sys.stdin:
+        message = json.loads(line)
+        method = message.get("method")
+        if method == "initialize":
+            result = {"serverInfo": {"name": "fake", "pid": os.getpid()}}
+        elif method == "ping":
+            result = {}
+        elif method == "tools/list":
+            calls += 1
+            result = {"tools": [], "calls": calls, "pid": os.getpid()}
+        elif method == "tools/call":
+            sys.exit(3)
+        else:
+            continue
+        response = {"jsonrpc": "2.0", "id": message["id"], "result": result}
+        sys.stdout.write(json.dumps(response) + "\\n")
+        sys.stdout.flush()
+    """)
+
+
+class Connection:
+    """A line-based JSON-RPC client on a server socket."""
+
+    def __init__(self, path):
+        self.socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.socket.settimeout(10)
+        self.socket.connect(path)
+        self.file = self.socket.makefile("rb")
+
+    def request(self, request_id, method):
+        message = {"jsonrpc": "2.0", "id": request_id, "method": method}
+        self.socket.sendall(json.dumps(message).encode() + b"\n")
+        return json.loads(self.file.readline())
+
+    def close(self):
+        self.file.close()
+        self.socket.close()
+
+
+@pytest.fixture
+def workspace(tmp_path):
+    """Return a workspace whose test profile declares two fake servers."""
+    server = tmp_path / "fake_server.py"
+    server.write_text(FAKE_SERVER)
+    mcp_dir = tmp_path / ".mcp"
+    mcp_dir.mkdir()
+    (mcp_dir / "mcp.json").write_text(json.dumps({"servers": {}}))
+    fake = {"command": sys.executable, "args": [str(server)]}
+    (mcp_dir / "config-test.json").write_text(
+        json.dumps({"servers": {"alpha": fake, "beta": fake}})
+    )
+    return tmp_path
+
+
+@pytest.fixture
+def supervisor(workspace, monkeypatch):
+    """Start a supervisor for the workspace and stop it afterwards."""
+    monkeypatch.setenv("PYTHONPATH", str(SRC_DIR))
+    pid = start_supervisor(workspace, "test", ["--health-interval", "0.2"])
+    yield pid
+    control_request(workspace, "test", "stop")
+    deadline = time.monotonic() + 10
+    while control_request(workspace, "test") is not None:
+        assert time.monotonic() < deadline, "supervisor did not stop"
+        time.sleep(0.05)
+
+
+def wait_for(condition, timeout=10.0):
+    """Poll ``condition()`` until it returns a truthy value."""
+    deadline = time.monotonic() + timeout
+    while True:
+        value = condition()
+        if value:
+            return value
+        assert time.monotonic() < deadline, "condition not met"
+        time.sleep(0.05)
+
+
+class TestLoadServers:
+    """Test reading the servers block of a profile."""
+
+    def test_servers_are_read_from_the_profile(self, workspace):
+        """Test that each declared server becomes a spec."""
+        specs = load_servers("test", workspace / ".mcp")
+
+        assert [spec.name for spec in specs] == ["alpha", "beta"]
+        assert specs[0].command == sys.executable
+
+    def test_missing_profile_is_an_error(self, workspace):
+        """Test that an unknown profile raises SupervisorError."""
+        with pytest.raises(SupervisorError):
+            load_servers("missing", workspace / ".mcp")
+
+    def test_client_config_connects_through_the_supervisor(self, workspace):
+        """Test that the client configuration runs the connect bridge."""
+        config = client_config(workspace, "test")
+
+        args = config["servers"]["alpha"]["args"]
+        assert args[2:5] == ["connect", "test", "alpha"]
+        assert args[-1] == str(workspace)
+
+
+class TestSupervisor:
+    """Test sharing, health checks and restarts of supervised servers."""
+
+    def test_clients_share_one_server_process(self, workspace, supervisor):
+        """Test that two clients reach the same process with their own ids."""
+        path = server_socket_path(workspace, "test", "alpha")
+        first, second = Connection(path), Connection(path)
+        try:
+            init_first = first.request(1, "initialize")
+            init_second = second.request(1, "initialize")
+            assert init_first == init_second
+            assert init_first["id"] == 1
+
+            listed_first = first.request(7, "tools/list")
+            listed_second = second.request(7, "tools/list")
+            assert listed_first["id"] == listed_second["id"] == 7
+            assert listed_first["result"]["pid"] == listed_second["result"]["pid"]
+            assert listed_second["result"]["calls"] == 2
+        finally:
+            first.close()
+            second.close()
+
+        status = control_request(workspace, "test")
+        assert status["pid"] == supervisor
+        alpha = status["servers"]["alpha"]
+        assert alpha["state"] == "running"
+        assert alpha["requests"] == 2
+        assert alpha["start_latency_ms"] > 0
+        assert alpha["rss_kb"] > 0
+        assert status["servers"]["beta"]["requests"] == 0
+
+    def test_crashed_server_is_restarted(self, workspace, supervisor):
+        """Test that a request in flight fails and a new process takes over."""
+        path = server_socket_path(workspace, "test", "beta")
+        connection = Connection(path)
+        try:
+            old_pid = connection.request(1, "tools/list")["result"]["pid"]
+
+            response = connection.request(2, "tools/call")
+            assert response["id"] == 2
+            assert "restarted" in response["error"]["message"]
+
+            new_pid = connection.request(3, "tools/list")["result"]["pid"]
+            assert new_pid != old_pid
+        finally:
+            connection.close()
+
+        status = control_request(workspace, "test")["servers"]["beta"]
+        assert status["restarts"] == 1
+        assert "exited with status 3" in status["last_error"]
+
+    def test_connect_bridges_stdio(self, workspace, supervisor):
+        """Test that the connect command relays stdio to the server."""
+        messages = [
+            {"jsonrpc": "2.0", "id": 1, "method": "initialize"},
+            {"jsonrpc": "2.0", "method": "notifications/initialized"},
+            {"jsonrpc": "2.0", "id": 2, "method": "tools/list"},
+        ]
+        result = subprocess.run(
+            [
+                sys.executable,
+                "-m",
+                "mcp_vscode_workflow.supervisor",
+                "connect",
+                "test",
+                "alpha",
+                "--workspace",
+                str(workspace),
+            ],
+            input="".join(json.dumps(m) + "\n" for m in messages),
+            capture_output=True,
+            text=True,
+            timeout=30,
+            env=dict(os.environ, PYTHONPATH=str(SRC_DIR)),
+        )
+
+        responses = [json.loads(line) for line in result.stdout.splitlines()]
+        assert [r["id"] for r in responses] == [1, 2]
+        assert responses[0]["result"]["serverInfo"]["name"] == "fake"
+
+    def test_concurrent_connects_start_one_supervisor(self, workspace, monkeypatch):
+        """Test that clients launched together share one supervisor."""
+        monkeypatch.setenv("PYTHONPATH", str(SRC_DIR))
+        messages = [
+            {"jsonrpc": "2.0", "id": 1, "method": "initialize"},
+            {"jsonrpc": "2.0", "id": 2, "method": "tools/list"},
+        ]
+        command = [sys.executable, "-m", "mcp_vscode_workflow.supervisor"]
+        command += ["connect", "test", "alpha", "--workspace", str(workspace)]
+        clients = [
+            subprocess.Popen(
+                command,
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                text=True,
+            )
+            for _ in range(4)
+        ]
+        try:
+            outputs = [
+                client.communicate(
+                    "".join(json.dumps(m) + "\n" for m in messages), timeout=60
+                )[0]
+                for client in clients
+            ]
+            pids = {
+                json.loads(out.splitlines()[-1])["result"]["pid"] for out in outputs
+            }
+            assert len(pids) == 1
+
+            serve = subprocess.run(
+                command[:3] + ["serve", "test", "--workspace", str(workspace)],
+                capture_output=True,
+                text=True,
+                timeout=30,
+            )
+            assert serve.returncode == 1
+            assert "already runs" in serve.stderr
+            assert (
+                control_request(workspace, "test")["servers"]["alpha"]["requests"] == 4
+            )
+        finally:
+            status = control_request(workspace, "test", "stop")
+            wait_for(lambda: control_request(workspace, "test") is None)
+
+        assert status is not None
+        pattern = f"supervisor serve test --workspace {workspace}"
+        wait_for(lambda: subprocess.run(["pgrep", "-f", pattern]).returncode == 1)
+
+    def test_status_and_stop_commands(self, workspace, supervisor, capsys):
+        """Test the status table and the stop command."""
+        wait_for(
+            lambda: control_request(workspace, "test")["servers"]["alpha"]["state"]
+            == "running"
+        )
+
+        assert main(["status", "test", "--workspace", str(workspace)]) == 0
+        output = capsys.readouterr().out
+        assert f"Supervisor {supervisor}" in output
+        assert "alpha: running" in output
+
+        assert main(["stop", "test", "--workspace", str(workspace)]) == 0
+        wait_for(lambda: control_request(workspace, "test") is None)
+        assert main(["status", "test", "--workspace", str(workspace)]) == 1
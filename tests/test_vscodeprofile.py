@@ -0,0 +1,294 @@
+"""
+Test VS Code profile composition and materialization.
+"""
+
+import json
+import os
+
+import pytest
+
+from mcp_vscode_workflow.vscodeprofile import (
+    ProfileError,
+    apply_profile,
+    compose_profile,
+    install_extensions,
+    main,
+)
+from tests import VSCODE_PROFILES_DIR, create_stub_command
+
+
+def write_json(path, document):
+    """Write a JSON document, creating parent directories."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(document))
+    return path
+
+
+@pytest.fixture
+def profiles_dir(tmp_path):
+    """Return a directory with a base and two overlays."""
+    profiles = tmp_path / "profiles"
+    write_json(
+        profiles / "base.json",
+        {
+            "name": "Base",
+            "settings": {"editor.formatOnSave": True, "editor.tabSize": 2},
+            "extensions": {"recommendations": ["GitHub.copilot"]},
+        },
+    )
+    write_json(
+        profiles / "python.json",
+        {
+            "name": "Python",
+            "settings": {
+                "editor.tabSize": 4,
+                "files.associations": {"*.py": "python", "*.txt": "pip-requirements"},
+            },
+            "extensions": {"recommendations": ["ms-python.python", "GitHub.copilot"]},
+        },
+    )
+    write_json(
+        profiles / "docs.json",
+        {
+            "name": "Docs",
+            "settings": {
+                "editor.wordWrap": "on",
+                "[markdown]": {"editor.wordWrap": "on"},
+                "files.associations": {"*.md": "markdown", "*.txt": "plaintext"},
+            },
+            "extensions": {"recommendations": ["yzhang.markdown-all-in-one"]},
+        },
+    )
+    return profiles
+
+
+@pytest.fixture
+def workspace(tmp_path):
+    """Return a Python workspace that also holds documentation."""
+    root = tmp_path / "workspace"
+    root.mkdir()
+    (root / "requirements.txt").write_text("requests\n")
+    (root / "README.md").write_text("# Project\n")
+    return root
+
+
+@pytest.fixture
+def code(tmp_path):
+    """Return a stub ``code`` that logs its calls and lists one extension."""
+    bin_dir = tmp_path / "bin"
+    bin_dir.mkdir()
+    log = tmp_path / "code.log"
+    stub = create_stub_command(
+        bin_dir,
+        "code",
+        f'echo "$*" >> "{log}"\n'
+        '[ "$1" = "--list-extensions" ] && echo github.copilot\nexit 0',
+    )
+    return str(stub), log
+
+
+class TestCompose:
+    """Test composing a profile from its overlays."""
+
+    def test_overlay_wins_over_base(self, profiles_dir):
+        """Test that the profile overlay is merged over the shared base."""
+        profile = compose_profile("python", profiles_dir)
+
+        assert profile["name"] == "Python"
+        assert profile["settings"]["editor.formatOnSave"] is True
+        assert profile["settings"]["editor.tabSize"] == 4
+        assert profile["extensions"]["recommendations"] == [
+            "GitHub.copilot",
+            "ms-python.python",
+        ]
+
+    def test_detected_languages_add_but_never_override(self, profiles_dir):
+        """Test that other languages add associations, settings and extensions."""
+        profile = compose_profile("python", profiles_dir, ["python", "docs", "go"])
+
+        settings = profile["settings"]
+        assert settings["files.associations"] == {
+            "*.md": "markdown",
+            "*.txt": "pip-requirements",
+            "*.py": "python",
+        }
+        assert settings["[markdown]"] == {"editor.wordWrap": "on"}
+        assert "editor.wordWrap" not in settings
+        assert profile["extensions"]["recommendations"][-1] == (
+            "yzhang.markdown-all-in-one"
+        )
+
+    def test_shipped_profiles_compose(self):
+        """Test that every shipped profile gets the shared base."""
+        for name in ("python", "infra", "docs", "bash", "cicd"):
+            profile = compose_profile(name, VSCODE_PROFILES_DIR)
+            assert profile["settings"]["editor.formatOnSave"] is True
+            assert (
+                "modelcontextprotocol.mcp" in profile["extensions"]["recommendations"]
+            )
+        assert compose_profile("node", VSCODE_PROFILES_DIR)["name"] == "node"
+
+
+class TestApply:
+    """Test writing profiles to a workspace and installing extensions."""
+
+    def test_writes_once_until_the_profile_changes(self, profiles_dir, workspace):
+        """Test that an unchanged profile is skipped and a changed one rewritten."""
+        first = apply_profile("python", workspace, profiles_dir, install=False)
+        settings_file = workspace / ".vscode" / "settings.json"
+        stamp = settings_file.stat().st_mtime_ns
+
+        again = apply_profile("python", workspace, profiles_dir, install=False)
+
+        assert first.written == [".vscode/settings.json", ".vscode/extensions.json"]
+        assert again.written == [] and again.hash == first.hash
+        assert settings_file.stat().st_mtime_ns == stamp
+        assert "[markdown]" in json.loads(settings_file.read_text())
+
+        write_json(
+            profiles_dir / "base.json",
+            {"settings": {"editor.rulers": [88]}, "extensions": {}},
+        )
+        changed = apply_profile("python", workspace, profiles_dir, install=False)
+        settings = json.loads(settings_file.read_text())
+        assert changed.written == [".vscode/settings.json", ".vscode/extensions.json"]
+        assert settings["editor.rulers"] == [88]
+        assert "editor.formatOnSave" not in settings
+
+    def test_hand_edits_are_kept(self, profiles_dir, workspace):
+        """Test that settings and recommendations added by hand survive."""
+        apply_profile("python", workspace, profiles_dir, install=False)
+        settings_file = workspace / ".vscode" / "settings.json"
+        settings = json.loads(settings_file.read_text())
+        settings["editor.tabSize"] = 8
+        settings["window.zoomLevel"] = 1
+        write_json(settings_file, settings)
+        extensions_file = workspace / ".vscode" / "extensions.json"
+        extensions = json.loads(extensions_file.read_text())
+        extensions["recommendations"].append("eamodio.gitlens")
+        write_json(extensions_file, extensions)
+
+        result = apply_profile(
+            "docs", workspace, profiles_dir, roles_file=None, install=False
+        )
+
+        settings = json.loads(settings_file.read_text())
+        recommendations = json.loads(extensions_file.read_text())["recommendations"]
+        assert result.written == [".vscode/settings.json", ".vscode/extensions.json"]
+        assert settings["editor.tabSize"] == 8 and settings["window.zoomLevel"] == 1
+        assert settings["editor.wordWrap"] == "on"
+        assert "ms-python.python" not in recommendations
+        assert recommendations[-1] == "eamodio.gitlens"
+
+    def test_settings_with_comments_are_read(self, profiles_dir, workspace):
+        """Test that JSONC settings are merged and never lose their comments."""
+        settings_file = workspace / ".vscode" / "settings.json"
+        settings_file.parent.mkdir()
+        commented = (
+            '{\n  // keep my font\n  "window.zoomLevel": 1,\n'
+            '  /* keep */ "url": "http://example.com/*x*/",\n}\n'
+        )
+        settings_file.write_text(commented)
+
+        result = apply_profile(
+            "python", workspace, profiles_dir, roles_file=None, install=False
+        )
+
+        assert result.skipped == [".vscode/settings.json"]
+        assert result.written == [".vscode/extensions.json"]
+        assert settings_file.read_text() == commented
+
+        settings_file.write_text('{"url": "http://example.com/*x*/",}')
+        apply_profile("python", workspace, profiles_dir, roles_file=None, install=False)
+        settings = json.loads(settings_file.read_text())
+        assert settings["url"] == "http://example.com/*x*/"
+        assert settings["editor.tabSize"] == 4
+
+        # Comments added to a file that needs no changes are kept too
+        commented = "// keep my font\n" + settings_file.read_text()
+        settings_file.write_text(commented)
+        result = apply_profile(
+            "python", workspace, profiles_dir, roles_file=None, install=False
+        )
+        assert result.skipped == result.written == []
+        assert settings_file.read_text() == commented
+
+        broken = '{"window.zoomLevel": 1 "editor.tabSize": 8}'
+        settings_file.write_text(broken)
+        (workspace / ".vscode" / "extensions.json").unlink()
+
+        result = apply_profile(
+            "docs", workspace, profiles_dir, roles_file=None, install=False
+        )
+
+        assert result.skipped == [".vscode/settings.json"]
+        assert result.written == [".vscode/extensions.json"]
+        assert settings_file.read_text() == broken
+        again = apply_profile(
+            "docs", workspace, profiles_dir, roles_file=None, install=False
+        )
+        assert again.skipped == [".vscode/settings.json"]
+
+    def test_missing_extensions_are_installed_in_one_call(
+        self, profiles_dir, workspace, code
+    ):
+        """Test one listing, one batched install, then nothing until a change."""
+        stub, log = code
+
+        result = apply_profile(
+            "python", workspace, profiles_dir, roles_file=None, code=stub
+        )
+        assert result.installed == ["ms-python.python"]
+        assert log.read_text().splitlines() == [
+            "--list-extensions",
+            "--install-extension ms-python.python",
+        ]
+
+        again = apply_profile(
+            "python", workspace, profiles_dir, roles_file=None, code=stub
+        )
+        assert again.installed is None
+        assert len(log.read_text().splitlines()) == 2
+
+        docs = apply_profile(
+            "docs", workspace, profiles_dir, roles_file=None, code=stub
+        )
+        assert docs.installed == ["yzhang.markdown-all-in-one"]
+
+    def test_install_failures(self, tmp_path):
+        """Test that a missing or failing VS Code CLI raises ProfileError."""
+        with pytest.raises(ProfileError, match="not found"):
+            install_extensions(["a.b"], code=str(tmp_path / "no-such-code"))
+        failing = create_stub_command(tmp_path, "code", "exit 3")
+        with pytest.raises(ProfileError, match="status 3"):
+            install_extensions(["a.b"], code=str(failing))
+
+
+class TestCommandLine:
+    """Test the compose and apply commands."""
+
+    def test_apply_reports_what_it_did(self, profiles_dir, workspace, capsys):
+        """Test the lines printed by apply and the up-to-date case."""
+        args = ["apply", "python", "--workspace", str(workspace)]
+        args += ["--profiles-dir", str(profiles_dir), "--no-install"]
+
+        assert main(args) == 0
+        assert capsys.readouterr().out == (
+            "wrote .vscode/settings.json\nwrote .vscode/extensions.json\n"
+        )
+        assert main(args) == 0
+        assert capsys.readouterr().out == "python profile is up to date\n"
+
+    def test_bootstrap_applies_the_profile(self, run_bootstrap, tmp_path):
+        """Test that bootstrap writes the composed profile before opening VS Code."""
+        workspace = tmp_path / "project"
+        workspace.mkdir()
+        (workspace / "main.py").write_text("print('hi')\n")
+
+        result = run_bootstrap("--profile", "python", cwd=workspace, timeout=60)
+
+        assert result.returncode == 0, result.stderr
+        settings = json.loads((workspace / ".vscode" / "settings.json").read_text())
+        assert settings["editor.formatOnSave"] is True
+        assert os.path.exists(workspace / ".mcp" / "cache" / "vscode-profile.json")
+        assert "Profile settings written to" in result.stdout
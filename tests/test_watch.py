@@ -0,0 +1,177 @@
+"""
+Test the background detection watcher.
+"""
+
+import json
+import os
+import shutil
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+from mcp_vscode_workflow.watch import (
+    STATUS_JSON_PATH,
+    STATUS_PATH,
+    Watcher,
+    main,
+    read_status,
+)
+from tests import get_script_path
+
+requires_inotify = pytest.mark.skipif(
+    not sys.platform.startswith("linux"), reason="inotify is Linux-only"
+)
+
+
+def create_files(root, *paths):
+    """Create empty files at the given relative paths."""
+    for relative_path in paths:
+        path = Path(root) / relative_path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text("")
+
+
+def step_until(watcher, condition, timeout=5.0):
+    """Run watcher steps until ``condition()`` holds or ``timeout`` passes."""
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "watcher did not pick up the change"
+        watcher.step(timeout=0.05)
+
+
+@pytest.fixture
+def python_workspace(tmp_path):
+    """Return a workspace holding a small Python project."""
+    create_files(tmp_path, "requirements.txt", "app/main.py")
+    return tmp_path
+
+
+class TestWatcher:
+    """Test re-detection as the workspace changes."""
+
+    @requires_inotify
+    def test_new_and_removed_subtrees_are_detected(self, python_workspace):
+        """Test that inotify events re-detect added and removed subtrees."""
+        watcher = Watcher(python_workspace, debounce=0.01)
+        try:
+            assert not watcher.polling
+            assert watcher.detector.detection.profiles == ["python"]
+
+            create_files(python_workspace, "terraform/modules/vpc/main.tf")
+            step_until(watcher, lambda: "infra" in watcher.detector.detection.profiles)
+
+            # Directories created after the start are watched too
+            create_files(python_workspace, "terraform/modules/vpc/run.sh")
+            step_until(watcher, lambda: "bash" in watcher.detector.detection.profiles)
+
+            shutil.rmtree(python_workspace / "terraform")
+            step_until(
+                watcher, lambda: watcher.detector.detection.profiles == ["python"]
+            )
+        finally:
+            watcher.close()
+
+    @requires_inotify
+    def test_indicator_trees_created_later_are_watched(self, python_workspace):
+        """Test that .github/workflows is picked up when created after the start."""
+        watcher = Watcher(python_workspace, debounce=0.01)
+        try:
+            (python_workspace / ".github").mkdir()
+            step_until(watcher, lambda: watcher.updates >= 1)
+            (python_workspace / ".github" / "workflows").mkdir()
+            step_until(watcher, lambda: watcher.updates >= 2)
+
+            create_files(python_workspace, ".github/workflows/ci.yml")
+            step_until(
+                watcher,
+                lambda: watcher.detector.detection.profiles == ["python", "cicd"],
+            )
+        finally:
+            watcher.close()
+
+    def test_polling_without_inotify(self, python_workspace):
+        """Test that the polling fallback finds changes by modification time."""
+        watcher = Watcher(python_workspace, use_inotify=False, poll_interval=0.05)
+        try:
+            assert watcher.polling
+            time.sleep(0.02)
+            create_files(python_workspace, "docs/index.md")
+            step_until(watcher, lambda: "docs" in watcher.detector.detection.profiles)
+        finally:
+            watcher.close()
+
+    def test_status_is_published(self, python_workspace):
+        """Test the status files, the socket and their removal on close."""
+        watcher = Watcher(python_workspace, use_inotify=False)
+        try:
+            status_lines = (python_workspace / STATUS_PATH).read_text().splitlines()
+            assert status_lines[0] == f"watcher {os.getpid()} {python_workspace}"
+            assert "recommended python" in status_lines
+
+            status_file = json.loads((python_workspace / STATUS_JSON_PATH).read_text())
+            assert status_file["recommended"] == "python"
+            # read_status asks the socket, which needs the loop to answer
+            client = subprocess.Popen(
+                [
+                    sys.executable,
+                    "-m",
+                    "mcp_vscode_workflow.watch",
+                    "status",
+                    str(python_workspace),
+                    "--format",
+                    "json",
+                ],
+                stdout=subprocess.PIPE,
+                env=dict(
+                    os.environ, PYTHONPATH=str(Path(__file__).parent.parent / "src")
+                ),
+            )
+            while client.poll() is None:
+                watcher.step(timeout=0.05)
+            status = json.loads(client.stdout.read())
+            assert status["watcher"]["pid"] == os.getpid()
+            assert status["profiles"] == ["python"]
+        finally:
+            watcher.close()
+
+        assert not (python_workspace / STATUS_PATH).exists()
+        assert read_status(python_workspace) is None
+        assert main(["status", str(python_workspace)]) == 1
+
+
+class TestBootstrapWatcher:
+    """Test that bootstrap.sh uses a running watcher's results."""
+
+    def test_bootstrap_reads_watcher_status(self, python_workspace):
+        """Test that bootstrap.sh takes the published results without scanning."""
+        watcher = Watcher(python_workspace, use_inotify=False, use_socket=False)
+        try:
+            # Not yet seen by the watcher, so absent from its results
+            create_files(python_workspace, "main.tf")
+
+            result = subprocess.run(
+                ["bash", str(get_script_path("bootstrap.sh"))],
+                input="4\n",  # Cancel
+                cwd=str(python_workspace),
+                capture_output=True,
+                text=True,
+                timeout=30,
+            )
+
+            assert "python profile detected" in result.stderr
+            assert "infra profile detected" not in result.stderr
+        finally:
+            watcher.close()
+
+        result = subprocess.run(
+            ["bash", str(get_script_path("bootstrap.sh"))],
+            input="4\n",
+            cwd=str(python_workspace),
+            capture_output=True,
+            text=True,
+            timeout=30,
+        )
+        assert "infra profile detected" in result.stderr